@@ -0,0 +1,284 @@
+"""Headless batch mode: run targets under GDB without the GUI and dump the contexts of every stop as JSON lines.
+
+A script is a JSON file such as:
+
+    {
+        "target": "./vuln",
+        "args": ["--verbose"],
+        "breakpoints": ["main", "*0x401196"],
+        "watches": {"&buf": 4},
+        "input": "AAAA\\n",
+        "resume": "-exec-continue",
+        "max_stops": 1000
+    }
+
+"input_hex" can be given instead of "input" for binary input, "resume" can be any command that resumes the inferior
+(e.g. "-exec-next-instruction" to dump every instruction), "sections" selects the contexts to dump and "diff_regions"
+enables the memory diff. Run with "python -m gui.batch script.json ... -o out/ -j 4", every script is run in its own
+process and GDB and its stops are written to <output dir>/<script name>.jsonl"""
+import argparse
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, List, TextIO
+
+sys.path.extend([os.path.join(os.path.dirname(__file__), os.path.pardir)])
+from gui.gdb_engine import GdbSession, GdbError, GdbExited, CommandResult, GDB_COMMAND
+from gui.gdb_handler import context_requests, mi_quote
+from gui.parser import parse_json_report
+from gui.tokens import ResponseToken
+
+logger = logging.getLogger(__file__)
+
+# The pwndbg contexts that are dumped as text, the GUI only needs "regs" since it resolves the stack itself
+BATCH_CONTEXTS = ["regs", "stack"]
+# The section of the output that the result of each context request belongs to
+TOKEN_SECTIONS = {
+    ResponseToken.GUI_REGS_CONTEXT: "regs",
+    ResponseToken.GUI_REGS_FS_BASE: "regs",
+    ResponseToken.GUI_STACK_CONTEXT: "stack",
+    ResponseToken.GUI_STACK_POINTER: "stack",
+    ResponseToken.GUI_FRAME_POINTER: "stack",
+    ResponseToken.GUI_DISASM_FRAME: "disasm",
+    ResponseToken.GUI_CODE_SOURCE: "disasm",
+    ResponseToken.GUI_BACKTRACE_DEPTH: "backtrace",
+    ResponseToken.GUI_BACKTRACE_FRAMES: "backtrace",
+    ResponseToken.GUI_HEAP_HEAP: "heap",
+    ResponseToken.GUI_MEMORY_DIFF: "diff",
+}
+# Queried in addition to the requests of the GdbHandler, since the GUI reads memory and disassembles locally
+STACK_MEMORY_BYTES = 256
+EXTRA_REQUESTS = {
+    "stack": ("memory", f"-data-read-memory-bytes $sp {STACK_MEMORY_BYTES}"),
+    "disasm": ("instructions", "-data-disassemble -s $pc -e \"$pc + 64\" -- 2"),
+}
+DEFAULT_SECTIONS = ["regs", "stack", "disasm", "backtrace", "heap", "watches"]
+ANSI_ESCAPE = re.compile(r"\x1b\[[0-9;?]*[A-Za-z]")
+
+
+def console_text(result: CommandResult) -> str:
+    """The console output of a command without pwndbg's colors"""
+    return ANSI_ESCAPE.sub("", result.console)
+
+
+class BatchScript:
+    """The parsed contents of a batch script"""
+    def __init__(self, path: Path):
+        with open(path) as f:
+            script = json.load(f)
+        self.path = path
+        target = Path(script["target"]).expanduser()
+        # Relative targets are relative to the script, so that scripts can be shipped alongside their binaries
+        self.target = str(target if target.is_absolute() else (path.parent / target).resolve())
+        self.args: List[str] = script.get("args", [])
+        self.breakpoints: List[str] = script.get("breakpoints", [])
+        # Watches in the form of {expression: number of hexdump lines}
+        self.watches: Dict[str, int] = script.get("watches", {})
+        if "input_hex" in script:
+            self.input = bytes.fromhex(script["input_hex"])
+        else:
+            self.input = script.get("input", "").encode()
+        self.resume: str = script.get("resume", "-exec-continue")
+        self.max_stops: int = script.get("max_stops", 10000)
+        self.sections: List[str] = script.get("sections", DEFAULT_SECTIONS)
+        self.diff_regions: str = script.get("diff_regions", "")
+        if self.diff_regions and "diff" not in self.sections:
+            self.sections = self.sections + ["diff"]
+
+
+class BatchRunner:
+    """Runs one batch script in its own GDB and writes a JSON line per stop"""
+    def __init__(self, script: BatchScript, output: TextIO, gdb_command: List[str]):
+        self.script = script
+        self.output = output
+        self.session = GdbSession(gdb_command)
+        # The requests of the GdbHandler, in the form of [(token, command)], restricted to the selected sections
+        watches = {watch: [idx, lines] for idx, (watch, lines) in enumerate(script.watches.items())}
+        self.requests = [(token, command) for token, command in
+                         context_requests(BATCH_CONTEXTS, -1, script.diff_regions, watches)
+                         if self.section_of(token) in script.sections]
+        self.watch_names = {ResponseToken.GUI_WATCHES_HEXDUMP + params[0]: watch for watch, params in watches.items()}
+        self.extra_requests = [(section, key, command) for section, (key, command) in EXTRA_REQUESTS.items()
+                               if section in script.sections]
+
+    @staticmethod
+    def section_of(token: int) -> str:
+        return "watches" if token >= ResponseToken.GUI_WATCHES_HEXDUMP else TOKEN_SECTIONS[token]
+
+    async def run(self) -> dict:
+        """Run the target until it exits or the maximum number of stops was reached, return a summary"""
+        start_time = time.perf_counter()
+        stops = 0
+        exit_record = {"reason": "max-stops"}
+        async with self.session:
+            try:
+                await self.session.load_gdbinit()
+            except GdbError as e:
+                logger.warning("Could not load .gdbinit: %s", e)
+            await self.session.load_scripts()
+            await self.session.command(f"-file-exec-and-symbols {mi_quote(self.script.target)}")
+            if self.script.args:
+                # GDB escapes every argument for the shell that starts the inferior
+                await self.session.command("-exec-arguments " + " ".join(map(mi_quote, self.script.args)))
+            await asyncio.gather(*(self.session.send(f"-break-insert {mi_quote(location)}")
+                                   for location in self.script.breakpoints))
+            # Subscribe before running, the first stop may arrive together with the result of "-exec-run"
+            events = self.session.events()
+            await self.session.command("-exec-run")
+            if self.script.input:
+                self.session.write_inferior(self.script.input)
+            async for event in events:
+                if event["message"] != "stopped":
+                    continue
+                stop = event["payload"] or {}
+                if stop.get("reason", "").startswith("exited"):
+                    exit_record = stop
+                    break
+                stops += 1
+                self.write_line(await self.collect(stops, stop))
+                if stops >= self.script.max_stops:
+                    break
+                try:
+                    await self.session.command(self.script.resume)
+                except GdbError as e:
+                    exit_record = {"reason": "resume-failed", "msg": str(e)}
+                    break
+            else:
+                exit_record = {"reason": "gdb-exited"}
+        elapsed = time.perf_counter() - start_time
+        summary = {"script": str(self.script.path), "target": self.script.target, "stops": stops,
+                   "exit": exit_record, "seconds": round(elapsed, 3)}
+        self.write_line(summary)
+        return summary
+
+    async def collect(self, number: int, stop: dict) -> dict:
+        """
+        Query all contexts at a stop. All requests are pipelined, so a stop costs about one round trip to GDB
+        :param number: The number of the stop, starting at 1
+        :param stop: The payload of the "stopped" record
+        """
+        futures = [self.session.send(command) for _, command in self.requests]
+        futures += [self.session.send(command) for _, _, command in self.extra_requests]
+        results = await asyncio.gather(*futures, return_exceptions=True)
+        if any(isinstance(result, GdbExited) for result in results):
+            raise GdbExited("GDB exited while collecting the contexts")
+        record = {"stop": number, "reason": stop.get("reason", ""), "thread": stop.get("thread-id"),
+                  "pc": stop.get("frame", {}).get("addr")}
+        for section in self.script.sections:
+            record[section] = {}
+        for (token, _), result in zip(self.requests, results):
+            self.add_result(record, token, result)
+        for (section, key, _), result in zip(self.extra_requests, results[len(self.requests):]):
+            if isinstance(result, GdbError):
+                record[section][key] = {"error": str(result)}
+            elif key == "memory":
+                record[section][key] = result.payload.get("memory", [{}])[0].get("contents", "")
+            else:
+                record[section][key] = result.payload.get("asm_insns", [])
+        return record
+
+    def add_result(self, record: dict, token: int, result: CommandResult | GdbError):
+        section = self.section_of(token)
+        if token >= ResponseToken.GUI_WATCHES_HEXDUMP:
+            watch = self.watch_names[token]
+            record[section][watch] = {"error": str(result)} if isinstance(result, GdbError) else console_text(result)
+            return
+        key = {ResponseToken.GUI_REGS_CONTEXT: "context", ResponseToken.GUI_STACK_CONTEXT: "context",
+               ResponseToken.GUI_REGS_FS_BASE: "fs_base", ResponseToken.GUI_STACK_POINTER: "sp",
+               ResponseToken.GUI_FRAME_POINTER: "fp", ResponseToken.GUI_DISASM_FRAME: "frame",
+               ResponseToken.GUI_CODE_SOURCE: "source", ResponseToken.GUI_BACKTRACE_DEPTH: "depth",
+               ResponseToken.GUI_BACKTRACE_FRAMES: "frames"}.get(token)
+        if isinstance(result, GdbError):
+            value = {"error": str(result)}
+        elif token in (ResponseToken.GUI_HEAP_HEAP, ResponseToken.GUI_MEMORY_DIFF):
+            # Our GDB scripts report JSON, pwndbg's errors (e.g. no heap yet) are kept as text
+            try:
+                value = parse_json_report(console_text(result).encode())
+            except ValueError:
+                value = {"error": console_text(result).strip()}
+        elif token in (ResponseToken.GUI_STACK_POINTER, ResponseToken.GUI_FRAME_POINTER):
+            value = result.payload.get("value")
+        elif token == ResponseToken.GUI_DISASM_FRAME:
+            value = result.payload.get("frame", {})
+        elif token == ResponseToken.GUI_BACKTRACE_DEPTH:
+            value = int(result.payload.get("depth", 0))
+        elif token == ResponseToken.GUI_BACKTRACE_FRAMES:
+            value = result.payload.get("stack", [])
+        elif token == ResponseToken.GUI_CODE_SOURCE:
+            value = result.payload
+        else:
+            value = console_text(result)
+        if key is None:
+            record[section] = value
+        else:
+            record[section][key] = value
+
+    def write_line(self, record: dict):
+        self.output.write(json.dumps(record, separators=(",", ":")) + "\n")
+
+
+def run_script_file(script_path: str, output_path: str | None, gdb_command: List[str]) -> dict:
+    """
+    Run a batch script, executed in a worker process of the pool
+    :param script_path: The path of the JSON script
+    :param output_path: The path of the JSON lines file, or None to write to stdout
+    :param gdb_command: The command line that starts GDB with the MI interpreter
+    :return: The summary of the run
+    """
+    # Keep pwndbg's colors out of the dumped contexts
+    os.environ["PWNDBG_DISABLE_COLORS"] = "1"
+    script = BatchScript(Path(script_path))
+    if output_path is None:
+        return asyncio.run(BatchRunner(script, sys.stdout, gdb_command).run())
+    # Buffer generously, there can be hundreds of stops per second
+    with open(output_path, "w", buffering=1 << 20) as output:
+        return asyncio.run(BatchRunner(script, output, gdb_command).run())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run targets under GDB without the GUI and dump the contexts of "
+                                                 "every stop as JSON lines")
+    parser.add_argument("scripts", nargs="+", help="JSON batch scripts")
+    parser.add_argument("-o", "--output-dir", help="Write <script name>.jsonl files to this directory instead of "
+                                                   "stdout, required for more than one script")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count(), help="Number of scripts run in parallel")
+    parser.add_argument("--gdb", default=GDB_COMMAND[0], help="The GDB executable")
+    parser.add_argument("-l", "--logging-level", default="WARNING", help="Set the log level")
+    args = parser.parse_args()
+    logging.basicConfig(level=args.logging_level.upper(),
+                        format='%(asctime)s - %(name)s | [%(levelname)s] : %(message)s')
+    if args.output_dir is None and len(args.scripts) > 1:
+        parser.error("--output-dir is required for more than one script")
+    gdb_command = [args.gdb] + list(GDB_COMMAND[1:])
+    if args.output_dir is None:
+        run_script_file(args.scripts[0], None, gdb_command)
+        return
+    os.makedirs(args.output_dir, exist_ok=True)
+    failed = False
+    # Every script gets its own process, so that one slow target does not hold up the others
+    with ProcessPoolExecutor(max_workers=min(args.jobs, len(args.scripts)),
+                             mp_context=multiprocessing.get_context("spawn")) as executor:
+        futures = {executor.submit(run_script_file, script,
+                                   os.path.join(args.output_dir, Path(script).stem + ".jsonl"), gdb_command): script
+                   for script in args.scripts}
+        for future in as_completed(futures):
+            try:
+                summary = future.result()
+            except Exception as e:
+                failed = True
+                logger.error("%s failed: %s", futures[future], e)
+                continue
+            logger.info("%s: %d stops in %.3fs (%s)", summary["script"], summary["stops"], summary["seconds"],
+                        summary["exit"].get("reason", ""))
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
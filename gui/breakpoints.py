@@ -0,0 +1,91 @@
+from typing import Dict, List, Set, Tuple
+
+
+def breakpoint_locations(bkpt: dict) -> List[dict]:
+    """The resolved locations of a breakpoint, a breakpoint with several locations (e.g. an inlined function) lists
+    them separately"""
+    locations = bkpt.get("locations")
+    if isinstance(locations, list) and locations:
+        return [location for location in locations if isinstance(location, dict)]
+    return [bkpt]
+
+
+class BreakpointTable:
+    """The breakpoints of GDB as reported in "bkpt" records, kept in sync from the breakpoint notifications instead
+    of listing all breakpoints on every stop. Breakpoints are additionally indexed by address and source line, so
+    that the gutters of the disassembly and source can look up a breakpoint in constant time"""
+    def __init__(self):
+        # The breakpoints in the form of {number: bkpt}, in the order GDB created them
+        self.breakpoints: Dict[str, dict] = {}
+        self.by_address: Dict[int, str] = {}
+        self.by_line: Dict[Tuple[str, int], str] = {}
+        # The source lines with breakpoints in the form of {fullname: {line}}
+        self.lines: Dict[str, Set[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self.breakpoints)
+
+    def __contains__(self, number: str) -> bool:
+        return number in self.breakpoints
+
+    def update(self, bkpt: dict) -> bool:
+        """
+        Add a created breakpoint or replace a modified one
+        :param bkpt: The "bkpt" record of the breakpoint
+        :return: True if the breakpoint is new
+        """
+        number = bkpt.get("number")
+        if number is None:
+            return False
+        created = number not in self.breakpoints
+        if not created:
+            self.unindex(number)
+        self.breakpoints[number] = bkpt
+        for location in breakpoint_locations(bkpt):
+            address = location.get("addr", "")
+            if address.startswith("0x"):
+                self.by_address[int(address, 16)] = number
+            if "fullname" in location and "line" in location:
+                line = int(location["line"])
+                self.by_line[(location["fullname"], line)] = number
+                self.lines.setdefault(location["fullname"], set()).add(line)
+        return created
+
+    def remove(self, number: str) -> dict | None:
+        """
+        Forget a deleted breakpoint
+        :return: The "bkpt" record of the breakpoint or None if it was not known
+        """
+        if number not in self.breakpoints:
+            return None
+        self.unindex(number)
+        return self.breakpoints.pop(number)
+
+    def unindex(self, number: str):
+        for location in breakpoint_locations(self.breakpoints[number]):
+            address = location.get("addr", "")
+            if address.startswith("0x") and self.by_address.get(int(address, 16)) == number:
+                del self.by_address[int(address, 16)]
+            if "fullname" in location and "line" in location:
+                key = (location["fullname"], int(location["line"]))
+                if self.by_line.get(key) == number:
+                    del self.by_line[key]
+                    self.lines[key[0]].discard(key[1])
+
+    def clear(self):
+        self.breakpoints.clear()
+        self.by_address.clear()
+        self.by_line.clear()
+        self.lines.clear()
+
+    def at_address(self, address: int) -> str | None:
+        """The number of the breakpoint at an address"""
+        return self.by_address.get(address)
+
+    def at_line(self, fullname: str, line: int) -> str | None:
+        """The number of the breakpoint on a source line"""
+        return self.by_line.get((fullname, line))
+
+    def lines_of(self, fullname: str) -> Set[int]:
+        """The lines of a source file that have breakpoints"""
+        return self.lines.get(fullname, set())
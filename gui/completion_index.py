@@ -0,0 +1,98 @@
+import bisect
+import hashlib
+import json
+import re
+from typing import List, Dict, Tuple, Any
+
+from gui.constants import PwndbgGuiConstants
+
+# Version of the on-disk command index format, bump it whenever the stored entries change
+INDEX_VERSION = 1
+# The word in front of the cursor, words of an expression are separated by operators, e.g. "x/8gx $rsp+8"
+LAST_WORD = re.compile(r"[^\s*&|^(),+\-/%=<>!~\[\]]*$")
+
+
+def index_key(versions: Dict[str, str]) -> str:
+    """The key under which the command index of a GDB and pwndbg version is cached"""
+    return hashlib.sha1(json.dumps(versions, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def prefixed(names: List[str], prefix: str, limit: int) -> List[str]:
+    """The first names of a sorted list that start with the prefix, found by binary search"""
+    matches = []
+    for index in range(bisect.bisect_left(names, prefix), len(names)):
+        if not names[index].startswith(prefix) or len(matches) == limit:
+            break
+        matches.append(names[index])
+    return matches
+
+
+class CompletionIndex:
+    """Sorted names of commands, registers and symbols. Every completion is a binary search, so that suggestions are
+    ready within a frame of typing without asking GDB"""
+    def __init__(self):
+        # Commands by their number of words, e.g. "info registers" has two, so that only the next word is suggested
+        self.commands: Dict[int, List[str]] = {}
+        # The short documentation of every command
+        self.docs: Dict[str, str] = {}
+        self.registers: List[str] = []
+        # The symbol names of every indexed objfile, merged into one sorted list on the next completion
+        self.objfile_symbols: Dict[str, List[str]] = {}
+        self.symbols: List[str] | None = []
+
+    def set_commands(self, entries: List[List[Any]]):
+        """
+        Replace the commands
+        :param entries: The commands in the form of [name, documentation]
+        """
+        self.commands = {}
+        self.docs = {}
+        for name, doc in entries:
+            self.commands.setdefault(name.count(" ") + 1, []).append(name)
+            self.docs[name] = doc
+        for names in self.commands.values():
+            names.sort()
+
+    def set_registers(self, names: List[str]):
+        self.registers = sorted(f"${name}" for name in names)
+
+    def add_symbols(self, path: str, names: List[str]):
+        """Add the symbols of an objfile, replacing its previous symbols"""
+        self.objfile_symbols[path] = names
+        self.symbols = None
+
+    def clear_symbols(self):
+        self.objfile_symbols = {}
+        self.symbols = []
+
+    def complete(self, text: str) -> Tuple[int, List[str]]:
+        """
+        Complete the input in front of the cursor. The first words complete commands (including subcommands and
+        settings), words starting with "$" complete registers and other words complete symbols
+        :param text: The input in front of the cursor
+        :return: The offset in the text at which the suggestions start and the suggestions
+        """
+        limit = PwndbgGuiConstants.COMPLETION_LIMIT
+        word_start = LAST_WORD.search(text).start()
+        word = text[word_start:]
+        if word.startswith("$"):
+            return word_start, prefixed(self.registers, word, limit)
+        command_start = len(text) - len(text.lstrip())
+        # Commands are indexed with single spaces between their words
+        command = " ".join(text.split()) + (" " if text[-1:].isspace() and text.strip() else "")
+        if command:
+            matches = prefixed(self.commands.get(command.count(" ") + 1, []), command, limit)
+            if matches:
+                if command == text[command_start:]:
+                    return command_start, matches
+                # Only the last word is replaced, since the user separated the words differently
+                return word_start, [match[len(command) - len(word):] for match in matches]
+        if not word or word_start == command_start:
+            return word_start, []
+        self.merge_symbols()
+        return word_start, prefixed(self.symbols, word, limit)
+
+    def merge_symbols(self):
+        """Merge the symbols of all objfiles into one sorted list, unless that happened since they changed"""
+        if self.symbols is None:
+            self.symbols = sorted({name for names in self.objfile_symbols.values() for name in names})
@@ -1,5 +1,29 @@
+import os
+
+
 class PwndbgGuiConstants:
     DEFAULT_WATCH_BYTES = 64
+    # Number of backtrace frames that are loaded at once
+    BACKTRACE_PAGE_SIZE = 32
+    # Helper modules in the gdb_scripts folder that are imported into GDB's Python interpreter on startup
+    GDB_SCRIPTS = ["gui_heap", "gui_search", "gui_snapshot", "gui_diff", "gui_trace",
+                   "gui_profile", "gui_logpoint", "gui_commands"]
+    # Bytes of main output kept per session, which are shown again when a session is brought to the front
+    SESSION_OUTPUT_CACHE = 1 << 20
+    # Bytes of inferior output kept for the next script while no script runs, e.g. a prompt it wants to receive
+    SCRIPT_BACKLOG = 1 << 16
+    # Bytes of a streamed payload that are read from its file at once, no more than a tty buffer holds
+    PAYLOAD_CHUNK_SIZE = 1 << 12
+    # Logpoint hits kept in the log pane, later hits are only counted
+    LOGPOINT_LOG_LIMIT = 1 << 20
+    # Suggestions shown at most when completing the main input
+    COMPLETION_LIMIT = 100
+    # Console lines of our GDB scripts starting with this prefix are streamed to a GUI channel, see gui_common.py
+    STREAM_PREFIX = "[pwndbg-gui:"
+    # Rows and columns of the ptys that pwndbg writes redirected context sections to, a new pty has a size of 0
+    CONTEXT_OUTPUT_SIZE = (50, 120)
+    # Stops per second that are shown at most by default, later stops within a storm of stops are skipped
+    REFRESH_RATE = 20
     FONT = "Noto Sans Mono"
     BLACK = "#282C34"
     RED = "#ED254E"
@@ -11,12 +35,15 @@ class PwndbgGuiConstants:
     LIGHT_GRAY = "#DCDFE4"
     SETTINGS_FOLDER = "pwndbg-gui"
     SETTINGS_FILE = "pwndbg-gui"
+    # Indexes that are expensive to build (e.g. ROP gadgets) are cached here across sessions
+    CACHE_FOLDER = os.path.join(os.environ.get("XDG_CACHE_HOME", os.path.expanduser("~/.cache")), SETTINGS_FOLDER)
     # The top level of the settings hierarchy
     SETTINGS_TOP_LEVEL = "MainWindow"
     SPLITTER_GEOMETRIES = "/".join([SETTINGS_TOP_LEVEL, "Splitters/Geometry"])
     SPLITTER_STATES = "/".join([SETTINGS_TOP_LEVEL, "Splitters/State"])
     SETTINGS_WINDOW_STATE = "/".join([SETTINGS_TOP_LEVEL, "State"])
     SETTINGS_WINDOW_GEOMETRY = "/".join([SETTINGS_TOP_LEVEL, "Geometry"])
+    SETTINGS_REFRESH_RATE = "/".join([SETTINGS_TOP_LEVEL, "RefreshRate"])
     # Written by ChatGPT lol
     ABOUT_TEXT = """<h2>About pwndbg-gui</h2>
 
@@ -0,0 +1,133 @@
+import fcntl
+import logging
+import os
+import re
+import select
+import struct
+import termios
+import tty
+from typing import Dict, List
+
+from PySide6.QtCore import QObject, Slot, Signal, QCoreApplication
+
+from gui.constants import PwndbgGuiConstants
+
+logger = logging.getLogger(__file__)
+
+# pwndbg clears the screen before it writes a section to a terminal, everything before that is an older output
+CLEAR_SCREEN = re.compile(rb"(?:\x1b\[[0-9;]*[HJ])+")
+
+
+class ContextOutputReader(QObject):
+    """Reader for pwndbg context sections that are redirected via "contextoutput" to ptys owned by the GUI. The text
+    of a section then never passes through GDB MI, so it is neither escaped by GDB nor unescaped and joined again by
+    the GdbReader. The MI result of the "context" command only marks that the section was written completely"""
+    # Update a context pane in the GUI with data
+    update_gui = Signal(str, bytes)
+
+    def __init__(self, sections: List[str]):
+        """
+        :param sections: The context sections that get their own pty
+        """
+        super().__init__()
+        # The master of every section's pty and the tty that pwndbg writes the section to
+        self.masters: Dict[str, int] = {}
+        self.ttys: Dict[str, str] = {}
+        # The slaves are kept open, so that the ptys stay usable while pwndbg does not write to them
+        self.slaves: List[int] = []
+        self.sections: Dict[int, str] = {}
+        # Output of every section that was read since its last flush
+        self.buffers: Dict[str, bytearray] = {}
+        self.run = True
+        # Written to after a flush was queued, so that the loop does not wait for the timeout of its select
+        self.wake_read, self.wake_write = os.pipe()
+        os.set_blocking(self.wake_read, False)
+        os.set_blocking(self.wake_write, False)
+        for section in sections:
+            master, slave = os.openpty()
+            flags = fcntl.fcntl(master, fcntl.F_GETFL)
+            fcntl.fcntl(master, fcntl.F_SETFL, flags | os.O_NONBLOCK)
+            # No translation of newlines, so that the output is the same as on GDB's console
+            tty.setraw(slave)
+            tty.setraw(master)
+            rows, columns = PwndbgGuiConstants.CONTEXT_OUTPUT_SIZE
+            fcntl.ioctl(slave, termios.TIOCSWINSZ, struct.pack("HHHH", rows, columns, 0, 0))
+            self.masters[section] = master
+            self.slaves.append(slave)
+            self.ttys[section] = os.ttyname(slave)
+            self.sections[master] = section
+            self.buffers[section] = bytearray()
+            logger.debug("Opened tty for context section %s: %s", section, self.ttys[section])
+
+    @Slot()
+    def read_sections(self):
+        """Main entry for the reader thread. Keep draining the ptys, so that GDB never blocks on a full pty while it
+        writes a large section"""
+        while self.run:
+            can_read, _, _ = select.select([*self.sections, self.wake_read], [], [], 0.2)
+            for master in can_read:
+                if master == self.wake_read:
+                    os.read(self.wake_read, 4096)
+                else:
+                    self.drain(self.sections[master])
+            QCoreApplication.processEvents()
+
+    def drain(self, section: str):
+        """Read everything that is currently in the pty of a section"""
+        buffer = self.buffers[section]
+        while True:
+            try:
+                data = os.read(self.masters[section], 65536)
+            except (BlockingIOError, OSError):
+                return
+            if not data:
+                return
+            buffer += data
+
+    @Slot(str, bool)
+    def flush_section(self, section: str, show: bool):
+        """
+        Send the latest output of a section to its pane. Called once GDB finished the section's "context" command,
+        which wrote the whole section to the pty before
+        :param section: The context section
+        :param show: Whether to update the pane, False if the inferior is not stopped anymore
+        """
+        self.drain(section)
+        buffer = self.buffers[section]
+        content = bytes(buffer)
+        buffer.clear()
+        if not show:
+            return
+        # Only the last output is up-to-date, e.g. the user may have printed all sections via "context" before
+        match = None
+        for match in CLEAR_SCREEN.finditer(content):
+            pass
+        if match is not None:
+            content = content[match.end():]
+        # pwndbg only ends its output with a newline on GDB's console
+        if not content.endswith(b"\n"):
+            content += b"\n"
+        self.update_gui.emit(section, content)
+
+    @Slot()
+    def wake(self):
+        """Wake up the loop of the reader thread to flush a section right away. Connected directly, i.e. called in the
+        thread that queued the flush"""
+        try:
+            os.write(self.wake_write, b"\0")
+        except BlockingIOError:
+            # The loop wakes up anyway
+            pass
+
+    @Slot()
+    def set_run(self, state: bool):
+        """Sets whether the thread should keep working"""
+        self.run = state
+
+    def close(self):
+        """Close the ptys and the wake pipe, only called once the reader thread finished"""
+        for fd in [*self.masters.values(), *self.slaves, self.wake_read, self.wake_write]:
+            os.close(fd)
+        self.masters.clear()
+        self.slaves.clear()
+        self.sections.clear()
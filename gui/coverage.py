@@ -0,0 +1,156 @@
+import bisect
+import gzip
+import json
+from array import array
+from collections import Counter
+from typing import Iterable, List, Dict, Tuple, Any
+
+# Version of the on-disk coverage format
+COVERAGE_VERSION = 1
+
+
+class CoverageMap:
+    """Hit counts per instruction address. The counts are kept in two parallel sorted arrays, which cost 16 bytes per
+    covered address and allow summing up the hits of an address range (e.g. a function) with two bisections. New hits
+    are counted in C via a Counter and only merged into the arrays when the counts are read"""
+    def __init__(self):
+        self.addresses = array("Q")
+        self.counts = array("Q")
+        self.pending: Counter = Counter()
+
+    def __len__(self) -> int:
+        self.compact()
+        return len(self.addresses)
+
+    def add_hits(self, addresses: Iterable[int]):
+        """Count one hit for every address, e.g. for every pc of a streamed trace chunk"""
+        self.pending.update(addresses)
+
+    def add_hit(self, address: int, count: int = 1):
+        self.pending[address] += count
+
+    def clear(self):
+        self.addresses = array("Q")
+        self.counts = array("Q")
+        self.pending.clear()
+
+    def compact(self):
+        """Merge the pending hits into the sorted arrays"""
+        if not self.pending:
+            return
+        merged = Counter(dict(zip(self.addresses, self.counts)))
+        merged.update(self.pending)
+        self.pending.clear()
+        addresses = sorted(merged)
+        self.addresses = array("Q", addresses)
+        self.counts = array("Q", map(merged.__getitem__, addresses))
+
+    def count(self, address: int) -> int:
+        self.compact()
+        index = bisect.bisect_left(self.addresses, address)
+        if index < len(self.addresses) and self.addresses[index] == address:
+            return self.counts[index]
+        return 0
+
+    def total(self, start: int, end: int) -> Tuple[int, int]:
+        """
+        Sum up the hits of an address range
+        :return: The hits and the number of covered addresses in [start, end)
+        """
+        self.compact()
+        first = bisect.bisect_left(self.addresses, start)
+        last = bisect.bisect_left(self.addresses, end, first)
+        return sum(self.counts[first:last]), last - first
+
+    def range_totals(self, starts: List[int], ends: List[int]) -> Dict[int, List[int]]:
+        """
+        Sum up the hits of many address ranges at once, walking the covered addresses instead of the ranges, as only
+        few of e.g. all functions of libc are usually covered
+        :param starts: The sorted start addresses of the ranges
+        :param ends: The end addresses of the ranges
+        :return: The covered ranges in the form of {range index: [hits, covered addresses]}
+        """
+        self.compact()
+        totals: Dict[int, List[int]] = {}
+        for address, count in zip(self.addresses, self.counts):
+            index = bisect.bisect_right(starts, address) - 1
+            if index >= 0 and address < ends[index]:
+                total = totals.setdefault(index, [0, 0])
+                total[0] += count
+                total[1] += 1
+        return totals
+
+    def max_count(self) -> int:
+        self.compact()
+        return max(self.counts, default=0)
+
+    def to_relative(self, regions: List[Tuple[int, int, str, int]]) -> Dict[str, List[List[int]]]:
+        """
+        Express the covered addresses as offsets into their objfiles, so that runs with different load bases compare
+        :param regions: Executable mappings in the form of (start, end, objfile, load base), sorted by start
+        :return: The hits in the form of {objfile: [[offset, count], ...]}, addresses outside of all regions are stored
+        as absolute addresses under the empty objfile name
+        """
+        self.compact()
+        relative: Dict[str, List[List[int]]] = {}
+        inside = bytearray(len(self.addresses))
+        for start, end, objfile, base in regions:
+            first = bisect.bisect_left(self.addresses, start)
+            last = bisect.bisect_left(self.addresses, end, first)
+            relative.setdefault(objfile, []).extend([address - base, count] for address, count in
+                                                    zip(self.addresses[first:last], self.counts[first:last]))
+            inside[first:last] = b"\x01" * (last - first)
+        relative[""] = [[address, count] for address, count, is_inside in zip(self.addresses, self.counts, inside)
+                        if not is_inside]
+        return {objfile: entries for objfile, entries in relative.items() if entries}
+
+    def add_relative(self, relative: Dict[str, List[List[int]]], bases: Dict[str, int]):
+        """
+        Add hits relative to their objfiles, e.g. of a previous run
+        :param relative: The hits in the form of {objfile: [[offset, count], ...]}, as created by to_relative
+        :param bases: The current load bases of the objfiles, hits of objfiles that are not mapped are skipped
+        """
+        for objfile, entries in relative.items():
+            base = 0 if objfile == "" else bases.get(objfile)
+            if base is None:
+                continue
+            for offset, count in entries:
+                self.pending[base + offset] += count
+
+    @classmethod
+    def from_relative(cls, relative: Dict[str, List[List[int]]], bases: Dict[str, int]) -> 'CoverageMap':
+        coverage = cls()
+        coverage.add_relative(relative, bases)
+        return coverage
+
+
+class SessionCoverage:
+    """The coverage recorded in one session. A restarted inferior is likely mapped at different addresses, so the
+    hits of the previous process are carried over relative to its objfiles"""
+    def __init__(self):
+        self.hits = CoverageMap()
+        # Coverage of the previous process, rebased onto the current process once its objfiles are mapped
+        self.carried: Dict[str, List[List[int]]] | None = None
+        # The executable mappings of the last stop, kept to save the coverage after the inferior exited
+        self.regions: List[Tuple[int, int, str, int]] = []
+        # The process the hits belong to
+        self.pid = 0
+
+
+def save_coverage(path: str, relative: Dict[str, List[List[int]]]):
+    with gzip.open(path, "wt") as coverage_file:
+        json.dump(dict(version=COVERAGE_VERSION, objfiles=relative), coverage_file)
+
+
+def load_coverage(path: str) -> Dict[str, List[List[Any]]]:
+    """
+    Load coverage saved by save_coverage
+    :raises ValueError: If the file is no coverage file of the current version
+    """
+    with gzip.open(path, "rt") as coverage_file:
+        coverage = json.load(coverage_file)
+    if not isinstance(coverage, dict) or coverage.get("version") != COVERAGE_VERSION:
+        raise ValueError("Unsupported coverage file")
+    if not isinstance(coverage.get("objfiles"), dict):
+        raise ValueError("Coverage file contains no objfiles")
+    return coverage["objfiles"]
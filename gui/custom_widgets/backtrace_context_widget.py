@@ -1,16 +1,164 @@
+import logging
 from typing import TYPE_CHECKING
 
-from PySide6.QtWidgets import QSplitter
+from PySide6.QtCore import Qt, Signal, Slot
+from PySide6.QtGui import QColor, QFont
+from PySide6.QtWidgets import QSplitter, QTreeWidget, QTreeWidgetItem
 
-from gui.custom_widgets.context_text_widget import ContextTextWidget
+from gui.constants import PwndbgGuiConstants
+from gui.custom_widgets.widget_setup import setup_context_box
 
 # Prevent circular import error
 if TYPE_CHECKING:
     from gui.pwndbg_gui import PwnDbgGui
 
+logger = logging.getLogger(__file__)
+
+
+class BacktraceContextWidget(QTreeWidget):
+    """Structured backtrace. Only the top frames are loaded on a stop, deeper frames are loaded page-wise when the user
+    scrolls down and the arguments of a frame are only fetched when the frame is expanded"""
+    # Request the frames with levels in [low, high]
+    request_frames = Signal(int, int)
+    # Request the arguments of the frame with the given level
+    request_arguments = Signal(int)
+    # Select the frame with the given level for the other contexts
+    select_frame = Signal(int)
+    # Marks whether the arguments of a frame item have already been requested
+    ARGUMENTS_REQUESTED = Qt.ItemDataRole.UserRole
 
-class BacktraceContextWidget(ContextTextWidget):
     def __init__(self, parent: 'PwnDbgGui', title: str, splitter: QSplitter, index: int):
-        super().__init__(parent, title, splitter, index)
+        super().__init__(parent)
         self.setObjectName("backtrace")
-        self.setup_widget_layout(parent, title, splitter, index)
+        self.setColumnCount(4)
+        self.setHeaderLabels(["#", "Address", "Function", "Location"])
+        self.setUniformRowHeights(True)
+        self.setRootIsDecorated(True)
+        # Whether there are more frames than currently loaded and whether we are waiting for a page
+        self.has_more = False
+        self.loading = False
+        self.selected_level = 0
+        self.bold_font = QFont(PwndbgGuiConstants.FONT)
+        self.bold_font.setBold(True)
+        setup_context_box(self, parent, title, splitter, index)
+        self.verticalScrollBar().valueChanged.connect(self.handle_scroll)
+        self.itemExpanded.connect(self.handle_expand)
+        self.itemClicked.connect(self.handle_click)
+
+    @Slot(dict)
+    def receive_depth(self, payload: dict):
+        """
+        Callback for receiving the result of "-stack-info-depth" from the GDB reader. The depth is capped at one frame
+        more than a page, so it only tells us whether there are frames beyond the first page
+        :param payload: The MI payload containing the "depth"
+        """
+        self.has_more = int(payload.get("depth", 0)) > PwndbgGuiConstants.BACKTRACE_PAGE_SIZE
+        self.fill_view()
+
+    @Slot(dict)
+    def receive_frames(self, payload: dict):
+        """
+        Callback for receiving the result of "-stack-list-frames" from the GDB reader
+        :param payload: The MI payload containing the "stack"
+        """
+        self.loading = False
+        frames = [entry.get("frame", entry) for entry in payload.get("stack", [])]
+        if len(frames) == 0:
+            if "msg" in payload:
+                self.clear()
+            self.has_more = False
+            return
+        if int(frames[0].get("level", 0)) == 0:
+            # A new stop, GDB always selects the innermost frame
+            self.clear()
+            self.selected_level = 0
+        elif len(frames) < PwndbgGuiConstants.BACKTRACE_PAGE_SIZE:
+            self.has_more = False
+        for frame in frames:
+            self.add_frame(frame)
+        self.set_frame_bold(self.selected_level, True)
+        self.fill_view()
+
+    def add_frame(self, frame: dict):
+        """Add a top-level item for a frame, its arguments are loaded once it is expanded"""
+        if "file" in frame:
+            location = f"{frame['file']}:{frame.get('line', '?')}"
+        else:
+            location = frame.get("from", "")
+        item = QTreeWidgetItem(self, [frame.get("level", ""), frame.get("addr", ""), frame.get("func", "??"), location])
+        item.setForeground(1, QColor(PwndbgGuiConstants.LIGHT_BLUE))
+        item.setForeground(2, QColor(PwndbgGuiConstants.YELLOW))
+        item.setChildIndicatorPolicy(QTreeWidgetItem.ChildIndicatorPolicy.ShowIndicator)
+        item.setData(0, self.ARGUMENTS_REQUESTED, False)
+
+    @Slot(dict)
+    def receive_arguments(self, payload: dict):
+        """
+        Callback for receiving the result of "-stack-list-arguments" from the GDB reader
+        :param payload: The MI payload containing the "stack-args" of one frame
+        """
+        for entry in payload.get("stack-args", []):
+            frame = entry.get("frame", entry)
+            level = int(frame.get("level", -1))
+            if not 0 <= level < self.topLevelItemCount():
+                continue
+            item = self.topLevelItem(level)
+            args = frame.get("args", [])
+            for arg in args:
+                value = arg.get("value", f"<{arg.get('type', '...')}>")
+                child = QTreeWidgetItem(item, ["", "", arg.get("name", "?"), value])
+                child.setForeground(3, QColor(PwndbgGuiConstants.LIGHT_GRAY))
+            if len(args) == 0:
+                QTreeWidgetItem(item, ["", "", "(no arguments)", ""])
+
+    @Slot(int)
+    def handle_scroll(self, value: int):
+        """Load the next page of frames when the user scrolls to the bottom"""
+        if value < self.verticalScrollBar().maximum() or not self.has_more or self.loading:
+            return
+        self.load_next_page()
+
+    def fill_view(self):
+        """Load the next page while all frames fit into the view, as the user cannot scroll to the bottom then"""
+        if not self.has_more or self.loading or self.topLevelItemCount() == 0:
+            return
+        # The scroll bar range is only updated once the new items are laid out
+        self.executeDelayedItemsLayout()
+        if self.verticalScrollBar().maximum() == 0:
+            self.load_next_page()
+
+    def load_next_page(self):
+        """Request the next page of frames"""
+        low = self.topLevelItemCount()
+        logger.debug("Loading backtrace frames %d to %d", low, low + PwndbgGuiConstants.BACKTRACE_PAGE_SIZE - 1)
+        self.loading = True
+        self.request_frames.emit(low, low + PwndbgGuiConstants.BACKTRACE_PAGE_SIZE - 1)
+
+    @Slot(QTreeWidgetItem)
+    def handle_expand(self, item: QTreeWidgetItem):
+        """Fetch the arguments of a frame the first time it is expanded"""
+        if item.parent() is not None or item.data(0, self.ARGUMENTS_REQUESTED):
+            return
+        item.setData(0, self.ARGUMENTS_REQUESTED, True)
+        self.request_arguments.emit(self.indexOfTopLevelItem(item))
+
+    @Slot(QTreeWidgetItem, int)
+    def handle_click(self, item: QTreeWidgetItem, column: int):
+        """Select the clicked frame, so that the other contexts show its registers, stack and code"""
+        if item.parent() is not None:
+            return
+        level = self.indexOfTopLevelItem(item)
+        if level == self.selected_level:
+            return
+        self.set_frame_bold(self.selected_level, False)
+        self.selected_level = level
+        self.set_frame_bold(self.selected_level, True)
+        self.select_frame.emit(level)
+
+    def set_frame_bold(self, level: int, bold: bool):
+        """Show the frame with the given level in bold, used to mark the selected frame"""
+        item = self.topLevelItem(level)
+        if item is None:
+            return
+        for column in range(self.columnCount()):
+            item.setFont(column, self.bold_font if bold else self.font())
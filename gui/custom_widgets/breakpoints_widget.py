@@ -0,0 +1,256 @@
+import logging
+from typing import List, Dict, Any
+
+from PySide6.QtCore import Qt, Signal, Slot, QAbstractTableModel, QModelIndex, QPersistentModelIndex
+from PySide6.QtGui import QColor, QIcon
+from PySide6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QLabel, QTableView, QHeaderView, \
+    QAbstractItemView, QPushButton, QLineEdit
+
+from gui.breakpoints import BreakpointTable, breakpoint_locations
+from gui.constants import PwndbgGuiConstants
+from gui.custom_widgets.widget_setup import setup_table_view
+
+logger = logging.getLogger(__file__)
+
+
+class BreakpointModel(QAbstractTableModel):
+    """Table model of the breakpoints. Every notification only inserts, repaints or removes the row of one breakpoint,
+    so that many breakpoints cost nothing on stops. Edits are not applied to the model, they are sent to GDB and come
+    back as notifications"""
+    ENABLED, NUMBER, TYPE, LOCATION, CONDITION, HITS = range(6)
+    HEADERS = ["", "Num", "Type", "Location", "Condition", "Hits"]
+    # Enable or disable a breakpoint
+    enable_breakpoint = Signal(str, bool)
+    # Set the condition of a breakpoint
+    set_condition = Signal(str, str)
+
+    def __init__(self, table: BreakpointTable, parent=None):
+        super().__init__(parent)
+        self.table = table
+        # The numbers of the shown breakpoints and their rows
+        self.numbers: List[str] = []
+        self.rows: Dict[str, int] = {}
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.numbers)
+
+    def columnCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section: int, orientation: Qt.Orientation, role=Qt.ItemDataRole.DisplayRole) -> Any:
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            return self.HEADERS[section]
+        return None
+
+    def flags(self, index: QModelIndex | QPersistentModelIndex) -> Qt.ItemFlag:
+        flags = super().flags(index)
+        if index.column() == self.ENABLED:
+            flags |= Qt.ItemFlag.ItemIsUserCheckable
+        elif index.column() == self.CONDITION:
+            flags |= Qt.ItemFlag.ItemIsEditable
+        return flags
+
+    def data(self, index: QModelIndex | QPersistentModelIndex, role=Qt.ItemDataRole.DisplayRole) -> Any:
+        if not index.isValid():
+            return None
+        bkpt = self.table.breakpoints[self.numbers[index.row()]]
+        column = index.column()
+        if role == Qt.ItemDataRole.CheckStateRole and column == self.ENABLED:
+            return Qt.CheckState.Checked if bkpt.get("enabled") == "y" else Qt.CheckState.Unchecked
+        elif role in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.EditRole):
+            if column == self.NUMBER:
+                return bkpt.get("number", "")
+            elif column == self.TYPE:
+                return bkpt.get("type", "")
+            elif column == self.LOCATION:
+                return self.location(bkpt)
+            elif column == self.CONDITION:
+                return bkpt.get("cond", "")
+            elif column == self.HITS:
+                return bkpt.get("times", "0")
+        elif role == Qt.ItemDataRole.ForegroundRole:
+            if column == self.LOCATION:
+                return QColor(PwndbgGuiConstants.LIGHT_BLUE)
+            elif column == self.CONDITION:
+                return QColor(PwndbgGuiConstants.YELLOW)
+        elif role == Qt.ItemDataRole.TextAlignmentRole and column == self.HITS:
+            return Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter
+        return None
+
+    def setData(self, index: QModelIndex | QPersistentModelIndex, value: Any, role=Qt.ItemDataRole.EditRole) -> bool:
+        if not index.isValid():
+            return False
+        number = self.numbers[index.row()]
+        if role == Qt.ItemDataRole.CheckStateRole and index.column() == self.ENABLED:
+            self.enable_breakpoint.emit(number, Qt.CheckState(value) == Qt.CheckState.Checked)
+        elif role == Qt.ItemDataRole.EditRole and index.column() == self.CONDITION:
+            self.set_condition.emit(number, str(value).strip())
+        # The model is updated once GDB reports the change
+        return False
+
+    @staticmethod
+    def location(bkpt: dict) -> str:
+        """The resolved location of a breakpoint, or what it watches"""
+        if "what" in bkpt and "addr" not in bkpt:
+            return bkpt["what"]
+        locations = breakpoint_locations(bkpt)
+        if len(locations) > 1:
+            return f"{bkpt.get('original-location', '')} ({len(locations)} locations)"
+        location = bkpt.get("addr", "")
+        if "func" in bkpt:
+            location += f" in {bkpt['func']}"
+        if "file" in bkpt and "line" in bkpt:
+            location += f" at {bkpt['file']}:{bkpt['line']}"
+        return location or bkpt.get("original-location", "")
+
+    def update_breakpoint(self, bkpt: dict):
+        """Insert a created breakpoint or repaint a modified one"""
+        if self.table.update(bkpt):
+            row = len(self.numbers)
+            self.beginInsertRows(QModelIndex(), row, row)
+            self.numbers.append(bkpt["number"])
+            self.rows[bkpt["number"]] = row
+            self.endInsertRows()
+        elif bkpt.get("number") in self.rows:
+            row = self.rows[bkpt["number"]]
+            self.dataChanged.emit(self.index(row, 0), self.index(row, self.columnCount() - 1))
+
+    def remove_breakpoint(self, number: str) -> dict | None:
+        """Remove the row of a deleted breakpoint, the rows after it move up"""
+        bkpt = self.table.remove(number)
+        row = self.rows.pop(number, None)
+        if row is None:
+            return bkpt
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self.numbers[row]
+        for moved in self.numbers[row:]:
+            self.rows[moved] -= 1
+        self.endRemoveRows()
+        return bkpt
+
+    def set_breakpoints(self, breakpoints: List[dict]):
+        """Replace all breakpoints, e.g. with those of another session"""
+        self.beginResetModel()
+        self.table.clear()
+        for bkpt in breakpoints:
+            self.table.update(bkpt)
+        self.numbers = list(self.table.breakpoints)
+        self.rows = {number: row for row, number in enumerate(self.numbers)}
+        self.endResetModel()
+
+    def number(self, row: int) -> str:
+        return self.numbers[row]
+
+
+class BreakpointsWidget(QWidget):
+    """The breakpoints of GDB, kept in sync from GDB's breakpoint notifications. Breakpoints can be enabled, disabled
+    and given a condition in place, the gutters of the disassembly and source toggle them as well"""
+    # Insert a breakpoint at a location
+    insert_breakpoint = Signal(str)
+    # Delete the breakpoint with the given number
+    delete_breakpoint = Signal(str)
+    # Request "-break-list"
+    request_breakpoints = Signal()
+    # Show an address in the disassembly
+    show_address = Signal(object)
+    # Emitted when breakpoints were created, modified or deleted, so that the gutters can be repainted
+    breakpoints_changed = Signal()
+
+    def __init__(self, parent: QWidget, table: BreakpointTable):
+        super().__init__(parent)
+        self.setObjectName("breakpoints")
+        self.breakpoint_model = BreakpointModel(table, self)
+        self.enable_breakpoint = self.breakpoint_model.enable_breakpoint
+        self.set_condition = self.breakpoint_model.set_condition
+        self.location_input = QLineEdit(self)
+        self.location_input.setPlaceholderText("Location, e.g. main, file.c:42 or *0x401136")
+        self.location_input.returnPressed.connect(self.add_breakpoint)
+        self.add_button = QPushButton("Add", self)
+        self.add_button.setIcon(QIcon.fromTheme("list-add"))
+        self.add_button.clicked.connect(self.add_breakpoint)
+        self.delete_button = QPushButton("Delete", self)
+        self.delete_button.setIcon(QIcon.fromTheme("edit-delete"))
+        self.delete_button.clicked.connect(self.delete_selected)
+        self.status_label = QLabel(self)
+        self.breakpoint_view = QTableView(self)
+        self.setup_widget_layout()
+
+    def setup_widget_layout(self):
+        header_layout = QHBoxLayout()
+        header_layout.addWidget(self.location_input)
+        header_layout.addWidget(self.add_button)
+        header_layout.addWidget(self.delete_button)
+        self.breakpoint_view.setModel(self.breakpoint_model)
+        setup_table_view(self.breakpoint_view)
+        self.breakpoint_view.setEditTriggers(QAbstractItemView.EditTrigger.DoubleClicked |
+                                             QAbstractItemView.EditTrigger.EditKeyPressed)
+        header = self.breakpoint_view.horizontalHeader()
+        header.setSectionResizeMode(BreakpointModel.LOCATION, QHeaderView.ResizeMode.Stretch)
+        header.resizeSection(BreakpointModel.ENABLED, self.fontMetrics().horizontalAdvance("M") * 3)
+        header.resizeSection(BreakpointModel.NUMBER, self.fontMetrics().horizontalAdvance("99999"))
+        self.breakpoint_view.doubleClicked.connect(self.handle_double_click)
+        layout = QVBoxLayout()
+        layout.addLayout(header_layout)
+        layout.addWidget(self.status_label)
+        layout.addWidget(self.breakpoint_view)
+        self.setLayout(layout)
+        self.status_label.hide()
+
+    @Slot()
+    def add_breakpoint(self):
+        location = self.location_input.text().strip()
+        if location:
+            self.insert_breakpoint.emit(location)
+            self.location_input.clear()
+
+    @Slot()
+    def delete_selected(self):
+        numbers = [self.breakpoint_model.number(index.row())
+                   for index in self.breakpoint_view.selectionModel().selectedRows()]
+        for number in numbers:
+            self.delete_breakpoint.emit(number)
+
+    @Slot(dict)
+    def receive_breakpoint(self, payload: dict):
+        """
+        Callback for a created or modified breakpoint, reported by a notification or the result of "-break-insert"
+        :param payload: The MI payload containing the "bkpt", or the error "msg" of "-break-insert"
+        """
+        bkpt = payload.get("bkpt")
+        if bkpt is None:
+            if "msg" in payload:
+                self.status_label.setText(payload["msg"])
+                self.status_label.show()
+            return
+        self.status_label.hide()
+        self.breakpoint_model.update_breakpoint(bkpt)
+        self.breakpoints_changed.emit()
+
+    @Slot(str)
+    def receive_breakpoint_deleted(self, number: str):
+        """
+        Callback for a deleted breakpoint
+        :param number: The number of the breakpoint
+        """
+        if self.breakpoint_model.remove_breakpoint(number) is not None:
+            self.breakpoints_changed.emit()
+
+    @Slot(dict)
+    def receive_breakpoint_list(self, payload: dict):
+        """
+        Callback for the result of "-break-list", which replaces all breakpoints
+        :param payload: The MI payload containing the "BreakpointTable"
+        """
+        body = payload.get("BreakpointTable", {}).get("body", [])
+        self.breakpoint_model.set_breakpoints([entry.get("bkpt", entry) for entry in body])
+        self.breakpoints_changed.emit()
+
+    @Slot(QModelIndex)
+    def handle_double_click(self, index: QModelIndex):
+        """Show the double-clicked breakpoint in the disassembly"""
+        if index.column() != BreakpointModel.LOCATION:
+            return
+        bkpt = self.breakpoint_model.table.breakpoints[self.breakpoint_model.number(index.row())]
+        address = breakpoint_locations(bkpt)[0].get("addr", "")
+        if address.startswith("0x"):
+            self.show_address.emit(int(address, 16))
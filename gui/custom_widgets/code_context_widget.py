@@ -1,16 +1,171 @@
-from typing import TYPE_CHECKING
+import logging
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Tuple, List
 
-from PySide6.QtWidgets import QSplitter
+from PySide6.QtCore import Slot, Signal
+from PySide6.QtGui import QTextDocument, QTextCursor, QTextFormat, QColor, QTextCharFormat, QMouseEvent
+from PySide6.QtWidgets import QSplitter, QTextEdit
 
+from gui.constants import PwndbgGuiConstants
 from gui.custom_widgets.context_text_widget import ContextTextWidget
+from gui.gdb_handler import mi_quote
+from gui.source_highlighter import SourceHighlighter
 
 # Prevent circular import error
 if TYPE_CHECKING:
     from gui.pwndbg_gui import PwnDbgGui
 
+logger = logging.getLogger(__file__)
+
 
 class CodeContextWidget(ContextTextWidget):
+    """Shows the current source file. Every file is only loaded and highlighted once, on every stop only the marker
+    of the current line is moved. Clicking on a line number toggles a breakpoint on that line"""
+    # Insert a breakpoint at a location
+    insert_breakpoint = Signal(str)
+    # Delete the breakpoint with the given number
+    delete_breakpoint = Signal(str)
+
     def __init__(self, parent: 'PwnDbgGui', title: str, splitter: QSplitter, index: int):
         super().__init__(parent, title, splitter, index)
         self.setObjectName("code")
         self.setup_widget_layout(parent, title, splitter, index)
+        self.setLineWrapMode(QTextEdit.LineWrapMode.NoWrap)
+        # Loaded source files in the form of {path: (modification time, document)}
+        self.documents: Dict[str, Tuple[float, QTextDocument]] = {}
+        # Document that is shown when no source is available, so that we never overwrite a cached source document
+        self.placeholder = QTextDocument(self)
+        self.current_line_format = QTextCharFormat()
+        self.current_line_format.setBackground(QColor(66, 66, 66))
+        self.current_line_format.setProperty(QTextFormat.Property.FullWidthSelection, True)
+        self.breakpoint_format = QTextCharFormat()
+        self.breakpoint_format.setBackground(QColor(PwndbgGuiConstants.RED))
+        self.disabled_breakpoint_format = QTextCharFormat()
+        self.disabled_breakpoint_format.setForeground(QColor(PwndbgGuiConstants.RED))
+        # The breakpoints of the session in front, shared with the breakpoints pane
+        self.breakpoints = parent.breakpoints
+        # The path of the shown source file and the selections of the current line and the lines with breakpoints
+        self.current_path: str | None = None
+        self.line_selection: QTextEdit.ExtraSelection | None = None
+        self.breakpoint_selections: List[QTextEdit.ExtraSelection] = []
+
+    def load_source(self, path: str) -> QTextDocument | None:
+        """
+        Get the highlighted document of a source file, loading it from disk if it is not cached or has changed
+        :param path: The full path of the source file as reported by GDB
+        :return: The document or None if the file could not be read
+        """
+        source_file = Path(path)
+        try:
+            mtime = source_file.stat().st_mtime
+        except OSError:
+            return None
+        cached = self.documents.get(path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        try:
+            lines = source_file.read_text(errors="replace").splitlines()
+        except OSError as e:
+            logger.warning("Could not read source file %s: %s", path, str(e))
+            return None
+        logger.debug("Loading source file %s", path)
+        number_width = len(str(len(lines)))
+        document = QTextDocument(self)
+        document.setUndoRedoEnabled(False)
+        document.setDefaultFont(self.font())
+        # Keep the highlighter alive as long as the document, it is parented to it
+        SourceHighlighter(document, number_width + 2)
+        document.setPlainText("\n".join(f"{number:>{number_width}}  {line}" for number, line in enumerate(lines, 1)))
+        if cached is not None:
+            cached[1].deleteLater()
+        self.documents[path] = (mtime, document)
+        return document
+
+    @Slot(dict)
+    def receive_source_file(self, payload: dict):
+        """
+        Callback for receiving the result of "-file-list-exec-source-file" from the GDB reader
+        :param payload: The MI payload containing the "fullname" and "line" of the current location
+        """
+        path = payload.get("fullname", payload.get("file"))
+        line = payload.get("line")
+        document = self.load_source(path) if path is not None else None
+        if document is None or line is None:
+            self.show_placeholder(f"No source available for {path}" if path is not None else payload.get("msg", ""))
+            return
+        if self.document() is not document:
+            self.setDocument(document)
+            self.current_path = path
+            self.breakpoint_selections = self.mark_breakpoints()
+        self.mark_line(int(line))
+
+    def show_placeholder(self, message: str):
+        """Show a message instead of source code"""
+        self.current_path = None
+        self.line_selection = None
+        self.breakpoint_selections = []
+        self.setExtraSelections([])
+        self.placeholder.setPlainText(message)
+        if self.document() is not self.placeholder:
+            self.setDocument(self.placeholder)
+
+    def mark_line(self, line: int):
+        """
+        Highlight the given line and scroll it into the middle of the view
+        :param line: The 1-based line number
+        """
+        block = self.document().findBlockByNumber(line - 1)
+        if not block.isValid():
+            return
+        cursor = QTextCursor(block)
+        selection = QTextEdit.ExtraSelection()
+        selection.cursor = cursor
+        selection.format = self.current_line_format
+        self.line_selection = selection
+        self.setExtraSelections([selection] + self.breakpoint_selections)
+        self.setTextCursor(cursor)
+        scroll_bar = self.verticalScrollBar()
+        scroll_bar.setValue(scroll_bar.value() + self.cursorRect(cursor).top() - self.viewport().height() // 2)
+
+    def number_width(self) -> int:
+        """The width of the line numbers in front of every line"""
+        return len(str(self.document().blockCount()))
+
+    def mark_breakpoints(self) -> List[QTextEdit.ExtraSelection]:
+        """Highlight the line numbers of the lines with breakpoints in the shown source file"""
+        if self.current_path is None:
+            return []
+        selections = []
+        for line in self.breakpoints.lines_of(self.current_path):
+            block = self.document().findBlockByNumber(line - 1)
+            if not block.isValid():
+                continue
+            number = self.breakpoints.at_line(self.current_path, line)
+            enabled = self.breakpoints.breakpoints[number].get("enabled") == "y"
+            cursor = QTextCursor(block)
+            cursor.movePosition(QTextCursor.MoveOperation.Right, QTextCursor.MoveMode.KeepAnchor, self.number_width())
+            selection = QTextEdit.ExtraSelection()
+            selection.cursor = cursor
+            selection.format = self.breakpoint_format if enabled else self.disabled_breakpoint_format
+            selections.append(selection)
+        return selections
+
+    @Slot()
+    def update_breakpoints(self):
+        """Repaint the breakpoints of the shown source file after breakpoints changed"""
+        self.breakpoint_selections = self.mark_breakpoints()
+        self.setExtraSelections(([self.line_selection] if self.line_selection else []) + self.breakpoint_selections)
+
+    def mousePressEvent(self, event: QMouseEvent):
+        """Toggle a breakpoint when the user clicks on a line number"""
+        cursor = self.cursorForPosition(event.position().toPoint())
+        if self.current_path is None or cursor.positionInBlock() > self.number_width():
+            super().mousePressEvent(event)
+            return
+        line = cursor.blockNumber() + 1
+        # The line numbers are repainted once GDB reports the change
+        number = self.breakpoints.at_line(self.current_path, line)
+        if number is None:
+            self.insert_breakpoint.emit(f"--source {mi_quote(self.current_path)} --line {line}")
+        else:
+            self.delete_breakpoint.emit(number)
@@ -0,0 +1,136 @@
+import logging
+
+from PySide6.QtCore import Signal, Slot, QTimer
+from PySide6.QtGui import QStandardItemModel, QStandardItem
+from PySide6.QtWidgets import QCompleter, QLineEdit
+
+from gui.completion_index import CompletionIndex, INDEX_VERSION, index_key
+from gui.index_cache import load_index, store_index
+
+logger = logging.getLogger(__file__)
+
+
+class CommandCompleter(QCompleter):
+    """Completes GDB and pwndbg commands, settings, registers and symbols in the main input from a local index, so that
+    typing never waits for GDB's "complete" command. The commands are only indexed by GDB once per GDB and pwndbg
+    version and cached on disk, the symbols come from the SymbolIndexer"""
+    # Request "gui-commands version" or "gui-commands index" from GDB
+    request_commands = Signal(str)
+
+    def __init__(self, line_edit: QLineEdit):
+        super().__init__(line_edit)
+        self.line_edit = line_edit
+        self.index = CompletionIndex()
+        self.suggestions = QStandardItemModel(self)
+        self.setModel(self.suggestions)
+        self.setWidget(line_edit)
+        # The suggestions are filtered by the index, the popup shows them as they are
+        self.setCompletionMode(QCompleter.CompletionMode.UnfilteredPopupCompletion)
+        self.setMaxVisibleItems(12)
+        # All suggestions are single lines, so the popup does not have to measure every one of them
+        self.popup().setUniformItemSizes(True)
+        self.activated[str].connect(self.insert_suggestion)
+        line_edit.textEdited.connect(self.update_suggestions)
+        # The offset in the input at which a picked suggestion is inserted
+        self.start = 0
+        # The key of the GDB and pwndbg version whose commands are indexed
+        self.key = ""
+        # The key whose index was requested last, so that it is not requested again while GDB builds it
+        self.requested = ""
+        # Whether the input is sent to GDB, the inferior's input is not completed
+        self.active = True
+        # Merges the symbols once a burst of objfiles was indexed, so that the next completion does not have to
+        self.merge_timer = QTimer(self)
+        self.merge_timer.setSingleShot(True)
+        self.merge_timer.setInterval(200)
+        self.merge_timer.timeout.connect(self.index.merge_symbols)
+
+    @Slot(str)
+    def update_suggestions(self, text: str):
+        """Show the suggestions for the input in front of the cursor"""
+        if not self.active:
+            return
+        prefix = text[:self.line_edit.cursorPosition()]
+        self.start, suggestions = self.index.complete(prefix)
+        if len(suggestions) == 0 or suggestions == [prefix[self.start:]]:
+            self.popup().hide()
+            return
+        self.suggestions.clear()
+        for suggestion in suggestions:
+            item = QStandardItem(suggestion)
+            item.setToolTip(self.index.docs.get(prefix[:self.start].lstrip() + suggestion, ""))
+            self.suggestions.appendRow(item)
+        self.complete()
+
+    @Slot()
+    def complete_input(self):
+        """Show the suggestions on request, e.g. on Tab"""
+        self.update_suggestions(self.line_edit.text())
+
+    @Slot(str)
+    def insert_suggestion(self, suggestion: str):
+        """Replace the completed part of the input with the picked suggestion"""
+        text = self.line_edit.text()
+        cursor = self.line_edit.cursorPosition()
+        self.line_edit.setText(text[:self.start] + suggestion + text[cursor:])
+        self.line_edit.setCursorPosition(self.start + len(suggestion))
+
+    def is_picking(self) -> bool:
+        """Whether the user picks a suggestion, in which case Enter completes instead of submitting the input"""
+        return self.popup().isVisible() and self.popup().currentIndex().isValid()
+
+    def set_active(self, active: bool):
+        self.active = active
+        if not active:
+            self.popup().hide()
+
+    @Slot(dict)
+    def receive_record(self, record: dict):
+        """
+        Callback for the records of the gui-commands command
+        :param record: Either the "version" of GDB and pwndbg with the "registers", or the "index" of all commands
+        """
+        if "version" in record:
+            self.index.set_registers(record.get("registers", []))
+            key = index_key(record["version"])
+            if key == self.key:
+                return
+            commands = load_index("commands", key, INDEX_VERSION)
+            if commands is None and key != self.requested:
+                self.requested = key
+                logger.info("Indexing the commands of GDB %s, pwndbg %s", record["version"].get("gdb"),
+                            record["version"].get("pwndbg"))
+                self.request_commands.emit("index")
+            if commands is None:
+                return
+            self.key = key
+            self.index.set_commands(commands)
+        elif "index" in record:
+            versions = record["index"]["version"]
+            self.key = index_key(versions)
+            self.index.set_commands(record["index"]["commands"])
+            try:
+                store_index("commands", self.key, INDEX_VERSION, f"GDB {versions.get('gdb')}, pwndbg "
+                            f"{versions.get('pwndbg')}", record["index"]["commands"])
+            except OSError as e:
+                logger.warning("Could not cache the command index: %s", e)
+
+    @Slot(dict)
+    def receive_symbols(self, index: dict):
+        """
+        Callback for the symbols of an objfile from the SymbolIndexer
+        :param index: The "path" and "symbols" of the objfile
+        """
+        self.index.add_symbols(index["path"], [symbol[0] for symbol in index["symbols"]])
+        self.merge_timer.start()
+
+    @Slot(int)
+    def handle_inferior_pid(self, pid: int):
+        """A started or attached process decides the architecture, and with it the registers"""
+        if pid != 0:
+            self.request_commands.emit("version")
+
+    @Slot(str)
+    def set_target(self, path: str):
+        """Drop the symbols of the previous target"""
+        self.index.clear_symbols()
@@ -4,9 +4,12 @@ from typing import TYPE_CHECKING
 
 from PySide6.QtCore import Qt, Signal, Slot, QKeyCombination
 from PySide6.QtGui import QIcon, QKeySequence, QKeyEvent
-from PySide6.QtWidgets import QListWidget, QListWidgetItem, QApplication, QMenu, QSplitter, QGroupBox, QVBoxLayout
+from PySide6.QtWidgets import QListWidget, QListWidgetItem, QApplication, QMenu, QSplitter
 
+from gui.constants import PwndbgGuiConstants
 from gui.context_data_role import ContextDataRole
+from gui.custom_widgets.widget_setup import setup_context_box
+from gui.cyclic import CyclicPattern, cyclic_pattern
 from gui.parser import ContextParser
 
 # Prevent circular import error
@@ -20,9 +23,13 @@ class ContextListWidget(QListWidget):
     execute_xinfo = Signal(str)
     value_xinfo = Signal(str)
 
+    # The data role of an item that holds the value which is looked up in the cyclic pattern
+    cyclic_role = ContextDataRole.VALUE
+
     def __init__(self, parent: 'PwnDbgGui', title: str, splitter: QSplitter, index: int):
         super().__init__(parent)
         self.parser = ContextParser()
+        self.cyclic_pattern = cyclic_pattern()
         self.setup_widget_layout(parent, title, splitter, index)
         self.setResizeMode(QListWidget.ResizeMode.Adjust)
         self.context_menu = QMenu(self)
@@ -33,16 +40,7 @@ class ContextListWidget(QListWidget):
         self.setup_context_menu()
 
     def setup_widget_layout(self, parent: 'PwnDbgGui', title: str, splitter: QSplitter, index: int):
-        # GroupBox needs to have parent before being added to splitter (see SO below)
-        context_box = QGroupBox(title, parent)
-        context_box.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        context_box.setFlat(True)
-        context_layout = QVBoxLayout()
-        context_layout.addWidget(self)
-        context_box.setLayout(context_layout)
-        splitter.replaceWidget(index, context_box)
-        # https://stackoverflow.com/a/66067630
-        context_box.show()
+        setup_context_box(self, parent, title, splitter, index)
 
     def setup_context_menu(self):
         # Copy the address data, for a stack this is the stack address, for a register this is the register's content
@@ -82,6 +80,24 @@ class ContextListWidget(QListWidget):
             address, value = self.find_hex_values(plain_text)
             item.setData(ContextDataRole.ADDRESS, address)
             item.setData(ContextDataRole.VALUE, value)
+        self.annotate_cyclic_offsets()
+
+    @Slot(object)
+    def set_cyclic_pattern(self, pattern: CyclicPattern):
+        """Set the cyclic pattern whose offsets are annotated, i.e. the one that was last sent to the inferior"""
+        self.cyclic_pattern = pattern
+
+    def annotate_cyclic_offsets(self):
+        """Append the offset in the cyclic pattern to every line whose value is part of the pattern"""
+        for row in range(self.count()):
+            item = self.item(row)
+            value = item.data(self.cyclic_role)
+            if not value:
+                continue
+            offset = self.cyclic_pattern.find(int(value, 16))
+            if offset is not None:
+                item.setData(Qt.ItemDataRole.DisplayRole, item.data(Qt.ItemDataRole.DisplayRole) +
+                             f'<span style="color:{PwndbgGuiConstants.GREEN};"> ◂ cyclic offset {offset}</span>')
 
     def keyPressEvent(self, event: QKeyEvent):
         """Event handler for any key presses on this widget"""
@@ -17,7 +17,7 @@ class ContextTextEdit(QTextEdit):
         # Move cursor to the end, so that the subsequent ensureCursorVisible will scroll UP
         cursor.movePosition(QTextCursor.MoveOperation.End, QTextCursor.MoveMode.MoveAnchor)
         self.setTextCursor(cursor)
-        # Scroll so that the current line in "code" and "disasm" contexts is in view
+        # Scroll so that a line marked as current by pwndbg is in view
         self.find_and_set_cursor("►")
 
 
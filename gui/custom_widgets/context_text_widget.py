@@ -1,9 +1,9 @@
 from typing import TYPE_CHECKING
 
-from PySide6.QtCore import Qt
-from PySide6.QtWidgets import QSplitter, QGroupBox, QVBoxLayout
+from PySide6.QtWidgets import QSplitter
 
 from gui.custom_widgets.context_text_edit import ContextTextEdit
+from gui.custom_widgets.widget_setup import setup_context_box
 
 # Prevent circular import error
 if TYPE_CHECKING:
@@ -18,13 +18,4 @@ class ContextTextWidget(ContextTextEdit):
         self.setup_widget_layout(parent, title, splitter, index)
 
     def setup_widget_layout(self, parent: 'PwnDbgGui', title: str, splitter: QSplitter, index: int):
-        # GroupBox needs to have parent before being added to splitter (see SO below)
-        context_box = QGroupBox(title, parent)
-        context_box.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        context_box.setFlat(True)
-        context_layout = QVBoxLayout()
-        context_layout.addWidget(self)
-        context_box.setLayout(context_layout)
-        splitter.replaceWidget(index, context_box)
-        # https://stackoverflow.com/a/66067630
-        context_box.show()
+        setup_context_box(self, parent, title, splitter, index)
@@ -0,0 +1,273 @@
+import base64
+import logging
+import os
+from array import array
+from typing import List, Any, Dict, TYPE_CHECKING
+
+from PySide6.QtCore import Qt, Signal, Slot, QAbstractTableModel, QModelIndex, QPersistentModelIndex, QTimer
+from PySide6.QtGui import QColor, QShowEvent, QIcon
+from PySide6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QLabel, QTableView, \
+    QAbstractItemView, QPushButton, QCheckBox, QFileDialog, QMessageBox
+
+from gui.constants import PwndbgGuiConstants
+from gui.coverage import CoverageMap, SessionCoverage, save_coverage, load_coverage
+from gui.custom_widgets.symbol_widget import SymbolModel
+from gui.custom_widgets.widget_setup import setup_table_view
+from gui.process_memory import ProcessMemory
+
+# Prevent circular import error
+if TYPE_CHECKING:
+    from gui.pwndbg_gui import PwnDbgGui
+
+logger = logging.getLogger(__file__)
+
+
+class FunctionCoverageModel(QAbstractTableModel):
+    """Table model of the hits per function, hottest functions first"""
+    FUNCTION, ADDRESS, HITS, INSTRUCTIONS, BASELINE, OBJFILE = range(6)
+    HEADERS = ["Function", "Address", "Hits", "Instructions", "Baseline", "Objfile"]
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        # Rows in the form of [name, address, hits, covered instructions, baseline hits, objfile]
+        self.functions: List[List[Any]] = []
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.functions)
+
+    def columnCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section: int, orientation: Qt.Orientation, role=Qt.ItemDataRole.DisplayRole) -> Any:
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            return self.HEADERS[section]
+        return None
+
+    def data(self, index: QModelIndex | QPersistentModelIndex, role=Qt.ItemDataRole.DisplayRole) -> Any:
+        if not index.isValid():
+            return None
+        function = self.functions[index.row()]
+        column = index.column()
+        if role == Qt.ItemDataRole.DisplayRole:
+            if column == self.ADDRESS:
+                return hex(function[1])
+            elif column == self.OBJFILE:
+                return os.path.basename(function[5])
+            return str(function[column])
+        elif role == Qt.ItemDataRole.ToolTipRole and column == self.OBJFILE:
+            return function[5]
+        elif role == Qt.ItemDataRole.ForegroundRole:
+            if column == self.FUNCTION:
+                return QColor(PwndbgGuiConstants.RED)
+            elif column == self.ADDRESS:
+                return QColor(PwndbgGuiConstants.LIGHT_BLUE)
+            elif column == self.BASELINE and function[2] != function[4]:
+                # Highlight functions that were executed differently than in the baseline run
+                return QColor(PwndbgGuiConstants.YELLOW)
+        return None
+
+    def set_functions(self, functions: List[List[Any]]):
+        self.beginResetModel()
+        self.functions = sorted(functions, key=lambda function: (-function[2], -function[4], function[1]))
+        self.endResetModel()
+
+
+class CoverageWidget(QWidget):
+    """Execution coverage built from instruction traces and breakpoint hits. The hits are shown as a heatmap in the
+    disassembly and summed up per function here, and can be saved relative to their objfiles to compare the
+    coverage of different runs of an exploit"""
+    # Emitted when the hit counts changed, so that the disassembly can repaint its heatmap
+    coverage_changed = Signal()
+    # Show the function at an address in the disassembly
+    show_address = Signal(object)
+
+    def __init__(self, parent: 'PwnDbgGui', symbols: SymbolModel):
+        super().__init__(parent)
+        self.setObjectName("coverage")
+        # The memory and the coverage of the session in front, swapped by set_session
+        self.memory = parent.process_memory
+        self.coverage: SessionCoverage = parent.coverage
+        self.symbols = symbols
+        # Coverage of a saved run that is compared against, relative to its objfiles and rebased on every stop
+        self.baseline_relative: Dict[str, List[List[int]]] = {}
+        self.baseline = CoverageMap()
+        self.function_model = FunctionCoverageModel(self)
+        self.record_checkbox = QCheckBox("Record", self)
+        self.record_checkbox.setChecked(True)
+        self.record_checkbox.setToolTip("Count the instructions of traces and the addresses of breakpoint hits")
+        self.status_label = QLabel("No coverage", self)
+        self.clear_button = QPushButton("Clear", self)
+        self.clear_button.setIcon(QIcon.fromTheme("edit-clear"))
+        self.clear_button.clicked.connect(self.clear)
+        self.save_button = QPushButton("Save", self)
+        self.save_button.setIcon(QIcon.fromTheme("document-save"))
+        self.save_button.clicked.connect(self.save)
+        self.baseline_button = QPushButton("Load baseline", self)
+        self.baseline_button.setIcon(QIcon.fromTheme("document-open"))
+        self.baseline_button.clicked.connect(self.load_baseline)
+        self.function_view = QTableView(self)
+        # Coalesces the chunks of a running trace into a single repaint
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setSingleShot(True)
+        self.refresh_timer.setInterval(200)
+        self.refresh_timer.timeout.connect(self.refresh)
+        self.setup_widget_layout()
+
+    def setup_widget_layout(self):
+        header_layout = QHBoxLayout()
+        header_layout.addWidget(self.record_checkbox)
+        header_layout.addWidget(self.status_label)
+        header_layout.addStretch()
+        header_layout.addWidget(self.clear_button)
+        header_layout.addWidget(self.save_button)
+        header_layout.addWidget(self.baseline_button)
+        self.function_view.setModel(self.function_model)
+        setup_table_view(self.function_view)
+        self.function_view.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
+        self.function_view.horizontalHeader().resizeSection(FunctionCoverageModel.FUNCTION, 300)
+        self.function_view.doubleClicked.connect(self.handle_double_click)
+        layout = QVBoxLayout()
+        layout.addLayout(header_layout)
+        layout.addWidget(self.function_view)
+        self.setLayout(layout)
+
+    def showEvent(self, event: QShowEvent) -> None:
+        super().showEvent(event)
+        self.update_functions()
+
+    @Slot(dict)
+    def receive_trace_record(self, record: dict):
+        """
+        Count the pcs of a chunk streamed by the gui-trace command
+        :param record: A record streamed on the "trace" channel, only chunks of steps contain "pcs"
+        """
+        if "pcs" not in record or not self.record_checkbox.isChecked():
+            return
+        self.coverage.hits.add_hits(array("Q", base64.b64decode(record["pcs"])))
+        self.refresh_timer.start()
+
+    @Slot(object)
+    def receive_breakpoint_hit(self, address: int):
+        if not self.record_checkbox.isChecked():
+            return
+        self.coverage.hits.add_hit(address)
+        self.refresh_timer.start()
+
+    def set_session(self, memory: ProcessMemory, coverage: SessionCoverage):
+        """
+        Show the coverage of the session that was brought to the front
+        :param memory: The memory of the session's inferior
+        :param coverage: The coverage recorded in the session
+        """
+        self.memory = memory
+        self.coverage = coverage
+        self.set_pid(memory.pid)
+        self.baseline = CoverageMap.from_relative(self.baseline_relative, self.bases())
+        self.refresh()
+
+    def bases(self) -> Dict[str, int]:
+        """The load bases of the objfiles of the last stop in the form of {path: base}"""
+        return {objfile: base for _, _, objfile, base in self.coverage.regions}
+
+    @Slot(int)
+    def set_pid(self, pid: int):
+        """
+        Keep the coverage of the previous process relative to its objfiles, as the new process is likely mapped at
+        different addresses
+        :param pid: The pid of the new inferior or 0 if the inferior exited
+        """
+        coverage = self.coverage
+        if pid == 0 or pid == coverage.pid:
+            return
+        coverage.pid = pid
+        if len(coverage.hits) > 0 and len(coverage.regions) > 0:
+            coverage.carried = coverage.hits.to_relative(coverage.regions)
+            coverage.hits.clear()
+        coverage.regions = []
+
+    @Slot(bool)
+    def handle_inferior_state(self, stopped: bool):
+        """Rebase the carried over and the baseline coverage once the objfiles of the current process are known"""
+        if not stopped or self.memory.pid == 0:
+            return
+        try:
+            regions = self.memory.executable_regions()
+        except OSError as e:
+            logger.debug("Cannot read mappings of pid %d: %s", self.memory.pid, e)
+            return
+        coverage = self.coverage
+        if regions == coverage.regions:
+            return
+        coverage.regions = regions
+        bases = self.bases()
+        if coverage.carried is not None:
+            coverage.hits.add_relative(coverage.carried, bases)
+            coverage.carried = None
+        self.baseline = CoverageMap.from_relative(self.baseline_relative, bases)
+        self.refresh_timer.start()
+
+    @Slot()
+    def refresh(self):
+        self.coverage_changed.emit()
+        self.update_status()
+        if self.isVisible():
+            self.update_functions()
+
+    def update_functions(self):
+        """Sum up the hits of every known function, only done while the pane is visible"""
+        functions = self.symbols.functions(self.bases())
+        starts = [address for _, address, _, _ in functions]
+        ends = [address + size for _, address, size, _ in functions]
+        totals = self.coverage.hits.range_totals(starts, ends)
+        baseline_totals = self.baseline.range_totals(starts, ends)
+        rows = []
+        for index in totals.keys() | baseline_totals.keys():
+            name, address, _, objfile = functions[index]
+            hits, covered = totals.get(index, (0, 0))
+            rows.append([name, address, hits, covered, baseline_totals.get(index, (0, 0))[0], objfile])
+        self.function_model.set_functions(rows)
+
+    def update_status(self):
+        hits = self.coverage.hits
+        if len(hits) == 0:
+            self.status_label.setText("No coverage")
+            return
+        self.status_label.setText(f"{sum(hits.counts)} hits on {len(hits)} instructions")
+
+    @Slot()
+    def clear(self):
+        self.coverage.hits.clear()
+        self.coverage.carried = None
+        self.refresh()
+
+    @Slot()
+    def save(self):
+        """Save the coverage relative to the objfiles it was recorded in"""
+        if len(self.coverage.hits) == 0:
+            return
+        path, _ = QFileDialog.getSaveFileName(self, "Save coverage", "coverage.json.gz", "Coverage (*.json.gz)")
+        if not path:
+            return
+        try:
+            save_coverage(path, self.coverage.hits.to_relative(self.coverage.regions))
+        except OSError as e:
+            QMessageBox.critical(self, "Save failed", f"Could not save coverage: {e}")
+
+    @Slot()
+    def load_baseline(self):
+        """Load the saved coverage of another run to compare the per-function hits against"""
+        path, _ = QFileDialog.getOpenFileName(self, "Load baseline coverage", "", "Coverage (*.json.gz)")
+        if not path:
+            return
+        try:
+            self.baseline_relative = load_coverage(path)
+        except (OSError, ValueError) as e:
+            QMessageBox.critical(self, "Load failed", f"Could not load coverage: {e}")
+            return
+        self.baseline = CoverageMap.from_relative(self.baseline_relative, self.bases())
+        self.refresh()
+
+    @Slot(QModelIndex)
+    def handle_double_click(self, index: QModelIndex):
+        """Show the double-clicked function in the disassembly"""
+        self.show_address.emit(self.function_model.functions[index.row()][1])
@@ -0,0 +1,46 @@
+from PySide6.QtCore import Qt
+from PySide6.QtGui import QIcon
+from PySide6.QtWidgets import QDialog, QFormLayout, QSpinBox, QComboBox, QLineEdit, QCheckBox, QDialogButtonBox, \
+    QPushButton, QWidget
+
+from gui.cyclic import DEFAULT_ALPHABET, DEFAULT_WORD_SIZE, MAX_LENGTH
+
+
+class CyclicDialog(QDialog):
+    """Query the length, alphabet and word size of a cyclic pattern that is sent to the inferior"""
+    def __init__(self, parent: QWidget, alphabet: bytes = DEFAULT_ALPHABET, word_size: int = DEFAULT_WORD_SIZE):
+        super().__init__(parent)
+        self.setWindowTitle("Send Cyclic Pattern")
+        self.length_input = QSpinBox(self)
+        self.length_input.setRange(1, MAX_LENGTH)
+        self.length_input.setValue(200)
+        self.alphabet_input = QLineEdit(alphabet.decode(), self)
+        self.word_size_input = QComboBox(self)
+        self.word_size_input.addItems(["4", "8"])
+        self.word_size_input.setCurrentText(str(word_size))
+        self.newline_input = QCheckBox("Append newline", self)
+        self.newline_input.setChecked(True)
+
+        button_box = QDialogButtonBox(Qt.Orientation.Horizontal)
+        send_button = QPushButton("Send")
+        send_button.setIcon(QIcon.fromTheme("mail-send"))
+        send_button.clicked.connect(self.accept)
+        cancel_button = QPushButton("Cancel")
+        cancel_button.setIcon(QIcon.fromTheme("dialog-cancel"))
+        cancel_button.clicked.connect(self.reject)
+        button_box.addButton(send_button, QDialogButtonBox.ButtonRole.AcceptRole)
+        button_box.addButton(cancel_button, QDialogButtonBox.ButtonRole.RejectRole)
+
+        layout = QFormLayout()
+        layout.addRow("Length:", self.length_input)
+        layout.addRow("Alphabet:", self.alphabet_input)
+        layout.addRow("Word size:", self.word_size_input)
+        layout.addRow(self.newline_input)
+        layout.addRow(button_box)
+        self.setLayout(layout)
+
+    def alphabet(self) -> bytes:
+        return self.alphabet_input.text().encode()
+
+    def word_size(self) -> int:
+        return int(self.word_size_input.currentText())
@@ -1,16 +1,313 @@
-from typing import TYPE_CHECKING
+import logging
+import math
+from typing import TYPE_CHECKING, Any, Callable
 
-from PySide6.QtWidgets import QSplitter
+from PySide6.QtCore import Qt, Signal, Slot, QAbstractTableModel, QModelIndex, QPersistentModelIndex
+from PySide6.QtGui import QColor, QFont
+from PySide6.QtWidgets import QSplitter, QTableView, QHeaderView, QAbstractItemView
 
-from gui.custom_widgets.context_text_widget import ContextTextWidget
+from gui.breakpoints import BreakpointTable
+from gui.constants import PwndbgGuiConstants
+from gui.coverage import CoverageMap, SessionCoverage
+from gui.custom_widgets.widget_setup import setup_context_box, setup_table_view
+from gui.disassembly_cache import DisassemblyCache, DisassembledFunction, Instruction
+from gui.process_memory import ProcessMemory
 
 # Prevent circular import error
 if TYPE_CHECKING:
     from gui.pwndbg_gui import PwnDbgGui
 
+logger = logging.getLogger(__file__)
+
+
+class DisassemblyModel(QAbstractTableModel):
+    """Table model for the instructions of one disassembled function"""
+    GUTTER, HITS, ADDRESS, OFFSET, BYTES, INSTRUCTION = range(6)
+    HEADERS = ["", "Hits", "Address", "Offset", "Bytes", "Instruction"]
+
+    def __init__(self, coverage: CoverageMap, breakpoints: BreakpointTable, parent=None):
+        super().__init__(parent)
+        self.function: DisassembledFunction | None = None
+        # Hit counts of the executed instructions, shown as a heatmap next to the gutter
+        self.coverage = coverage
+        self.max_hits = 0
+        self.pc_row = -1
+        # The breakpoints of the session in front, shared with the breakpoints pane
+        self.breakpoints = breakpoints
+        self.bold_font = QFont(PwndbgGuiConstants.FONT)
+        self.bold_font.setBold(True)
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        if parent.isValid() or self.function is None:
+            return 0
+        return len(self.function.instructions)
+
+    def columnCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section: int, orientation: Qt.Orientation, role=Qt.ItemDataRole.DisplayRole) -> Any:
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            return self.HEADERS[section]
+        return None
+
+    def data(self, index: QModelIndex | QPersistentModelIndex, role=Qt.ItemDataRole.DisplayRole) -> Any:
+        if not index.isValid() or self.function is None:
+            return None
+        inst: Instruction = self.function.instructions[index.row()]
+        column = index.column()
+        if role == Qt.ItemDataRole.DisplayRole:
+            if column == self.GUTTER:
+                return self.breakpoint_marker(inst.address) + ("►" if index.row() == self.pc_row else "")
+            elif column == self.HITS:
+                hits = self.coverage.count(inst.address)
+                return str(hits) if hits > 0 else ""
+            elif column == self.ADDRESS:
+                return hex(inst.address)
+            elif column == self.OFFSET:
+                return f"<{inst.function}+{inst.offset}>" if inst.function else ""
+            elif column == self.BYTES:
+                return inst.opcodes
+            return inst.text
+        elif role == Qt.ItemDataRole.ForegroundRole:
+            if column == self.GUTTER:
+                return QColor(PwndbgGuiConstants.RED)
+            elif column == self.ADDRESS:
+                return QColor(PwndbgGuiConstants.LIGHT_BLUE)
+            elif column in (self.OFFSET, self.BYTES):
+                return QColor(PwndbgGuiConstants.LIGHT_GRAY)
+        elif role == Qt.ItemDataRole.BackgroundRole and column == self.HITS:
+            return self.heat_color(self.coverage.count(inst.address))
+        elif role == Qt.ItemDataRole.BackgroundRole and index.row() == self.pc_row:
+            return QColor(66, 66, 66)
+        elif role == Qt.ItemDataRole.FontRole and index.row() == self.pc_row:
+            return self.bold_font
+        elif role == Qt.ItemDataRole.ToolTipRole and column == self.GUTTER:
+            return "Click to toggle a breakpoint"
+        elif role == Qt.ItemDataRole.TextAlignmentRole and column == self.HITS:
+            return Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter
+        return None
+
+    def breakpoint_marker(self, address: int) -> str:
+        number = self.breakpoints.at_address(address)
+        if number is None:
+            return " "
+        return "●" if self.breakpoints.breakpoints[number].get("enabled") == "y" else "○"
+
+    def heat_color(self, hits: int) -> QColor | None:
+        """Color the hits on a logarithmic scale from blue (rarely executed) to red (hottest instruction)"""
+        if hits == 0 or self.max_hits == 0:
+            return None
+        heat = math.log(hits) / math.log(self.max_hits) if self.max_hits > 1 else 1.0
+        return QColor.fromHsv(int(240 * (1 - heat)), 200, 150)
+
+    def function_hits(self) -> int:
+        """The total hits of all instructions of the shown function"""
+        if self.function is None:
+            return 0
+        return sum(self.coverage.count(inst.address) for inst in self.function.instructions)
+
+    def update_coverage(self):
+        """Repaint the hits after the coverage changed"""
+        self.max_hits = self.coverage.max_count()
+        if self.rowCount() > 0:
+            self.dataChanged.emit(self.index(0, self.HITS), self.index(self.rowCount() - 1, self.HITS))
+
+    def set_function(self, function: DisassembledFunction | None):
+        """Replace the shown function, only done when the pc leaves the currently shown function"""
+        self.beginResetModel()
+        self.function = function
+        self.pc_row = -1
+        self.endResetModel()
+
+    def set_pc(self, address: int) -> int:
+        """
+        Move the pc highlight to the given address, only the old and new rows get repainted
+        :param address: The current pc, must be contained in the shown function
+        :return: The row of the pc
+        """
+        old_row = self.pc_row
+        self.pc_row = self.function.rows.get(address, -1)
+        for row in {old_row, self.pc_row}:
+            if row >= 0:
+                self.dataChanged.emit(self.index(row, 0), self.index(row, self.columnCount() - 1))
+        return self.pc_row
+
+    def update_breakpoints(self):
+        """Repaint the gutter after breakpoints changed, only the visible rows are actually repainted"""
+        if self.rowCount() > 0:
+            self.dataChanged.emit(self.index(0, self.GUTTER), self.index(self.rowCount() - 1, self.GUTTER))
+
+
+class DisasmContextWidget(QTableView):
+    """Virtualized disassembly of the whole current function. Functions are fetched once via "-data-disassemble" and
+    cached, so that stepping inside a function only moves the pc highlight"""
+    # Disassemble the whole function containing the address, addresses are passed as objects as they exceed a C int
+    disassemble_function = Signal(object)
+    # Disassemble the instructions between two addresses
+    disassemble_range = Signal(object, object)
+    # Insert a breakpoint at a location
+    insert_breakpoint = Signal(str)
+    # Delete the breakpoint with the given number
+    delete_breakpoint = Signal(str)
+    # Number of bytes that are disassembled around the pc if it does not belong to any known function
+    FALLBACK_RANGE = 0x80
 
-class DisasmContextWidget(ContextTextWidget):
     def __init__(self, parent: 'PwnDbgGui', title: str, splitter: QSplitter, index: int):
-        super().__init__(parent, title, splitter, index)
+        super().__init__(parent)
         self.setObjectName("disasm")
-        self.setup_widget_layout(parent, title, splitter, index)
+        self.cache = DisassemblyCache()
+        # Used to check that cached functions still match the code in memory
+        self.memory = parent.process_memory
+        self.disasm_model = DisassemblyModel(parent.coverage.hits, parent.breakpoints, self)
+        self.setModel(self.disasm_model)
+        # The address for which a disassembly was requested and whether the whole function was requested
+        self.pending_address: int | None = None
+        self.pending_function = False
+        self.current_pc: int | None = None
+        # An address that was picked to be shown (e.g. in the symbol browser), it is scrolled to once disassembled
+        self.focus_address: int | None = None
+        self.title = title
+        self.setup_view()
+        self.context_box = setup_context_box(self, parent, title, splitter, index)
+        self.clicked.connect(self.handle_click)
+
+    def setup_view(self):
+        """Configure the table so that only the visible rows are laid out and painted"""
+        setup_table_view(self)
+        header = self.horizontalHeader()
+        header.setSectionResizeMode(QHeaderView.ResizeMode.Interactive)
+        header.resizeSection(DisassemblyModel.GUTTER, self.fontMetrics().horizontalAdvance("●►") + 8)
+        header.resizeSection(DisassemblyModel.HITS, self.fontMetrics().horizontalAdvance("9999999") + 8)
+        header.resizeSection(DisassemblyModel.ADDRESS, self.fontMetrics().horizontalAdvance("0x7fffffffffff") + 8)
+        # The hits are only shown once there is coverage
+        self.setColumnHidden(DisassemblyModel.HITS, True)
+
+    @Slot(dict)
+    def receive_frame(self, payload: dict):
+        """
+        Callback for receiving the result of "-stack-info-frame" from the GDB reader
+        :param payload: The MI payload containing the current "frame"
+        """
+        frame = payload.get("frame")
+        if frame is None or "addr" not in frame:
+            return
+        self.current_pc = int(frame["addr"], 16)
+        function = self.cache.find(self.current_pc, self.read_memory())
+        if function is not None:
+            self.show_function(function)
+            return
+        logger.debug("Disassembling function at %s", hex(self.current_pc))
+        self.pending_address = self.current_pc
+        self.pending_function = True
+        self.disassemble_function.emit(self.current_pc)
+
+    @Slot(dict)
+    def receive_disassembly(self, payload: dict):
+        """
+        Callback for receiving the result of "-data-disassemble" from the GDB reader
+        :param payload: The MI payload containing the "asm_insns" or an error "msg"
+        """
+        if self.pending_address is None:
+            return
+        instructions = payload.get("asm_insns")
+        if not instructions:
+            if self.pending_function:
+                # The pc does not belong to a known function (e.g. no symbols), fall back to a fixed range
+                self.pending_function = False
+                self.disassemble_range.emit(self.pending_address, self.pending_address + self.FALLBACK_RANGE)
+            else:
+                logger.warning("Could not disassemble %s: %s", hex(self.pending_address), payload.get("msg"))
+                self.pending_address = None
+            return
+        self.pending_address = None
+        self.show_function(self.cache.add([Instruction.from_mi(entry) for entry in instructions]))
+
+    @Slot(object)
+    def show_address(self, address: int):
+        """
+        Show the function containing an address without moving the pc, e.g. for a symbol picked by the user
+        :param address: The address to scroll to
+        """
+        self.focus_address = address
+        function = self.cache.find(address, self.read_memory())
+        if function is not None:
+            self.show_function(function)
+            return
+        self.pending_address = address
+        self.pending_function = True
+        self.disassemble_function.emit(address)
+
+    def read_memory(self) -> Callable[[int, int], bytes | None] | None:
+        """The function to read the inferior's memory with, or None if we cannot read it ourselves"""
+        return self.memory.read if self.memory.available() else None
+
+    def show_function(self, function: DisassembledFunction):
+        """Show the given function and highlight the pc within it"""
+        if self.disasm_model.function is not function:
+            self.disasm_model.set_function(function)
+            self.update_title()
+        if self.focus_address is not None and self.focus_address in function.rows:
+            self.disasm_model.set_pc(self.current_pc if self.current_pc is not None else -1)
+            row = function.rows[self.focus_address]
+            self.focus_address = None
+            self.selectRow(row)
+            self.scrollTo(self.disasm_model.index(row, DisassemblyModel.INSTRUCTION),
+                          QAbstractItemView.ScrollHint.PositionAtTop)
+            return
+        self.focus_address = None
+        if self.current_pc is None:
+            return
+        row = self.disasm_model.set_pc(self.current_pc)
+        if row < 0:
+            return
+        index = self.disasm_model.index(row, DisassemblyModel.INSTRUCTION)
+        if not self.viewport().rect().contains(self.visualRect(index)):
+            self.scrollTo(index, QAbstractItemView.ScrollHint.PositionAtCenter)
+
+    @Slot(QModelIndex)
+    def handle_click(self, index: QModelIndex):
+        """Toggle a breakpoint when the user clicks into the gutter"""
+        if index.column() != DisassemblyModel.GUTTER or self.disasm_model.function is None:
+            return
+        address = self.disasm_model.function.instructions[index.row()].address
+        # The gutter is repainted once GDB reports the change
+        number = self.disasm_model.breakpoints.at_address(address)
+        if number is None:
+            self.insert_breakpoint.emit(f"*{hex(address)}")
+        else:
+            self.delete_breakpoint.emit(number)
+
+    @Slot()
+    def update_breakpoints(self):
+        self.disasm_model.update_breakpoints()
+
+    @Slot()
+    def update_coverage(self):
+        """Repaint the heatmap and the hits of the shown function after the coverage changed"""
+        self.disasm_model.update_coverage()
+        self.setColumnHidden(DisassemblyModel.HITS, self.disasm_model.max_hits == 0)
+        self.update_title()
+
+    def update_title(self):
+        """Show the total hits of the shown function in the title, if there is any coverage"""
+        if self.disasm_model.max_hits == 0 or self.disasm_model.function is None:
+            self.context_box.setTitle(self.title)
+            return
+        self.context_box.setTitle(f"{self.title} ({self.disasm_model.function_hits()} hits in function)")
+
+    @Slot()
+    def set_session(self, memory: ProcessMemory, coverage: SessionCoverage):
+        """
+        Show the heatmap of the session that was brought to the front, the cached functions belong to another process
+        :param memory: The memory of the session's inferior
+        :param coverage: The coverage recorded in the session
+        """
+        self.memory = memory
+        self.disasm_model.coverage = coverage.hits
+        self.clear_cache()
+
+    def clear_cache(self):
+        """Drop all cached disassembly, e.g. when a new binary is loaded"""
+        self.cache.clear()
+        self.disasm_model.set_function(None)
+        self.update_title()
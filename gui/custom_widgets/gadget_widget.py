@@ -0,0 +1,204 @@
+import logging
+import os
+from typing import List, Any, Dict, TYPE_CHECKING
+
+from PySide6.QtCore import Qt, Signal, Slot, QAbstractTableModel, QModelIndex, QPersistentModelIndex
+from PySide6.QtGui import QColor, QShowEvent
+from PySide6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QTableView, QApplication
+
+from gui.constants import PwndbgGuiConstants
+from gui.custom_widgets.widget_setup import setup_table_view
+from gui.process_memory import ProcessMemory
+
+# Prevent circular import error
+if TYPE_CHECKING:
+    from gui.pwndbg_gui import PwnDbgGui
+
+logger = logging.getLogger(__file__)
+
+
+class GadgetModel(QAbstractTableModel):
+    """Table model of the gadgets of all indexed objfiles. Gadgets are stored relative to the load base of their
+    objfile, so rebasing after a restart with a different ASLR slide only changes the bases"""
+    ADDRESS, GADGET, OBJFILE = range(3)
+    HEADERS = ["Address", "Gadget", "Objfile"]
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        # Paths of the indexed objfiles and their current load base (None if the objfile is not mapped)
+        self.objfiles: List[str] = []
+        self.bases: List[int | None] = []
+        # Gadgets in the form of [text, offset to the load base, objfile index], shortest gadgets first
+        self.gadgets: List[List[Any]] = []
+        # Indices into self.gadgets of the gadgets matching the current filter
+        self.shown: List[int] = []
+        self.query = ""
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.shown)
+
+    def columnCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section: int, orientation: Qt.Orientation, role=Qt.ItemDataRole.DisplayRole) -> Any:
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            return self.HEADERS[section]
+        return None
+
+    def data(self, index: QModelIndex | QPersistentModelIndex, role=Qt.ItemDataRole.DisplayRole) -> Any:
+        if not index.isValid():
+            return None
+        text, offset, objfile = self.gadgets[self.shown[index.row()]]
+        if role == Qt.ItemDataRole.DisplayRole:
+            if index.column() == self.ADDRESS:
+                return self.address_text(offset, objfile)
+            elif index.column() == self.GADGET:
+                return text
+            return os.path.basename(self.objfiles[objfile])
+        elif role == Qt.ItemDataRole.ToolTipRole and index.column() == self.OBJFILE:
+            return self.objfiles[objfile]
+        elif role == Qt.ItemDataRole.ForegroundRole and index.column() == self.ADDRESS:
+            return QColor(PwndbgGuiConstants.RED)
+        return None
+
+    def address_text(self, offset: int, objfile: int) -> str:
+        """The address of a gadget, or its offset into the objfile if the objfile is currently not mapped"""
+        base = self.bases[objfile]
+        return hex(offset) if base is None else hex(base + offset)
+
+    def set_index(self, path: str, gadgets: List[List[Any]], base: int | None):
+        """Add the gadgets of an objfile, replacing its previous index"""
+        self.beginResetModel()
+        if path in self.objfiles:
+            objfile = self.objfiles.index(path)
+            self.gadgets = [gadget for gadget in self.gadgets if gadget[2] != objfile]
+            self.bases[objfile] = base
+        else:
+            objfile = len(self.objfiles)
+            self.objfiles.append(path)
+            self.bases.append(base)
+        self.gadgets.extend([text, offset, objfile] for text, offset in gadgets)
+        self.gadgets.sort(key=lambda gadget: (len(gadget[0]), gadget[0]))
+        self.shown = self.matching(self.query)
+        self.endResetModel()
+
+    def rebase(self, bases: Dict[str, int]):
+        """Update the load bases of the objfiles, objfiles missing from bases are no longer mapped"""
+        new_bases = [bases.get(path) for path in self.objfiles]
+        if new_bases == self.bases:
+            return
+        self.bases = new_bases
+        if len(self.shown) > 0:
+            self.dataChanged.emit(self.index(0, self.ADDRESS), self.index(len(self.shown) - 1, self.ADDRESS))
+
+    def matching(self, query: str) -> List[int]:
+        """Get the gadgets containing all "; " separated parts of the query, ignoring case"""
+        parts = [part.strip() for part in query.lower().split(";") if part.strip()]
+        if len(parts) == 0:
+            return list(range(len(self.gadgets)))
+        return [index for index, gadget in enumerate(self.gadgets)
+                if all(part in gadget[0] for part in parts)]
+
+    def set_filter(self, query: str):
+        self.beginResetModel()
+        self.query = query
+        self.shown = self.matching(query)
+        self.endResetModel()
+
+
+class GadgetWidget(QWidget):
+    """Searchable list of the ROP gadgets of the inferior's objfiles. The index is built in the background by the
+    GadgetIndexer when the pane is shown and queried locally, so searching never involves GDB"""
+    # Request the gadget index of an objfile
+    request_index = Signal(str)
+
+    def __init__(self, parent: 'PwnDbgGui'):
+        super().__init__(parent)
+        self.setObjectName("gadgets")
+        self.memory = parent.process_memory
+        self.gadget_model = GadgetModel(self)
+        self.status_label = QLabel("Gadgets are indexed once the inferior is stopped", self)
+        self.filter_input = QLineEdit(self)
+        self.filter_input.setPlaceholderText("Filter, e.g. pop rdi; ret")
+        self.filter_input.setClearButtonEnabled(True)
+        self.filter_input.textChanged.connect(self.gadget_model.set_filter)
+        self.filter_input.textChanged.connect(self.update_status)
+        self.gadget_view = QTableView(self)
+        # Objfiles that were requested from the indexer in the form of {path: modification time}
+        self.requested: Dict[str, float] = {}
+        # Current load bases of the mapped objfiles in the form of {path: base}
+        self.bases: Dict[str, int] = {}
+        self.setup_widget_layout()
+
+    def setup_widget_layout(self):
+        header_layout = QHBoxLayout()
+        header_layout.addWidget(self.status_label)
+        header_layout.addStretch()
+        header_layout.addWidget(self.filter_input)
+        self.gadget_view.setModel(self.gadget_model)
+        setup_table_view(self.gadget_view)
+        self.gadget_view.doubleClicked.connect(self.handle_double_click)
+        layout = QVBoxLayout()
+        layout.addLayout(header_layout)
+        layout.addWidget(self.gadget_view)
+        self.setLayout(layout)
+
+    def showEvent(self, event: QShowEvent) -> None:
+        super().showEvent(event)
+        self.update_objfiles()
+
+    def set_memory(self, memory: ProcessMemory):
+        """Read the load bases from the memory of the session that was brought to the front"""
+        self.memory = memory
+
+    @Slot(bool)
+    def handle_inferior_state(self, stopped: bool):
+        """Check for new objfiles and load bases on every stop, but only while the pane is visible"""
+        if stopped and self.isVisible():
+            self.update_objfiles()
+
+    def update_objfiles(self):
+        """Rebase the known gadgets with the current mappings and request the index of new or changed objfiles"""
+        if self.memory.pid == 0:
+            return
+        try:
+            self.bases = self.memory.objfile_bases()
+        except OSError as e:
+            logger.debug("Cannot read mappings of pid %d: %s", self.memory.pid, e)
+            return
+        self.gadget_model.rebase(self.bases)
+        for path in self.bases:
+            try:
+                modified = os.stat(path).st_mtime
+            except OSError:
+                continue
+            if self.requested.get(path) != modified:
+                self.requested[path] = modified
+                self.status_label.setText(f"Indexing {os.path.basename(path)} ...")
+                self.request_index.emit(path)
+
+    @Slot(str, list)
+    def receive_index(self, path: str, gadgets: List[List[Any]]):
+        """
+        Callback for the gadget index of an objfile from the GadgetIndexer
+        :param path: The path of the indexed objfile
+        :param gadgets: The gadgets in the form of [[text, offset to the load base], ...]
+        """
+        self.gadget_model.set_index(path, gadgets, self.bases.get(path))
+        self.update_status()
+
+    @Slot(str)
+    def receive_status(self, status: str):
+        self.status_label.setText(status)
+
+    @Slot()
+    def update_status(self):
+        self.status_label.setText(f"{len(self.gadget_model.shown)} of {len(self.gadget_model.gadgets)} gadgets in "
+                                  f"{len(self.gadget_model.objfiles)} objfiles")
+
+    @Slot(QModelIndex)
+    def handle_double_click(self, index: QModelIndex):
+        """Copy the address of the double-clicked gadget into the clipboard"""
+        address = self.gadget_model.data(self.gadget_model.index(index.row(), GadgetModel.ADDRESS))
+        QApplication.clipboard().setText(address)
+        self.status_label.setText(f"Copied {address}")
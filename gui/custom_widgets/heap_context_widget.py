@@ -1,11 +1,15 @@
 import logging
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Dict, List, Any, Tuple
 
-from PySide6.QtCore import Qt, Signal, Slot
-from PySide6.QtWidgets import QGroupBox, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QSplitter, QWidget
+from PySide6.QtCore import Qt, Signal, Slot, QAbstractTableModel, QModelIndex, QPersistentModelIndex
+from PySide6.QtGui import QColor
+from PySide6.QtWidgets import QGroupBox, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QSplitter, QWidget, QTableView, \
+    QTreeWidget, QTreeWidgetItem
 
+from gui.constants import PwndbgGuiConstants
 from gui.custom_widgets.context_text_edit import ContextTextEdit
-from gui.parser import ContextParser
+from gui.custom_widgets.widget_setup import setup_table_view
+from gui.parser import ContextParser, parse_json_report
 
 # Prevent circular import error
 if TYPE_CHECKING:
@@ -14,15 +18,100 @@ if TYPE_CHECKING:
 logger = logging.getLogger(__file__)
 
 
+class HeapChunkModel(QAbstractTableModel):
+    """Table model of all heap chunks, with the changes since the previous stop"""
+    ADDRESS, SIZE, STATUS, CHANGE = range(4)
+    HEADERS = ["Address", "Size", "Status", "Change"]
+    FREE_STATUSES = ("free", "tcache", "fast")
+    CHANGE_COLORS = {"new": PwndbgGuiConstants.GREEN, "freed": PwndbgGuiConstants.RED,
+                     "modified": PwndbgGuiConstants.YELLOW}
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        # The current heap state in the form of {address: (size, status)}
+        self.states: Dict[int, Tuple[int, str]] = {}
+        # Rows in the form of [address, size, status, change] sorted by address
+        self.rows: List[List[Any]] = []
+        self.background_colors = {}
+        for change, color in self.CHANGE_COLORS.items():
+            self.background_colors[change] = QColor(color)
+            self.background_colors[change].setAlpha(60)
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section: int, orientation: Qt.Orientation, role=Qt.ItemDataRole.DisplayRole) -> Any:
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            return self.HEADERS[section]
+        return None
+
+    def data(self, index: QModelIndex | QPersistentModelIndex, role=Qt.ItemDataRole.DisplayRole) -> Any:
+        if not index.isValid():
+            return None
+        row = self.rows[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            if index.column() in (self.ADDRESS, self.SIZE):
+                return hex(row[index.column()])
+            return row[index.column()]
+        elif role == Qt.ItemDataRole.BackgroundRole:
+            return self.background_colors.get(row[self.CHANGE])
+        elif role == Qt.ItemDataRole.ForegroundRole and index.column() == self.ADDRESS:
+            return QColor(PwndbgGuiConstants.LIGHT_BLUE)
+        return None
+
+    def apply_report(self, report: dict) -> Dict[str, int]:
+        """
+        Apply a (full or delta) report of the gui-heap command and compare it to the previous state
+        :param report: The parsed JSON report
+        :return: The number of chunks per kind of change
+        """
+        states = {} if report["full"] else dict(self.states)
+        for address in report["removed"]:
+            states.pop(address, None)
+        modified = set()
+        for address, size, status, was_modified in report["chunks"]:
+            states[address] = (size, status)
+            if was_modified:
+                modified.add(address)
+        counts = {"new": 0, "freed": 0, "modified": 0, "merged": len(set(self.states) - set(states))}
+        rows = []
+        for address in sorted(states):
+            size, status = states[address]
+            change = ""
+            if self.states:
+                previous = self.states.get(address)
+                if previous is None:
+                    change = "new"
+                elif status in self.FREE_STATUSES and previous[1] not in self.FREE_STATUSES:
+                    change = "freed"
+                elif address in modified or previous != (size, status):
+                    change = "modified"
+            if change:
+                counts[change] += 1
+            rows.append([address, size, status, change])
+        self.beginResetModel()
+        self.states = states
+        self.rows = rows
+        self.endResetModel()
+        return counts
+
+
 class HeapContextWidget(QGroupBox):
     # Execute "try_free" in pwndbg
     get_try_free = Signal(str)
+    # Tell the GdbHandler which heap report we have, or -1 if we need a full report
+    heap_generation = Signal(int)
 
     def __init__(self, parent: 'PwnDbgGui'):
         super().__init__(parent)
         self.parser = ContextParser()
-        self.bins_output: ContextTextEdit | None = None
-        self.heap_output: ContextTextEdit | None = None
+        self.chunks_model = HeapChunkModel(self)
+        self.chunks_view: QTableView | None = None
+        self.bins_view: QTreeWidget | None = None
+        self.summary_label: QLabel | None = None
         self.try_free_output: ContextTextEdit | None = None
         self.try_free_input: QLineEdit | None = None
         # The "top" layout of the whole heap context widget
@@ -33,7 +122,6 @@ class HeapContextWidget(QGroupBox):
         self.setAlignment(Qt.AlignmentFlag.AlignCenter)
         self.setFlat(True)
         self.setTitle("Heap")
-        self.get_try_free.connect(parent.gdb_handler.execute_try_free)
         # Set up the interior layout of this widget
         self.setup_widget_layout()
         # Insert this widget into the UI
@@ -44,10 +132,20 @@ class HeapContextWidget(QGroupBox):
         output_splitter.setOrientation(Qt.Orientation.Horizontal)
         output_splitter.setObjectName("heap_output_splitter")
 
-        self.heap_output = ContextTextEdit(self)
-        output_splitter.addWidget(self.heap_output)
-        self.bins_output = ContextTextEdit(self)
-        output_splitter.addWidget(self.bins_output)
+        chunks_layout = QVBoxLayout()
+        self.summary_label = QLabel(self)
+        chunks_layout.addWidget(self.summary_label)
+        self.chunks_view = QTableView(self)
+        self.chunks_view.setModel(self.chunks_model)
+        setup_table_view(self.chunks_view)
+        chunks_layout.addWidget(self.chunks_view)
+        chunks_widget = QWidget(self)
+        chunks_widget.setLayout(chunks_layout)
+        output_splitter.addWidget(chunks_widget)
+        self.bins_view = QTreeWidget(self)
+        self.bins_view.setHeaderLabels(["Bin", "Chunks"])
+        self.bins_view.setUniformRowHeights(True)
+        output_splitter.addWidget(self.bins_view)
         self.context_splitter.addWidget(output_splitter)
 
         # The overall element of the TryFree block, containing the input mask and output box
@@ -86,10 +184,31 @@ class HeapContextWidget(QGroupBox):
 
     @Slot(bytes)
     def receive_heap_result(self, result: bytes):
-        """Callback for receiving the result of the 'heap' command from the GDB reader"""
-        self.heap_output.add_content(self.parser.to_html(result))
+        """Callback for receiving the JSON report of the 'gui-heap' command from the GDB reader"""
+        try:
+            report = parse_json_report(result)
+        except ValueError:
+            # E.g. the process is not running, the output is GDB's error message
+            report = {"error": result.decode(errors="replace").strip()}
+        if "error" in report:
+            self.summary_label.setText(report["error"])
+            self.heap_generation.emit(-1)
+            return
+        scroll_value = self.chunks_view.verticalScrollBar().value()
+        counts = self.chunks_model.apply_report(report)
+        self.chunks_view.verticalScrollBar().setValue(scroll_value)
+        self.heap_generation.emit(report["generation"])
+        self.summary_label.setText(f"{len(self.chunks_model.rows)} chunks in {hex(report['heap'][0])}-"
+                                   f"{hex(report['heap'][1])} | {counts['new']} new, {counts['freed']} freed, "
+                                   f"{counts['modified']} modified, {counts['merged']} merged")
+        self.update_bins(report["bins"])
 
-    @Slot(bytes)
-    def receive_bins_result(self, result: bytes):
-        """Callback for receiving the result of the 'bins' command from the GDB reader"""
-        self.bins_output.add_content(self.parser.to_html(result))
+    def update_bins(self, bins: Dict[str, Dict[str, List[int]]]):
+        """Show the non-empty bins as a tree of bin kind -> bin size -> chunks"""
+        self.bins_view.clear()
+        for kind, sizes in bins.items():
+            kind_item = QTreeWidgetItem(self.bins_view, [kind, str(sum(len(chain) for chain in sizes.values()))])
+            for size, chain in sizes.items():
+                size_item = QTreeWidgetItem(kind_item, [hex(int(size)), " → ".join(hex(address) for address in chain)])
+                size_item.setForeground(1, QColor(PwndbgGuiConstants.LIGHT_BLUE))
+            kind_item.setExpanded(True)
@@ -0,0 +1,238 @@
+import logging
+from typing import List, Dict, Any, Tuple
+
+from PySide6.QtCore import Qt, Signal, Slot, QAbstractTableModel, QModelIndex, QPersistentModelIndex, \
+    QSortFilterProxyModel, QTimer
+from PySide6.QtGui import QColor, QIcon
+from PySide6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QTableView, QLineEdit, \
+    QListWidget, QListWidgetItem, QSplitter
+
+from gui.constants import PwndbgGuiConstants
+from gui.custom_widgets.widget_setup import setup_table_view
+
+logger = logging.getLogger(__file__)
+
+
+class LogModel(QAbstractTableModel):
+    """Table model of the hits of all logpoints, which are appended in batches while the inferior keeps running"""
+    TIME, THREAD, LOGPOINT, VALUES = range(4)
+    HEADERS = ["Time (ms)", "Thread", "Logpoint", "Values"]
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        # Hits in the form of (time, thread, logpoint id, values), the values are joined once when a hit arrives
+        self.hits: List[Tuple[float, int, int, str]] = []
+        # Hits that arrived after the log was full
+        self.dropped = 0
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.hits)
+
+    def columnCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section: int, orientation: Qt.Orientation, role=Qt.ItemDataRole.DisplayRole) -> Any:
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            return self.HEADERS[section]
+        return None
+
+    def data(self, index: QModelIndex | QPersistentModelIndex, role=Qt.ItemDataRole.DisplayRole) -> Any:
+        if not index.isValid():
+            return None
+        hit = self.hits[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            if index.column() == self.TIME:
+                return f"{hit[0]:.3f}"
+            return str(hit[index.column()]) if index.column() != self.VALUES else hit[self.VALUES]
+        elif role == Qt.ItemDataRole.ForegroundRole and index.column() == self.VALUES:
+            return QColor(PwndbgGuiConstants.LIGHT_BLUE)
+        elif role == Qt.ItemDataRole.TextAlignmentRole and index.column() == self.TIME:
+            return Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter
+        return None
+
+    def append_hits(self, hits: List[Tuple[float, int, int, str]]):
+        """Append a streamed batch of hits, up to the size limit of the log"""
+        room = PwndbgGuiConstants.LOGPOINT_LOG_LIMIT - len(self.hits)
+        self.dropped += max(0, len(hits) - room)
+        hits = hits[:room]
+        if not hits:
+            return
+        self.beginInsertRows(QModelIndex(), len(self.hits), len(self.hits) + len(hits) - 1)
+        self.hits.extend(hits)
+        self.endInsertRows()
+
+    def clear(self):
+        self.beginResetModel()
+        self.hits = []
+        self.dropped = 0
+        self.endResetModel()
+
+
+class LogFilterModel(QSortFilterProxyModel):
+    """Filters the hits by a substring of their values. Matches the joined values directly instead of asking the
+    source model for the display text of every cell, which keeps filtering a full log fast"""
+    def __init__(self, log_model: LogModel, parent=None):
+        super().__init__(parent)
+        self.setSourceModel(log_model)
+        self.log_model = log_model
+        self.needle = ""
+
+    def set_needle(self, needle: str):
+        self.needle = needle.lower()
+        self.invalidateFilter()
+
+    def filterAcceptsRow(self, source_row: int, source_parent: QModelIndex | QPersistentModelIndex) -> bool:
+        return not self.needle or self.needle in self.log_model.hits[source_row][LogModel.VALUES].lower()
+
+
+class LogpointWidget(QWidget):
+    """Logpoints log the values of expressions on every hit without stopping the inferior. The hits are streamed in
+    batches by the gui-logpoint command and collected in a filterable log"""
+    # Add a logpoint at a location with the expressions that are logged on every hit
+    add_logpoint = Signal(str, list)
+    # Delete the logpoint with the given id
+    delete_logpoint = Signal(int)
+    # Request the logpoints of the session in front
+    request_logpoints = Signal()
+
+    def __init__(self, parent: QWidget):
+        super().__init__(parent)
+        self.setObjectName("logpoints")
+        # The logpoints in the form of {id: info}, where info contains the "location", "expressions" and "hits"
+        self.logpoints: Dict[int, dict] = {}
+        self.log_model = LogModel(self)
+        self.proxy_model = LogFilterModel(self.log_model, self)
+        self.location_input = QLineEdit(self)
+        self.location_input.setPlaceholderText("Location, e.g. malloc or *0x401136")
+        self.expressions_input = QLineEdit(self)
+        self.expressions_input.setPlaceholderText("Expressions separated by ';', e.g. $rdi; *(int *)$rsi")
+        self.expressions_input.returnPressed.connect(self.handle_add)
+        self.add_button = QPushButton("Add", self)
+        self.add_button.setIcon(QIcon.fromTheme("list-add"))
+        self.add_button.clicked.connect(self.handle_add)
+        self.delete_button = QPushButton("Delete", self)
+        self.delete_button.setIcon(QIcon.fromTheme("edit-delete"))
+        self.delete_button.clicked.connect(self.handle_delete)
+        self.clear_button = QPushButton("Clear log", self)
+        self.clear_button.setIcon(QIcon.fromTheme("edit-clear"))
+        self.clear_button.clicked.connect(self.clear_log)
+        self.filter_input = QLineEdit(self)
+        self.filter_input.setPlaceholderText("Filter values")
+        # Filters once the user paused typing, as every filter run goes through the whole log
+        self.filter_timer = QTimer(self)
+        self.filter_timer.setSingleShot(True)
+        self.filter_timer.setInterval(200)
+        self.filter_timer.timeout.connect(self.apply_filter)
+        self.filter_input.textChanged.connect(self.filter_timer.start)
+        self.status_label = QLabel("No hits", self)
+        self.logpoint_list = QListWidget(self)
+        self.log_view = QTableView(self)
+        self.setup_widget_layout()
+
+    @Slot()
+    def apply_filter(self):
+        self.proxy_model.set_needle(self.filter_input.text())
+
+    def setup_widget_layout(self):
+        header_layout = QHBoxLayout()
+        header_layout.addWidget(self.location_input)
+        header_layout.addWidget(self.expressions_input, 2)
+        header_layout.addWidget(self.add_button)
+        header_layout.addWidget(self.delete_button)
+        filter_layout = QHBoxLayout()
+        filter_layout.addWidget(self.status_label)
+        filter_layout.addStretch()
+        filter_layout.addWidget(self.filter_input)
+        filter_layout.addWidget(self.clear_button)
+        self.log_view.setModel(self.proxy_model)
+        setup_table_view(self.log_view)
+        splitter = QSplitter(self)
+        splitter.addWidget(self.logpoint_list)
+        splitter.addWidget(self.log_view)
+        splitter.setStretchFactor(1, 3)
+        layout = QVBoxLayout()
+        layout.addLayout(header_layout)
+        layout.addLayout(filter_layout)
+        layout.addWidget(splitter)
+        self.setLayout(layout)
+
+    @Slot()
+    def handle_add(self):
+        location = self.location_input.text().strip()
+        if not location:
+            return
+        expressions = [expression.strip() for expression in self.expressions_input.text().split(";")]
+        self.add_logpoint.emit(location, [expression for expression in expressions if expression])
+
+    @Slot()
+    def handle_delete(self):
+        for item in self.logpoint_list.selectedItems():
+            self.delete_logpoint.emit(item.data(Qt.ItemDataRole.UserRole))
+
+    @Slot()
+    def clear_log(self):
+        self.log_model.clear()
+        self.update_status()
+
+    def reset(self):
+        """Forget the logpoints and hits, e.g. of another session, until the logpoints are listed again"""
+        self.logpoints = {}
+        self.logpoint_list.clear()
+        self.clear_log()
+
+    @Slot(dict)
+    def receive_record(self, record: dict):
+        """
+        Callback for the records streamed by the gui-logpoint command and the logpoints
+        :param record: Either a batch of "hits", an "added" or "deleted" logpoint or all "logpoints"
+        """
+        if "hits" in record:
+            self.receive_hits(record["hits"])
+        elif "added" in record:
+            self.logpoints[record["added"]["id"]] = record["added"]
+            self.location_input.clear()
+            self.expressions_input.clear()
+            self.update_logpoint_list()
+        elif "deleted" in record:
+            self.logpoints.pop(record["deleted"], None)
+            self.update_logpoint_list()
+        elif "logpoints" in record:
+            self.logpoints = {logpoint["id"]: logpoint for logpoint in record["logpoints"]}
+            self.update_logpoint_list()
+
+    def receive_hits(self, hits: List[list]):
+        """Append a batch of hits in the form of [id, time, thread, values] to the log"""
+        rows = []
+        for number, time, thread, values in hits:
+            logpoint = self.logpoints.get(number)
+            if logpoint is None:
+                rows.append((time, thread, number, ", ".join(values)))
+                continue
+            logpoint["hits"] += 1
+            text = ", ".join(f"{expression}={value}" for expression, value in zip(logpoint["expressions"], values))
+            rows.append((time, thread, number, text))
+        self.log_model.append_hits(rows)
+        self.update_logpoint_list()
+        self.update_status()
+
+    def update_logpoint_list(self):
+        """Show the logpoints with their hit counts, the selection is kept"""
+        selected = {item.data(Qt.ItemDataRole.UserRole) for item in self.logpoint_list.selectedItems()}
+        self.logpoint_list.clear()
+        for number, logpoint in self.logpoints.items():
+            item = QListWidgetItem(f"{logpoint['location']} ({logpoint['hits']} hits)", self.logpoint_list)
+            item.setData(Qt.ItemDataRole.UserRole, number)
+            item.setToolTip("\n".join(logpoint["expressions"]))
+            item.setSelected(number in selected)
+
+    def update_status(self):
+        text = f"Hits: {self.log_model.rowCount()}"
+        if self.log_model.dropped:
+            text += f" ({self.log_model.dropped} dropped, the log is full)"
+        self.status_label.setText(text)
+
+    @Slot(dict)
+    def logpoint_finished(self, payload: dict):
+        """Callback for the result of the gui-logpoint command, only relevant if the command failed"""
+        if "msg" in payload:
+            self.status_label.setText(f"Logpoint failed: {payload['msg']}")
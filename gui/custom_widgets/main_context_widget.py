@@ -6,9 +6,12 @@ from typing import TYPE_CHECKING, List
 from PySide6.QtCore import Qt, Signal, Slot, QEvent
 from PySide6.QtGui import QIcon, QTextCursor
 from PySide6.QtWidgets import QGroupBox, QVBoxLayout, QLineEdit, QHBoxLayout, QPushButton, QLabel, QWidget, QComboBox, \
-    QFrame
+    QFrame, QProgressBar, QFileDialog
 from gui.constants import PwndbgGuiConstants
+from gui.custom_widgets.command_completer import CommandCompleter
 from gui.custom_widgets.context_text_edit import ContextTextEdit
+from gui.custom_widgets.cyclic_dialog import CyclicDialog
+from gui.cyclic import cyclic_pattern
 from gui.inferior_handler import InferiorHandler
 from gui.inferior_state import InferiorState
 
@@ -45,32 +48,76 @@ class MainContextWidget(QGroupBox):
     inferior_write = Signal(bytes)
     # Signal to update data in the GUI
     update_gui = Signal(str, bytes)
-    # Send a search request to GDB
-    gdb_search = Signal(list)
+    # Send a search request with the value type and value to GDB
+    gdb_search = Signal(str, str)
+    # Send a search request with the value type, value and snapshot scope to the local snapshot searcher
+    snapshot_search = Signal(str, str, str)
+    # Emitted when a cyclic pattern with a different alphabet or word size is generated, so that the contexts can look
+    # up their values in it
+    cyclic_pattern_changed = Signal(object)
+    # Stream a payload file to the inferior's input in the form of (path, pid of an attached process or 0)
+    stream_payload = Signal(str, int)
+    # Stop streaming the payload
+    cancel_payload = Signal()
 
     def __init__(self, parent: 'PwnDbgGui'):
         super().__init__(parent)
-        self.update_gui.connect(parent.update_pane)
         self.buttons_data = {'s&tart': (self.start, "media-record"), '&r': (self.run, "media-playback-start"), '&c': (self.continue_execution, "media-skip-forward"), '&n': (self.next, "media-seek-forward"),
                              '&s': (self.step, "go-bottom"), 'ni': (self.next_instruction, "go-next"), 'si': (self.step_into, "go-down")}
         # Whether the inferior was attached or started by GDB. If attached, we cannot divert I/O of the inferior via
         # GDB to the tty, so we need to send input via the GdbHandler.
         self.inferior_attached = False
-        self.setup_worker_signals(parent)
+        self.inferior_pid = 0
+        # The command executed by the continue button, replaced by gui-profile while the profiler samples
+        self.continue_command = "c"
+        # The inferior of the session in front, its state decides whether input is sent to GDB or the inferior
+        self.inferior_handler: InferiorHandler | None = None
         self.input_label = QLabel(f"<span style=' color:{PwndbgGuiConstants.RED};'>pwndbg></span>")
         self.output_widget = MainContextOutput(self)
+        # Shows how many stops were skipped during the last storm of stops, hidden otherwise
+        self.skipped_label = QLabel(self)
+        self.skipped_label.setToolTip("Stops that were not shown because the inferior stopped faster than the "
+                                      "refresh rate, the last stop is always shown")
+        self.skipped_label.hide()
         self.input_widget = QLineEdit(self)
         self.search_input_widget = QLineEdit(self)
         self.search_input_widget.returnPressed.connect(self.handle_search_submit)
         self.search_input_widget.setPlaceholderText("Search data...")
         self.search_drop_down = QComboBox(self)
-        self.search_drop_down.addItems(["byte", "word", "dword", "qword", "pointer", "string", "bytes"])
+        self.search_drop_down.addItems(["byte", "word", "dword", "qword", "pointer", "string", "bytes", "regex"])
         self.search_drop_down.setCurrentText("bytes")
         self.search_drop_down.setToolTip("Select the type of data you want to search for")
+        self.search_engine_drop_down = QComboBox(self)
+        # Maps the engine to the snapshot scope, GDB searches the process directly
+        self.search_engines = {"GDB": "", "Snapshot (writable)": "writable", "Snapshot (readable)": "readable"}
+        self.search_engine_drop_down.addItems(list(self.search_engines))
+        self.search_engine_drop_down.setToolTip("Search via GDB or in a snapshot of the mappings that is taken once per "
+                                                "stop, which makes repeated searches fast")
         self.input_widget.returnPressed.connect(self.handle_submit)
         self.input_widget.installEventFilter(self)
+        # Completes commands, registers and symbols from a local index while typing
+        self.completer = CommandCompleter(self.input_widget)
         # The currently selected command in the command history, for when the user presses ↑ and ↓
         self.current_cmd_index = 0
+        # The pattern of the last "cyclic" input, its offsets are annotated in the contexts
+        self.cyclic_pattern = cyclic_pattern()
+        self.cyclic_button = QPushButton("cyclic", self)
+        self.cyclic_button.setIcon(QIcon.fromTheme("format-justify-fill"))
+        self.cyclic_button.setToolTip("Send a cyclic pattern to the inferior, offsets of pattern values in registers "
+                                      "and on the stack are shown on every stop")
+        self.cyclic_button.clicked.connect(self.send_cyclic)
+        self.payload_button = QPushButton("payload", self)
+        self.payload_button.setIcon(QIcon.fromTheme("document-open"))
+        self.payload_button.setToolTip("Stream a file of any size to the inferior's input")
+        self.payload_button.clicked.connect(self.send_payload)
+        self.payload_progress = QProgressBar(self)
+        self.payload_progress.setMaximumWidth(250)
+        self.payload_progress.hide()
+        self.payload_cancel_button = QPushButton(self)
+        self.payload_cancel_button.setIcon(QIcon.fromTheme("process-stop"))
+        self.payload_cancel_button.setToolTip("Stop streaming the payload")
+        self.payload_cancel_button.clicked.connect(self.cancel_payload)
+        self.payload_cancel_button.hide()
         self.buttons = QHBoxLayout()
         self.setup_buttons()
         self.setup_widget_layout()
@@ -85,16 +132,22 @@ class MainContextWidget(QGroupBox):
         top_line_layout = QHBoxLayout()
         top_line_layout.addWidget(self.search_input_widget)
         top_line_layout.addWidget(self.search_drop_down)
+        top_line_layout.addWidget(self.search_engine_drop_down)
         separator_line = QFrame(self)
         separator_line.setFrameShape(QFrame.Shape.VLine)
         separator_line.setFrameShadow(QFrame.Shadow.Sunken)
         top_line_layout.addWidget(separator_line)
+        top_line_layout.addWidget(self.cyclic_button)
+        top_line_layout.addWidget(self.payload_button)
         top_line_layout.addLayout(self.buttons)
         context_layout.addLayout(top_line_layout)
         context_layout.addWidget(self.output_widget)
         input_layout = QHBoxLayout()
         input_layout.addWidget(self.input_label)
         input_layout.addWidget(self.input_widget)
+        input_layout.addWidget(self.payload_progress)
+        input_layout.addWidget(self.payload_cancel_button)
+        input_layout.addWidget(self.skipped_label)
         context_layout.addLayout(input_layout)
         self.setLayout(context_layout)
 
@@ -111,16 +164,12 @@ class MainContextWidget(QGroupBox):
                 button.setToolTip(button.shortcut().toString())
             self.buttons.addWidget(button)
 
-    def setup_worker_signals(self, parent: 'PwnDbgGui'):
-        """Connect signals to the GDB and Inferior writer to allow this widget to forward commands/input"""
-        # Allow giving the thread work from outside
-        self.gdb_write.connect(parent.gdb_handler.send_command)
-        self.inferior_write.connect(parent.inferior_handler.inferior_write)
-
     @Slot()
     def handle_submit(self):
         """Callback for when the user presses Enter in the main widget's input field"""
-        if InferiorHandler.INFERIOR_STATE == InferiorState.RUNNING:
+        if self.completer.is_picking():
+            return
+        if self.inferior_handler is not None and self.inferior_handler.state == InferiorState.RUNNING:
             # Inferior is running, send to inferior
             self.submit_input()
         else:
@@ -143,7 +192,11 @@ class MainContextWidget(QGroupBox):
     def continue_execution(self):
         """Callback of the Continue button"""
         logger.debug("Executing c callback")
-        self.gdb_write.emit("c")
+        self.gdb_write.emit(self.continue_command)
+
+    @Slot(str)
+    def set_continue_command(self, command: str):
+        self.continue_command = command
 
     @Slot()
     def next(self):
@@ -172,21 +225,34 @@ class MainContextWidget(QGroupBox):
     @Slot(bool)
     def change_input_label(self, is_pwndbg: bool):
         """Update the input label's text"""
+        self.completer.set_active(is_pwndbg)
         if is_pwndbg:
             self.input_label.setText(f"<span style=' color:{PwndbgGuiConstants.RED};'>pwndbg></span>")
         else:
             self.input_label.setText(f"<span style=' color:{PwndbgGuiConstants.GREEN};'>target></span>")
 
+    @Slot(int)
+    def set_stops_skipped(self, skipped: int):
+        """Show the number of stops that were skipped during the last storm of stops"""
+        self.skipped_label.setText(f"<span style=' color:{PwndbgGuiConstants.YELLOW};'>{skipped} stops skipped</span>")
+        self.skipped_label.setVisible(skipped > 0)
+
     @Slot()
     def handle_search_submit(self):
+        """Callback for when the user presses Enter in the search field, the hits are shown in the search results"""
         search_value = self.search_input_widget.text()
         value_type = self.search_drop_down.currentText()
-        if value_type == "bytes":
-            # Wrap the user input with "", otherwise characters like "'" and " " cause problems
-            search_value = f'"{search_value}"'
-        params = ["-t", value_type, search_value]
-        logger.debug("Executing search with %s", params)
-        self.gdb_search.emit(params)
+        scope = self.search_engines[self.search_engine_drop_down.currentText()]
+        if search_value == "":
+            return
+        if scope == "" and value_type == "regex":
+            self.update_gui.emit("main", b"Regex searches require a snapshot search engine\n")
+            return
+        logger.debug("Executing search for %s %s (snapshot: %s)", value_type, search_value, scope or "no")
+        if scope:
+            self.snapshot_search.emit(value_type, search_value, scope)
+        else:
+            self.gdb_search.emit(value_type, search_value)
         self.search_input_widget.clear()
 
     def submit_cmd(self):
@@ -200,6 +266,78 @@ class MainContextWidget(QGroupBox):
         self.gdb_write.emit(user_line)
         self.input_widget.clear()
 
+    @Slot()
+    def send_cyclic(self):
+        """Callback of the cyclic button, generate a cyclic pattern and send it to the inferior"""
+        dialog = CyclicDialog(self, self.cyclic_pattern.alphabet, self.cyclic_pattern.word_size)
+        if not dialog.exec():
+            return
+        if (dialog.alphabet(), dialog.word_size()) != (self.cyclic_pattern.alphabet, self.cyclic_pattern.word_size):
+            try:
+                self.cyclic_pattern = cyclic_pattern(dialog.alphabet(), dialog.word_size())
+            except ValueError as e:
+                self.update_gui.emit("main", f"Invalid cyclic alphabet: {e}\n".encode())
+                return
+            self.cyclic_pattern_changed.emit(self.cyclic_pattern)
+        try:
+            payload = self.cyclic_pattern.generate(dialog.length_input.value())
+        except ValueError as e:
+            # Small alphabets and word sizes have fewer distinct words than the maximum length
+            self.update_gui.emit("main", f"Invalid cyclic length: {e}\n".encode())
+            return
+        if dialog.newline_input.isChecked():
+            payload += b"\n"
+        logger.debug("Sending cyclic pattern of length %d to inferior", len(payload))
+        self.write_inferior(payload, payload)
+
+    @Slot()
+    def send_payload(self):
+        """Callback of the payload button, stream a file to the inferior without loading it into memory"""
+        path, _ = QFileDialog.getOpenFileName(self, "Select payload", "", "All files (*)")
+        if not path:
+            return
+        logger.debug("Streaming payload %s to inferior", path)
+        self.payload_progress.setRange(0, 0)
+        self.payload_progress.setFormat("Streaming payload")
+        self.payload_progress.show()
+        self.payload_cancel_button.show()
+        self.payload_button.setEnabled(False)
+        self.stream_payload.emit(path, self.inferior_pid if self.inferior_attached else 0)
+
+    @Slot(int, int)
+    def receive_payload_progress(self, sent: int, total: int):
+        """
+        Show the progress of the streamed payload
+        :param sent: The bytes written to the inferior's input so far
+        :param total: The size of the payload, -1 if unknown
+        """
+        if total > 0:
+            # Permille, since the sizes of large payloads do not fit into the int of the progress bar
+            self.payload_progress.setRange(0, 1000)
+            self.payload_progress.setValue(sent * 1000 // total)
+            self.payload_progress.setFormat(f"{sent / (1 << 20):.1f} / {total / (1 << 20):.1f} MiB")
+        else:
+            self.payload_progress.setFormat(f"{sent / (1 << 20):.1f} MiB")
+
+    @Slot(str)
+    def payload_finished(self, error: str):
+        """
+        Callback for the end of a streamed payload
+        :param error: Why the payload was not written completely, empty on success
+        """
+        self.hide_payload_progress()
+        if error:
+            self.update_gui.emit("main", f"Payload: {error}\n".encode())
+
+    def hide_payload_progress(self):
+        self.payload_progress.hide()
+        self.payload_cancel_button.hide()
+        self.payload_button.setEnabled(True)
+
+    @Slot(int)
+    def set_inferior_pid(self, pid: int):
+        self.inferior_pid = pid
+
     def submit_input(self):
         """Submit an input to the inferior process"""
         user_line = self.input_widget.text()
@@ -221,18 +359,30 @@ class MainContextWidget(QGroupBox):
         else:
             user_echo = user_line.encode() + b"\n"
             user_input = user_line.encode() + b"\n"
+        self.write_inferior(user_input, user_echo)
+        self.input_widget.clear()
+
+    def write_inferior(self, user_input: bytes, user_echo: bytes):
+        """
+        Write input to the inferior process
+        :param user_input: The bytes to write
+        :param user_echo: What is echoed to the main output
+        """
         if self.inferior_attached:
             self.gdb_write_input.emit(user_input)
         else:
             self.update_gui.emit("main", user_echo)
             self.inferior_write.emit(user_input)
-        self.input_widget.clear()
 
     def eventFilter(self, source: QWidget, event: QEvent):
-        """Callback for Qt events. Handles the navigation of the user's command history"""
+        """Callback for Qt events. Handles the navigation of the user's command history and completion on Tab"""
         # https://stackoverflow.com/a/46506129
         if event.type() != QEvent.Type.KeyPress or source is not self.input_widget:
             return super().eventFilter(source, event)
+        if event.key() == Qt.Key.Key_Tab:
+            # Complete instead of moving the focus
+            self.completer.complete_input()
+            return True
         if event.key() == Qt.Key.Key_Down:
             self.current_cmd_index = min(len(self.command_history) - 1, self.current_cmd_index + 1)
             self.input_widget.setText(self.command_history[self.current_cmd_index])
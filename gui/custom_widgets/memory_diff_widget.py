@@ -0,0 +1,147 @@
+import logging
+from typing import List, Any
+
+from PySide6.QtCore import Qt, Signal, Slot, QAbstractTableModel, QModelIndex, QPersistentModelIndex, \
+    QSortFilterProxyModel
+from PySide6.QtGui import QColor
+from PySide6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QLabel, QCheckBox, QTableView
+
+from gui.constants import PwndbgGuiConstants
+from gui.custom_widgets.widget_setup import setup_table_view
+from gui.parser import parse_json_report
+
+logger = logging.getLogger(__file__)
+
+
+class MemoryDiffModel(QAbstractTableModel):
+    """Table model of the memory ranges that changed since the previous stop"""
+    ADDRESS, LENGTH, REGION, OLD, NEW = range(5)
+    HEADERS = ["Address", "Length", "Region", "Old", "New"]
+    # Number of bytes shown in the old and new columns, the complete bytes are shown in the tooltip
+    MAX_SHOWN_BYTES = 32
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        # Rows in the form of [address, length, region, old bytes hex, new bytes hex]
+        self.rows: List[List[Any]] = []
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section: int, orientation: Qt.Orientation, role=Qt.ItemDataRole.DisplayRole) -> Any:
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            return self.HEADERS[section]
+        return None
+
+    def data(self, index: QModelIndex | QPersistentModelIndex, role=Qt.ItemDataRole.DisplayRole) -> Any:
+        if not index.isValid():
+            return None
+        row = self.rows[index.row()]
+        column = index.column()
+        if role == Qt.ItemDataRole.DisplayRole:
+            if column == self.ADDRESS:
+                return hex(row[column])
+            elif column in (self.OLD, self.NEW):
+                shown = row[column][:2 * self.MAX_SHOWN_BYTES]
+                return " ".join(shown[i:i + 2] for i in range(0, len(shown), 2)) + \
+                    (" …" if len(row[column]) > len(shown) else "")
+            return row[column]
+        elif role == Qt.ItemDataRole.UserRole:
+            # Sort by the raw values, e.g. numerically by address
+            return row[column]
+        elif role == Qt.ItemDataRole.ToolTipRole and column in (self.OLD, self.NEW):
+            return row[column]
+        elif role == Qt.ItemDataRole.ForegroundRole:
+            if column == self.ADDRESS:
+                return QColor(PwndbgGuiConstants.LIGHT_BLUE)
+            elif column == self.OLD:
+                return QColor(PwndbgGuiConstants.LIGHT_GRAY)
+            elif column == self.NEW:
+                return QColor(PwndbgGuiConstants.YELLOW)
+        return None
+
+    def set_rows(self, rows: List[List[Any]]):
+        """Replace the changed ranges with the ones of the current stop"""
+        self.beginResetModel()
+        self.rows = rows
+        self.endResetModel()
+
+
+class MemoryDiffWidget(QWidget):
+    """Shows which bytes of the selected regions changed since the previous stop"""
+    # Set the regions that are compared on every stop, as a comma separated list of region names
+    regions_changed = Signal(str)
+    # Open an address in the memory view (watches)
+    open_address = Signal(str)
+    REGIONS = {"stack": "Stack", "heap": "Heap", "data": "Binary .data/.bss"}
+
+    def __init__(self, parent: QWidget):
+        super().__init__(parent)
+        self.setObjectName("memory_diff")
+        self.diff_model = MemoryDiffModel(self)
+        self.proxy_model = QSortFilterProxyModel(self)
+        self.proxy_model.setSourceModel(self.diff_model)
+        self.proxy_model.setSortRole(Qt.ItemDataRole.UserRole)
+        self.summary_label = QLabel("Select the regions to compare between stops", self)
+        self.region_checkboxes = {name: QCheckBox(label, self) for name, label in self.REGIONS.items()}
+        for checkbox in self.region_checkboxes.values():
+            checkbox.toggled.connect(self.handle_region_toggled)
+        self.diff_view = QTableView(self)
+        self.setup_widget_layout()
+
+    def setup_widget_layout(self):
+        header_layout = QHBoxLayout()
+        header_layout.addWidget(self.summary_label)
+        header_layout.addStretch()
+        for checkbox in self.region_checkboxes.values():
+            header_layout.addWidget(checkbox)
+        self.diff_view.setModel(self.proxy_model)
+        self.diff_view.setSortingEnabled(True)
+        self.diff_view.sortByColumn(MemoryDiffModel.ADDRESS, Qt.SortOrder.AscendingOrder)
+        setup_table_view(self.diff_view)
+        self.diff_view.doubleClicked.connect(self.handle_double_click)
+        layout = QVBoxLayout()
+        layout.addLayout(header_layout)
+        layout.addWidget(self.diff_view)
+        self.setLayout(layout)
+
+    @Slot()
+    def handle_region_toggled(self):
+        """Send the selected regions to the GdbHandler, the diff is shown starting with the next stop"""
+        regions = [name for name, checkbox in self.region_checkboxes.items() if checkbox.isChecked()]
+        self.regions_changed.emit(",".join(regions))
+        if len(regions) == 0:
+            self.diff_model.set_rows([])
+            self.summary_label.setText("Select the regions to compare between stops")
+
+    @Slot(bytes)
+    def receive_diff_result(self, result: bytes):
+        """
+        Callback for the JSON report of the gui-diff command
+        :param result: The report containing the changed "ranges" of the compared "regions"
+        """
+        try:
+            report = parse_json_report(result)
+        except ValueError:
+            logger.warning("Could not parse gui-diff output: %s", result[:200])
+            return
+        if "error" in report:
+            self.summary_label.setText(f"Diff failed: {report['error']}")
+            return
+        self.diff_model.set_rows(report["ranges"])
+        changed_bytes = sum(row[MemoryDiffModel.LENGTH] for row in report["ranges"])
+        compared_bytes = sum(end - start for _, start, end in report["regions"])
+        summary = f"{len(report['ranges'])} changed ranges ({changed_bytes} of {compared_bytes} bytes)"
+        if report["truncated"]:
+            summary += ", truncated"
+        self.summary_label.setText(summary)
+
+    @Slot(QModelIndex)
+    def handle_double_click(self, index: QModelIndex):
+        """Open the double-clicked range in the memory view"""
+        source_index = self.proxy_model.mapToSource(index)
+        address = self.diff_model.rows[source_index.row()][MemoryDiffModel.ADDRESS]
+        self.open_address.emit(hex(address))
@@ -0,0 +1,178 @@
+import logging
+import time
+from collections import Counter
+from typing import List, Any
+
+from PySide6.QtCore import Qt, Signal, Slot, QAbstractTableModel, QModelIndex, QPersistentModelIndex
+from PySide6.QtGui import QColor, QIcon
+from PySide6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QLabel, QTableView, QHeaderView, \
+    QPushButton, QSpinBox, QCheckBox
+
+from gui.constants import PwndbgGuiConstants
+from gui.custom_widgets.widget_setup import setup_table_view
+
+logger = logging.getLogger(__file__)
+
+
+class ProfileModel(QAbstractTableModel):
+    """Table model of the sampled functions, hottest functions first. "Self" counts the samples in which a function
+    was the innermost frame, "Total" the samples in which it was anywhere on the sampled stack"""
+    FUNCTION, SELF, SELF_PERCENT, TOTAL, TOTAL_PERCENT = range(5)
+    HEADERS = ["Function", "Self", "Self %", "Total", "Total %"]
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.self_samples: Counter = Counter()
+        self.total_samples: Counter = Counter()
+        self.sample_count = 0
+        # Functions in the order they are shown
+        self.functions: List[str] = []
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.functions)
+
+    def columnCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section: int, orientation: Qt.Orientation, role=Qt.ItemDataRole.DisplayRole) -> Any:
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            return self.HEADERS[section]
+        return None
+
+    def data(self, index: QModelIndex | QPersistentModelIndex, role=Qt.ItemDataRole.DisplayRole) -> Any:
+        if not index.isValid():
+            return None
+        function = self.functions[index.row()]
+        column = index.column()
+        if role == Qt.ItemDataRole.DisplayRole:
+            if column == self.FUNCTION:
+                return function
+            samples = self.self_samples[function] if column in (self.SELF, self.SELF_PERCENT) else \
+                self.total_samples[function]
+            if column in (self.SELF, self.TOTAL):
+                return str(samples)
+            return f"{100 * samples / self.sample_count:.1f}"
+        elif role == Qt.ItemDataRole.ForegroundRole and column == self.FUNCTION:
+            return QColor(PwndbgGuiConstants.RED)
+        elif role == Qt.ItemDataRole.TextAlignmentRole and column != self.FUNCTION:
+            return Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter
+        return None
+
+    def add_samples(self, samples: List[List[str]]):
+        """
+        Add a batch of sampled backtraces
+        :param samples: The function names of every sample, innermost frame first
+        """
+        for backtrace in samples:
+            if len(backtrace) == 0:
+                continue
+            self.self_samples[backtrace[0]] += 1
+            # Recursive functions only count once per sample
+            self.total_samples.update(set(backtrace))
+            self.sample_count += 1
+        self.beginResetModel()
+        self.functions = sorted(self.total_samples,
+                                key=lambda function: (-self.self_samples[function], -self.total_samples[function]))
+        self.endResetModel()
+
+    def clear(self):
+        self.beginResetModel()
+        self.self_samples.clear()
+        self.total_samples.clear()
+        self.sample_count = 0
+        self.functions = []
+        self.endResetModel()
+
+
+class ProfilerWidget(QWidget):
+    """Sampling profiler for the running inferior. With sampling enabled, "continue" is replaced by the gui-profile
+    command, which interrupts the inferior with the chosen rate, records its backtrace and resumes it right away"""
+    # Emitted with the command that the continue button should execute
+    continue_command_changed = Signal(str)
+
+    def __init__(self, parent: QWidget):
+        super().__init__(parent)
+        self.setObjectName("profiler")
+        self.profile_model = ProfileModel(self)
+        self.sample_checkbox = QCheckBox("Sample on continue", self)
+        self.sample_checkbox.setToolTip("Continue with gui-profile, which samples backtraces while the inferior runs")
+        self.sample_checkbox.toggled.connect(self.update_continue_command)
+        self.rate_input = QSpinBox(self)
+        self.rate_input.setRange(1, 1000)
+        self.rate_input.setValue(50)
+        self.rate_input.setSuffix(" Hz")
+        self.rate_input.setToolTip("Samples per second, every sample stops the inferior for a moment")
+        self.rate_input.valueChanged.connect(self.update_continue_command)
+        self.depth_input = QSpinBox(self)
+        self.depth_input.setRange(1, 256)
+        self.depth_input.setValue(16)
+        self.depth_input.setPrefix("Depth ")
+        self.depth_input.setToolTip("Number of frames recorded per sample")
+        self.depth_input.valueChanged.connect(self.update_continue_command)
+        self.reset_button = QPushButton("Reset", self)
+        self.reset_button.setIcon(QIcon.fromTheme("edit-clear"))
+        self.reset_button.clicked.connect(self.reset)
+        self.status_label = QLabel("No samples", self)
+        self.profile_view = QTableView(self)
+        # Overhead of the current profiling run and when it started
+        self.run_samples = 0
+        self.run_overhead = 0.0
+        self.run_start = 0.0
+        self.setup_widget_layout()
+
+    def setup_widget_layout(self):
+        controls_layout = QHBoxLayout()
+        controls_layout.addWidget(self.sample_checkbox)
+        controls_layout.addWidget(self.rate_input)
+        controls_layout.addWidget(self.depth_input)
+        controls_layout.addWidget(self.status_label)
+        controls_layout.addStretch()
+        controls_layout.addWidget(self.reset_button)
+        self.profile_view.setModel(self.profile_model)
+        setup_table_view(self.profile_view)
+        self.profile_view.horizontalHeader().setStretchLastSection(False)
+        self.profile_view.horizontalHeader().setSectionResizeMode(ProfileModel.FUNCTION, QHeaderView.ResizeMode.Stretch)
+        layout = QVBoxLayout()
+        layout.addLayout(controls_layout)
+        layout.addWidget(self.profile_view)
+        self.setLayout(layout)
+
+    @Slot()
+    def update_continue_command(self):
+        if self.sample_checkbox.isChecked():
+            self.continue_command_changed.emit(f"gui-profile {self.rate_input.value()} {self.depth_input.value()}")
+        else:
+            self.continue_command_changed.emit("c")
+
+    @Slot(dict)
+    def receive_record(self, record: dict):
+        """
+        Callback for the records streamed by the gui-profile command
+        :param record: Either the "rate" of a new run, a batch of "samples" or the final "done" record
+        """
+        if "rate" in record:
+            self.run_samples = 0
+            self.run_overhead = 0.0
+            self.run_start = time.perf_counter()
+        elif "samples" in record:
+            self.profile_model.add_samples(record["samples"])
+            self.run_samples += len(record["samples"])
+            self.run_overhead += record["overhead"]
+            self.update_status(self.run_overhead, time.perf_counter() - self.run_start)
+        elif "done" in record:
+            self.update_status(record["overhead"], record["elapsed"])
+
+    def update_status(self, overhead: float, elapsed: float):
+        """Show the cost of sampling, so that a rate can be picked that does not distort the inferior"""
+        if self.run_samples == 0:
+            self.status_label.setText(f"{self.profile_model.sample_count} samples")
+            return
+        self.status_label.setText(f"{self.profile_model.sample_count} samples, "
+                                  f"{1000 * overhead / self.run_samples:.2f} ms overhead per sample, "
+                                  f"stopped {100 * overhead / max(elapsed, 1e-9):.1f}% of the time")
+
+    @Slot()
+    def reset(self):
+        self.profile_model.clear()
+        self.run_samples = 0
+        self.status_label.setText("No samples")
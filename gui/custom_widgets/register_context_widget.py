@@ -13,6 +13,9 @@ if TYPE_CHECKING:
 
 
 class RegisterContextWidget(ContextListWidget):
+    # The first value of a register line is the register's content
+    cyclic_role = ContextDataRole.ADDRESS
+
     def __init__(self, parent: 'PwnDbgGui', title: str, splitter: QSplitter, index: int):
         super().__init__(parent, title, splitter, index)
         self.setObjectName("regs")
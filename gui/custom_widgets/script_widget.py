@@ -0,0 +1,112 @@
+import logging
+
+from PySide6.QtCore import Signal, Slot
+from PySide6.QtGui import QIcon, QFont, QTextCursor
+from PySide6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QPlainTextEdit, QSplitter, \
+    QFileDialog, QMessageBox
+
+from gui.constants import PwndbgGuiConstants
+
+logger = logging.getLogger(__file__)
+
+EXAMPLE_SCRIPT = """# The inferior is available as "io", its functions can also be called directly
+# recvuntil(b"Name: ")
+# sendline(b"A" * 40 + p64(0x401196))
+# print(recvline())
+# interactive()
+"""
+
+
+class ScriptWidget(QWidget):
+    """Editor for exploit scripts that drive the inferior with a pwntools-like API. Scripts run in their own thread,
+    so the GUI stays responsive and the panes keep refreshing on stops while a script waits for output"""
+    # Run the script with the given source
+    run_script = Signal(str)
+    # Stop the running script, needs a direct connection since the script blocks its worker's thread
+    stop_script = Signal()
+
+    def __init__(self, parent: QWidget):
+        super().__init__(parent)
+        self.setObjectName("script")
+        self.editor = QPlainTextEdit(self)
+        self.editor.setFont(QFont(PwndbgGuiConstants.FONT))
+        self.editor.setPlainText(EXAMPLE_SCRIPT)
+        self.output = QPlainTextEdit(self)
+        self.output.setFont(QFont(PwndbgGuiConstants.FONT))
+        self.output.setReadOnly(True)
+        # Keep the output of long-running scripts bounded
+        self.output.setMaximumBlockCount(10000)
+        self.open_button = QPushButton("Open", self)
+        self.open_button.setIcon(QIcon.fromTheme("document-open"))
+        self.open_button.clicked.connect(self.open_script)
+        self.save_button = QPushButton("Save", self)
+        self.save_button.setIcon(QIcon.fromTheme("document-save"))
+        self.save_button.clicked.connect(self.save_script)
+        self.run_button = QPushButton("Run", self)
+        self.run_button.setIcon(QIcon.fromTheme("media-playback-start"))
+        self.run_button.clicked.connect(self.handle_run)
+        self.stop_button = QPushButton("Stop", self)
+        self.stop_button.setIcon(QIcon.fromTheme("process-stop"))
+        self.stop_button.setEnabled(False)
+        self.stop_button.clicked.connect(self.stop_script)
+        self.status_label = QLabel("Idle", self)
+        self.setup_widget_layout()
+
+    def setup_widget_layout(self):
+        header_layout = QHBoxLayout()
+        header_layout.addWidget(self.open_button)
+        header_layout.addWidget(self.save_button)
+        header_layout.addWidget(self.status_label)
+        header_layout.addStretch()
+        header_layout.addWidget(self.run_button)
+        header_layout.addWidget(self.stop_button)
+        splitter = QSplitter(self)
+        splitter.addWidget(self.editor)
+        splitter.addWidget(self.output)
+        layout = QVBoxLayout()
+        layout.addLayout(header_layout)
+        layout.addWidget(splitter)
+        self.setLayout(layout)
+
+    @Slot()
+    def handle_run(self):
+        self.output.clear()
+        self.run_script.emit(self.editor.toPlainText())
+
+    @Slot(bool)
+    def set_running(self, running: bool):
+        self.run_button.setEnabled(not running)
+        self.stop_button.setEnabled(running)
+        self.status_label.setText("Running" if running else "Idle")
+
+    @Slot(str)
+    def receive_output(self, text: str):
+        """
+        Append output of the script
+        :param text: Printed text or an error
+        """
+        self.output.moveCursor(QTextCursor.MoveOperation.End)
+        self.output.insertPlainText(text)
+        self.output.ensureCursorVisible()
+
+    @Slot()
+    def open_script(self):
+        path, _ = QFileDialog.getOpenFileName(self, "Open script", "", "Python (*.py)")
+        if not path:
+            return
+        try:
+            with open(path) as f:
+                self.editor.setPlainText(f.read())
+        except (OSError, UnicodeDecodeError) as e:
+            QMessageBox.critical(self, "Open failed", f"Could not open script: {e}")
+
+    @Slot()
+    def save_script(self):
+        path, _ = QFileDialog.getSaveFileName(self, "Save script", "exploit.py", "Python (*.py)")
+        if not path:
+            return
+        try:
+            with open(path, "w") as f:
+                f.write(self.editor.toPlainText())
+        except OSError as e:
+            QMessageBox.critical(self, "Save failed", f"Could not save script: {e}")
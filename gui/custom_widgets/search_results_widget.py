@@ -0,0 +1,185 @@
+import logging
+from typing import List, Any
+
+from PySide6.QtCore import Qt, Signal, Slot, QAbstractTableModel, QModelIndex, QPersistentModelIndex, \
+    QSortFilterProxyModel, QRegularExpression
+from PySide6.QtGui import QColor, QIcon
+from PySide6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QLabel, QComboBox, QPushButton, QTableView
+
+from gui.constants import PwndbgGuiConstants
+from gui.custom_widgets.widget_setup import setup_table_view
+
+logger = logging.getLogger(__file__)
+
+
+class SearchResultsModel(QAbstractTableModel):
+    """Table model of search hits, which are appended in batches while the search is still running"""
+    ADDRESS, MAPPING, OFFSET = range(3)
+    HEADERS = ["Address", "Mapping", "Offset"]
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        # Regions in the form of [start, end, permissions, path]
+        self.regions: List[List[Any]] = []
+        # Hits in the form of [address, region index]
+        self.hits: List[List[int]] = []
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.hits)
+
+    def columnCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section: int, orientation: Qt.Orientation, role=Qt.ItemDataRole.DisplayRole) -> Any:
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            return self.HEADERS[section]
+        return None
+
+    def data(self, index: QModelIndex | QPersistentModelIndex, role=Qt.ItemDataRole.DisplayRole) -> Any:
+        if not index.isValid():
+            return None
+        address, region = self.hits[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            if index.column() == self.ADDRESS:
+                return hex(address)
+            elif index.column() == self.MAPPING:
+                return self.region_name(region)
+            return hex(address - self.regions[region][0])
+        elif role == Qt.ItemDataRole.ForegroundRole and index.column() == self.ADDRESS:
+            return QColor(PwndbgGuiConstants.LIGHT_BLUE)
+        return None
+
+    def region_name(self, region: int) -> str:
+        """The name of a region as shown in the mapping column and filter, anonymous mappings are named by address"""
+        start, _, permissions, path = self.regions[region]
+        return path if path else f"[anon_{hex(start)}] {permissions}"
+
+    def reset(self, regions: List[List[Any]]):
+        """Start a new search with the given region list"""
+        self.beginResetModel()
+        self.regions = regions
+        self.hits = []
+        self.endResetModel()
+
+    def append_hits(self, hits: List[List[int]]):
+        """Append a streamed batch of hits"""
+        self.beginInsertRows(QModelIndex(), len(self.hits), len(self.hits) + len(hits) - 1)
+        self.hits.extend(hits)
+        self.endInsertRows()
+
+
+class SearchResultsWidget(QWidget):
+    """Shows the hits of a memory search while they are streamed from GDB"""
+    # Interrupt the running GDB search
+    cancel_search = Signal()
+    # Stop the running local snapshot search
+    cancel_local_search = Signal()
+    # Open an address in the memory view (watches)
+    open_address = Signal(str)
+    ALL_MAPPINGS = "All mappings"
+
+    def __init__(self, parent: QWidget):
+        super().__init__(parent)
+        self.setObjectName("search_results")
+        self.results_model = SearchResultsModel(self)
+        self.proxy_model = QSortFilterProxyModel(self)
+        self.proxy_model.setSourceModel(self.results_model)
+        self.proxy_model.setFilterKeyColumn(SearchResultsModel.MAPPING)
+        self.hits_label = QLabel("No search", self)
+        self.mapping_filter = QComboBox(self)
+        self.mapping_filter.setToolTip("Only show hits in the selected mapping")
+        self.mapping_filter.currentTextChanged.connect(self.filter_mapping)
+        self.cancel_button = QPushButton("Cancel", self)
+        self.cancel_button.setIcon(QIcon.fromTheme("process-stop"))
+        self.cancel_button.setEnabled(False)
+        self.cancel_button.clicked.connect(self.handle_cancel)
+        self.results_view = QTableView(self)
+        # Whether the running search is done locally in a snapshot
+        self.local_search = False
+        self.setup_widget_layout()
+
+    def setup_widget_layout(self):
+        header_layout = QHBoxLayout()
+        header_layout.addWidget(self.hits_label)
+        header_layout.addStretch()
+        header_layout.addWidget(self.mapping_filter)
+        header_layout.addWidget(self.cancel_button)
+        self.results_view.setModel(self.proxy_model)
+        setup_table_view(self.results_view)
+        self.results_view.doubleClicked.connect(self.handle_double_click)
+        layout = QVBoxLayout()
+        layout.addLayout(header_layout)
+        layout.addWidget(self.results_view)
+        self.setLayout(layout)
+
+    @Slot(str, str)
+    def start_search(self, value_type: str, value: str):
+        """Reset the results when a new GDB search is started"""
+        self.local_search = False
+        self.reset_search(value_type, value)
+
+    @Slot(str, str, str)
+    def start_local_search(self, value_type: str, value: str, scope: str):
+        """Reset the results when a new snapshot search is started"""
+        self.local_search = True
+        self.reset_search(value_type, value)
+
+    def reset_search(self, value_type: str, value: str):
+        """Clear the results of the previous search"""
+        self.results_model.reset([])
+        self.mapping_filter.clear()
+        self.hits_label.setText(f"Searching {value_type} {value} ...")
+        self.cancel_button.setEnabled(True)
+
+    @Slot(dict)
+    def receive_record(self, record: dict):
+        """
+        Callback for the records streamed by the gui-search command
+        :param record: Either the searched "regions", a batch of "hits" or the final "done" record
+        """
+        if "regions" in record:
+            self.results_model.reset(record["regions"])
+            names = dict.fromkeys(self.results_model.region_name(region) for region in range(len(record["regions"])))
+            self.mapping_filter.addItems([self.ALL_MAPPINGS] + list(names))
+        elif "hits" in record:
+            self.results_model.append_hits(record["hits"])
+            self.hits_label.setText(f"Hits: {len(self.results_model.hits)} ...")
+        elif "error" in record:
+            self.hits_label.setText(f"Search failed: {record['error']}")
+            self.cancel_button.setEnabled(False)
+        elif "done" in record:
+            state = "cancelled" if record["cancelled"] else "done"
+            if "elapsed" in record:
+                state += f" in {record['elapsed']:.1f}ms"
+            self.hits_label.setText(f"Hits: {len(self.results_model.hits)} ({state})")
+            self.cancel_button.setEnabled(False)
+
+    @Slot(dict)
+    def search_finished(self, payload: dict):
+        """Callback for the result of the gui-search command, only relevant if the search failed"""
+        self.cancel_button.setEnabled(False)
+        if "msg" in payload:
+            self.hits_label.setText(f"Search failed: {payload['msg']}")
+
+    @Slot()
+    def handle_cancel(self):
+        """Cancel the running search in GDB or in the local snapshot"""
+        if self.local_search:
+            self.cancel_local_search.emit()
+        else:
+            self.cancel_search.emit()
+
+    @Slot(str)
+    def filter_mapping(self, name: str):
+        """Only show the hits in the mapping with the given name"""
+        if name in (self.ALL_MAPPINGS, ""):
+            self.proxy_model.setFilterRegularExpression("")
+        else:
+            self.proxy_model.setFilterRegularExpression(f"^{QRegularExpression.escape(name)}$")
+
+    @Slot(QModelIndex)
+    def handle_double_click(self, index: QModelIndex):
+        """Open the double-clicked hit in the memory view"""
+        source_index = self.proxy_model.mapToSource(index)
+        address = self.results_model.hits[source_index.row()][0]
+        self.open_address.emit(hex(address))
@@ -1,36 +1,50 @@
+import html
+import logging
+import re
 from typing import TYPE_CHECKING
 
-from PySide6.QtCore import Qt
-from PySide6.QtWidgets import QGroupBox, QVBoxLayout, QSplitter, QHBoxLayout, QLabel, QSpinBox
+from PySide6.QtCore import Qt, Signal, Slot
+from PySide6.QtWidgets import QSplitter, QHBoxLayout, QLabel, QSpinBox, QListWidgetItem
 
+from gui.constants import PwndbgGuiConstants
+from gui.context_data_role import ContextDataRole
 from gui.custom_widgets.context_list_widget import ContextListWidget
+from gui.custom_widgets.widget_setup import setup_context_box
 from gui.html_style_delegate import HTMLDelegate
+from gui.process_memory import ProcessMemory
+from gui.telescope import Telescope, StackSlot, Link
 
 # Prevent circular import error
 if TYPE_CHECKING:
     from gui.pwndbg_gui import PwnDbgGui
 
+logger = logging.getLogger(__file__)
+
 
 class StackContextWidget(ContextListWidget):
+    # Request pwndbg's "context stack", used when we cannot read the inferior's memory ourselves
+    request_pwndbg_stack = Signal()
+    # Colors of pointers to the different kinds of mappings, same as pwndbg's legend
+    KIND_COLORS = {"stack": PwndbgGuiConstants.YELLOW, "heap": PwndbgGuiConstants.LIGHT_BLUE,
+                   "code": PwndbgGuiConstants.RED, "data": PwndbgGuiConstants.PURPLE,
+                   "rodata": PwndbgGuiConstants.LIGHT_GRAY}
+
     def __init__(self, parent: 'PwnDbgGui', title: str, splitter: QSplitter, index: int):
         super().__init__(parent, title, splitter, index)
         self.setObjectName("stack")
         self.setItemDelegate(HTMLDelegate())
+        self.telescope = Telescope(parent.process_memory)
+        # The frame pointer of the current stop, it is received before the stack pointer
+        self.frame_pointer: int | None = None
+
+    def set_memory(self, memory: ProcessMemory):
+        """Resolve the stack from the memory of the session that was brought to the front"""
+        self.telescope = Telescope(memory)
 
     def setup_widget_layout(self, parent: 'PwnDbgGui', title: str, splitter: QSplitter, index: int):
-        # GroupBox needs to have parent before being added to splitter (see SO below)
-        context_box = QGroupBox(title, parent)
-        context_box.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        context_box.setFlat(True)
-        context_layout = QVBoxLayout()
-        self.add_stack_header(context_layout)
-        context_layout.addWidget(self)
-        context_box.setLayout(context_layout)
-        splitter.replaceWidget(index, context_box)
-        # https://stackoverflow.com/a/66067630
-        context_box.show()
-
-    def add_stack_header(self, layout: QVBoxLayout):
+        setup_context_box(self, parent, title, splitter, index, self.create_stack_header())
+
+    def create_stack_header(self) -> QHBoxLayout:
         # Add a stack count inc-/decrementor
         self.stack_lines_incrementor = QSpinBox()
         header_layout = QHBoxLayout()
@@ -40,4 +54,68 @@ class StackContextWidget(ContextListWidget):
         self.stack_lines_incrementor.setRange(1, 999)
         self.stack_lines_incrementor.setValue(8)
         header_layout.addWidget(self.stack_lines_incrementor)
-        layout.addLayout(header_layout)
+        return header_layout
+
+    @staticmethod
+    def parse_pointer(payload: dict) -> int | None:
+        """Get the value of a "-data-evaluate-expression" result for a pointer register"""
+        match = re.search(r"0x[0-9a-fA-F]+", payload.get("value", ""))
+        return int(match.group(), 16) if match else None
+
+    @Slot(dict)
+    def receive_frame_pointer(self, payload: dict):
+        """
+        Callback for receiving the result of "-data-evaluate-expression $fp" from the GDB reader
+        :param payload: The MI payload containing the "value" of the frame pointer
+        """
+        self.frame_pointer = self.parse_pointer(payload)
+
+    @Slot(dict)
+    def receive_stack_pointer(self, payload: dict):
+        """
+        Callback for receiving the result of "-data-evaluate-expression $sp" from the GDB reader. Resolves the stack
+        locally and falls back to pwndbg's stack context if the inferior's memory cannot be read by us
+        :param payload: The MI payload containing the "value" of the stack pointer
+        """
+        stack_pointer = self.parse_pointer(payload)
+        if stack_pointer is None or not self.telescope.memory.available():
+            self.request_pwndbg_stack.emit()
+            return
+        try:
+            slots = self.telescope.resolve(stack_pointer, self.stack_lines_incrementor.value())
+        except OSError as e:
+            logger.debug("Could not resolve stack locally: %s", e)
+            slots = []
+        if len(slots) == 0:
+            self.request_pwndbg_stack.emit()
+            return
+        self.clear()
+        for index, slot in enumerate(slots):
+            self.add_slot(index, slot, stack_pointer)
+        self.annotate_cyclic_offsets()
+
+    def add_slot(self, index: int, slot: StackSlot, stack_pointer: int):
+        """Add a line for a stack slot in the style of pwndbg's telescope"""
+        marker = "sp" if slot.address == stack_pointer else "fp" if slot.address == self.frame_pointer else ""
+        line = f"{index:02x}:{slot.address - stack_pointer:04x}│ {marker:<3} "
+        line += self.format_link(Link(slot.address, "stack"))
+        for link in slot.links:
+            # Pointers are marked with —▸, the final plain value with ◂— as in pwndbg's telescope
+            line += (" ◂— " if link.kind is None else " —▸ ") + self.format_link(link)
+        if slot.string_value is not None:
+            line += f" ◂— {html.escape(repr(slot.string_value))}"
+        if slot.cyclic:
+            line += " ◂— (loop)"
+        item = QListWidgetItem(self)
+        item.setData(Qt.ItemDataRole.DisplayRole, f'<span style="white-space:pre">{line}</span>')
+        item.setData(ContextDataRole.ADDRESS, hex(slot.address))
+        item.setData(ContextDataRole.VALUE, hex(slot.links[0].value))
+
+    def format_link(self, link: Link) -> str:
+        """Format a value of a pointer chain, colored by the mapping it points to"""
+        text = hex(link.value)
+        if link.label:
+            text += f" ({html.escape(link.label)})"
+        if link.kind is None:
+            return text
+        return f'<span style="color:{self.KIND_COLORS[link.kind]}">{text}</span>'
@@ -0,0 +1,295 @@
+import logging
+import os
+from typing import List, Any, Dict, Tuple, TYPE_CHECKING
+
+from PySide6.QtCore import Qt, Signal, Slot, QAbstractTableModel, QModelIndex, QPersistentModelIndex, QTimer
+from PySide6.QtGui import QColor, QShowEvent, QIcon
+from PySide6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QTableView, \
+    QAbstractItemView, QPushButton
+
+from gui.constants import PwndbgGuiConstants
+from gui.custom_widgets.widget_setup import setup_table_view
+from gui.process_memory import ProcessMemory
+from gui.symbol_index import SymbolIndex
+
+# Prevent circular import error
+if TYPE_CHECKING:
+    from gui.pwndbg_gui import PwnDbgGui
+
+logger = logging.getLogger(__file__)
+
+
+class SymbolModel(QAbstractTableModel):
+    """Table model of the symbols of the target and its libraries, filtered with a fuzzy query"""
+    NAME, ADDRESS, SIZE, KIND, OBJFILE = range(5)
+    HEADERS = ["Name", "Address", "Size", "Type", "Objfile"]
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        # Paths of the indexed objfiles, their link base and their current load base (None if not mapped)
+        self.objfiles: List[str] = []
+        self.link_bases: List[int] = []
+        self.bases: List[int | None] = []
+        # Symbols in the form of [name, offset to the base, size, kind, objfile index]
+        self.symbols: List[List[Any]] = []
+        self.fuzzy_index = SymbolIndex()
+        # Indices into self.symbols of the symbols matching the current query, best matches first
+        self.shown: List[int] = []
+        self.query = ""
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.shown)
+
+    def columnCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section: int, orientation: Qt.Orientation, role=Qt.ItemDataRole.DisplayRole) -> Any:
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            return self.HEADERS[section]
+        return None
+
+    def data(self, index: QModelIndex | QPersistentModelIndex, role=Qt.ItemDataRole.DisplayRole) -> Any:
+        if not index.isValid():
+            return None
+        symbol = self.symbols[self.shown[index.row()]]
+        column = index.column()
+        if role == Qt.ItemDataRole.DisplayRole:
+            if column == self.NAME:
+                return symbol[0]
+            elif column == self.ADDRESS:
+                return hex(self.address(index.row()))
+            elif column == self.SIZE:
+                return hex(symbol[2])
+            elif column == self.KIND:
+                return symbol[3]
+            return os.path.basename(self.objfiles[symbol[4]])
+        elif role == Qt.ItemDataRole.ToolTipRole and column == self.OBJFILE:
+            return self.objfiles[symbol[4]]
+        elif role == Qt.ItemDataRole.ForegroundRole:
+            if column == self.ADDRESS:
+                return QColor(PwndbgGuiConstants.LIGHT_BLUE)
+            elif column == self.NAME:
+                return QColor(PwndbgGuiConstants.RED if symbol[3] == "function" else PwndbgGuiConstants.PURPLE)
+        return None
+
+    def address(self, row: int) -> int:
+        """The address of a shown symbol, its link time address if the objfile is currently not mapped"""
+        _, offset, _, _, objfile = self.symbols[self.shown[row]]
+        base = self.bases[objfile]
+        return (self.link_bases[objfile] if base is None else base) + offset
+
+    def is_mapped(self, row: int) -> bool:
+        return self.bases[self.symbols[self.shown[row]][4]] is not None
+
+    def functions(self, bases: Dict[str, int]) -> List[Tuple[str, int, int, str]]:
+        """
+        The functions of the mapped objfiles in the form of (name, address, size, objfile), sorted by address
+        :param bases: The load bases of the mapped objfiles in the form of {path: base}. They are passed in since the
+        model only rebases itself while the symbols pane is shown
+        """
+        functions = [(name, bases[self.objfiles[objfile]] + offset, size, self.objfiles[objfile])
+                     for name, offset, size, kind, objfile in self.symbols
+                     if kind == "function" and size > 0 and self.objfiles[objfile] in bases]
+        functions.sort(key=lambda function: function[1])
+        return functions
+
+    def clear(self):
+        self.beginResetModel()
+        self.objfiles, self.link_bases, self.bases, self.symbols, self.shown = [], [], [], [], []
+        self.fuzzy_index = SymbolIndex()
+        self.endResetModel()
+
+    def set_index(self, path: str, link_base: int, symbols: List[List[Any]], base: int | None):
+        """Add the symbols of an objfile, replacing its previous symbols. New symbols are only shown after the next
+        call of set_filter, so that many objfiles arriving at once do not search the growing index every time"""
+        new_symbols = [[name, offset, size, kind] for name, offset, size, kind in symbols]
+        if path not in self.objfiles:
+            for symbol in new_symbols:
+                symbol.append(len(self.objfiles))
+            self.objfiles.append(path)
+            self.link_bases.append(link_base)
+            self.bases.append(base)
+            self.symbols.extend(new_symbols)
+            self.fuzzy_index.add([symbol[0] for symbol in new_symbols])
+            return
+        # The symbol indices change, so the fuzzy index has to be rebuilt
+        self.beginResetModel()
+        objfile = self.objfiles.index(path)
+        for symbol in new_symbols:
+            symbol.append(objfile)
+        self.symbols = [symbol for symbol in self.symbols if symbol[4] != objfile] + new_symbols
+        self.link_bases[objfile] = link_base
+        self.bases[objfile] = base
+        self.fuzzy_index = SymbolIndex()
+        self.fuzzy_index.add([symbol[0] for symbol in self.symbols])
+        self.shown = self.fuzzy_index.search(self.query)
+        self.endResetModel()
+
+    def rebase(self, bases: Dict[str, int]):
+        """Update the load bases of the objfiles, objfiles missing from bases are no longer mapped"""
+        new_bases = [bases.get(path) for path in self.objfiles]
+        if new_bases == self.bases:
+            return
+        self.bases = new_bases
+        if len(self.shown) > 0:
+            self.dataChanged.emit(self.index(0, self.ADDRESS), self.index(len(self.shown) - 1, self.ADDRESS))
+
+    def set_filter(self, query: str):
+        self.beginResetModel()
+        self.query = query
+        self.shown = self.fuzzy_index.search(query)
+        self.endResetModel()
+
+
+class SymbolWidget(QWidget):
+    """Fuzzy searchable symbols of the target and its libraries. The symbol tables are parsed locally by the
+    SymbolIndexer, picking a symbol shows it in the disassembly or sets a breakpoint on it"""
+    # Request the symbols of an objfile
+    request_index = Signal(str)
+    # Show the function at an address in the disassembly
+    show_address = Signal(object)
+    # Insert a breakpoint at a location
+    insert_breakpoint = Signal(str)
+    # Emitted with the path of a new target, whose symbols replace all indexed symbols
+    target_changed = Signal(str)
+
+    def __init__(self, parent: 'PwnDbgGui'):
+        super().__init__(parent)
+        self.setObjectName("symbols")
+        self.memory = parent.process_memory
+        self.symbol_model = SymbolModel(self)
+        self.status_label = QLabel("No target", self)
+        self.filter_input = QLineEdit(self)
+        self.filter_input.setPlaceholderText("Fuzzy search, e.g. mlc")
+        self.filter_input.setClearButtonEnabled(True)
+        self.filter_input.textChanged.connect(self.symbol_model.set_filter)
+        self.filter_input.textChanged.connect(self.update_status)
+        self.filter_input.returnPressed.connect(self.disassemble_selected)
+        self.disassemble_button = QPushButton("Disassemble", self)
+        self.disassemble_button.setIcon(QIcon.fromTheme("go-jump"))
+        self.disassemble_button.clicked.connect(self.disassemble_selected)
+        self.breakpoint_button = QPushButton("Breakpoint", self)
+        self.breakpoint_button.setIcon(QIcon.fromTheme("media-record"))
+        self.breakpoint_button.clicked.connect(self.break_on_selected)
+        self.symbol_view = QTableView(self)
+        # Coalesces the objfiles that arrive in quick succession into a single search
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setSingleShot(True)
+        self.refresh_timer.setInterval(100)
+        self.refresh_timer.timeout.connect(self.refresh)
+        # Objfiles that were requested from the indexer in the form of {path: modification time}
+        self.requested: Dict[str, float] = {}
+        # Current load bases of the mapped objfiles in the form of {path: base}
+        self.bases: Dict[str, int] = {}
+        self.setup_widget_layout()
+
+    def setup_widget_layout(self):
+        header_layout = QHBoxLayout()
+        header_layout.addWidget(self.status_label)
+        header_layout.addStretch()
+        header_layout.addWidget(self.filter_input)
+        header_layout.addWidget(self.disassemble_button)
+        header_layout.addWidget(self.breakpoint_button)
+        self.symbol_view.setModel(self.symbol_model)
+        setup_table_view(self.symbol_view)
+        self.symbol_view.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
+        self.symbol_view.horizontalHeader().resizeSection(SymbolModel.NAME, 300)
+        self.symbol_view.doubleClicked.connect(self.disassemble_selected)
+        layout = QVBoxLayout()
+        layout.addLayout(header_layout)
+        layout.addWidget(self.symbol_view)
+        self.setLayout(layout)
+
+    def showEvent(self, event: QShowEvent) -> None:
+        super().showEvent(event)
+        self.update_objfiles()
+
+    @Slot(str)
+    def set_target(self, path: str):
+        """
+        Index the symbols of a new target, dropping the symbols of the previous one
+        :param path: The path of the executable that was loaded or attached to
+        """
+        self.symbol_model.clear()
+        self.requested.clear()
+        self.target_changed.emit(path)
+        self.request(path)
+
+    def set_memory(self, memory: ProcessMemory):
+        """Read the load bases from the memory of the session that was brought to the front"""
+        self.memory = memory
+
+    @Slot(bool)
+    def handle_inferior_state(self, stopped: bool):
+        """Check for new libraries and load bases on every stop, but only while the pane is visible"""
+        if stopped and self.isVisible():
+            self.update_objfiles()
+
+    def update_objfiles(self):
+        """Rebase the known symbols with the current mappings and request the symbols of new or changed objfiles"""
+        if self.memory.pid == 0:
+            return
+        try:
+            self.bases = self.memory.objfile_bases()
+        except OSError as e:
+            logger.debug("Cannot read mappings of pid %d: %s", self.memory.pid, e)
+            return
+        self.symbol_model.rebase(self.bases)
+        for path in self.bases:
+            self.request(path)
+
+    def request(self, path: str):
+        """Request the symbols of an objfile, unless they were requested before and the file did not change"""
+        try:
+            modified = os.stat(path).st_mtime
+        except OSError:
+            return
+        if self.requested.get(path) != modified:
+            self.requested[path] = modified
+            self.request_index.emit(path)
+
+    @Slot(dict)
+    def receive_index(self, index: dict):
+        """
+        Callback for the symbols of an objfile from the SymbolIndexer
+        :param index: The "path", "link_base" and "symbols" of the objfile
+        """
+        self.symbol_model.set_index(index["path"], index["link_base"], index["symbols"], self.bases.get(index["path"]))
+        self.refresh_timer.start()
+
+    @Slot()
+    def refresh(self):
+        """Search the index again after new symbols were added"""
+        self.symbol_model.set_filter(self.filter_input.text())
+        self.update_status()
+
+    @Slot()
+    def update_status(self):
+        self.status_label.setText(f"{len(self.symbol_model.shown)} of {len(self.symbol_model.symbols)} symbols in "
+                                  f"{len(self.symbol_model.objfiles)} objfiles")
+
+    def selected_row(self) -> int:
+        """The selected row, or the best match if nothing is selected"""
+        rows = self.symbol_view.selectionModel().selectedRows()
+        if len(rows) > 0:
+            return rows[0].row()
+        return 0 if self.symbol_model.rowCount() > 0 else -1
+
+    @Slot()
+    def disassemble_selected(self):
+        """Show the selected symbol in the disassembly"""
+        row = self.selected_row()
+        if row >= 0:
+            self.show_address.emit(self.symbol_model.address(row))
+
+    @Slot()
+    def break_on_selected(self):
+        """Set a breakpoint on the selected symbol"""
+        row = self.selected_row()
+        if row < 0:
+            return
+        if self.symbol_model.is_mapped(row):
+            self.insert_breakpoint.emit(f"*{hex(self.symbol_model.address(row))}")
+        else:
+            # Let GDB resolve the name, the link time address is wrong once a PIE is loaded
+            self.insert_breakpoint.emit(self.symbol_model.symbols[self.symbol_model.shown[row]][0])
@@ -0,0 +1,211 @@
+import logging
+from typing import List, Any
+
+from PySide6.QtCore import Qt, Signal, Slot, QAbstractTableModel, QModelIndex, QPersistentModelIndex, QTimer
+from PySide6.QtGui import QColor, QIcon, QShowEvent
+from PySide6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QLabel, QTableView, \
+    QAbstractItemView, QPushButton
+
+from gui.constants import PwndbgGuiConstants
+from gui.custom_widgets.widget_setup import setup_table_view
+
+logger = logging.getLogger(__file__)
+
+
+class ThreadModel(QAbstractTableModel):
+    """Table model of the threads as reported by "-thread-info" """
+    CURRENT, ID, TARGET_ID, NAME, STATE, LOCATION = range(6)
+    HEADERS = ["", "Id", "Target Id", "Name", "State", "Location"]
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.threads: List[dict] = []
+        self.current_id: str | None = None
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.threads)
+
+    def columnCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section: int, orientation: Qt.Orientation, role=Qt.ItemDataRole.DisplayRole) -> Any:
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            return self.HEADERS[section]
+        return None
+
+    def data(self, index: QModelIndex | QPersistentModelIndex, role=Qt.ItemDataRole.DisplayRole) -> Any:
+        if not index.isValid():
+            return None
+        thread = self.threads[index.row()]
+        column = index.column()
+        if role == Qt.ItemDataRole.DisplayRole:
+            if column == self.CURRENT:
+                return "►" if thread.get("id") == self.current_id else ""
+            elif column == self.ID:
+                return thread.get("id", "")
+            elif column == self.TARGET_ID:
+                return thread.get("target-id", "")
+            elif column == self.NAME:
+                return thread.get("name", "")
+            elif column == self.STATE:
+                return thread.get("state", "")
+            return self.location(thread)
+        elif role == Qt.ItemDataRole.ForegroundRole:
+            if column == self.STATE:
+                return QColor(PwndbgGuiConstants.GREEN if thread.get("state") == "running" else PwndbgGuiConstants.RED)
+            elif column == self.LOCATION:
+                return QColor(PwndbgGuiConstants.LIGHT_BLUE)
+        return None
+
+    @staticmethod
+    def location(thread: dict) -> str:
+        """The frame a stopped thread is in, running threads have no frame"""
+        frame = thread.get("frame")
+        if frame is None:
+            return ""
+        location = frame.get("addr", "")
+        if "func" in frame:
+            location += f" in {frame['func']}"
+        return location
+
+    def set_threads(self, threads: List[dict], current_id: str | None):
+        self.beginResetModel()
+        self.threads = threads
+        self.current_id = current_id
+        self.endResetModel()
+
+    def thread_id(self, row: int) -> str:
+        return self.threads[row].get("id", "")
+
+
+class ThreadsWidget(QWidget):
+    """The threads of the inferior. In non-stop mode threads are resumed and interrupted on their own, so that one
+    thread can be inspected while the others keep serving"""
+    # Request "-thread-info"
+    request_threads = Signal()
+    # Select the thread that the contexts show
+    select_thread = Signal(str)
+    # Interrupt or resume a single thread or "all" threads in non-stop mode
+    interrupt_thread = Signal(str)
+    continue_thread = Signal(str)
+    # Interrupt the whole process in all-stop mode
+    interrupt_process = Signal()
+    # Request an update of all contexts
+    refresh_contexts = Signal(bool)
+
+    def __init__(self, parent: QWidget):
+        super().__init__(parent)
+        self.setObjectName("threads")
+        self.non_stop = False
+        self.thread_model = ThreadModel(self)
+        self.status_label = QLabel("All-stop mode", self)
+        self.interrupt_button = QPushButton("Interrupt", self)
+        self.interrupt_button.setIcon(QIcon.fromTheme("media-playback-pause"))
+        self.interrupt_button.clicked.connect(self.interrupt_selected)
+        self.continue_button = QPushButton("Continue", self)
+        self.continue_button.setIcon(QIcon.fromTheme("media-playback-start"))
+        self.continue_button.clicked.connect(self.continue_selected)
+        self.interrupt_all_button = QPushButton("Interrupt all", self)
+        self.interrupt_all_button.clicked.connect(self.interrupt_all)
+        self.continue_all_button = QPushButton("Continue all", self)
+        self.continue_all_button.clicked.connect(self.continue_all)
+        self.thread_view = QTableView(self)
+        # Coalesces the notifications of busy threads into a single "-thread-info"
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setSingleShot(True)
+        self.refresh_timer.setInterval(100)
+        self.refresh_timer.timeout.connect(self.request_threads)
+        self.setup_widget_layout()
+        self.set_non_stop(False)
+
+    def setup_widget_layout(self):
+        header_layout = QHBoxLayout()
+        header_layout.addWidget(self.status_label)
+        header_layout.addStretch()
+        header_layout.addWidget(self.interrupt_button)
+        header_layout.addWidget(self.continue_button)
+        header_layout.addWidget(self.interrupt_all_button)
+        header_layout.addWidget(self.continue_all_button)
+        self.thread_view.setModel(self.thread_model)
+        setup_table_view(self.thread_view)
+        self.thread_view.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
+        marker_width = self.fontMetrics().horizontalAdvance("►") + 8
+        self.thread_view.horizontalHeader().resizeSection(ThreadModel.CURRENT, marker_width)
+        self.thread_view.doubleClicked.connect(self.handle_double_click)
+        layout = QVBoxLayout()
+        layout.addLayout(header_layout)
+        layout.addWidget(self.thread_view)
+        self.setLayout(layout)
+
+    def showEvent(self, event: QShowEvent) -> None:
+        super().showEvent(event)
+        self.request_threads.emit()
+
+    @Slot(bool)
+    def set_non_stop(self, enabled: bool):
+        """Single threads can only be resumed and interrupted in non-stop mode"""
+        self.non_stop = enabled
+        self.status_label.setText("Non-stop mode" if enabled else "All-stop mode")
+        self.continue_button.setEnabled(enabled)
+        self.interrupt_all_button.setEnabled(enabled)
+        self.continue_all_button.setEnabled(enabled)
+
+    @Slot()
+    def handle_threads_changed(self):
+        """Refresh the thread list after threads changed, but only while the pane is visible"""
+        if self.isVisible():
+            self.refresh_timer.start()
+
+    @Slot(dict)
+    def receive_threads(self, payload: dict):
+        """
+        Callback for the result of "-thread-info"
+        :param payload: The MI payload containing the "threads" and the "current-thread-id"
+        """
+        self.thread_model.set_threads(payload.get("threads", []), payload.get("current-thread-id"))
+
+    @Slot()
+    def handle_selected_thread_stopped(self):
+        """In non-stop mode nothing queues a context update for a thread that stops on its own"""
+        if self.non_stop:
+            self.refresh_contexts.emit(False)
+
+    @Slot(str)
+    def handle_other_thread_stopped(self, thread_id: str):
+        """Show a thread that stopped while the selected thread is running, e.g. at a breakpoint"""
+        if self.non_stop:
+            self.select_thread.emit(thread_id)
+
+    def selected_thread(self) -> str | None:
+        rows = self.thread_view.selectionModel().selectedRows()
+        if len(rows) == 0:
+            return self.thread_model.current_id
+        return self.thread_model.thread_id(rows[0].row())
+
+    @Slot()
+    def interrupt_selected(self):
+        if not self.non_stop:
+            self.interrupt_process.emit()
+            return
+        thread_id = self.selected_thread()
+        if thread_id is not None:
+            self.interrupt_thread.emit(thread_id)
+
+    @Slot()
+    def continue_selected(self):
+        thread_id = self.selected_thread()
+        if thread_id is not None:
+            self.continue_thread.emit(thread_id)
+
+    @Slot()
+    def interrupt_all(self):
+        self.interrupt_thread.emit("all")
+
+    @Slot()
+    def continue_all(self):
+        self.continue_thread.emit("all")
+
+    @Slot(QModelIndex)
+    def handle_double_click(self, index: QModelIndex):
+        """Show the double-clicked thread in the contexts"""
+        self.select_thread.emit(self.thread_model.thread_id(index.row()))
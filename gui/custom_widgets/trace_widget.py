@@ -0,0 +1,185 @@
+import logging
+from typing import Any
+
+from PySide6.QtCore import Qt, Signal, Slot, QAbstractTableModel, QModelIndex, QPersistentModelIndex
+from PySide6.QtGui import QColor, QIcon
+from PySide6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QTableView, \
+    QAbstractItemView, QPushButton, QSpinBox, QCheckBox
+
+from gui.constants import PwndbgGuiConstants
+from gui.custom_widgets.widget_setup import setup_table_view
+from gui.trace_buffer import TraceBuffer
+
+logger = logging.getLogger(__file__)
+
+
+class TraceModel(QAbstractTableModel):
+    """Table model over a TraceBuffer: step, pc, the recorded registers and the memory writes of every step"""
+    STEP, PC = range(2)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.trace = TraceBuffer()
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.trace)
+
+    def columnCount(self, parent=QModelIndex()) -> int:
+        # Step, pc, one column per register and the writes
+        return 0 if parent.isValid() else 3 + len(self.trace.register_names)
+
+    def headerData(self, section: int, orientation: Qt.Orientation, role=Qt.ItemDataRole.DisplayRole) -> Any:
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            return (["Step", "PC"] + self.trace.register_names + ["Writes"])[section]
+        return None
+
+    def data(self, index: QModelIndex | QPersistentModelIndex, role=Qt.ItemDataRole.DisplayRole) -> Any:
+        if not index.isValid():
+            return None
+        step = index.row()
+        column = index.column()
+        if role == Qt.ItemDataRole.DisplayRole:
+            if column == self.STEP:
+                return str(step)
+            elif column == self.PC:
+                return hex(self.trace.pcs[step])
+            elif column - 2 < len(self.trace.register_names):
+                return hex(self.trace.registers_at(step)[column - 2])
+            return ", ".join(f"[{hex(address)}]:{size} = {hex(value)}"
+                             for address, size, value in self.trace.writes_at(step))
+        elif role == Qt.ItemDataRole.ForegroundRole:
+            if column == self.PC:
+                return QColor(PwndbgGuiConstants.RED)
+            elif column == self.columnCount() - 1:
+                return QColor(PwndbgGuiConstants.YELLOW)
+        return None
+
+    def reset(self, register_names: list):
+        self.beginResetModel()
+        self.trace = TraceBuffer(register_names)
+        self.endResetModel()
+
+    def append_chunk(self, record: dict):
+        """Append a streamed chunk of steps"""
+        if record["count"] == 0:
+            return
+        self.beginInsertRows(QModelIndex(), len(self.trace), len(self.trace) + record["count"] - 1)
+        self.trace.append_chunk(record)
+        self.endInsertRows()
+
+
+class TraceWidget(QWidget):
+    """Runs the gui-trace command and shows the streamed instruction trace. Selecting a step shows its pc in the
+    disassembly"""
+    # Start a trace in the form of (count, until address, condition, comma separated registers, record writes)
+    start_trace = Signal(int, str, str, str, bool)
+    # Interrupt the running trace
+    cancel_trace = Signal()
+    # Show the function at an address in the disassembly
+    show_address = Signal(object)
+
+    def __init__(self, parent: QWidget):
+        super().__init__(parent)
+        self.setObjectName("trace")
+        self.trace_model = TraceModel(self)
+        self.count_input = QSpinBox(self)
+        self.count_input.setRange(1, 10_000_000)
+        self.count_input.setValue(10_000)
+        self.count_input.setToolTip("Maximum number of instructions to trace")
+        self.until_input = QLineEdit(self)
+        self.until_input.setPlaceholderText("Until address, e.g. main+42")
+        self.condition_input = QLineEdit(self)
+        self.condition_input.setPlaceholderText("Until condition, e.g. $rax == 0")
+        self.registers_input = QLineEdit(self)
+        self.registers_input.setPlaceholderText("Registers, e.g. rax,rdi")
+        self.writes_checkbox = QCheckBox("Memory writes", self)
+        self.writes_checkbox.setToolTip("Record the memory written by every instruction (x86 only)")
+        self.trace_button = QPushButton("Trace", self)
+        self.trace_button.setIcon(QIcon.fromTheme("media-playback-start"))
+        self.trace_button.clicked.connect(self.handle_trace)
+        self.cancel_button = QPushButton("Cancel", self)
+        self.cancel_button.setIcon(QIcon.fromTheme("process-stop"))
+        self.cancel_button.setEnabled(False)
+        self.cancel_button.clicked.connect(self.cancel_trace)
+        self.status_label = QLabel("No trace", self)
+        self.step_input = QSpinBox(self)
+        self.step_input.setPrefix("Step ")
+        self.step_input.setRange(0, 0)
+        self.step_input.setToolTip("Jump to a recorded step")
+        self.step_input.editingFinished.connect(self.jump_to_step)
+        self.trace_view = QTableView(self)
+        self.setup_widget_layout()
+
+    def setup_widget_layout(self):
+        controls_layout = QHBoxLayout()
+        controls_layout.addWidget(self.count_input)
+        controls_layout.addWidget(self.until_input)
+        controls_layout.addWidget(self.condition_input)
+        controls_layout.addWidget(self.registers_input)
+        controls_layout.addWidget(self.writes_checkbox)
+        controls_layout.addWidget(self.trace_button)
+        controls_layout.addWidget(self.cancel_button)
+        status_layout = QHBoxLayout()
+        status_layout.addWidget(self.status_label)
+        status_layout.addStretch()
+        status_layout.addWidget(self.step_input)
+        self.trace_view.setModel(self.trace_model)
+        setup_table_view(self.trace_view)
+        self.trace_view.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
+        self.trace_view.doubleClicked.connect(self.handle_double_click)
+        layout = QVBoxLayout()
+        layout.addLayout(controls_layout)
+        layout.addLayout(status_layout)
+        layout.addWidget(self.trace_view)
+        self.setLayout(layout)
+
+    @Slot()
+    def handle_trace(self):
+        registers = ",".join(register.strip().lstrip("$") for register in self.registers_input.text().split(",")
+                             if register.strip())
+        self.trace_button.setEnabled(False)
+        self.cancel_button.setEnabled(True)
+        self.status_label.setText("Tracing ...")
+        self.start_trace.emit(self.count_input.value(), self.until_input.text().strip(),
+                              self.condition_input.text().strip(), registers, self.writes_checkbox.isChecked())
+
+    @Slot(dict)
+    def receive_record(self, record: dict):
+        """
+        Callback for the records streamed by the gui-trace command
+        :param record: Either the "register_names" of a new trace, a chunk of steps or the final "done" record
+        """
+        if "register_names" in record:
+            self.trace_model.reset(record["register_names"])
+        elif "count" in record:
+            self.trace_model.append_chunk(record)
+            self.status_label.setText(f"Tracing ... {len(self.trace_model.trace)} steps")
+        elif "done" in record:
+            self.status_label.setText(f"{record['done']} steps in {record['elapsed']:.2f}s ({record['reason']})")
+            self.step_input.setRange(0, max(record["done"] - 1, 0))
+            self.trace_finished({})
+
+    @Slot(dict)
+    def trace_finished(self, payload: dict):
+        """Callback for the result of the gui-trace command, only relevant if the trace failed"""
+        self.trace_button.setEnabled(True)
+        self.cancel_button.setEnabled(False)
+        if "msg" in payload:
+            self.status_label.setText(f"Trace failed: {payload['msg']}")
+
+    @Slot()
+    def jump_to_step(self):
+        """Select the step entered in the step input and show its pc"""
+        step = self.step_input.value()
+        if step >= len(self.trace_model.trace):
+            return
+        index = self.trace_model.index(step, TraceModel.PC)
+        self.trace_view.selectRow(step)
+        self.trace_view.scrollTo(index, QAbstractItemView.ScrollHint.PositionAtCenter)
+        self.show_address.emit(self.trace_model.trace.pcs[step])
+
+    @Slot(QModelIndex)
+    def handle_double_click(self, index: QModelIndex):
+        """Show the pc of the double-clicked step in the disassembly"""
+        self.step_input.setValue(index.row())
+        self.show_address.emit(self.trace_model.trace.pcs[index.row()])
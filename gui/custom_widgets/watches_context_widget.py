@@ -1,5 +1,5 @@
 import logging
-from typing import TYPE_CHECKING, List
+from typing import TYPE_CHECKING, List, Dict
 
 from PySide6.QtCore import Qt, Signal, Slot, QParallelAnimationGroup, QPropertyAnimation, QAbstractAnimation, QSize
 from PySide6.QtGui import QIcon
@@ -149,10 +149,6 @@ class HDumpContextWidget(QGroupBox):
         self.setAlignment(Qt.AlignmentFlag.AlignCenter)
         self.setFlat(True)
         self.setTitle("Watches")
-        # Connect signals for gdb_handler communication
-        self.add_watch.connect(parent.gdb_handler.add_watch)
-        self.del_watch.connect(parent.gdb_handler.del_watch)
-        self.change_lines_watch.connect(parent.gdb_handler.change_watch_lines)
         # Set up the interior layout of this widget
         self.setup_widget_layout()
         # Insert this widget into the UI
@@ -201,7 +197,7 @@ class HDumpContextWidget(QGroupBox):
         watch_lines_incrementor = QSpinBox()
         watch_lines_incrementor.setRange(1, 999)
         watch_lines_incrementor.setValue(PwndbgGuiConstants.DEFAULT_WATCH_BYTES)
-        watch_lines_incrementor.valueChanged.connect(lambda value: self.change_lines_watch.emit(address, value))
+        watch_lines_incrementor.valueChanged.connect(lambda value: self.change_watch_bytes(address, value))
         watch_lines_incrementor.setFixedHeight(QApplication.font().pointSize() * 2.5)
         watch_lines_incrementor.setSizePolicy(QSizePolicy.Policy.Fixed, QSizePolicy.Policy.Fixed)
         watch_interact_layout.addWidget(watch_lines_incrementor)
@@ -253,14 +249,33 @@ class HDumpContextWidget(QGroupBox):
     @Slot()
     def new_watch_submit(self):
         """Callback for when the user presses Enter in the new_watch input mask"""
-        param = self.new_watch_input.text()
-        if self.find_watch_by_address(param) is not None:
-            self.new_watch_input.clear()
-            return
-        self.setup_new_watch_widget(param)
-        self.add_watch.emit(param, self.find_watch_by_address(param).index)
+        self.add_new_watch(self.new_watch_input.text())
         self.new_watch_input.clear()
 
+    @Slot(str)
+    def add_new_watch(self, address: str):
+        """
+        Add a watch for the given address unless it is already watched, e.g. when opening an address from other widgets
+        :param address: address or expression to watch
+        """
+        if self.find_watch_by_address(address) is not None:
+            return
+        self.setup_new_watch_widget(address)
+        self.add_watch.emit(address, self.find_watch_by_address(address).index)
+
+    def change_watch_bytes(self, address: str, numbytes: int):
+        """
+        Callback for when the user changes the number of bytes of a watch
+        :param address: Address of the watch
+        :param numbytes: The new number of bytes to dump
+        """
+        self.find_watch_by_address(address).numbytes = numbytes
+        self.change_lines_watch.emit(address, numbytes)
+
+    def watch_parameters(self) -> Dict[str, List[int]]:
+        """The active watches in the form that GdbHandler keeps them: {address: [index, number of bytes]}"""
+        return {watch.address: [watch.index, watch.numbytes] for watch in self.watches}
+
     @Slot(str)
     def delete_watch_submit(self, address: str):
         """Callback for when the user presses Delete in one of the watch spoilers
@@ -0,0 +1,43 @@
+from PySide6.QtCore import Qt
+from PySide6.QtWidgets import QWidget, QSplitter, QGroupBox, QVBoxLayout, QLayout, QTableView, QAbstractItemView, \
+    QHeaderView
+
+
+def setup_context_box(widget: QWidget, parent: QWidget, title: str, splitter: QSplitter, index: int,
+                      header: QLayout | None = None) -> QGroupBox:
+    """
+    Wrap a context widget in a GroupBox with a title and put it into the splitter
+    :param widget: The context widget
+    :param parent: The main window
+    :param title: The title of the GroupBox
+    :param splitter: The splitter that holds the context
+    :param index: The index of the placeholder widget in the splitter that is replaced
+    :param header: An optional layout that is shown above the widget
+    :return: The GroupBox, e.g. to change its title later on
+    """
+    # GroupBox needs to have parent before being added to splitter (see SO below)
+    context_box = QGroupBox(title, parent)
+    context_box.setAlignment(Qt.AlignmentFlag.AlignCenter)
+    context_box.setFlat(True)
+    context_layout = QVBoxLayout()
+    if header is not None:
+        context_layout.addLayout(header)
+    context_layout.addWidget(widget)
+    context_box.setLayout(context_layout)
+    splitter.replaceWidget(index, context_box)
+    # https://stackoverflow.com/a/66067630
+    context_box.show()
+    return context_box
+
+
+def setup_table_view(view: QTableView):
+    """Configure a read-only table of single line rows, callers adjust e.g. the selection mode and column sizes"""
+    view.setShowGrid(False)
+    view.setWordWrap(False)
+    view.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+    view.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+    view.verticalHeader().hide()
+    # Fixed row heights allow the view to only lay out the visible rows
+    view.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+    view.verticalHeader().setDefaultSectionSize(view.fontMetrics().lineSpacing() + 2)
+    view.horizontalHeader().setStretchLastSection(True)
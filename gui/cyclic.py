@@ -0,0 +1,78 @@
+import functools
+import itertools
+import string
+from typing import Iterator, Dict
+
+# Same defaults as pwntools' and pwndbg's "cyclic" command
+DEFAULT_ALPHABET = string.ascii_lowercase.encode()
+DEFAULT_WORD_SIZE = 4
+# The offset index covers patterns up to this length, which is more than any sane overflow payload
+MAX_LENGTH = 0x10000
+
+
+def de_bruijn(alphabet: bytes, word_size: int) -> Iterator[int]:
+    """
+    Generate the de Bruijn sequence in which every word of the given size over the alphabet occurs exactly once
+    (https://en.wikipedia.org/wiki/De_Bruijn_sequence#Algorithm, same sequence as pwntools' cyclic)
+    """
+    k = len(alphabet)
+    a = [0] * k * word_size
+
+    def db(t: int, p: int) -> Iterator[int]:
+        if t > word_size:
+            if word_size % p == 0:
+                for j in range(1, p + 1):
+                    yield alphabet[a[j]]
+        else:
+            a[t] = a[t - p]
+            yield from db(t + 1, p)
+            for j in range(a[t - p] + 1, k):
+                a[t] = j
+                yield from db(t + 1, t)
+
+    return db(1, 1)
+
+
+class CyclicPattern:
+    """A cyclic pattern for a fixed alphabet and word size. The pattern and the offset of every word in it are computed
+    once, so that looking up the offset of a register or stack value is a single dict lookup"""
+    def __init__(self, alphabet: bytes = DEFAULT_ALPHABET, word_size: int = DEFAULT_WORD_SIZE):
+        if len(set(alphabet)) != len(alphabet) or len(alphabet) < 2:
+            raise ValueError("The alphabet needs at least two distinct characters")
+        self.alphabet = alphabet
+        self.word_size = word_size
+        self.pattern = bytes(itertools.islice(de_bruijn(alphabet, word_size), MAX_LENGTH))
+        # The offset of every word of the pattern in the form of {word: offset}
+        self.offsets: Dict[bytes, int] = {}
+        for offset in range(len(self.pattern) - word_size + 1):
+            self.offsets.setdefault(self.pattern[offset:offset + word_size], offset)
+
+    def generate(self, length: int) -> bytes:
+        """Get the first length bytes of the pattern"""
+        if length > len(self.pattern):
+            raise ValueError(f"Patterns are limited to {len(self.pattern)} bytes")
+        return self.pattern[:length]
+
+    def find(self, value: int, byte_order: str = "little") -> int | None:
+        """
+        Find the offset of a register or memory value in the pattern. Values wider than the word size (e.g. a 64-bit
+        register and a pattern with 4 byte words) are looked up by their lowest word
+        :param value: The value as an integer
+        :param byte_order: The byte order of the inferior, determines how the value was read from the pattern
+        :return: The offset or None if the value is not part of the pattern
+        """
+        width = (value.bit_length() + 7) // 8
+        if value < 0 or not self.word_size <= width <= 8:
+            return None
+        data = value.to_bytes(width, byte_order)
+        # All bytes need to come from the pattern, otherwise e.g. an address could match by its lowest bytes
+        if not set(data).issubset(self.alphabet):
+            return None
+        word = data[:self.word_size] if byte_order == "little" else data[-self.word_size:]
+        return self.offsets.get(word)
+
+
+@functools.lru_cache(maxsize=4)
+def cyclic_pattern(alphabet: bytes = DEFAULT_ALPHABET, word_size: int = DEFAULT_WORD_SIZE) -> CyclicPattern:
+    """Get the (shared) pattern for an alphabet and word size, so that its offset index is only computed once"""
+    return CyclicPattern(alphabet, word_size)
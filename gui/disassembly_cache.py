@@ -0,0 +1,128 @@
+import bisect
+import hashlib
+from typing import List, Dict, Tuple, Callable
+
+# GDB inserts breakpoints as int3 at the start of an instruction, which also holds for the internal breakpoints of
+# logpoints that are not listed anywhere. In non-stop mode they stay inserted while the inferior is stopped
+BREAKPOINT_BYTE = 0xcc
+
+class Instruction:
+    """A single disassembled instruction as reported by "-data-disassemble" """
+    def __init__(self, address: int, function: str, offset: int, opcodes: str, text: str):
+        self.address = address
+        self.function = function
+        self.offset = offset
+        self.opcodes = opcodes
+        self.text = text
+
+    @staticmethod
+    def from_mi(entry: dict) -> 'Instruction':
+        """
+        Create an instruction from an entry of the "asm_insns" list of a "-data-disassemble" result
+        :param entry: The MI dict of a single instruction
+        """
+        return Instruction(int(entry["address"], 16), entry.get("func-name", ""), int(entry.get("offset", 0)),
+                           entry.get("opcodes", ""), entry.get("inst", ""))
+
+
+class DisassembledFunction:
+    """The disassembly of a whole function (or of an address range if no function information is available)"""
+    def __init__(self, instructions: List[Instruction]):
+        self.instructions = instructions
+        self.start = instructions[0].address
+        self.end = instructions[-1].address
+        self.name = instructions[0].function
+        self.code = bytes.fromhex("".join(inst.opcodes for inst in instructions).replace(" ", ""))
+        # Number of bytes from the start to the end of the last instruction
+        self.size = len(self.code)
+        # Hash over the raw bytes, so that we can tell apart different code that was mapped at the same address
+        self.digest = hashlib.sha1(self.code).hexdigest()
+        # Mapping of instruction address to row, so that moving the pc highlight is a lookup
+        self.rows: Dict[int, int] = {inst.address: row for row, inst in enumerate(instructions)}
+
+    def contains(self, address: int) -> bool:
+        """Whether the given address is the start of an instruction of this function"""
+        return address in self.rows
+
+    def matches(self, code: bytes) -> bool:
+        """
+        Whether the code in memory is still the disassembled code. GDB reports the original bytes of instructions
+        with inserted breakpoints, so breakpoint bytes at instruction starts are not counted as differences
+        :param code: The bytes read from the start of the function
+        """
+        if code == self.code:
+            return True
+        if len(code) != self.size:
+            return False
+        restored = bytearray(code)
+        for address in self.rows:
+            offset = address - self.start
+            if restored[offset] == BREAKPOINT_BYTE:
+                restored[offset] = self.code[offset]
+        return restored == self.code
+
+
+class DisassemblyCache:
+    """Cache of disassembled functions keyed by their start address and a hash of their bytes.
+    As text mappings are rarely written to, the cache stays valid across stops and runs of the same binary as long as
+    the bytes in memory still match the hash"""
+    def __init__(self):
+        self.functions: Dict[Tuple[int, str], DisassembledFunction] = {}
+        # Sorted start addresses and their functions to look up the function containing an address
+        self.starts: List[int] = []
+        self.by_start: Dict[int, DisassembledFunction] = {}
+
+    def add(self, instructions: List[Instruction]) -> DisassembledFunction:
+        """
+        Add a freshly disassembled function to the cache
+        :param instructions: All instructions of the function
+        :return: The cached function, which might be an already existing identical one
+        """
+        function = DisassembledFunction(instructions)
+        key = (function.start, function.digest)
+        if key in self.functions:
+            return self.functions[key]
+        self.functions[key] = function
+        if function.start not in self.by_start:
+            bisect.insort(self.starts, function.start)
+        else:
+            # Different code at the same address replaces the outdated disassembly
+            old = self.by_start[function.start]
+            del self.functions[(old.start, old.digest)]
+        self.by_start[function.start] = function
+        return function
+
+    def find(self, address: int, read: Callable[[int, int], bytes | None] | None = None
+             ) -> DisassembledFunction | None:
+        """
+        Find the cached function containing an instruction at the given address
+        :param address: E.g. the current pc
+        :param read: Reads the current memory of the inferior, if given the function is only returned while its bytes
+        still match the digest, e.g. code that was unpacked or patched at runtime has to be disassembled again
+        :return: The function or None if the address is not cached
+        """
+        index = bisect.bisect_right(self.starts, address) - 1
+        if index < 0:
+            return None
+        function = self.by_start[self.starts[index]]
+        if not function.contains(address):
+            return None
+        if read is not None:
+            code = read(function.start, function.size)
+            # Memory that cannot be read is trusted, e.g. if we are not allowed to read the inferior ourselves
+            if code is not None and not function.matches(code):
+                self.remove(function)
+                return None
+        return function
+
+    def remove(self, function: DisassembledFunction):
+        """Forget an outdated function"""
+        del self.functions[(function.start, function.digest)]
+        del self.by_start[function.start]
+        self.starts.remove(function.start)
+
+    def clear(self):
+        """Forget all cached functions, e.g. when a different binary is loaded"""
+        self.functions.clear()
+        self.starts.clear()
+        self.by_start.clear()
@@ -0,0 +1,142 @@
+import hashlib
+import struct
+from typing import List, Tuple, Iterator
+
+ELF_MAGIC = b"\x7fELF"
+ET_DYN = 3
+PT_LOAD = 1
+PT_NOTE = 4
+PF_X = 1
+SHT_SYMTAB = 2
+SHT_DYNSYM = 11
+NT_GNU_BUILD_ID = 3
+STT_FUNC = 2
+STT_OBJECT = 1
+SHN_UNDEF = 0
+# e_machine values of the architectures pwndbg supports best
+MACHINES = {3: "i386", 62: "x86-64", 40: "arm", 183: "aarch64", 8: "mips", 243: "riscv"}
+
+
+class Segment:
+    """A program header of type PT_LOAD"""
+    def __init__(self, vaddr: int, offset: int, file_size: int, flags: int):
+        self.vaddr = vaddr
+        self.offset = offset
+        self.file_size = file_size
+        self.flags = flags
+
+    @property
+    def executable(self) -> bool:
+        return bool(self.flags & PF_X)
+
+
+class Symbol:
+    """An entry of the .symtab or .dynsym section"""
+    def __init__(self, name: str, value: int, size: int, kind: int):
+        self.name = name
+        self.value = value
+        self.size = size
+        self.kind = kind
+
+
+class ElfFile:
+    """Minimal ELF parser for the information the GUI needs locally: load segments, build-id and symbols. Parsing is
+    done with struct on the raw file, so that no GDB round trips are needed"""
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as elf:
+            self.data = elf.read()
+        if self.data[:4] != ELF_MAGIC:
+            raise ValueError(f"{path} is not an ELF file")
+        self.is_64_bit = self.data[4] == 2
+        self.endian = ">" if self.data[5] == 2 else "<"
+        header_format = "HHIQQQIHHHHHH" if self.is_64_bit else "HHIIIIIHHHHHH"
+        (self.type, machine, _, self.entry, self.program_header_offset, self.section_header_offset, _, _,
+         self.program_header_size, self.program_header_count, self.section_header_size, self.section_header_count,
+         self.section_names_index) = struct.unpack_from(self.endian + header_format, self.data, 16)
+        self.machine = MACHINES.get(machine, str(machine))
+        self.segments: List[Segment] = []
+        self.notes: List[Tuple[int, int]] = []
+        self.parse_program_headers()
+        self._build_id: str | None = None
+
+    @property
+    def pie(self) -> bool:
+        """Whether the file is position independent, i.e. all addresses are relative to the load base"""
+        return self.type == ET_DYN
+
+    @property
+    def link_base(self) -> int:
+        """The address the first segment is linked at, the difference to the actual load base is the ASLR slide"""
+        return min((segment.vaddr for segment in self.segments), default=0) & ~0xfff
+
+    def parse_program_headers(self):
+        for index in range(self.program_header_count):
+            offset = self.program_header_offset + index * self.program_header_size
+            if self.is_64_bit:
+                p_type, flags, p_offset, vaddr, _, file_size, _, _ = struct.unpack_from(self.endian + "IIQQQQQQ",
+                                                                                       self.data, offset)
+            else:
+                p_type, p_offset, vaddr, _, file_size, _, flags, _ = struct.unpack_from(self.endian + "IIIIIIII",
+                                                                                       self.data, offset)
+            if p_type == PT_LOAD:
+                self.segments.append(Segment(vaddr, p_offset, file_size, flags))
+            elif p_type == PT_NOTE:
+                self.notes.append((p_offset, file_size))
+
+    @property
+    def build_id(self) -> str:
+        """The GNU build-id of the file, or a hash of its content if it has none"""
+        if self._build_id is None:
+            self._build_id = self.find_build_id() or hashlib.sha1(self.data).hexdigest()
+        return self._build_id
+
+    def find_build_id(self) -> str | None:
+        for note_offset, note_size in self.notes:
+            offset = note_offset
+            while offset + 12 <= note_offset + note_size:
+                name_size, description_size, note_type = struct.unpack_from(self.endian + "III", self.data, offset)
+                name_start = offset + 12
+                description_start = name_start + (name_size + 3) // 4 * 4
+                if note_type == NT_GNU_BUILD_ID and self.data[name_start:name_start + name_size] == b"GNU\x00":
+                    return self.data[description_start:description_start + description_size].hex()
+                offset = description_start + (description_size + 3) // 4 * 4
+        return None
+
+    def sections(self) -> Iterator[Tuple[int, int, int, int, int]]:
+        """
+        Iterate over the section headers
+        :return: Tuples in the form of (type, offset, size, link, entry size)
+        """
+        for index in range(self.section_header_count):
+            offset = self.section_header_offset + index * self.section_header_size
+            if self.is_64_bit:
+                _, section_type, _, _, section_offset, size, link, _, _, entry_size = struct.unpack_from(
+                    self.endian + "IIQQQQIIQQ", self.data, offset)
+            else:
+                _, section_type, _, _, section_offset, size, link, _, _, entry_size = struct.unpack_from(
+                    self.endian + "IIIIIIIIII", self.data, offset)
+            yield section_type, section_offset, size, link, entry_size
+
+    def symbols(self) -> List[Symbol]:
+        """Get the defined function and object symbols of .symtab and .dynsym, without duplicates"""
+        sections = list(self.sections())
+        symbols = {}
+        for section_type, offset, size, link, entry_size in sections:
+            if section_type not in (SHT_SYMTAB, SHT_DYNSYM) or entry_size == 0 or link >= len(sections):
+                continue
+            strings_offset = sections[link][1]
+            for entry in range(offset, offset + size, entry_size):
+                if self.is_64_bit:
+                    name, info, _, section_index, value, symbol_size = struct.unpack_from(self.endian + "IBBHQQ",
+                                                                                          self.data, entry)
+                else:
+                    name, value, symbol_size, info, _, section_index = struct.unpack_from(self.endian + "IIIBBH",
+                                                                                          self.data, entry)
+                kind = info & 0xf
+                if section_index == SHN_UNDEF or kind not in (STT_FUNC, STT_OBJECT) or name == 0:
+                    continue
+                name_end = self.data.index(b"\x00", strings_offset + name)
+                symbol_name = self.data[strings_offset + name:name_end].decode(errors="replace")
+                symbols.setdefault((symbol_name, value), Symbol(symbol_name, value, symbol_size, kind))
+        return list(symbols.values())
@@ -0,0 +1,153 @@
+import logging
+import multiprocessing
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed, Future
+from typing import List, Tuple, Dict
+
+from PySide6.QtCore import QObject, Signal, Slot
+
+from gui.elf_file import ElfFile
+from gui.index_cache import load_index, store_index
+
+# Optional dependency, the gadget pane shows an error if it is missing
+try:
+    import capstone
+except ImportError:
+    capstone = None
+
+logger = logging.getLogger(__file__)
+
+# Version of the on-disk index format, bump it whenever the scanner changes its output
+INDEX_VERSION = 2
+# Bytes of executable code that are scanned by a single worker process
+CHUNK_SIZE = 0x10000
+# Maximum number of bytes and instructions of a gadget, similar to ROPgadget's defaults
+MAX_GADGET_BYTES = 20
+MAX_GADGET_INSTRUCTIONS = 6
+# Instructions that end a gadget: ret, ret imm16, jmp reg, call reg, syscall, int 0x80
+TERMINATORS = re.compile(rb"(?=(\xc3|\xc2..|\xff[\xd0-\xd7\xe0-\xe7]|\x0f\x05|\xcd\x80))", re.DOTALL)
+# Mnemonics that may only appear as the last instruction of a gadget
+CONTROL_FLOW_PREFIXES = ("j", "call", "ret", "int", "syscall", "sysenter", "loop", "hlt", "ud")
+CAPSTONE_MODES = {"x86-64": 64, "i386": 32}
+
+
+def find_gadgets(machine: str, path: str, file_offset: int, vaddr: int, start: int, end: int) -> List[Tuple[str, int]]:
+    """
+    Find the gadgets ending in a chunk of an executable segment. Runs in a worker process, so it only receives plain
+    arguments and reads the chunk from the file itself instead of having it pickled over
+    :param machine: The architecture of the file, see CAPSTONE_MODES
+    :param path: The path of the ELF file
+    :param file_offset: The file offset of the segment
+    :param vaddr: The (link time) address of the segment
+    :param start: Offset of the chunk into the segment
+    :param end: End of the chunk, only gadgets whose terminator starts before this are reported
+    :return: Gadgets in the form of (text, address)
+    """
+    mode = capstone.CS_MODE_64 if CAPSTONE_MODES[machine] == 64 else capstone.CS_MODE_32
+    disassembler = capstone.Cs(capstone.CS_ARCH_X86, mode)
+    # Include the bytes before the chunk and the end of the last terminator
+    read_start = max(start - MAX_GADGET_BYTES, 0)
+    with open(path, "rb") as elf:
+        elf.seek(file_offset + read_start)
+        code = elf.read(end + 3 - read_start)
+    gadgets: Dict[str, int] = {}
+    for match in TERMINATORS.finditer(code, start - read_start):
+        if match.start() >= end - read_start:
+            break
+        gadget_end = match.start() + len(match.group(1))
+        for gadget_start in range(max(match.start() - MAX_GADGET_BYTES, 0), match.start() + 1):
+            instructions = list(disassembler.disasm_lite(code[gadget_start:gadget_end], 0))
+            # The instructions have to decode exactly up to the terminator, which has to be the only control flow
+            if len(instructions) == 0 or len(instructions) > MAX_GADGET_INSTRUCTIONS or \
+                    sum(size for _, size, _, _ in instructions) != gadget_end - gadget_start or \
+                    instructions[-1][0] != match.start() - gadget_start or \
+                    any(mnemonic.startswith(CONTROL_FLOW_PREFIXES) for _, _, mnemonic, _ in instructions[:-1]):
+                continue
+            text = "; ".join(f"{mnemonic} {operands}".strip() for _, _, mnemonic, operands in instructions)
+            gadgets.setdefault(text, vaddr + read_start + gadget_start)
+    return list(gadgets.items())
+
+
+class GadgetIndexer(QObject):
+    """Worker that builds the ROP gadget index of the inferior's objfiles in a pool of processes, so that neither GDB
+    nor the GUI are blocked while e.g. libc is scanned. Indexes are cached on disk by build-id, gadget addresses are
+    stored relative to the link base of the file and rebased by the gadget pane"""
+    # Send the index of a file in the form of (path, gadgets) with gadgets in the form of [[text, offset], ...]
+    send_index = Signal(str, list)
+    # Progress and error messages for the gadget pane
+    send_status = Signal(str)
+
+    def __init__(self):
+        super().__init__()
+        self.executor: ProcessPoolExecutor | None = None
+        # Set from the GUI thread while indexing, hence not a queued slot
+        self.cancelled = False
+
+    @Slot(str)
+    def index_file(self, path: str):
+        """
+        Get the gadget index of a file, from the disk cache or by scanning its executable segments
+        :param path: The path of an ELF file mapped into the inferior
+        """
+        try:
+            elf = ElfFile(path)
+        except (OSError, ValueError, IndexError) as e:
+            logger.warning("Cannot index gadgets of %s: %s", path, e)
+            return
+        gadgets = load_index("gadgets", elf.build_id, INDEX_VERSION)
+        if gadgets is None:
+            if capstone is None:
+                self.send_status.emit("Indexing gadgets requires capstone, install it with 'pip install capstone'")
+                return
+            if elf.machine not in CAPSTONE_MODES:
+                self.send_status.emit(f"Gadget search does not support {elf.machine} yet")
+                return
+            gadgets = self.scan(elf)
+            if gadgets is None:
+                return
+            try:
+                store_index("gadgets", elf.build_id, INDEX_VERSION, path, gadgets)
+            except OSError as e:
+                logger.warning("Could not cache gadgets of %s: %s", path, e)
+        self.send_index.emit(path, gadgets)
+
+    def scan(self, elf: ElfFile) -> List[List] | None:
+        """Scan the executable segments of a file in parallel, return None if the scan was cancelled"""
+        start_time = time.perf_counter()
+        self.cancelled = False
+        if self.executor is None:
+            # Do not fork the GUI process with all its threads, start fresh interpreters instead
+            self.executor = ProcessPoolExecutor(mp_context=multiprocessing.get_context("spawn"))
+        futures: List[Future] = []
+        for segment in elf.segments:
+            if not segment.executable:
+                continue
+            for start in range(0, segment.file_size, CHUNK_SIZE):
+                end = min(start + CHUNK_SIZE, segment.file_size)
+                futures.append(self.executor.submit(find_gadgets, elf.machine, elf.path, segment.offset,
+                                                    segment.vaddr, start, end))
+        gadgets: Dict[str, int] = {}
+        for done, future in enumerate(as_completed(futures)):
+            if self.cancelled:
+                for pending in futures:
+                    pending.cancel()
+                return None
+            for text, address in future.result():
+                if text not in gadgets or address < gadgets[text]:
+                    gadgets[text] = address
+            self.send_status.emit(f"Indexing {os.path.basename(elf.path)}: {100 * (done + 1) // len(futures)}%")
+        logger.debug("Indexed %d gadgets of %s in %.2fs", len(gadgets), elf.path, time.perf_counter() - start_time)
+        return [[text, address - elf.link_base] for text, address in gadgets.items()]
+
+    def cancel(self):
+        """Abort the running scan, called directly from the GUI thread"""
+        self.cancelled = True
+
+    @Slot()
+    def cleanup(self):
+        """Stop the worker processes"""
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
@@ -0,0 +1,344 @@
+"""Qt independent core of a debugging session, which drives GDB via GDB/MI on asyncio. It can be used headless, e.g. in
+scripts and tests"""
+import asyncio
+import fcntl
+import itertools
+import json
+import logging
+import os
+import tty
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, List, Sequence, Tuple
+
+from pygdbmi import gdbmiparser
+
+from gui.constants import PwndbgGuiConstants
+
+logger = logging.getLogger(__file__)
+
+GDB_COMMAND = ("gdb", "--nx", "--quiet", "--interpreter=mi3")
+# Queried on every stop by GdbSession.snapshots() unless other queries are given
+DEFAULT_SNAPSHOT_QUERIES = {"frame": "-stack-info-frame",
+                            "registers": "-data-list-register-values --skip-unavailable x",
+                            "threads": "-thread-info"}
+# Ends the iterators of subscribers once GDB exited
+CLOSED = object()
+
+
+class GdbError(Exception):
+    """A command finished with an error record"""
+    def __init__(self, message: str, result: 'CommandResult'):
+        super().__init__(message)
+        self.result = result
+
+
+class GdbExited(Exception):
+    """GDB exited before it finished a command"""
+
+
+class StreamRecordParser:
+    """Splits GDB's console output into ordinary text and the records that our GDB scripts stream as single lines of
+    the form "<prefix><channel>] <JSON>". GDB may split such a line over several console records, so incomplete lines
+    are buffered. Shared by the GdbSession and the GdbReader of the GUI"""
+    def __init__(self):
+        # Incomplete line of streamed output
+        self.buffer = ""
+
+    def accepts(self, payload: str) -> bool:
+        """Whether console output starts or continues a streamed record"""
+        return bool(self.buffer) or payload.startswith(PwndbgGuiConstants.STREAM_PREFIX)
+
+    def feed(self, payload: str) -> List[Tuple[str | None, Any]]:
+        """
+        Parse the lines that are complete now
+        :param payload: Console output that was accepted
+        :return: The records in the form of (channel, record), text that is no record in the form of (None, text)
+        """
+        parsed = []
+        self.buffer += payload
+        while "\n" in self.buffer:
+            line, self.buffer = self.buffer.split("\n", 1)
+            if not line.startswith(PwndbgGuiConstants.STREAM_PREFIX):
+                parsed.append((None, line + "\n"))
+                continue
+            channel, separator, record = line[len(PwndbgGuiConstants.STREAM_PREFIX):].partition("] ")
+            if not separator:
+                # E.g. the user echoed something that looks like a record
+                logger.warning("Received malformed stream record %s", line)
+                continue
+            try:
+                parsed.append((channel, json.loads(record)))
+            except ValueError:
+                logger.warning("Could not parse record on stream channel %s: %s", channel, record)
+        return parsed
+
+
+class CommandResult:
+    """The result record of a command together with the console and log output that GDB produced for it"""
+    def __init__(self, message: str, payload: dict | None, console: str, logs: List[str]):
+        # "done", "running", "connected", "error" or "exit"
+        self.message = message
+        self.payload = payload if payload is not None else {}
+        self.console = console
+        self.logs = logs
+
+
+class Snapshot:
+    """The state of the inferior at a stop: the payload of the stopped record and the results of the queries"""
+    def __init__(self, stop: dict, results: Dict[str, dict | GdbError]):
+        self.stop = stop
+        # Results in the form of {query name: payload}, or the error if a query failed
+        self.results = results
+
+
+class GdbSession:
+    """One GDB process driven via GDB/MI. Commands are pipelined: every command is written right away with a unique
+    token and its result is matched by that token, so any number of commands can be in flight without waiting for a
+    round trip each. GDB executes them in order, so console output that precedes a result belongs to that command"""
+    def __init__(self, command: Sequence[str] = GDB_COMMAND):
+        """
+        :param command: The command line that starts GDB (or a stand-in speaking GDB/MI) with the MI interpreter
+        """
+        self.command_line = list(command)
+        self.process: asyncio.subprocess.Process | None = None
+        self.reader_task: asyncio.Task | None = None
+        self.tokens = itertools.count(1)
+        # Commands waiting for their result in the form of {token: future}
+        self.pending: Dict[int, asyncio.Future] = {}
+        # Console and log output of the command that is currently executed
+        self.console: List[str] = []
+        self.logs: List[str] = []
+        # Splits the records streamed by our GDB scripts from the console output
+        self.stream_parser = StreamRecordParser()
+        # Queues of the subscribers in the form of {topic: [queue]}
+        self.subscribers: Dict[str, List[asyncio.Queue]] = {}
+        # The pty of the inferior and input that could not be written yet
+        self.master: int | None = None
+        self.slave: int | None = None
+        self.tty = ""
+        self.inferior_input = bytearray()
+
+    async def __aenter__(self) -> 'GdbSession':
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def start(self):
+        """Start GDB, and route the I/O of the inferiors it starts via our own pty"""
+        self.process = await asyncio.create_subprocess_exec(*self.command_line, stdin=asyncio.subprocess.PIPE,
+                                                            stdout=asyncio.subprocess.PIPE,
+                                                            stderr=asyncio.subprocess.STDOUT,
+                                                            # Contexts of pwndbg easily exceed the default line limit
+                                                            limit=1 << 24)
+        self.reader_task = asyncio.create_task(self.read_responses())
+        self.open_inferior_tty()
+        await self.command(f"-inferior-tty-set {self.tty}")
+
+    def open_inferior_tty(self):
+        self.master, self.slave = os.openpty()
+        flags = fcntl.fcntl(self.master, fcntl.F_GETFL)
+        fcntl.fcntl(self.master, fcntl.F_SETFL, flags | os.O_NONBLOCK)
+        # Disable ASCII control character interpretation, so that any byte input by the user doesn't get swallowed
+        tty.setraw(self.slave)
+        tty.setraw(self.master)
+        self.tty = os.ttyname(self.slave)
+        asyncio.get_running_loop().add_reader(self.master, self.read_inferior)
+
+    async def close(self):
+        """Exit GDB and release the pty of the inferior"""
+        if self.process is not None and self.process.returncode is None:
+            try:
+                self.process.stdin.write(b"-gdb-exit\n")
+                await asyncio.wait_for(self.process.wait(), timeout=5)
+            except (asyncio.TimeoutError, ConnectionError):
+                self.process.kill()
+                await self.process.wait()
+        if self.reader_task is not None:
+            await self.reader_task
+        if self.master is not None:
+            loop = asyncio.get_running_loop()
+            loop.remove_reader(self.master)
+            loop.remove_writer(self.master)
+            os.close(self.master)
+            os.close(self.slave)
+            self.master = self.slave = None
+
+    def send(self, command: str) -> asyncio.Future:
+        """
+        Write a command without waiting for its result, which allows to pipeline many commands
+        :param command: A GDB/MI or CLI command
+        :return: A future that resolves to the CommandResult, or fails with a GdbError if the command failed
+        """
+        if "\n" in command:
+            raise ValueError("Commands must not contain newlines")
+        if self.process is None or self.process.returncode is not None or self.reader_task.done():
+            raise GdbExited("GDB is not running")
+        token = next(self.tokens)
+        future = asyncio.get_running_loop().create_future()
+        self.pending[token] = future
+        self.process.stdin.write(f"{token}{command}\n".encode())
+        return future
+
+    async def command(self, command: str) -> CommandResult:
+        """
+        Execute a command and wait for its result
+        :param command: A GDB/MI or CLI command
+        """
+        future = self.send(command)
+        await self.process.stdin.drain()
+        return await future
+
+    async def load_gdbinit(self):
+        """Load the user's .gdbinit (e.g. pwndbg), which GDB ignores in MI mode, like the GdbHandler does"""
+        gdbinit = Path(Path.home() / ".gdbinit").resolve()
+        if gdbinit.exists():
+            await self.command(f"source {str(gdbinit)}")
+        else:
+            logger.warning("Could not find .gdbinit file at %s", str(gdbinit))
+
+    async def load_scripts(self):
+        """Import our helper commands (e.g. gui-heap) into GDB's Python interpreter, like the GdbHandler does"""
+        scripts_dir = Path(__file__).parent.resolve() / "gdb_scripts"
+        await self.command(f"python import sys; sys.path.insert(0, {str(scripts_dir)!r})")
+        await asyncio.gather(*(self.send(f"python import {script}") for script in PwndbgGuiConstants.GDB_SCRIPTS))
+
+    async def read_responses(self):
+        """Parse every line GDB outputs until it exits"""
+        while True:
+            line = await self.process.stdout.readline()
+            if not line:
+                break
+            self.handle_record(gdbmiparser.parse_response(line.decode(errors="replace").rstrip("\r\n")))
+        logger.debug("GDB exited with %s", await self.process.wait())
+        for future in self.pending.values():
+            if not future.done():
+                future.set_exception(GdbExited("GDB exited"))
+        self.pending.clear()
+        for queues in self.subscribers.values():
+            for queue in queues:
+                queue.put_nowait(CLOSED)
+
+    def handle_record(self, record: dict):
+        record_type = record["type"]
+        if record_type == "result":
+            result = CommandResult(record["message"], record["payload"], "".join(self.console), self.logs)
+            self.console = []
+            self.logs = []
+            future = self.pending.pop(record["token"], None)
+            if future is None or future.done():
+                return
+            if record["message"] == "error":
+                future.set_exception(GdbError(result.payload.get("msg", ""), result))
+            else:
+                future.set_result(result)
+        elif record_type == "console" and record["payload"] is not None:
+            if self.stream_parser.accepts(record["payload"]):
+                self.handle_stream_output(record["payload"])
+            else:
+                self.console.append(record["payload"])
+        elif record_type == "log" and record["payload"] is not None:
+            self.logs.append(record["payload"])
+        elif record_type == "notify":
+            self.publish("events", record)
+        elif record_type in ("output", "target") and record["payload"] is not None:
+            # Output of attached inferiors and of GDB itself on stderr
+            self.console.append(record["payload"] + "\n")
+
+    def handle_stream_output(self, payload: str):
+        """
+        Publish streamed records of our GDB scripts to their channel as soon as a record is complete
+        :param payload: Console output starting with (or continuing) a streamed record
+        """
+        for channel, record in self.stream_parser.feed(payload):
+            if channel is None:
+                self.console.append(record)
+                continue
+            self.publish(f"stream:{channel}", record)
+            self.publish("stream", (channel, record))
+
+    def read_inferior(self):
+        try:
+            data = os.read(self.master, 65536)
+        except (BlockingIOError, OSError):
+            return
+        if data:
+            self.publish("inferior", data)
+
+    def write_inferior(self, data: bytes):
+        """
+        Write input for the inferior to its pty, without blocking if the inferior does not read its input
+        :param data: The input
+        """
+        if self.master is None:
+            raise GdbExited("GDB is not running")
+        if not self.inferior_input:
+            asyncio.get_running_loop().add_writer(self.master, self.flush_inferior_input)
+        self.inferior_input += data
+
+    def flush_inferior_input(self):
+        try:
+            written = os.write(self.master, self.inferior_input)
+        except BlockingIOError:
+            return
+        del self.inferior_input[:written]
+        if not self.inferior_input:
+            asyncio.get_running_loop().remove_writer(self.master)
+
+    def publish(self, topic: str, item):
+        for queue in self.subscribers.get(topic, []):
+            queue.put_nowait(item)
+
+    def subscribe(self, topic: str) -> AsyncIterator:
+        """
+        Yield everything published on a topic until GDB exits. The subscription starts right away, so that no record
+        is missed between subscribing and the first iteration, e.g. the stop right after "-exec-run"
+        """
+        queue = asyncio.Queue()
+        self.subscribers.setdefault(topic, []).append(queue)
+        return self.iterate(topic, queue)
+
+    async def iterate(self, topic: str, queue: asyncio.Queue) -> AsyncIterator:
+        try:
+            while (item := await queue.get()) is not CLOSED:
+                yield item
+        finally:
+            self.subscribers[topic].remove(queue)
+
+    def events(self) -> AsyncIterator[dict]:
+        """The asynchronous records of GDB, e.g. "running", "stopped" or "thread-created" notifications"""
+        return self.subscribe("events")
+
+    def inferior_output(self) -> AsyncIterator[bytes]:
+        """The output of the inferior on its pty"""
+        return self.subscribe("inferior")
+
+    def stream(self, channel: str | None = None) -> AsyncIterator[dict | Tuple[str, dict]]:
+        """
+        The records streamed by our GDB scripts
+        :param channel: The channel to receive, or None to receive the records of all channels as (channel, record)
+        """
+        return self.subscribe("stream" if channel is None else f"stream:{channel}")
+
+    def snapshots(self, queries: Dict[str, str] | None = None) -> AsyncIterator[Snapshot]:
+        """
+        Yield a snapshot of the inferior on every stop. The queries of a snapshot are pipelined, so a snapshot costs
+        about one round trip no matter how many queries it has. Like subscribe(), the stops are collected right away
+        :param queries: The commands to execute on every stop in the form of {name: command}
+        """
+        return self.take_snapshots(self.events(), DEFAULT_SNAPSHOT_QUERIES if queries is None else queries)
+
+    async def take_snapshots(self, events: AsyncIterator[dict], queries: Dict[str, str]) -> AsyncIterator[Snapshot]:
+        async for event in events:
+            if event["message"] != "stopped":
+                continue
+            try:
+                futures = [self.send(query) for query in queries.values()]
+            except GdbExited:
+                return
+            results = await asyncio.gather(*futures, return_exceptions=True)
+            if any(isinstance(result, GdbExited) for result in results):
+                return
+            yield Snapshot(event["payload"] or {}, {name: result if isinstance(result, GdbError) else result.payload
+                                                    for name, result in zip(queries, results)})
@@ -1,6 +1,7 @@
 import logging
+import signal
 from pathlib import Path
-from typing import List, Dict
+from typing import List, Dict, Tuple
 
 from PySide6.QtCore import QObject, Slot, Signal
 from pygdbmi import gdbcontroller
@@ -8,21 +9,87 @@ from pygdbmi import gdbcontroller
 from gui.constants import PwndbgGuiConstants
 from gui.inferior_handler import InferiorHandler
 from gui.inferior_state import InferiorState
-from gui.tokens import ResponseToken, Context_to_Token
+from gui.tokens import ResponseToken, Context_to_Token, Context_to_Output_Token
 
 logger = logging.getLogger(__file__)
 
 
+def mi_quote(value: str) -> str:
+    """Quote an argument as a C string for GDB/MI"""
+    return '"' + value.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def context_token(context: str, context_output: bool) -> int:
+    """The token of a "context <name>" command, which differs if the section is redirected to a pty of the GUI"""
+    return Context_to_Output_Token[context] if context_output else Context_to_Token[context]
+
+
+def frame_context_requests(contexts: List[str], context_output=False) -> List[Tuple[int, str]]:
+    """
+    The commands that query all contexts that depend on the selected frame
+    :param contexts: The pwndbg contexts that are requested via "context <name>"
+    :param context_output: Whether pwndbg writes the contexts to ptys of the GUI instead of GDB's console
+    :return: The commands in the form of [(token, command)]
+    """
+    requests = [(context_token(context, context_output), f"context {context}") for context in contexts]
+    # The stack is resolved by the GUI itself if possible, otherwise it requests pwndbg's stack context
+    requests.append((ResponseToken.GUI_FRAME_POINTER, "-data-evaluate-expression $fp"))
+    requests.append((ResponseToken.GUI_STACK_POINTER, "-data-evaluate-expression $sp"))
+    # The source file and disassembly are rendered by the GUI itself, we only need to know where we are
+    requests.append((ResponseToken.GUI_CODE_SOURCE, "-file-list-exec-source-file"))
+    requests.append((ResponseToken.GUI_DISASM_FRAME, "-stack-info-frame"))
+    return requests
+
+
+def context_requests(contexts: List[str], heap_generation: int | None, diff_regions: str,
+                     watches: Dict[str, List[int]], context_output=False) -> List[Tuple[int, str]]:
+    """
+    The commands that query all context information after a stop. Shared by the GdbHandler and the headless batch mode,
+    so that both see the same contexts
+    :param contexts: The pwndbg contexts that are requested via "context <name>"
+    :param heap_generation: The generation of the last heap report that was received, -1 for a full report or None to
+    skip the heap, e.g. if the inferior did not run since the last report
+    :param diff_regions: Comma separated names of the regions that gui-diff compares, empty to skip the diff, e.g. if
+    the inferior did not run since the last diff
+    :param watches: The watches in the form of {address: [idx, number of lines]}
+    :param context_output: Whether pwndbg writes the contexts to ptys of the GUI instead of GDB's console
+    :return: The commands in the form of [(token, command)]
+    """
+    requests = frame_context_requests(contexts, context_output)
+    # Only query whether the stack is deeper than one page, so that the cost does not depend on the recursion depth
+    requests.append((ResponseToken.GUI_BACKTRACE_DEPTH,
+                     f"-stack-info-depth {PwndbgGuiConstants.BACKTRACE_PAGE_SIZE + 1}"))
+    requests.append((ResponseToken.GUI_BACKTRACE_FRAMES,
+                     f"-stack-list-frames 0 {PwndbgGuiConstants.BACKTRACE_PAGE_SIZE - 1}"))
+    if heap_generation is not None:
+        requests.append((ResponseToken.GUI_HEAP_HEAP, f"gui-heap {heap_generation}"))
+    requests.append((ResponseToken.GUI_REGS_FS_BASE, "fsbase"))
+    if diff_regions:
+        requests.append((ResponseToken.GUI_MEMORY_DIFF, f"gui-diff {diff_regions}"))
+    for watch, params in watches.items():
+        requests.append((ResponseToken.GUI_WATCHES_HEXDUMP + params[0], " ".join(["hexdump", watch, str(params[1])])))
+    return requests
+
+
 class GdbHandler(QObject):
     """A wrapper to interact with GDB/pwndbg via the GDB Machine Interface"""
     update_gui = Signal(str, bytes)
 
-    def __init__(self):
+    def __init__(self, inferior_handler: InferiorHandler):
         super().__init__()
-        self.contexts = ['regs', 'stack', 'disasm', 'code', 'backtrace']
+        self.contexts = ['regs']
         self.controller = gdbcontroller.GdbController()
+        self.inferior_handler = inferior_handler
         # active watches in the form of {address: [idx , number of lines]}
         self.watches: Dict[str, List[int]] = {}
+        # The generation of the last heap report received by the GUI, allows gui-heap to only send changes
+        self.heap_generation = -1
+        # Comma separated names of the regions that gui-diff compares between stops
+        self.diff_regions = ""
+        # The ptys that context sections can be redirected to in the form of {section: tty}, set by the session
+        self.context_ttys: Dict[str, str] = {}
+        # Whether the context sections are currently redirected to their ptys
+        self.context_output = False
 
     def write_to_controller(self, token: ResponseToken, command: str):
         """
@@ -36,12 +103,22 @@ class GdbHandler(QObject):
         """Load the user's .gdbinit, check that pwndbg is loaded"""
         # With GDB MI, the .gdbinit file is ignored so we load it ourselves
         gdbinit = Path(Path.home() / ".gdbinit").resolve()
-        if not gdbinit.exists():
+        if gdbinit.exists():
+            logger.debug("Loading .gdbinit from %s", str(gdbinit))
+            self.write_to_controller(ResponseToken.GUI_MAIN_CONTEXT, f"source {str(gdbinit)}")
+            self.write_to_controller(ResponseToken.GUI_PWNDBG_ABOUT, "pwndbg --all")
+        else:
             logger.warning("Could not find .gdbinit file at %s", str(gdbinit))
-            return
-        logger.debug("Loading .gdbinit from %s", str(gdbinit))
-        self.write_to_controller(ResponseToken.GUI_MAIN_CONTEXT, f"source {str(gdbinit)}")
-        self.write_to_controller(ResponseToken.GUI_PWNDBG_ABOUT, "pwndbg --all")
+        # Our helpers only use pwndbg lazily, so they can be loaded in any case
+        self.load_gdb_scripts()
+
+    def load_gdb_scripts(self):
+        """Import our helper commands (e.g. gui-heap) into GDB's Python interpreter"""
+        scripts_dir = Path(__file__).parent.resolve() / "gdb_scripts"
+        self.write_to_controller(ResponseToken.DELETE, f"python import sys; sys.path.insert(0, {str(scripts_dir)!r})")
+        for script in PwndbgGuiConstants.GDB_SCRIPTS:
+            logger.debug("Loading GDB script %s", script)
+            self.write_to_controller(ResponseToken.GUI_MAIN_CONTEXT, f"python import {script}")
 
     @Slot(str)
     def send_command(self, cmd: str):
@@ -52,6 +129,9 @@ class GdbHandler(QObject):
         try:
             self.write_to_controller(ResponseToken.USER_MAIN, cmd)
             self.update_contexts()
+            # Commands can change the heap without resuming the inferior, e.g. "set {long}addr=...", the report only
+            # contains the changes so this is cheap
+            self.request_heap()
         except Exception as e:
             logger.warning("Error while sending command '%s': '%s'", cmd, str(e))
 
@@ -63,18 +143,59 @@ class GdbHandler(QObject):
         """
         if flush_to_main:
             self.write_to_controller(ResponseToken.GUI_MAIN_CONTEXT, "")
-        for context in self.contexts:
-            self.write_to_controller(Context_to_Token[context], f"context {context}")
-        # Update heap
-        self.write_to_controller(ResponseToken.GUI_HEAP_HEAP, "heap")
-        self.write_to_controller(ResponseToken.GUI_HEAP_BINS, "bins")
-        self.write_to_controller(ResponseToken.GUI_REGS_FS_BASE, "fsbase")
-        # Update watches
-        logger.debug("updating watches: ")
-        for watch, params in self.watches.items():
-            logger.debug("updating watch: %s", watch)
-            self.write_to_controller(ResponseToken.GUI_WATCHES_HEXDUMP + params[0],
-                                     " ".join(["hexdump", watch, str(params[1])]))
+        logger.debug("updating contexts and watches: %s", list(self.watches))
+        # The heap and the changed memory only change when the inferior ran, see update_memory_contexts
+        for token, command in context_requests(self.contexts, None, "", self.watches, self.context_output):
+            self.write_to_controller(token, command)
+
+    @Slot()
+    def update_memory_contexts(self):
+        """
+        Query the heap report and the memory diff, which the reader requests whenever the inferior stopped. The diff
+        takes a new snapshot every time, so it must not run after commands that did not resume the inferior
+        """
+        self.request_heap()
+        if self.diff_regions:
+            self.write_to_controller(ResponseToken.GUI_MEMORY_DIFF, f"gui-diff {self.diff_regions}")
+
+    def request_heap(self):
+        """Query the heap report. Every report of gui-heap increments its generation by one, so the generation a
+        delta report will have is known before it arrives and further requests can already build on it"""
+        self.write_to_controller(ResponseToken.GUI_HEAP_HEAP, f"gui-heap {self.heap_generation}")
+        if self.heap_generation != -1:
+            self.heap_generation += 1
+
+    def update_frame_contexts(self):
+        """Send commands to query updates for all contexts that depend on the selected frame"""
+        for token, command in frame_context_requests(self.contexts, self.context_output):
+            self.write_to_controller(token, command)
+
+    @Slot(int, int)
+    def list_frames(self, low: int, high: int):
+        """
+        Query a page of the backtrace
+        :param low: The level of the first frame
+        :param high: The level of the last frame
+        """
+        self.write_to_controller(ResponseToken.GUI_BACKTRACE_FRAMES, f"-stack-list-frames {low} {high}")
+
+    @Slot(int)
+    def list_frame_arguments(self, level: int):
+        """
+        Query the arguments of a single frame. Only simple values are printed to keep the output small
+        :param level: The level of the frame
+        """
+        self.write_to_controller(ResponseToken.GUI_BACKTRACE_ARGS, f"-stack-list-arguments --simple-values {level} {level}")
+
+    @Slot(int)
+    def select_frame(self, level: int):
+        """
+        Select a frame and update all contexts that depend on it
+        :param level: The level of the frame
+        """
+        # Use the CLI command, as it also updates the current source location
+        self.write_to_controller(ResponseToken.DELETE, f"frame {level}")
+        self.update_frame_contexts()
 
     @Slot(list)
     def execute_cmd(self, arguments: List[str]):
@@ -92,7 +213,7 @@ class GdbHandler(QObject):
         :param arguments: The arguments to add after "file"
         """
         self.write_to_controller(ResponseToken.GUI_MAIN_CONTEXT, " ".join(["file"] + arguments))
-        InferiorHandler.INFERIOR_STATE = InferiorState.QUEUED
+        self.inferior_handler.state = InferiorState.QUEUED
 
     @Slot(list)
     def set_pid_target(self, arguments: List[str]):
@@ -102,7 +223,7 @@ class GdbHandler(QObject):
         """
         self.write_to_controller(ResponseToken.GUI_MAIN_CONTEXT, " ".join(["attach"] + arguments))
         # Attaching to a running process stops it
-        InferiorHandler.INFERIOR_STATE = InferiorState.STOPPED
+        self.inferior_handler.state = InferiorState.STOPPED
 
     @Slot(list)
     def set_source_dir(self, arguments: List[str]):
@@ -128,13 +249,38 @@ class GdbHandler(QObject):
         :param new_value: The new stack-lines value
         """
         self.change_setting(["context-stack-lines", str(new_value)])
-        self.write_to_controller(ResponseToken.GUI_STACK_CONTEXT, "context stack")
+        self.write_to_controller(ResponseToken.GUI_STACK_POINTER, "-data-evaluate-expression $sp")
+
+    @Slot()
+    def update_pwndbg_stack(self):
+        """Query pwndbg's stack context, used when the GUI cannot resolve the stack itself"""
+        self.write_to_controller(context_token("stack", self.context_output), "context stack")
 
     @Slot(str)
     def execute_try_free(self, param: str):
         """Execute the "try_free" command with the given address"""
         self.write_to_controller(ResponseToken.GUI_HEAP_TRY_FREE, " ".join(["try_free", param]))
 
+    @Slot(int)
+    def set_heap_generation(self, generation: int):
+        """
+        Remember which heap report the GUI has, so that the next report can only contain the changes
+        :param generation: The generation of the last received report or -1 to request a full report
+        """
+        if generation == -1:
+            self.heap_generation = -1
+        else:
+            # Reports that were requested in the meantime already build on this one
+            self.heap_generation = max(self.heap_generation, generation)
+
+    @Slot(str)
+    def set_diff_regions(self, regions: str):
+        """
+        Set the regions that are compared with the previous stop on every stop
+        :param regions: Comma separated region names (stack, heap, data) or an empty string to disable the diff
+        """
+        self.diff_regions = regions
+
     @Slot(str, int)
     def add_watch(self, param: str, idx: int):
         self.watches[param] = [idx, PwndbgGuiConstants.DEFAULT_WATCH_BYTES]
@@ -142,6 +288,14 @@ class GdbHandler(QObject):
         self.write_to_controller(ResponseToken.GUI_WATCHES_HEXDUMP + idx,
                                  " ".join(["hexdump", param, str(PwndbgGuiConstants.DEFAULT_WATCH_BYTES)]))
 
+    @Slot(dict)
+    def set_watches(self, watches: Dict[str, List[int]]):
+        """
+        Replace the active watches, e.g. when this session is brought to the front and shows the watches of the GUI
+        :param watches: The watches in the form of {address: [idx, number of bytes]}
+        """
+        self.watches = watches
+
     @Slot(str)
     def del_watch(self, param: str):
         logger.debug("Deleted watch %s with index %d", param, self.watches[param][0])
@@ -178,10 +332,192 @@ class GdbHandler(QObject):
         """
         self.controller.write(user_input.decode(), read_response=False)
 
-    @Slot(list)
-    def execute_search(self, search_params: List[str]):
+    @Slot(object)
+    def disassemble_function(self, address: int):
+        """
+        Disassemble the whole function containing the given address, including the raw instruction bytes
+        :param address: An address inside the function
+        """
+        self.write_to_controller(ResponseToken.GUI_DISASM_FUNCTION, f"-data-disassemble -a {hex(address)} -- 2")
+
+    @Slot(object, object)
+    def disassemble_range(self, start: int, end: int):
+        """
+        Disassemble all instructions in the given address range, including the raw instruction bytes
+        :param start: The first address
+        :param end: The end address (exclusive)
+        """
+        self.write_to_controller(ResponseToken.GUI_DISASM_FUNCTION, f"-data-disassemble -s {hex(start)} -e {hex(end)} -- 2")
+
+    @Slot(str)
+    def insert_breakpoint(self, location: str):
+        """
+        Insert a breakpoint at the given location
+        :param location: A GDB location, e.g. "*0x401136"
+        """
+        self.write_to_controller(ResponseToken.GUI_BREAKPOINT_INSERT, f"-break-insert {location}")
+
+    @Slot(str)
+    def delete_breakpoint(self, number: str):
         """
-        Execute the "search" command for a given parameter
-        :param search_params: A list of the search parameters
+        Delete the breakpoint with the given number. Breakpoints are changed via CLI commands, since only those are
+        reported as breakpoint notifications, which keep the breakpoints pane in sync
+        :param number: The number of the breakpoint as reported by GDB
         """
-        self.write_to_controller(ResponseToken.GUI_MAIN_CONTEXT, " ".join(["search"] + search_params))
+        self.write_to_controller(ResponseToken.DELETE, f"delete {number}")
+
+    @Slot(str, bool)
+    def enable_breakpoint(self, number: str, enabled: bool):
+        """
+        Enable or disable the breakpoint with the given number
+        :param number: The number of the breakpoint as reported by GDB
+        :param enabled: True to enable the breakpoint
+        """
+        self.write_to_controller(ResponseToken.DELETE, f"{'enable' if enabled else 'disable'} {number}")
+
+    @Slot(str, str)
+    def set_breakpoint_condition(self, number: str, condition: str):
+        """
+        Set the condition of a breakpoint, errors (e.g. an unknown symbol) are shown in the main pane
+        :param number: The number of the breakpoint as reported by GDB
+        :param condition: The condition, an empty condition makes the breakpoint unconditional
+        """
+        self.write_to_controller(ResponseToken.GUI_MAIN_CONTEXT, f"condition {number} {condition}".rstrip())
+
+    @Slot()
+    def list_breakpoints(self):
+        self.write_to_controller(ResponseToken.GUI_BREAKPOINT_LIST, "-break-list")
+
+    @Slot(str, list)
+    def add_logpoint(self, location: str, expressions: List[str]):
+        """
+        Add a logpoint with our "gui-logpoint" command, which streams the values of the expressions on every hit
+        without stopping the inferior
+        :param location: A GDB location, e.g. "malloc" or "*0x401136"
+        :param expressions: The expressions that are evaluated on every hit, e.g. "$rdi"
+        """
+        arguments = " ".join(mi_quote(argument) for argument in [location] + expressions)
+        self.write_to_controller(ResponseToken.GUI_LOGPOINT, f"gui-logpoint add {arguments}")
+
+    @Slot(int)
+    def delete_logpoint(self, number: int):
+        self.write_to_controller(ResponseToken.GUI_LOGPOINT, f"gui-logpoint delete {number}")
+
+    @Slot()
+    def list_logpoints(self):
+        self.write_to_controller(ResponseToken.GUI_LOGPOINT, "gui-logpoint list")
+
+    @Slot(str)
+    def list_commands(self, argument: str):
+        """
+        Execute our "gui-commands" command, which streams the data of the main input's completion
+        :param argument: "version" for the versions of GDB and pwndbg and the registers, or "index" for all commands
+        """
+        self.write_to_controller(ResponseToken.DELETE, f"gui-commands {argument}")
+
+    @Slot(str, str)
+    def execute_search(self, value_type: str, value: str):
+        """
+        Execute our "gui-search" command, which streams its hits to the search results widget
+        :param value_type: The type of the value, e.g. "qword" or "bytes"
+        :param value: The value as entered by the user
+        """
+        # Hex encode the value so that quotes, spaces and escape sequences survive GDB's argument parsing
+        self.write_to_controller(ResponseToken.GUI_SEARCH, f"gui-search {value_type} {value.encode().hex()}")
+
+    @Slot(str, str)
+    def take_snapshot(self, scope: str, path: str):
+        """
+        Execute our "gui-snapshot" command, which dumps the mappings of the inferior for local searches
+        :param scope: Either "writable" or "readable" mappings
+        :param path: The file the snapshot is written to
+        """
+        self.write_to_controller(ResponseToken.GUI_SNAPSHOT, f"gui-snapshot {scope} {path}")
+
+    @Slot(bool)
+    def set_non_stop(self, enabled: bool):
+        """
+        Switch between all-stop and non-stop mode, only possible while no program runs. Non-stop mode needs GDB to
+        accept commands while threads are running
+        :param enabled: True for non-stop mode
+        """
+        state = "on" if enabled else "off"
+        self.write_to_controller(ResponseToken.GUI_MAIN_CONTEXT, f"-gdb-set mi-async {state}")
+        self.write_to_controller(ResponseToken.GUI_MAIN_CONTEXT, f"-gdb-set non-stop {state}")
+
+    @Slot(bool)
+    def set_context_output(self, enabled: bool):
+        """
+        Redirect pwndbg's context sections to the ptys of the GUI or back to GDB's console. Later "context" commands
+        are sent with the matching tokens, so the GdbReader knows where to find their output
+        :param enabled: True to redirect the sections
+        """
+        for section, tty in self.context_ttys.items():
+            if enabled:
+                # The section is cleared before every output, which lets the reader find the latest one
+                command = f"contextoutput {section} {tty} true"
+            else:
+                command = f"contextoutput {section} stdout \"\""
+            self.write_to_controller(ResponseToken.GUI_MAIN_CONTEXT, command)
+        self.context_output = enabled
+
+    @Slot()
+    def list_threads(self):
+        self.write_to_controller(ResponseToken.GUI_THREAD_INFO, "-thread-info")
+
+    @Slot(str)
+    def select_thread(self, thread_id: str):
+        """
+        Select a thread that the contexts show, and update the contexts if it is stopped
+        :param thread_id: The GDB id of the thread
+        """
+        self.write_to_controller(ResponseToken.GUI_THREAD_SELECT, f"-thread-select {thread_id}")
+        self.update_contexts()
+
+    @Slot(str)
+    def interrupt_thread(self, thread_id: str):
+        """
+        Interrupt a thread without stopping the other threads in non-stop mode
+        :param thread_id: The GDB id of the thread or "all"
+        """
+        scope = "--all" if thread_id == "all" else f"--thread {thread_id}"
+        self.write_to_controller(ResponseToken.GUI_MAIN_CONTEXT, f"-exec-interrupt {scope}")
+
+    @Slot(str)
+    def continue_thread(self, thread_id: str):
+        """
+        Resume a thread without resuming the other threads in non-stop mode
+        :param thread_id: The GDB id of the thread or "all"
+        """
+        scope = "--all" if thread_id == "all" else f"--thread {thread_id}"
+        self.write_to_controller(ResponseToken.GUI_MAIN_CONTEXT, f"-exec-continue {scope}")
+
+    @Slot(int, str, str, str, bool)
+    def execute_trace(self, count: int, until: str, condition: str, registers: str, record_writes: bool):
+        """
+        Execute our "gui-trace" command, which single-steps the inferior inside GDB and streams the trace to the trace
+        widget, and update the contexts once afterwards
+        :param count: The maximum number of instructions to step
+        :param until: An address expression to stop at, or empty
+        :param condition: An expression to stop at once it is true, or empty
+        :param registers: Comma separated registers to record at every step
+        :param record_writes: Whether to record the memory written by every instruction
+        """
+        command = f"gui-trace {count}"
+        # Hex encode the expressions so that quotes and spaces survive GDB's argument parsing
+        if until:
+            command += f" until={until.encode().hex()}"
+        if condition:
+            command += f" cond={condition.encode().hex()}"
+        if registers:
+            command += f" regs={registers}"
+        if record_writes:
+            command += " writes"
+        self.write_to_controller(ResponseToken.GUI_TRACE, command)
+        self.update_contexts()
+
+    @Slot()
+    def interrupt_command(self):
+        """Interrupt the command GDB is currently executing, e.g. a long-running search"""
+        logger.debug("Interrupting current GDB command")
+        self.controller.gdb_process.send_signal(signal.SIGINT)
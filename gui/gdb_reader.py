@@ -1,26 +1,31 @@
 import logging
-from typing import List
+import time
+from typing import List, Dict
 
 from PySide6.QtCore import QObject, Slot, Signal, QCoreApplication
 from pygdbmi import gdbcontroller
 
 import gui.tokens as tokens
+from gui.constants import PwndbgGuiConstants
+from gui.gdb_engine import StreamRecordParser
 from gui.inferior_handler import InferiorHandler
-from gui.inferior_state import InferiorState
+from gui.inferior_state import InferiorState, ThreadStates
+from gui.refresh_governor import RefreshGovernor
 
 logger = logging.getLogger(__file__)
 
 
-class GdbReader(QObject):
-    """Reader object to continuously check for data from gdb and handle the parsed responses"""
+class GdbSignals(QObject):
+    """The signals through which the output of a GDB is sent to the widgets. Shared by the GdbReader and the
+    GdbSessionAdapter, so that the widgets can be connected to either"""
     # Update a context pane in the GUI with data
     update_gui = Signal(str, bytes)
     # Send the result of a try_free command to the Heap widget
     send_heap_try_free_response = Signal(bytes)
-    # Send the result of a heap command to the Heap widget
+    # Send the JSON chunk and bins report of the gui-heap command to the Heap widget
     send_heap_heap_response = Signal(bytes)
-    # Send the result of a bins command to the Heap widget
-    send_heap_bins_response = Signal(bytes)
+    # Send the JSON report of the gui-diff command to the memory diff widget
+    send_memory_diff = Signal(bytes)
     # Send the result of the hexdump output of a watch to the Watches widget
     send_watches_hexdump_response = Signal(int, bytes)
     # Send the fs base to the "regs" context
@@ -29,12 +34,85 @@ class GdbReader(QObject):
     send_pwndbg_about = Signal(bytes)
     # Send the result of an xinfo command to a list widget
     send_xinfo = Signal(bytes)
+    # Send the current source file and line to the "code" context
+    send_source_file = Signal(dict)
+    # Send the current frame (containing the pc) to the "disasm" context
+    send_frame_info = Signal(dict)
+    # Send the result of a "-data-disassemble" command to the "disasm" context
+    send_disassembly = Signal(dict)
+    # Send a created or modified breakpoint ("bkpt"), or the error ("msg") of a breakpoint that could not be inserted
+    send_breakpoint_changed = Signal(dict)
+    # Send the number of a deleted breakpoint
+    send_breakpoint_deleted = Signal(str)
+    # Send the result of "-break-list" to the breakpoints widget
+    send_breakpoint_list = Signal(dict)
+    # Send the (capped) stack depth to the "backtrace" context
+    send_backtrace_depth = Signal(dict)
+    # Send a page of frames to the "backtrace" context
+    send_backtrace_frames = Signal(dict)
+    # Send the arguments of a frame to the "backtrace" context
+    send_backtrace_args = Signal(dict)
+    # Send a streamed record of the gui-search command to the search results widget
+    send_search_record = Signal(dict)
+    # Send the result of the gui-search command once it finished
+    send_search_finished = Signal(dict)
+    # Send the index of a memory snapshot written by the gui-snapshot command
+    send_snapshot_index = Signal(dict)
+    # Send the result of the gui-snapshot command once it finished
+    send_snapshot_finished = Signal(dict)
+    # Send a streamed record of the gui-trace command to the trace widget
+    send_trace_record = Signal(dict)
+    # Send the result of the gui-trace command once it finished
+    send_trace_finished = Signal(dict)
+    # Send a streamed record of the gui-profile command to the profiler widget
+    send_profile_record = Signal(dict)
+    # Send a streamed record of the gui-logpoint command or of the hits of logpoints to the logpoints widget
+    send_logpoint_record = Signal(dict)
+    # Send the result of the gui-logpoint command, only relevant if the command failed
+    send_logpoint_result = Signal(dict)
+    # Send a streamed record of the gui-commands command to the completer of the main input
+    send_command_record = Signal(dict)
+    # Send the stack and frame pointer to the "stack" context
+    send_stack_pointer = Signal(dict)
+    send_frame_pointer = Signal(dict)
+    # Send the address at which the inferior stopped because it hit a breakpoint
+    send_breakpoint_hit = Signal(object)
+    # Send the result of "-thread-info" to the threads widget
+    send_thread_info = Signal(dict)
+    # Emitted when a new inferior process was started or attached to, or with 0 when it exited
+    inferior_pid_changed = Signal(int)
     # Emitted when the inferior state changes. True for Stopped and False for Running
     inferior_state_changed = Signal(bool)
+    # Emitted when the inferior actually ran and stopped, only then the heap and the changed memory are queried again
+    memory_outdated = Signal()
+
+    # Signals of the records streamed on a channel by our GDB scripts in the form of {channel: signal name}
+    STREAM_CHANNELS = {"search": "send_search_record",
+                       "snapshot": "send_snapshot_index",
+                       "trace": "send_trace_record",
+                       "profile": "send_profile_record",
+                       "logpoint": "send_logpoint_record",
+                       "commands": "send_command_record"}
 
-    def __init__(self, controller: gdbcontroller.GdbController):
+
+class GdbReader(GdbSignals):
+    """Reader object to continuously check for data from gdb and handle the parsed responses"""
+    # Emitted when threads were created, exited, resumed or stopped
+    threads_changed = Signal()
+    # Emitted when the selected thread stopped
+    selected_thread_stopped = Signal()
+    # Emitted with the id of a thread that stopped while the selected thread keeps running (non-stop mode)
+    other_thread_stopped = Signal(str)
+    # Emitted when pwndbg finished writing a context section to its pty, with whether the pane should be updated
+    context_output_done = Signal(str, bool)
+    # Emitted with the number of stops that were not shown during the current storm of stops, whenever a stop is shown
+    stops_skipped = Signal(int)
+
+    def __init__(self, controller: gdbcontroller.GdbController, inferior_handler: InferiorHandler):
         super().__init__()
         self.controller = controller
+        # Holds the state of the inferior that this reader's GDB debugs
+        self.inferior_handler = inferior_handler
         self.result = []
         # Whether the thread should keep working
         self.run = True
@@ -42,15 +120,48 @@ class GdbReader(QObject):
         # as "log" elements. However, since also all inputted commands are echoed back as logs, we capture logs
         # separately and decide on a "result" element whether we want to forward the logs or not
         self.logs: List[str] = []
+        # Splits the records streamed by our GDB scripts from the console output
+        self.stream_parser = StreamRecordParser()
+        # Signals that receive the records streamed on a channel by our GDB scripts
+        self.stream_channels: Dict[str, Signal] = {channel: getattr(self, signal)
+                                                   for channel, signal in self.STREAM_CHANNELS.items()}
+        # Whether the running and stopped notifications are currently ignored, because gui-trace or gui-profile
+        # resume and stop the inferior many times within a single command
+        self.suppress_stops = False
+        # The last ignored stopped notification, which is handled once gui-profile returns
+        self.suppressed_stop: dict | None = None
+        # The state of every thread, the inferior counts as stopped if the selected thread is stopped
+        self.threads = ThreadStates()
+        # Caps how often stops are shown, e.g. while breakpoint commands or a script keep continuing the inferior
+        self.governor = RefreshGovernor(PwndbgGuiConstants.REFRESH_RATE)
+        # Whether the GUI still shows the inferior as running, because the stops since it resumed were not shown yet
+        self.stop_deferred = False
+        # Output for the main pane and modified breakpoints in the form of {number: bkpt} that were collected while
+        # stops were deferred, they are sent together with the next refresh
+        self.main_backlog: List[str] = []
+        self.deferred_breakpoints: Dict[str, dict] = {}
 
     @Slot()
     def read_with_timeout(self):
         """Start continuously reading output from GDB MI"""
         while self.run:
             QCoreApplication.processEvents()
-            response = self.controller.get_gdb_response(raise_error_on_timeout=False)
+            deferred = self.governor.pending or self.main_backlog or self.deferred_breakpoints
+            # Don't block longer than until a deferred refresh is due
+            timeout = self.governor.remaining(time.monotonic()) if deferred else 1
+            response = self.controller.get_gdb_response(timeout_sec=timeout, raise_error_on_timeout=False)
             if response is not None:
                 self.parse_response(response)
+            if deferred and self.governor.remaining(time.monotonic()) == 0:
+                self.refresh_deferred()
+
+    @Slot(int)
+    def set_refresh_rate(self, rate: int):
+        """
+        Set how often stops are shown at most
+        :param rate: Stops per second, 0 shows every stop
+        """
+        self.governor.set_rate(rate)
 
     @Slot()
     def set_run(self, state: bool):
@@ -79,10 +190,22 @@ class GdbReader(QObject):
         # destined to main should not be shown
         if context == tokens.Token_to_Context[tokens.ResponseToken.GUI_MAIN_CONTEXT.value]:
             self.update_gui.emit(context, content)
-        elif InferiorHandler.INFERIOR_STATE == InferiorState.STOPPED:
+        elif self.inferior_handler.state == InferiorState.STOPPED:
             self.update_gui.emit(context, content)
         self.result = []
 
+    def send_context_output_done(self, token: int):
+        """
+        Let the reader of a redirected context section know that the section was written completely
+        :param token: Token of the redirected section
+        """
+        section = tokens.Output_Token_to_Context[token]
+        if self.result:
+            # pwndbg printed the section to the console anyway, e.g. because it does not know contextoutput
+            self.send_update_gui(tokens.Context_to_Token[section])
+            return
+        self.context_output_done.emit(section, self.inferior_handler.state == InferiorState.STOPPED)
+
     def send_main_update(self):
         """Flushes all collected outputs to the main output window"""
         self.update_gui.emit("main", "".join(self.result).encode())
@@ -97,17 +220,33 @@ class GdbReader(QObject):
         if not send_on_stop:
             # Send this signal even if the inferior is not started yet or running
             signal.emit("".join(self.result).encode())
-        elif InferiorHandler.INFERIOR_STATE == InferiorState.STOPPED:
+        elif self.inferior_handler.state == InferiorState.STOPPED:
             signal.emit("".join(self.result).encode())
         self.result = []
 
+    def send_payload_update(self, signal: Signal, response: dict, send_on_stop=True):
+        """
+        Emit a supplied signal with the structured payload of a GDB MI result, e.g. for MI commands like
+        "-file-list-exec-source-file" that don't produce any console output
+        :param signal: The signal that will handle the payload
+        :param response: GDB-MI response with ["type"] == result
+        :param send_on_stop: Whether to send data only when the inferior is stopped
+        """
+        payload = response["payload"] if response["payload"] is not None else {}
+        if not send_on_stop or self.inferior_handler.state == InferiorState.STOPPED:
+            signal.emit(payload)
+        self.result = []
+
     def parse_response(self, gdbmi_response: list[dict]):
         """
         Parse a response received from GDB MI and decide how to handle it
         :param gdbmi_response: The parsed response from pygdbmi
         """
         for response in gdbmi_response:
-            if response["type"] == "console" and response["payload"] is not None and response["stream"] == "stdout":
+            if response["type"] == "console" and response["payload"] is not None and (
+                    self.stream_parser.accepts(response["payload"])):
+                self.handle_stream_output(response["payload"])
+            elif response["type"] == "console" and response["payload"] is not None and response["stream"] == "stdout":
                 self.result.append(response["payload"])
                 # When a subprocess is spawned, we get no proper notify/result event from GDB, so we check manually
                 if response["payload"].startswith("[Detaching"):
@@ -126,6 +265,56 @@ class GdbReader(QObject):
             elif response["type"] == "log":
                 self.logs.append(response["payload"])
 
+    def handle_stream_output(self, payload: str):
+        """
+        Route streamed records of our GDB scripts to their channel as soon as a record is complete
+        :param payload: Console output starting with (or continuing) a streamed record
+        """
+        for channel, record in self.stream_parser.feed(payload):
+            if channel is None:
+                self.result.append(record)
+                continue
+            if channel not in self.stream_channels:
+                logger.warning("Received record for unknown stream channel %s", channel)
+                continue
+            if channel == "trace":
+                self.handle_trace_record(record)
+            elif channel == "profile":
+                self.handle_profile_record(record)
+            self.stream_channels[channel].emit(record)
+
+    def handle_trace_record(self, record: dict):
+        """
+        Every step of the gui-trace command produces a running and a stopped notification, which are ignored while the
+        trace is running so that the contexts are not refreshed after every single instruction
+        :param record: A record streamed on the "trace" channel
+        """
+        if "register_names" in record:
+            self.suppress_stops = True
+        elif "done" in record:
+            self.suppress_stops = False
+            # Let everything that caches inferior state know that the inferior moved on
+            if self.inferior_handler.state == InferiorState.STOPPED:
+                self.inferior_state_changed.emit(False)
+                self.inferior_state_changed.emit(True)
+                self.memory_outdated.emit()
+
+    def handle_profile_record(self, record: dict):
+        """
+        The gui-profile command interrupts and resumes the inferior for every sample, so for the GUI the inferior is
+        running from the first record until the "done" record, after which the final stop is handled
+        :param record: A record streamed on the "profile" channel
+        """
+        if "rate" in record:
+            self.suppress_stops = True
+            self.suppressed_stop = None
+            self.handle_running()
+        elif "done" in record:
+            self.suppress_stops = False
+            if self.suppressed_stop is not None:
+                self.handle_notify(self.suppressed_stop)
+            self.suppressed_stop = None
+
     def handle_result(self, response: dict):
         """
         Handle messages of the result type, which are emitted after a command/action has finished producing output
@@ -137,26 +326,29 @@ class GdbReader(QObject):
         if response["message"] == "error" and response["payload"] is not None:
             self.result.append(response["payload"]["msg"])
         token = response["token"]
-        if token == tokens.ResponseToken.GUI_HEAP_TRY_FREE:
-            self.send_context_update(self.send_heap_try_free_response)
-        elif token == tokens.ResponseToken.GUI_HEAP_HEAP:
-            self.send_context_update(self.send_heap_heap_response)
-        elif token == tokens.ResponseToken.GUI_HEAP_BINS:
-            self.send_context_update(self.send_heap_bins_response)
-        elif token == tokens.ResponseToken.GUI_REGS_FS_BASE:
-            self.send_context_update(self.send_fs_base_response)
-        elif token == tokens.ResponseToken.GUI_PWNDBG_ABOUT:
-            self.send_context_update(self.send_pwndbg_about, send_on_stop=False)
-        elif token == tokens.ResponseToken.GUI_XINFO:
-            self.send_context_update(self.send_xinfo)
+        if token == tokens.ResponseToken.GUI_TRACE:
+            # The trace might have failed before streaming its "done" record
+            self.suppress_stops = False
+        if token in tokens.Token_to_Console_Signal:
+            signal, send_on_stop = tokens.Token_to_Console_Signal[token]
+            self.send_context_update(getattr(self, signal), send_on_stop)
+        elif token in tokens.Token_to_Payload_Signal:
+            signal, send_on_stop = tokens.Token_to_Payload_Signal[token]
+            self.send_payload_update(getattr(self, signal), response, send_on_stop)
+        elif token == tokens.ResponseToken.GUI_THREAD_SELECT:
+            if response["message"] == "done" and response["payload"] is not None:
+                self.select_thread(response["payload"].get("new-thread-id"))
+            self.result = []
         elif token >= tokens.ResponseToken.GUI_WATCHES_HEXDUMP:
-            if InferiorHandler.INFERIOR_STATE == InferiorState.STOPPED:
+            if self.inferior_handler.state == InferiorState.STOPPED:
                 ''' Here we send the result of the hexdump, the signal differs from the rest here since we need to send 
                 the token as well so that the watch-widget knows to which watch the result belongs. If we have logs then 
                 something was wrong with the hexdump command. In this case the logs that describe the error will always 
                 be from the third log line onwards.'''
                 self.send_watches_hexdump_response.emit(token, "".join(self.result + self.logs[2:]).encode())
             self.result = []
+        elif token in tokens.Output_Token_to_Context:
+            self.send_context_output_done(token)
         elif token != tokens.ResponseToken.DELETE:
             # We found a context token -> send it to the corresponding context
             self.send_update_gui(token)
@@ -165,32 +357,151 @@ class GdbReader(QObject):
             self.result = []
         self.logs = []
 
+    def handle_running(self, thread_id: str = "all"):
+        """
+        Handle resumed threads, the inferior only counts as running if the selected thread was resumed
+        :param thread_id: The id of the resumed thread or "all"
+        """
+        self.threads.set_running(thread_id)
+        self.threads_changed.emit()
+        if self.threads.selected_stopped() and thread_id != "all":
+            return
+        logger.debug("Setting inferior state to %s", InferiorState.RUNNING.name)
+        self.inferior_handler.state = InferiorState.RUNNING
+        # A stop that was not shown yet is outdated now
+        self.governor.cancel()
+        if self.stop_deferred:
+            # The GUI still shows the inferior as running, the output is shown with the next refresh
+            self.main_backlog.extend(self.result)
+            self.result = []
+            return
+        # When we start the inferior we should flush everything we have to main
+        self.send_main_update()
+        self.inferior_state_changed.emit(False)
+
+    def handle_stopped(self, payload: dict):
+        """
+        Handle stopped threads, the inferior only counts as stopped once the selected thread stopped
+        :param payload: The payload of the stopped notification
+        """
+        stopped_threads = payload.get("stopped-threads", "all")
+        self.threads.set_stopped(stopped_threads)
+        # In all-stop mode GDB selects the thread that caused the stop, in non-stop mode it keeps the selected thread
+        if "thread-id" in payload and (stopped_threads == "all" or self.threads.selected is None):
+            self.threads.selected = payload["thread-id"]
+        self.threads_changed.emit()
+        if stopped_threads != "all" and self.threads.selected not in stopped_threads:
+            # Another thread stopped in non-stop mode, the selected thread is not affected
+            if not self.threads.selected_stopped() and "thread-id" in payload:
+                self.other_thread_stopped.emit(payload["thread-id"])
+            return
+        # Don't go from EXITED->STOPPED state
+        if self.inferior_handler.state != InferiorState.EXITED:
+            logger.debug("Setting inferior state to %s", InferiorState.STOPPED.name)
+            self.inferior_handler.state = InferiorState.STOPPED
+        # Every hit is counted, even if the stop is not shown
+        if payload.get("reason") == "breakpoint-hit" and "addr" in payload.get("frame", {}):
+            self.send_breakpoint_hit.emit(int(payload["frame"]["addr"], 16))
+        if self.governor.request(time.monotonic()):
+            self.show_stop()
+            return
+        # Too soon after the last shown stop, it is shown once it is due unless the inferior resumes before that
+        self.stop_deferred = True
+        self.main_backlog.extend(self.result)
+        self.result = []
+
+    def show_stop(self):
+        """Show the inferior as stopped in the GUI, which lets the panes refresh"""
+        self.governor.shown(time.monotonic())
+        self.stop_deferred = False
+        self.inferior_state_changed.emit(True)
+        # If we get a stop we don't get a result type done, which is why we trigger a main context update manually
+        self.result = self.main_backlog + self.result
+        self.main_backlog = []
+        self.send_main_update()
+        self.send_deferred_breakpoints()
+        self.selected_thread_stopped.emit()
+        self.stops_skipped.emit(self.governor.skipped)
+        self.memory_outdated.emit()
+
+    def refresh_deferred(self):
+        """Show the deferred stop, or only the collected output if the inferior resumed before it was shown"""
+        if self.governor.pending:
+            self.show_stop()
+            return
+        self.governor.refreshed(time.monotonic())
+        if self.main_backlog:
+            self.update_gui.emit("main", "".join(self.main_backlog).encode())
+            self.main_backlog = []
+        self.send_deferred_breakpoints()
+
+    def send_deferred_breakpoints(self):
+        for bkpt in self.deferred_breakpoints.values():
+            self.send_breakpoint_changed.emit(bkpt)
+        self.deferred_breakpoints = {}
+
+    def select_thread(self, thread_id: str | None):
+        """Follow a change of the selected thread, which changes whether the inferior counts as stopped"""
+        if thread_id is None or thread_id == self.threads.selected:
+            return
+        was_stopped = self.threads.selected_stopped()
+        self.threads.selected = thread_id
+        self.threads_changed.emit()
+        if self.threads.selected_stopped() and self.inferior_handler.state != InferiorState.EXITED:
+            self.inferior_handler.state = InferiorState.STOPPED
+            self.inferior_state_changed.emit(True)
+        elif was_stopped and not self.threads.selected_stopped():
+            self.inferior_handler.state = InferiorState.RUNNING
+            self.inferior_state_changed.emit(False)
+
     def handle_notify(self, response: dict):
         """
         Handle the notify events, which are emitted for different occasions
         :param response: GDB-MI response with ["type"] == notify
          """
+        payload = response["payload"] or {}
+        # An exit ends the trace or profile, so it is always handled
+        exited = payload.get("reason", "").startswith("exited")
+        if self.suppress_stops and response["message"] in ("running", "stopped") and not exited:
+            if response["message"] == "stopped":
+                self.suppressed_stop = response
+            return
+        if exited:
+            # An earlier stop is outdated by the exit
+            self.suppressed_stop = None
         if response["message"] == "running":
-            logger.debug("Setting inferior state to %s", InferiorState.RUNNING.name)
-            InferiorHandler.INFERIOR_STATE = InferiorState.RUNNING
-            # When we start the inferior we should flush everything we have to main
-            self.send_main_update()
-            self.inferior_state_changed.emit(False)
+            self.handle_running(payload.get("thread-id", "all"))
         elif response["message"] == "stopped":
-            # Don't go from EXITED->STOPPED state
-            self.inferior_state_changed.emit(True)
-            if InferiorHandler.INFERIOR_STATE != InferiorState.EXITED:
-                logger.debug("Setting inferior state to %s", InferiorState.STOPPED.name)
-                InferiorHandler.INFERIOR_STATE = InferiorState.STOPPED
-            # If we get a stop we don't get a result type done, which is why we trigger a main context update manually
-            self.send_main_update()
+            self.handle_stopped(payload)
+        elif response["message"] == "thread-created":
+            self.threads.add(payload.get("id"))
+            self.threads_changed.emit()
+        elif response["message"] == "thread-exited":
+            self.threads.remove(payload.get("id"))
+            self.threads_changed.emit()
+        elif response["message"] == "thread-selected":
+            self.select_thread(payload.get("id"))
+        # Breakpoints changed by CLI commands (including "delete", "enable" and "condition" sent by the GUI) or hit by
+        # the inferior, which increments their hit count. Breakpoints changed by MI commands are reported in the result
+        elif response["message"] == "breakpoint-modified" and self.stop_deferred and "bkpt" in payload:
+            # Every hit increments the hit count, only the latest state is sent with the next refresh
+            self.deferred_breakpoints[payload["bkpt"].get("number", "")] = payload
+        elif response["message"] in ("breakpoint-created", "breakpoint-modified"):
+            self.send_breakpoint_changed.emit(payload)
+        elif response["message"] == "breakpoint-deleted":
+            self.deferred_breakpoints.pop(payload.get("id", ""), None)
+            self.send_breakpoint_deleted.emit(payload.get("id", ""))
         elif response["message"] == "thread-group-exited":
             logger.debug("Setting inferior state to %s", InferiorState.EXITED.name)
-            InferiorHandler.INFERIOR_STATE = InferiorState.EXITED
+            self.inferior_handler.state = InferiorState.EXITED
+            self.threads.clear()
+            self.threads_changed.emit()
+            self.inferior_pid_changed.emit(0)
         # If we attach while having a process open we will get a thread-group-exited to indicate the exit of the current
         # process. However, we don't get a running message when attaching for the second time, but only a stopped
         # message. Since we don't switch from exited -> stopped our contexts will not update although they got new
         # information. Solution: interpret thread-group-started notify as running state change.
         elif response["message"] == "thread-group-started":
             logger.debug("Setting inferior state to %s", InferiorState.RUNNING.name)
-            InferiorHandler.INFERIOR_STATE = InferiorState.RUNNING
+            self.inferior_handler.state = InferiorState.RUNNING
+            self.inferior_pid_changed.emit(int(response["payload"].get("pid", 0)))
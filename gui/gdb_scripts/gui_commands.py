@@ -0,0 +1,76 @@
+"""The "gui-commands" command, which reports what pwndbg-gui completes in its main input: the commands and settings of
+GDB and pwndbg, which only change with their versions, and the registers of the current architecture"""
+import re
+
+import gdb
+
+from gui_common import stream_record
+
+# A command in the output of "help all", e.g. "break, brea, bre, br, b -- Set breakpoint at specified location."
+HELP_LINE = re.compile(r"^(\S.*?) -- (.*)$")
+
+
+def versions() -> dict:
+    """The versions that the indexed commands depend on"""
+    try:
+        import pwndbg
+        pwndbg_version = getattr(pwndbg, "__version__", "unknown")
+    except ImportError:
+        pwndbg_version = ""
+    return {"gdb": gdb.VERSION, "pwndbg": pwndbg_version}
+
+
+def register_names() -> list:
+    """The registers of the selected frame's architecture, or of the inferior's if there is no frame yet"""
+    try:
+        architecture = gdb.selected_frame().architecture()
+    except gdb.error:
+        try:
+            architecture = gdb.selected_inferior().architecture()
+        except (gdb.error, AttributeError):
+            return []
+    try:
+        return [register.name for register in architecture.registers()]
+    except (gdb.error, AttributeError):
+        return []
+
+
+def command_index() -> list:
+    """
+    Collect all commands with their (and their aliases') short documentation from "help all", which also lists the
+    subcommands of "set", "show", "info" etc. The top level completions add user defined commands without help
+    :return: A list of [name, documentation]
+    """
+    commands = {}
+    for line in gdb.execute("help all", to_string=True).splitlines():
+        match = HELP_LINE.match(line)
+        if match is None:
+            continue
+        for name in match.group(1).split(", "):
+            commands.setdefault(name.strip(), match.group(2).strip())
+    limit = gdb.parameter("max-completions")
+    gdb.execute("set max-completions unlimited", to_string=True)
+    try:
+        for name in gdb.execute("complete ", to_string=True).splitlines():
+            commands.setdefault(name.strip(), "")
+    finally:
+        gdb.execute(f"set max-completions {'unlimited' if limit is None or limit < 0 else limit}", to_string=True)
+    return [[name, doc] for name, doc in commands.items() if name and " --" not in name]
+
+
+class GuiCommandsCommand(gdb.Command):
+    """Report the completion data: gui-commands version | index"""
+    def __init__(self):
+        super().__init__("gui-commands", gdb.COMMAND_USER)
+
+    def invoke(self, argument: str, from_tty: bool):
+        argument = argument.strip()
+        if argument == "version":
+            stream_record("commands", {"version": versions(), "registers": register_names()})
+        elif argument == "index":
+            stream_record("commands", {"index": {"version": versions(), "commands": command_index()}})
+        else:
+            raise gdb.GdbError("Usage: gui-commands version | index")
+
+
+GuiCommandsCommand()
@@ -0,0 +1,69 @@
+"""Utilities shared by the helper commands that pwndbg-gui loads into GDB's Python interpreter"""
+import json
+
+import gdb
+
+# Console lines starting with this prefix are routed by the GUI's GdbReader to the channel that follows the prefix
+STREAM_PREFIX = "[pwndbg-gui:"
+# Mapping tuple layout: (start, end, permissions, offset, path)
+START, END, PERMISSIONS, OFFSET, PATH = range(5)
+
+
+def inferior_mappings():
+    """
+    Get the memory mappings of the selected inferior. Reads /proc/<pid>/maps directly and falls back to
+    "info proc mappings" (e.g. for remote targets)
+    :return: A list of (start, end, permissions, offset, path) tuples sorted by start address
+    """
+    pid = gdb.selected_inferior().pid
+    mappings = []
+    try:
+        with open(f"/proc/{pid}/maps") as maps:
+            for line in maps:
+                parts = line.split(maxsplit=5)
+                start, end = (int(address, 16) for address in parts[0].split("-"))
+                path = parts[5].strip() if len(parts) > 5 else ""
+                mappings.append((start, end, parts[1], int(parts[2], 16), path))
+    except OSError:
+        output = gdb.execute("info proc mappings", to_string=True)
+        for line in output.splitlines():
+            parts = line.split()
+            if len(parts) < 4 or not parts[0].startswith("0x"):
+                continue
+            # Newer GDB versions also output the permissions as fifth column
+            has_permissions = len(parts) > 4 and len(parts[4]) == 4 and not parts[4].startswith("/")
+            permissions = parts[4] if has_permissions else "r?xp"
+            path = " ".join(parts[5 if has_permissions else 4:])
+            mappings.append((int(parts[0], 16), int(parts[1], 16), permissions, int(parts[3], 16), path))
+    return sorted(mappings)
+
+
+def find_mapping(path: str):
+    """Find the first mapping with the given path, e.g. "[heap]" """
+    return next((mapping for mapping in inferior_mappings() if mapping[PATH] == path), None)
+
+
+def pointer_size() -> int:
+    """The size of a pointer of the current architecture in bytes"""
+    return gdb.lookup_type("void").pointer().sizeof
+
+
+def byte_order() -> str:
+    """The byte order of the current architecture as accepted by int.from_bytes"""
+    return "little" if "little" in gdb.execute("show endian", to_string=True) else "big"
+
+
+def read_memory(address: int, length: int) -> bytes:
+    """Read memory of the selected inferior in one bulk read"""
+    return gdb.selected_inferior().read_memory(address, length).tobytes()
+
+
+def stream_record(channel: str, data):
+    """
+    Write a record to a GUI stream channel and flush it immediately, so that the GUI receives it while the command is
+    still running
+    :param channel: The channel name, e.g. "search"
+    :param data: JSON serializable data
+    """
+    gdb.write(f"{STREAM_PREFIX}{channel}] {json.dumps(data, separators=(',', ':'))}\n")
+    gdb.flush()
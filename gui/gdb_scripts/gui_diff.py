@@ -0,0 +1,126 @@
+"""The "gui-diff" command, which reports the bytes of selected regions that changed since the previous stop as JSON to
+pwndbg-gui"""
+import json
+import re
+import zlib
+
+import gdb
+
+from gui_common import inferior_mappings, read_memory, START, END, PERMISSIONS, PATH
+
+PAGE_SIZE = 0x1000
+# Runs of differing bytes in the XOR of two pages
+CHANGED_BYTES = re.compile(rb"[^\x00]+")
+# Ranges closer than this are reported as one range
+MERGE_DISTANCE = 8
+# Maximum number of reported ranges, so that e.g. a freshly zeroed buffer does not flood the GUI
+MAX_RANGES = 5000
+
+
+def selected_mappings(region_names: list) -> list:
+    """
+    Resolve the region names selected in the GUI to mappings
+    :param region_names: Any of "stack", "heap" and "data" (the writable mappings of the executable, i.e. .data/.bss)
+    :return: A list of (name, mapping) tuples
+    """
+    executable = gdb.current_progspace().filename
+    selected = []
+    # The end of the previous mapping if it belongs to the executable
+    executable_end = None
+    for mapping in inferior_mappings():
+        if "stack" in region_names and mapping[PATH] == "[stack]":
+            selected.append(("stack", mapping))
+        elif "heap" in region_names and mapping[PATH] == "[heap]":
+            selected.append(("heap", mapping))
+        elif "data" in region_names and executable and mapping[PATH] == executable and "w" in mapping[PERMISSIONS]:
+            selected.append(("data", mapping))
+        elif ("data" in region_names and mapping[PATH] == "" and mapping[START] == executable_end
+              and "w" in mapping[PERMISSIONS]):
+            # The part of .bss that does not fit into the last page of the file is an anonymous mapping right behind it
+            selected.append(("data", mapping))
+        executable_end = mapping[END] if executable and mapping[PATH] == executable else None
+    return selected
+
+
+def diff_pages(old: bytes, new: bytes, address: int) -> list:
+    """
+    Compare two pages in bulk: XOR them as big integers and find the runs of non-zero bytes in the result
+    :return: Changed ranges in the form of [address, length]
+    """
+    length = len(new)
+    xor = int.from_bytes(old[:length].ljust(length, b"\x00"), "little") ^ int.from_bytes(new, "little")
+    ranges = []
+    for match in CHANGED_BYTES.finditer(xor.to_bytes(length, "little")):
+        if ranges and address + match.start() - (ranges[-1][0] + ranges[-1][1]) <= MERGE_DISTANCE:
+            ranges[-1][1] = address + match.end() - ranges[-1][0]
+        else:
+            ranges.append([address + match.start(), match.end() - match.start()])
+    return ranges
+
+
+class MemoryDiffer:
+    """Keeps the previous stop's contents and page hashes of the selected regions. Only pages whose hash changed are
+    compared byte-wise, so unchanged memory costs one hash per page"""
+    def __init__(self):
+        self.pid = None
+        # The previous contents in the form of {key: (start, data, {page address: hash})}
+        self.snapshots = {}
+
+    def diff(self, region_names: list) -> dict:
+        """
+        Read the selected regions and compare them with the previous stop
+        :param region_names: The names of the regions to compare, see selected_mappings
+        """
+        pid = gdb.selected_inferior().pid
+        if pid != self.pid:
+            # A new process, the previous contents are meaningless
+            self.snapshots = {}
+            self.pid = pid
+        snapshots = {}
+        ranges = []
+        regions = []
+        for name, mapping in selected_mappings(region_names):
+            start = mapping[START]
+            try:
+                data = read_memory(start, mapping[END] - start)
+            except gdb.MemoryError:
+                continue
+            hashes = {start + offset: zlib.crc32(data[offset:offset + PAGE_SIZE])
+                      for offset in range(0, len(data), PAGE_SIZE)}
+            # The stack grows down, so it is identified by its end, all other regions by their start
+            key = (name, mapping[END] if name == "stack" else start)
+            snapshots[key] = (start, data, hashes)
+            regions.append([name, start, mapping[END]])
+            if key not in self.snapshots:
+                continue
+            old_start, old_data, old_hashes = self.snapshots[key]
+            for page, page_hash in hashes.items():
+                # Pages that did not exist at the previous stop are new and not a change
+                if page not in old_hashes or old_hashes[page] == page_hash:
+                    continue
+                old_page = old_data[page - old_start:page - old_start + PAGE_SIZE]
+                new_page = data[page - start:page - start + PAGE_SIZE]
+                for address, length in diff_pages(old_page, new_page, page):
+                    old_bytes = old_data[address - old_start:address - old_start + length]
+                    new_bytes = data[address - start:address - start + length]
+                    ranges.append([address, length, name, old_bytes.hex(), new_bytes.hex()])
+        self.snapshots = snapshots
+        truncated = len(ranges) > MAX_RANGES
+        return {"regions": regions, "ranges": ranges[:MAX_RANGES], "truncated": truncated}
+
+
+class GuiDiffCommand(gdb.Command):
+    """Report the changes of the selected regions since the previous stop as JSON: gui-diff <stack,heap,data>"""
+    def __init__(self):
+        super().__init__("gui-diff", gdb.COMMAND_USER)
+        self.differ = MemoryDiffer()
+
+    def invoke(self, argument: str, from_tty: bool):
+        try:
+            result = self.differ.diff(argument.strip().split(","))
+        except gdb.error as e:
+            result = {"error": str(e)}
+        gdb.write(json.dumps(result, separators=(",", ":")) + "\n")
+
+
+GuiDiffCommand()
@@ -0,0 +1,208 @@
+"""The "gui-heap" command, which walks the main heap in GDB and reports chunks and bins as JSON to pwndbg-gui"""
+import bisect
+import importlib
+import json
+import zlib
+
+import gdb
+
+from gui_common import find_mapping, pointer_size, byte_order, read_memory, START, END
+
+PAGE_SIZE = 0x1000
+MALLOC_ALIGNMENT = 16
+PREV_INUSE = 1
+SIZE_BITS = 7
+# Bin kinds as named by pwndbg's allocator
+BIN_KINDS = ["tcachebins", "fastbins", "unsortedbin", "smallbins", "largebins"]
+
+
+def heap_allocator():
+    """Get pwndbg's heap allocator, whose module changed between pwndbg versions"""
+    for module in ("pwndbg.aglib.heap", "pwndbg.gdblib.heap", "pwndbg.heap"):
+        try:
+            return importlib.import_module(module).current
+        except (ImportError, AttributeError):
+            continue
+    return None
+
+
+def collect_bins():
+    """
+    Collect the non-empty bins of the main arena via pwndbg
+    :return: A dict of the form {kind: {size: [chain addresses]}}
+    """
+    allocator = heap_allocator()
+    result = {}
+    if allocator is None:
+        return result
+    for kind in BIN_KINDS:
+        try:
+            bins = getattr(allocator, kind)()
+        except Exception:
+            continue
+        bins = getattr(bins, "bins", bins)
+        if not bins:
+            continue
+        for size, entry in bins.items():
+            if not isinstance(size, int):
+                continue
+            # Bin objects (new pwndbg), (chain, count) tuples (old tcache) or plain chains (old)
+            chain = getattr(entry, "fd_chain", entry[0] if isinstance(entry, tuple) else entry)
+            chain = [int(address) for address in chain if int(address) != 0]
+            if chain:
+                result.setdefault(kind, {})[str(size)] = chain
+    return result
+
+
+class HeapWalker:
+    """Walks the chunks of the main heap from a single bulk read. The previous walk is kept, so that on the next stop
+    only the chunks in pages that actually changed have to be parsed again"""
+    def __init__(self):
+        # Incremented for every report, so that the GUI can request a delta against the report it already has
+        self.generation = 0
+        self.heap_start = None
+        self.page_hashes = []
+        # Parsed chunks in the form of [address, size, prev_inuse] sorted by address
+        self.chunks = []
+        # The state of the last report in the form of {address: [size, status]}
+        self.states = {}
+        # CRCs of the contents of the last reported chunks in the form of {address: crc}
+        self.chunk_hashes = {}
+
+    def walk(self, start: int, end: int):
+        """
+        Walk the heap between start and end, reusing the previous walk for unchanged pages
+        :return: The heap's contents and the set of changed page indices
+        """
+        data = read_memory(start, end - start)
+        hashes = [zlib.crc32(data[offset:offset + PAGE_SIZE]) for offset in range(0, len(data), PAGE_SIZE)]
+        if start != self.heap_start:
+            self.chunks = []
+            self.page_hashes = []
+            self.chunk_hashes = {}
+            self.heap_start = start
+        changed = {page for page, page_hash in enumerate(hashes)
+                   if page >= len(self.page_hashes) or self.page_hashes[page] != page_hash}
+        self.page_hashes = hashes
+        if not changed:
+            return data, changed
+        ptr = pointer_size()
+        order = byte_order()
+        first_changed = start + min(changed) * PAGE_SIZE
+        last_changed = start + (max(changed) + 1) * PAGE_SIZE
+        # Chunks whose header lies before the first changed page are still valid
+        reused = 0
+        while reused < len(self.chunks) and self.chunks[reused][0] + 2 * ptr <= first_changed:
+            reused += 1
+        old_chunks = self.chunks
+        old_index = {chunk[0]: index for index, chunk in enumerate(old_chunks)}
+        chunks = old_chunks[:reused]
+        if reused > 0:
+            address = chunks[-1][0] + chunks[-1][1]
+        else:
+            address = start + (MALLOC_ALIGNMENT - 2 * ptr) % MALLOC_ALIGNMENT
+        while address + 2 * ptr <= end:
+            if address >= last_changed and address in old_index:
+                # Back in sync with the previous walk behind the last changed page
+                chunks.extend(old_chunks[old_index[address]:])
+                break
+            offset = address - start
+            size_field = int.from_bytes(data[offset + ptr:offset + 2 * ptr], order)
+            size = size_field & ~SIZE_BITS
+            if size < 2 * ptr or address + size > end:
+                break
+            chunks.append([address, size, size_field & PREV_INUSE])
+            address += size
+        self.chunks = chunks
+        return data, changed
+
+    def modified_chunks(self, start: int, data: bytes, changed: set) -> set:
+        """
+        Find the chunks whose contents changed since the last report. Only the chunks overlapping a changed page are
+        hashed again, as a small write would otherwise mark every chunk on its page
+        :param start: The start address of the heap
+        :param data: The contents of the heap
+        :param changed: The indices of the changed pages
+        """
+        addresses = [chunk[0] for chunk in self.chunks]
+        candidates = set()
+        for page in changed:
+            page_start = start + page * PAGE_SIZE
+            index = max(0, bisect.bisect_right(addresses, page_start) - 1)
+            while index < len(addresses) and addresses[index] < page_start + PAGE_SIZE:
+                candidates.add(index)
+                index += 1
+        # Nothing was reported before, so there is nothing to compare with
+        first_report = not self.chunk_hashes
+        chunk_hashes = {}
+        modified = set()
+        for index, (address, size, _) in enumerate(self.chunks):
+            if index not in candidates:
+                chunk_hashes[address] = self.chunk_hashes.get(address)
+                continue
+            chunk_hash = zlib.crc32(data[address - start:address - start + size])
+            if not first_report and self.chunk_hashes.get(address) != chunk_hash:
+                modified.add(address)
+            chunk_hashes[address] = chunk_hash
+        self.chunk_hashes = chunk_hashes
+        return modified
+
+    def report(self, known_generation: int) -> dict:
+        """
+        Walk the heap and create a report. If the GUI already has the previous report, only changes are included
+        :param known_generation: The generation of the last report the GUI received
+        """
+        heap = find_mapping("[heap]")
+        if heap is None:
+            return {"error": "No heap mapping found"}
+        data, changed = self.walk(heap[START], heap[END])
+        bins = collect_bins()
+        ptr = pointer_size()
+        chunk_set = {chunk[0] for chunk in self.chunks}
+        statuses = {}
+        for kind, sizes in bins.items():
+            status = "tcache" if kind == "tcachebins" else "fast" if kind == "fastbins" else "free"
+            for chain in sizes.values():
+                for address in chain:
+                    # tcache entries point to the user data instead of the chunk header
+                    statuses[address if address in chunk_set else address - 2 * ptr] = status
+        states = {}
+        for index, (address, size, _) in enumerate(self.chunks):
+            if index == len(self.chunks) - 1:
+                status = "top"
+            elif address in statuses:
+                status = statuses[address]
+            else:
+                status = "used" if self.chunks[index + 1][2] else "free"
+            states[address] = [size, status]
+        modified = self.modified_chunks(heap[START], data, changed)
+        full = known_generation != self.generation
+        if full:
+            chunks = [[address, size, status, address in modified] for address, (size, status) in states.items()]
+            removed = []
+        else:
+            chunks = [[address, size, status, address in modified] for address, (size, status) in states.items()
+                      if address in modified or self.states.get(address) != [size, status]]
+            removed = [address for address in self.states if address not in states]
+        self.states = states
+        self.generation += 1
+        return {"generation": self.generation, "full": full, "heap": [heap[START], heap[END]], "chunks": chunks,
+                "removed": removed, "bins": bins}
+
+
+class GuiHeapCommand(gdb.Command):
+    """Report the chunks and bins of the main heap as JSON: gui-heap [known generation]"""
+    def __init__(self):
+        super().__init__("gui-heap", gdb.COMMAND_USER)
+        self.walker = HeapWalker()
+
+    def invoke(self, argument: str, from_tty: bool):
+        known_generation = int(argument) if argument.strip() else -1
+        try:
+            result = self.walker.report(known_generation)
+        except gdb.error as e:
+            result = {"error": str(e)}
+        gdb.write(json.dumps(result, separators=(",", ":")) + "\n")
+
+
+GuiHeapCommand()
@@ -0,0 +1,108 @@
+"""The "gui-logpoint" command, which manages logpoints: breakpoints that evaluate expressions on every hit, stream the
+values to pwndbg-gui and let the inferior continue right away. GDB neither reports a stop nor refreshes any context
+for a hit, so the inferior keeps running at the speed of a breakpoint condition"""
+import threading
+import time
+
+import gdb
+
+from gui_common import stream_record
+
+# Hits are buffered and streamed at most this often, so that the GUI is not flooded with console records
+FLUSH_INTERVAL = 0.1
+# Hits that are buffered at most before they are streamed
+FLUSH_HITS = 4096
+
+
+def evaluate(expression: str) -> str:
+    """Evaluate an expression in the frame of the hit, integers are shown in hex"""
+    try:
+        value = gdb.parse_and_eval(expression)
+        if value.type.strip_typedefs().code in (gdb.TYPE_CODE_INT, gdb.TYPE_CODE_ENUM):
+            return hex(int(value))
+        return str(value)
+    except gdb.error as e:
+        return f"<{e}>"
+
+
+class HitBuffer:
+    """Collects the hits of all logpoints and streams them in batches. While the inferior runs, nothing else executes
+    GDB code that could flush the buffer, so a flush is posted to GDB's main thread shortly after the first hit"""
+    def __init__(self):
+        self.hits = []
+        self.flush_posted = False
+        self.start_time = time.perf_counter()
+
+    def add(self, hit: list):
+        self.hits.append(hit)
+        if len(self.hits) >= FLUSH_HITS:
+            self.flush()
+        elif not self.flush_posted:
+            self.flush_posted = True
+            # The timer's thread must not use GDB's API, it only posts the flush to GDB's main thread
+            timer = threading.Timer(FLUSH_INTERVAL, gdb.post_event, (self.flush,))
+            timer.daemon = True
+            timer.start()
+
+    def flush(self):
+        self.flush_posted = False
+        if self.hits:
+            stream_record("logpoint", {"hits": self.hits})
+            self.hits = []
+
+    def elapsed(self) -> float:
+        """Milliseconds since the logpoints were first used"""
+        return round((time.perf_counter() - self.start_time) * 1000, 3)
+
+
+class Logpoint(gdb.Breakpoint):
+    """An internal breakpoint, so that it is neither listed nor reported as a breakpoint notification"""
+    def __init__(self, location: str, expressions: list, buffer: HitBuffer):
+        super().__init__(location, internal=True)
+        self.spec = location
+        self.expressions = expressions
+        self.buffer = buffer
+        self.hits = 0
+
+    def stop(self) -> bool:
+        self.hits += 1
+        values = [evaluate(expression) for expression in self.expressions]
+        self.buffer.add([self.number, self.buffer.elapsed(), gdb.selected_thread().num, values])
+        # Continue the inferior without reporting a stop
+        return False
+
+    def info(self) -> dict:
+        return {"id": self.number, "location": self.spec, "expressions": self.expressions, "hits": self.hits}
+
+
+class GuiLogpointCommand(gdb.Command):
+    """Manage logpoints: gui-logpoint add <location> [expression ...] | delete <id> | list"""
+    def __init__(self):
+        super().__init__("gui-logpoint", gdb.COMMAND_USER)
+        self.buffer = HitBuffer()
+        self.logpoints = {}
+        # Hits that are still buffered when the inferior stops or exits are streamed right away
+        gdb.events.stop.connect(lambda event: self.buffer.flush())
+        gdb.events.exited.connect(lambda event: self.buffer.flush())
+
+    def invoke(self, argument: str, from_tty: bool):
+        arguments = gdb.string_to_argv(argument)
+        if len(arguments) >= 2 and arguments[0] == "add":
+            logpoint = Logpoint(arguments[1], arguments[2:], self.buffer)
+            self.logpoints[logpoint.number] = logpoint
+            stream_record("logpoint", {"added": logpoint.info()})
+        elif len(arguments) == 2 and arguments[0] == "delete":
+            logpoint = self.logpoints.pop(int(arguments[1]), None)
+            if logpoint is None:
+                raise gdb.GdbError(f"No logpoint {arguments[1]}")
+            self.buffer.flush()
+            logpoint.delete()
+            stream_record("logpoint", {"deleted": int(arguments[1])})
+        elif arguments == ["list"]:
+            self.buffer.flush()
+            stream_record("logpoint", {"logpoints": [logpoint.info() for logpoint in self.logpoints.values()]})
+        else:
+            raise gdb.GdbError("Usage: gui-logpoint add <location> [expression ...] | delete <id> | list")
+
+
+GuiLogpointCommand()
@@ -0,0 +1,161 @@
+"""The "gui-profile" command, which continues the inferior like "continue" but periodically interrupts it to sample its
+backtrace, and streams the samples to pwndbg-gui while the inferior keeps running"""
+import os
+import signal
+import threading
+import time
+
+import gdb
+
+from gui_common import stream_record
+
+# Samples are streamed at least this often, so that the histogram in the GUI stays live
+FLUSH_INTERVAL = 0.25
+
+
+class Sampler(threading.Thread):
+    """Sends SIGINT to the inferior one interval after every resume. The thread never touches GDB's API, which must
+    only be used from GDB's main thread"""
+    def __init__(self, pid: int, interval: float):
+        super().__init__(daemon=True)
+        self.pid = pid
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.resumed = threading.Event()
+        self.finished = False
+        # Whether a signal was sent since the last resume and the time it was sent
+        self.signal_sent = False
+        self.signal_time = 0.0
+
+    def run(self):
+        while not self.finished:
+            self.resumed.wait()
+            time.sleep(self.interval)
+            with self.lock:
+                if self.finished or not self.resumed.is_set():
+                    continue
+                self.resumed.clear()
+                self.signal_sent = True
+                self.signal_time = time.perf_counter()
+                try:
+                    os.kill(self.pid, signal.SIGINT)
+                except OSError:
+                    self.finished = True
+
+    def resume(self):
+        with self.lock:
+            self.signal_sent = False
+            self.resumed.set()
+
+    def stopped(self) -> bool:
+        """Mark the inferior as stopped, returns whether our signal was sent since the last resume. There is a small
+        window in which a real stop (e.g. a breakpoint) races with our signal, which then stops the next continue"""
+        with self.lock:
+            self.resumed.clear()
+            return self.signal_sent
+
+    def stop(self):
+        with self.lock:
+            self.finished = True
+            self.resumed.set()
+
+
+class Profiler:
+    """Continues the inferior until it stops for another reason than our sampling signal"""
+    def __init__(self, depth: int):
+        self.depth = depth
+        self.last_stop: gdb.StopEvent | None = None
+        self.samples = []
+        self.sample_count = 0
+        # Time the inferior was stopped for sampling, from sending the signal until the backtrace was recorded, in
+        # total and of the samples that were not streamed yet
+        self.overhead = 0.0
+        self.pending_overhead = 0.0
+
+    def handle_stop(self, event: gdb.StopEvent):
+        self.last_stop = event
+
+    def backtrace(self) -> list:
+        """The function names of the innermost frames, or the pc of frames without a known function"""
+        names = []
+        frame = gdb.newest_frame()
+        while frame is not None and len(names) < self.depth:
+            names.append(frame.name() or hex(frame.pc()))
+            try:
+                frame = frame.older()
+            except gdb.error:
+                break
+        return names
+
+    def flush(self):
+        stream_record("profile", {"samples": self.samples, "overhead": self.pending_overhead})
+        self.samples = []
+        self.pending_overhead = 0.0
+
+    def profile(self, sampler: Sampler) -> str:
+        """
+        Keep the inferior running, recording a backtrace whenever our signal stopped it
+        :return: Why the inferior stopped for good, either "stopped" or "exited"
+        """
+        flush_time = time.perf_counter()
+        while True:
+            self.last_stop = None
+            sampler.resume()
+            try:
+                gdb.execute("continue", to_string=True)
+            except gdb.error as e:
+                if "not being run" in str(e):
+                    return "exited"
+                raise
+            sampled = sampler.stopped()
+            if not gdb.selected_inferior().pid or isinstance(self.last_stop, gdb.ExitedEvent):
+                return "exited"
+            if not sampled or not isinstance(self.last_stop, gdb.SignalEvent) or \
+                    self.last_stop.stop_signal != "SIGINT":
+                return "stopped"
+            self.samples.append(self.backtrace())
+            self.sample_count += 1
+            now = time.perf_counter()
+            self.overhead += now - sampler.signal_time
+            self.pending_overhead += now - sampler.signal_time
+            if now - flush_time >= FLUSH_INTERVAL:
+                self.flush()
+                flush_time = now
+
+
+class GuiProfileCommand(gdb.Command):
+    """Continue the inferior and sample its backtrace with the given rate: gui-profile <samples per second> <depth>"""
+    def __init__(self):
+        super().__init__("gui-profile", gdb.COMMAND_USER)
+
+    def invoke(self, argument: str, from_tty: bool):
+        arguments = gdb.string_to_argv(argument)
+        if len(arguments) != 2:
+            raise gdb.GdbError("Usage: gui-profile <samples per second> <depth>")
+        rate, depth = int(arguments[0]), int(arguments[1])
+        pid = gdb.selected_inferior().pid
+        if not pid:
+            raise gdb.GdbError("The program is not being run.")
+        if rate <= 0 or depth <= 0:
+            raise gdb.GdbError("Rate and depth must be positive")
+        profiler = Profiler(depth)
+        sampler = Sampler(pid, 1 / rate)
+        stream_record("profile", {"rate": rate, "depth": depth})
+        gdb.events.stop.connect(profiler.handle_stop)
+        gdb.events.exited.connect(profiler.handle_stop)
+        sampler.start()
+        start_time = time.perf_counter()
+        reason = "stopped"
+        try:
+            reason = profiler.profile(sampler)
+        finally:
+            sampler.stop()
+            gdb.events.stop.disconnect(profiler.handle_stop)
+            gdb.events.exited.disconnect(profiler.handle_stop)
+            if profiler.samples:
+                profiler.flush()
+            stream_record("profile", {"done": profiler.sample_count, "reason": reason, "overhead": profiler.overhead,
+                                      "elapsed": time.perf_counter() - start_time})
+
+
+GuiProfileCommand()
@@ -0,0 +1,67 @@
+"""The "gui-search" command, which searches the memory of the inferior and streams hits to pwndbg-gui"""
+import gdb
+
+from gui_common import inferior_mappings, pointer_size, byte_order, read_memory, stream_record, \
+    START, END, PERMISSIONS, PATH
+from search_values import search_pattern
+
+# Number of bytes read from the inferior at once
+CHUNK_SIZE = 16 * 1024 * 1024
+# Maximum number of hits per streamed record
+BATCH_SIZE = 1000
+
+
+def search(pattern: bytes):
+    """Search all readable mappings and stream the hits in batches"""
+    mappings = [mapping for mapping in inferior_mappings() if "r" in mapping[PERMISSIONS]]
+    stream_record("search", {"regions": [[mapping[START], mapping[END], mapping[PERMISSIONS], mapping[PATH]]
+                                         for mapping in mappings]})
+    count = 0
+    for region, mapping in enumerate(mappings):
+        hits = []
+        address = mapping[START]
+        while address < mapping[END]:
+            # Overlap the chunks so that we don't miss hits on chunk borders
+            length = min(CHUNK_SIZE + len(pattern) - 1, mapping[END] - address)
+            try:
+                data = read_memory(address, length)
+            except gdb.MemoryError:
+                break
+            offset = data.find(pattern)
+            while offset != -1 and offset <= CHUNK_SIZE - 1:
+                hits.append([address + offset, region])
+                if len(hits) == BATCH_SIZE:
+                    count += len(hits)
+                    stream_record("search", {"hits": hits})
+                    hits = []
+                offset = data.find(pattern, offset + 1)
+            address += CHUNK_SIZE
+        if hits:
+            count += len(hits)
+            stream_record("search", {"hits": hits})
+    return count
+
+
+class GuiSearchCommand(gdb.Command):
+    """Search memory and stream the hits to the GUI: gui-search <type> <hex encoded value>"""
+    def __init__(self):
+        super().__init__("gui-search", gdb.COMMAND_USER)
+
+    def invoke(self, argument: str, from_tty: bool):
+        value_type, value = argument.split(maxsplit=1)
+        pattern = search_pattern(value_type, bytes.fromhex(value).decode(), pointer_size(), byte_order())
+        if len(pattern) == 0:
+            raise gdb.GdbError("Empty search value")
+        try:
+            count = search(pattern)
+            stream_record("search", {"done": count, "cancelled": False})
+        except KeyboardInterrupt:
+            stream_record("search", {"done": -1, "cancelled": True})
+        except gdb.error as e:
+            # An interrupt during a GDB call is reported as a "Quit" error
+            if "Quit" not in str(e):
+                raise
+            stream_record("search", {"done": -1, "cancelled": True})
+
+
+GuiSearchCommand()
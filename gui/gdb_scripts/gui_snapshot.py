@@ -0,0 +1,56 @@
+"""The "gui-snapshot" command, which dumps mappings of the stopped inferior into a file that pwndbg-gui memory-maps in
+order to search it locally"""
+import gdb
+
+from gui_common import inferior_mappings, pointer_size, byte_order, read_memory, stream_record, \
+    START, END, PERMISSIONS, PATH
+
+# Number of bytes read from the inferior at once
+CHUNK_SIZE = 16 * 1024 * 1024
+# Permissions a mapping needs to be part of a snapshot of the given scope
+SCOPE_PERMISSIONS = {"writable": "rw", "readable": "r"}
+
+
+def write_snapshot(scope: str, path: str) -> dict:
+    """
+    Write the mappings of the given scope back to back into a file
+    :param scope: Either "writable" or "readable"
+    :param path: The file to write the snapshot to
+    :return: The snapshot index with the regions in the form of [start, end, permissions, path, file offset]
+    """
+    regions = []
+    file_offset = 0
+    with open(path, "wb") as snapshot:
+        for mapping in inferior_mappings():
+            if not all(permission in mapping[PERMISSIONS] for permission in SCOPE_PERMISSIONS[scope]):
+                continue
+            address = mapping[START]
+            while address < mapping[END]:
+                try:
+                    data = read_memory(address, min(CHUNK_SIZE, mapping[END] - address))
+                except gdb.MemoryError:
+                    # E.g. [vvar], only keep the part we could read
+                    break
+                snapshot.write(data)
+                address += len(data)
+            if address > mapping[START]:
+                regions.append([mapping[START], address, mapping[PERMISSIONS], mapping[PATH], file_offset])
+                file_offset += address - mapping[START]
+    return {"file": path, "scope": scope, "pointer_size": pointer_size(), "byte_order": byte_order(),
+            "regions": regions}
+
+
+class GuiSnapshotCommand(gdb.Command):
+    """Dump the mappings of the inferior into a file and stream the snapshot index to the GUI:
+    gui-snapshot <writable|readable> <path>"""
+    def __init__(self):
+        super().__init__("gui-snapshot", gdb.COMMAND_USER)
+
+    def invoke(self, argument: str, from_tty: bool):
+        scope, path = argument.split(maxsplit=1)
+        if scope not in SCOPE_PERMISSIONS:
+            raise gdb.GdbError(f"Unknown snapshot scope {scope}")
+        stream_record("snapshot", write_snapshot(scope, path))
+
+
+GuiSnapshotCommand()
@@ -0,0 +1,263 @@
+"""The "gui-trace" command, which single-steps the inferior inside GDB and streams a compact instruction trace to
+pwndbg-gui, instead of letting the GUI refresh all contexts after every single step"""
+import base64
+import re
+import time
+from array import array
+from typing import Optional
+
+import gdb
+
+from gui_common import pointer_size, read_memory, stream_record
+
+# Number of steps per streamed chunk
+CHUNK_STEPS = 4096
+# Mnemonics (without AT&T size suffix) whose first (Intel) or last (AT&T) operand is a memory operand that is only read
+READ_ONLY_MNEMONICS = {"cmp", "test", "nop", "bt", "clflush", "ptest", "cmps", "scas", "lods", "lea", "jmp"}
+READ_ONLY_PREFIXES = ("prefetch", "ucomis", "comis")
+# Mnemonics whose only operand is written, the only operand of all others (e.g. mul, div, jmp, push) is only read
+SINGLE_OPERAND_WRITES = {"inc", "dec", "neg", "not", "pop", "cmpxchg8b", "cmpxchg16b", "sgdt", "sidt", "sldt", "str",
+                         "smsw", "stmxcsr", "vstmxcsr"}
+# Setcc and the x87/extended state stores, e.g. "fstp", "fnstcw", "xsave64"
+SINGLE_OPERAND_WRITE_PREFIXES = ("set", "fst", "fist", "fnst", "fsave", "fnsave", "fxsave", "xsave")
+INTEL_SIZES = {"byte": 1, "word": 2, "dword": 4, "qword": 8, "xmmword": 16, "ymmword": 32, "zmmword": 64}
+ATT_SUFFIX_SIZES = {"b": 1, "w": 2, "l": 4, "q": 8}
+# GDB annotates rip-relative operands with the resolved address, e.g. "[rip+0x2edb]        # 0x404010 <completed>"
+RESOLVED_ADDRESS = re.compile(r"#\s*(0x[0-9a-f]+)")
+MEMORY_OPERAND_INTEL = re.compile(r"(?:(\w+) ptr )?(?:(\w+):)?\[([^\]]+)\]")
+MEMORY_OPERAND_ATT = re.compile(r"(?:%(\w+):)?(-?(?:0x)?[0-9a-f]*)\((%\w+)?(?:,(%\w+)(?:,(\d))?)?\)")
+
+
+def split_operands(operands: str) -> list:
+    """Split an operand list at the commas that are not inside brackets or parentheses"""
+    parts, depth, current = [], 0, ""
+    for char in operands:
+        if char in "[(":
+            depth += 1
+        elif char in "])":
+            depth -= 1
+        if char == "," and depth == 0:
+            parts.append(current.strip())
+            current = ""
+        else:
+            current += char
+    if current.strip():
+        parts.append(current.strip())
+    return parts
+
+
+def segment_base(segment: Optional[str]) -> str:
+    """GDB expression of the base of an fs/gs segment, other segments are flat"""
+    if segment in ("fs", "gs"):
+        return f"${segment}_base+"
+    return ""
+
+
+def memory_destination(asm: str, intel: bool) -> Optional[tuple]:
+    """
+    Find the memory operand an x86 instruction writes to
+    :param asm: The disassembled instruction, e.g. "mov QWORD PTR [rbp-0x8],rax"
+    :param intel: Whether the disassembly flavor is Intel, otherwise AT&T
+    :return: A GDB expression for the address and the size of the write, or None if the instruction writes no memory
+    """
+    parts = asm.lower().split(None, 1)
+    mnemonic = parts[0]
+    # Skip prefixes like "lock" or "rep"
+    while mnemonic in ("lock", "rep", "repz", "repe", "repnz", "repne", "bnd", "notrack") and len(parts) > 1:
+        parts = parts[1].split(None, 1)
+        mnemonic = parts[0]
+    if mnemonic.startswith(("push", "call")):
+        return "$sp-" + str(pointer_size()), pointer_size()
+    if len(parts) < 2 or mnemonic in READ_ONLY_MNEMONICS or mnemonic.rstrip("bwlq") in READ_ONLY_MNEMONICS or \
+            mnemonic.startswith(READ_ONLY_PREFIXES):
+        return None
+    operands = split_operands(parts[1].split("#")[0].split("<")[0])
+    if len(operands) == 0:
+        return None
+    if len(operands) == 1 and not writes_single_operand(mnemonic):
+        return None
+    # The rip of a rip-relative operand is the address of the next instruction, so use GDB's resolved address
+    resolved = RESOLVED_ADDRESS.search(parts[1])
+    if intel:
+        match = MEMORY_OPERAND_INTEL.fullmatch(operands[0])
+        if match is None:
+            return None
+        size_name, segment, address = match.groups()
+        size = INTEL_SIZES.get(size_name, pointer_size())
+        if "rip" in address and resolved:
+            return resolved.group(1), size
+        expression = re.sub(r"\b([a-z][a-z0-9]+)\b", r"$\1", address)
+        return segment_base(segment) + f"({expression})", size
+    match = MEMORY_OPERAND_ATT.fullmatch(operands[-1])
+    if match is None:
+        return None
+    segment, displacement, base, index, scale = match.groups()
+    size = att_register_size(operands[0]) if len(operands) > 1 else None
+    size = size or ATT_SUFFIX_SIZES.get(mnemonic[-1], pointer_size())
+    if base == "%rip" and resolved:
+        return resolved.group(1), size
+    expression = displacement or "0"
+    if base:
+        expression += f"+${base[1:]}"
+    if index:
+        expression += f"+${index[1:]}*{scale or 1}"
+    return segment_base(segment) + f"({expression})", size
+
+
+def writes_single_operand(mnemonic: str) -> bool:
+    """Whether an instruction with a single operand writes to it, the mnemonic may have an AT&T size suffix"""
+    if mnemonic.startswith(SINGLE_OPERAND_WRITE_PREFIXES) or mnemonic in SINGLE_OPERAND_WRITES:
+        return True
+    return mnemonic[-1] in ATT_SUFFIX_SIZES and mnemonic[:-1] in SINGLE_OPERAND_WRITES
+
+
+def att_register_size(operand: str) -> Optional[int]:
+    """The size of a general purpose register operand in AT&T syntax, e.g. 4 for "%eax" """
+    if not operand.startswith("%"):
+        return None
+    name = operand[1:]
+    if name.startswith("r"):
+        return {"d": 4, "w": 2, "b": 1}.get(name[-1], 8) if name[1].isdigit() else 8
+    if name.startswith("e"):
+        return 4
+    if name.endswith(("l", "h")) and len(name) <= 4:
+        return 1
+    return 2 if len(name) == 2 else None
+
+
+class Tracer:
+    """Single-steps the inferior and records the pc, optionally registers and memory writes, into flat arrays"""
+    def __init__(self, registers: list, record_writes: bool):
+        self.registers = registers
+        # Memory writes are derived from the disassembly, which is only implemented for x86
+        self.record_writes = record_writes and "i386" in gdb.selected_frame().architecture().name()
+        self.mask = (1 << (8 * pointer_size())) - 1
+        self.intel = "intel" in gdb.execute("show disassembly-flavor", to_string=True)
+        self.pcs = array("Q")
+        self.register_values = array("Q")
+        # Writes as flat (step, address, size, value) tuples, values are truncated to 8 bytes
+        self.writes = array("Q")
+        self.count = 0
+
+    def record(self, frame: gdb.Frame):
+        """Record the pc and the registers of the instruction that is executed by the next step"""
+        self.pcs.append(frame.pc())
+        for register in self.registers:
+            self.register_values.append(int(frame.read_register(register)) & self.mask)
+
+    def discard(self):
+        """Drop the recorded instruction again, e.g. if the step was interrupted"""
+        self.pcs.pop()
+        if self.registers:
+            del self.register_values[-len(self.registers):]
+
+    def record_write(self, pending_write: Optional[tuple]):
+        """Read back the write of the executed instruction, its address and size were evaluated before the step"""
+        if pending_write is not None:
+            address, size = pending_write
+            try:
+                value = int.from_bytes(read_memory(address, min(size, 8)), "little")
+                self.writes.extend((self.count, address, size, value))
+            except gdb.MemoryError:
+                pass
+        self.count += 1
+
+    def pending_write(self, frame: gdb.Frame) -> Optional[tuple]:
+        """The address and size the instruction at the pc is going to write to"""
+        asm = frame.architecture().disassemble(frame.pc())[0]["asm"]
+        destination = memory_destination(asm, self.intel)
+        if destination is None:
+            return None
+        expression, size = destination
+        try:
+            return int(gdb.parse_and_eval(expression)) & self.mask, size
+        except gdb.error:
+            return None
+
+    def flush(self, start: int):
+        """Stream the steps recorded since the last flush as base64 encoded arrays"""
+        stream_record("trace", {"start": start, "count": len(self.pcs),
+                                "pcs": base64.b64encode(self.pcs.tobytes()).decode(),
+                                "registers": base64.b64encode(self.register_values.tobytes()).decode(),
+                                "writes": base64.b64encode(self.writes.tobytes()).decode()})
+        self.pcs = array("Q")
+        self.register_values = array("Q")
+        self.writes = array("Q")
+
+    def trace(self, count: int, until: Optional[int], condition: Optional[str]) -> str:
+        """
+        Step until one of the stop criteria is met
+        :return: The reason the trace ended
+        """
+        chunk_start = 0
+        reason = "count"
+        try:
+            while self.count < count:
+                frame = gdb.selected_frame()
+                pending_write = self.pending_write(frame) if self.record_writes else None
+                # Every row pairs the pc and registers before an instruction with the memory it wrote
+                self.record(frame)
+                try:
+                    gdb.execute("stepi", to_string=True)
+                except (KeyboardInterrupt, gdb.error):
+                    self.discard()
+                    raise
+                if not gdb.selected_inferior().pid:
+                    # The instruction was executed, e.g. the exit syscall, but its write cannot be read anymore
+                    self.record_write(None)
+                    reason = "exited"
+                    break
+                self.record_write(pending_write)
+                frame = gdb.selected_frame()
+                if self.count - chunk_start == CHUNK_STEPS:
+                    self.flush(chunk_start)
+                    chunk_start = self.count
+                if until is not None and frame.pc() == until:
+                    reason = "until"
+                    break
+                if condition is not None and bool(gdb.parse_and_eval(condition)):
+                    reason = "condition"
+                    break
+        except KeyboardInterrupt:
+            reason = "cancelled"
+        except gdb.error as e:
+            # An interrupt during a GDB call is reported as a "Quit" error
+            if "Quit" in str(e):
+                reason = "cancelled"
+            elif "not being run" in str(e) or "No registers" in str(e):
+                reason = "exited"
+            else:
+                reason = f"error: {e}"
+        if self.count > chunk_start:
+            self.flush(chunk_start)
+        return reason
+
+
+class GuiTraceCommand(gdb.Command):
+    """Single-step the inferior and stream the trace to the GUI:
+    gui-trace <count> [until=<hex encoded address>] [cond=<hex encoded expression>] [regs=<reg>,<reg>] [writes]"""
+    def __init__(self):
+        super().__init__("gui-trace", gdb.COMMAND_USER)
+
+    def invoke(self, argument: str, from_tty: bool):
+        arguments = gdb.string_to_argv(argument)
+        if len(arguments) == 0:
+            raise gdb.GdbError("Usage: gui-trace <count> [until=<address>] [cond=<hex>] [regs=<list>] [writes]")
+        count = int(arguments[0], 0)
+        options = dict(option.split("=", 1) if "=" in option else (option, "") for option in arguments[1:])
+        until = int(gdb.parse_and_eval(bytes.fromhex(options["until"]).decode())) if options.get("until") else None
+        condition = bytes.fromhex(options["cond"]).decode() if options.get("cond") else None
+        registers = [register for register in options.get("regs", "").split(",") if register]
+        frame = gdb.selected_frame()
+        for register in registers:
+            # Fail early on unknown register names instead of after the first step
+            frame.read_register(register)
+        tracer = Tracer(registers, "writes" in options)
+        stream_record("trace", {"register_names": registers, "pointer_size": pointer_size()})
+        start_time = time.perf_counter()
+        reason = tracer.trace(count, until, condition)
+        stream_record("trace", {"done": tracer.count, "reason": reason,
+                                "elapsed": time.perf_counter() - start_time})
+
+
+GuiTraceCommand()
@@ -0,0 +1,22 @@
+"""Conversion of search values into byte patterns, shared by the gui-search command and the GUI's local snapshot
+search. It does not depend on GDB, so that the GUI can import it as well"""
+import codecs
+
+INTEGER_WIDTHS = {"byte": 1, "word": 2, "dword": 4, "qword": 8}
+
+
+def search_pattern(value_type: str, value: str, pointer_size: int, byte_order: str) -> bytes:
+    """
+    Convert the user's value into the byte pattern to search for
+    :param value_type: One of byte, word, dword, qword, pointer, string, bytes
+    :param value: The value as entered by the user
+    :param pointer_size: The pointer size of the inferior
+    :param byte_order: The byte order of the inferior, "little" or "big"
+    """
+    if value_type in INTEGER_WIDTHS or value_type == "pointer":
+        width = pointer_size if value_type == "pointer" else INTEGER_WIDTHS[value_type]
+        return (int(value, 0) % (1 << (8 * width))).to_bytes(width, byte_order)
+    if value_type == "bytes":
+        # Allow escape sequences like \x00 in the user input
+        return codecs.escape_decode(value.encode())[0]
+    return value.encode()
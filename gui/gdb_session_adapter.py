@@ -0,0 +1,173 @@
+import asyncio
+import logging
+from typing import Callable, Coroutine, Sequence
+
+from PySide6.QtCore import Qt, Slot, Signal, QThread
+
+import gui.tokens as tokens
+from gui.gdb_engine import GdbSession, GdbError, GdbExited, CommandResult, GDB_COMMAND
+from gui.gdb_reader import GdbSignals
+from gui.inferior_state import InferiorState
+
+logger = logging.getLogger(__file__)
+
+
+class GdbSessionAdapter(GdbSignals):
+    """Binds the widgets to a GdbSession of the asyncio engine. The session runs on an event loop in its own thread,
+    the results of commands, GDB's notifications, the streamed records and the inferior's output are sent through the
+    same signals as those of the GdbReader. Commands are routed by the tokens of the GdbHandler. The slots only
+    schedule work on the loop, so they can be called from any thread"""
+    # Emitted once GDB exited
+    gdb_exited = Signal()
+
+    def __init__(self, command: Sequence[str] = GDB_COMMAND):
+        """
+        :param command: The command line that starts GDB with the MI interpreter
+        """
+        super().__init__()
+        self.session = GdbSession(command)
+        # Created right away, so that commands can be scheduled before the thread runs it
+        self.loop = asyncio.new_event_loop()
+        # Set once GDB is running, commands that were scheduled earlier wait for it
+        self.started = asyncio.Event()
+        self.state = InferiorState.QUEUED
+        self.serve_task = self.loop.create_task(self.serve())
+        # The loop blocks its thread, so the adapter itself stays in the thread that created it
+        self.thread = QThread()
+        self.thread.started.connect(self.run, Qt.ConnectionType.DirectConnection)
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        """Exit GDB and wait for the thread of the loop to finish"""
+        # Leaving the session's context exits GDB
+        if not self.loop.is_closed():
+            self.loop.call_soon_threadsafe(self.serve_task.cancel)
+        self.thread.wait()
+
+    def run(self):
+        """Main entry of the loop's thread"""
+        try:
+            self.loop.run_until_complete(self.serve_task)
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self.loop.close()
+            # Don't enter the event loop of the thread, nothing runs in it
+            self.thread.quit()
+            self.gdb_exited.emit()
+
+    async def serve(self):
+        async with self.session:
+            # Subscribe before any command can resume the inferior
+            forwarders = [self.forward_events(self.session.events()), self.forward_streams(self.session.stream()),
+                          self.forward_inferior_output(self.session.inferior_output())]
+            self.started.set()
+            await asyncio.gather(*forwarders)
+
+    def schedule(self, function: Callable[..., Coroutine], *args):
+        """Run a coroutine function on the loop once GDB is running"""
+        if self.loop.is_closed():
+            logger.warning("Cannot run %s, GDB exited", function.__name__)
+            return
+        self.loop.call_soon_threadsafe(lambda: self.loop.create_task(self.once_started(function, *args)))
+
+    async def once_started(self, function: Callable[..., Coroutine], *args):
+        await self.started.wait()
+        await function(*args)
+
+    @Slot(int, str)
+    def execute(self, token: int, command: str):
+        """
+        Execute a command and send its result to the widgets
+        :param token: The token that decides which signal receives the result, e.g. ResponseToken.GUI_HEAP_HEAP
+        :param command: A GDB/MI or CLI command
+        """
+        self.schedule(self.execute_command, token, command)
+
+    @Slot(str)
+    def send_command(self, cmd: str):
+        """Execute a command of the user, its output goes to the main pane"""
+        self.execute(tokens.ResponseToken.USER_MAIN, cmd)
+
+    @Slot(bytes)
+    def inferior_write(self, data: bytes):
+        self.schedule(self.write_inferior, data)
+
+    async def write_inferior(self, data: bytes):
+        try:
+            self.session.write_inferior(data)
+        except GdbExited:
+            logger.warning("Cannot write to the inferior, GDB is not running")
+
+    async def execute_command(self, token: int, command: str):
+        try:
+            result = await self.session.command(command)
+        except GdbError as e:
+            result = e.result
+        except GdbExited:
+            logger.warning("Cannot execute '%s', GDB is not running", command)
+            return
+        self.send_result(token, result)
+
+    def send_result(self, token: int, result: CommandResult):
+        """Send the result of a command through the signal of its token, like the GdbReader does"""
+        stopped = self.state == InferiorState.STOPPED
+        output = result.console
+        if result.message == "error":
+            output += result.payload.get("msg", "")
+        if token in tokens.Token_to_Console_Signal:
+            signal, send_on_stop = tokens.Token_to_Console_Signal[token]
+            if stopped or not send_on_stop:
+                getattr(self, signal).emit(output.encode())
+        elif token in tokens.Token_to_Payload_Signal:
+            signal, send_on_stop = tokens.Token_to_Payload_Signal[token]
+            if stopped or not send_on_stop:
+                getattr(self, signal).emit(result.payload)
+        elif token >= tokens.ResponseToken.GUI_WATCHES_HEXDUMP:
+            if stopped:
+                self.send_watches_hexdump_response.emit(token, (output + "".join(result.logs[2:])).encode())
+        elif token in tokens.Token_to_Context:
+            context = tokens.Token_to_Context[token]
+            # Errors of CLI commands are only reported in the logs, the first log is the echoed command
+            content = (output or "".join(result.logs[1:])).encode()
+            if context == "main" or stopped:
+                self.update_gui.emit(context, content)
+
+    async def forward_events(self, events):
+        async for event in events:
+            message = event["message"]
+            payload = event["payload"] or {}
+            if message == "running":
+                self.state = InferiorState.RUNNING
+                self.inferior_state_changed.emit(False)
+            elif message == "stopped":
+                # Don't go from EXITED->STOPPED state
+                if self.state != InferiorState.EXITED:
+                    self.state = InferiorState.STOPPED
+                if payload.get("reason") == "breakpoint-hit" and "addr" in payload.get("frame", {}):
+                    self.send_breakpoint_hit.emit(int(payload["frame"]["addr"], 16))
+                self.inferior_state_changed.emit(True)
+                self.memory_outdated.emit()
+            elif message in ("breakpoint-created", "breakpoint-modified"):
+                self.send_breakpoint_changed.emit(payload)
+            elif message == "breakpoint-deleted":
+                self.send_breakpoint_deleted.emit(payload.get("id", ""))
+            elif message == "thread-group-exited":
+                self.state = InferiorState.EXITED
+                self.inferior_pid_changed.emit(0)
+            elif message == "thread-group-started":
+                self.state = InferiorState.RUNNING
+                self.inferior_pid_changed.emit(int(payload.get("pid", 0)))
+
+    async def forward_streams(self, records):
+        async for channel, record in records:
+            if channel not in self.STREAM_CHANNELS:
+                logger.warning("Received record for unknown stream channel %s", channel)
+                continue
+            getattr(self, self.STREAM_CHANNELS[channel]).emit(record)
+
+    async def forward_inferior_output(self, output):
+        async for data in output:
+            self.update_gui.emit("main", data)
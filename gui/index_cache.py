@@ -0,0 +1,36 @@
+import gzip
+import json
+import os
+from typing import List, Any
+
+from gui.constants import PwndbgGuiConstants
+
+
+def cache_path(kind: str, build_id: str) -> str:
+    return os.path.join(PwndbgGuiConstants.CACHE_FOLDER, kind, f"{build_id}.json.gz")
+
+
+def load_index(kind: str, build_id: str, version: int) -> List[Any] | None:
+    """
+    Load the index of a file from the disk cache
+    :param kind: The kind of index, e.g. "gadgets", each kind has its own folder
+    :param build_id: The build-id of the indexed file
+    :param version: The current format version of this kind of index, outdated indexes are ignored
+    :return: The cached entries or None if there is no usable index
+    """
+    try:
+        with gzip.open(cache_path(kind, build_id), "rt") as cache_file:
+            index = json.load(cache_file)
+    except (OSError, ValueError):
+        return None
+    return index["entries"] if index.get("version") == version else None
+
+
+def store_index(kind: str, build_id: str, version: int, path: str, entries: List[Any]):
+    """Store the index of a file in the disk cache, written to a temporary file first so that a crash cannot leave a
+    truncated index behind"""
+    target = cache_path(kind, build_id)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    with gzip.open(target + ".tmp", "wt") as cache_file:
+        json.dump(dict(version=version, path=path, entries=entries), cache_file)
+    os.replace(target + ".tmp", target)
@@ -2,10 +2,14 @@ import fcntl
 import logging
 import os
 import select
+import stat
+import time
 import tty
+from typing import BinaryIO
 
 from PySide6.QtCore import QObject, Slot, Signal, QCoreApplication
 
+from gui.constants import PwndbgGuiConstants
 from gui.inferior_state import InferiorState
 
 logger = logging.getLogger(__file__)
@@ -13,10 +17,15 @@ logger = logging.getLogger(__file__)
 
 class InferiorHandler(QObject):
     update_gui = Signal(str, bytes)
-    INFERIOR_STATE = InferiorState.QUEUED
+    # Emitted with the bytes written so far and the total size while a payload is streamed, the total is -1 if unknown
+    payload_progress = Signal(int, int)
+    # Emitted once a payload was streamed, with an error message if it was not written completely
+    payload_finished = Signal(str)
 
     def __init__(self):
         super().__init__()
+        # The state of the inferior of this session, written by the GdbHandler and GdbReader
+        self.state = InferiorState.QUEUED
 
         # open a tty for interaction with the inferior process (allows for separation of contexts)
         self.master, self.slave = os.openpty()
@@ -29,23 +38,133 @@ class InferiorHandler(QObject):
         # execute gdb tty command to forward the inferior to this tty
         self.tty = os.ttyname(self.slave)
         logger.debug("Opened tty for inferior interaction: %s", self.tty)
-        self.to_write = b""
+        # Input for the tty that was not written yet, since the tty only takes as much as its buffer has room for
+        self.to_write = bytearray()
         self.run = True
+        # The payload that is streamed from a file, its destination and the chunk that is currently written
+        self.payload: BinaryIO | None = None
+        self.payload_fd = -1
+        self.payload_chunk = bytearray()
+        self.payload_sent = 0
+        self.payload_size = -1
+        self.payload_progress_time = 0.0
+        # Written to after queueing input, so that the loop does not wait for the timeout of its select
+        self.wake_read, self.wake_write = os.pipe()
+        os.set_blocking(self.wake_read, False)
+        os.set_blocking(self.wake_write, False)
 
     @Slot()
     def inferior_runs(self):
         """Main entry for inferior thread. Read and Write to tty."""
         logger.debug("Starting Inferior Interaction")
         while self.run:
-            can_read, _, _ = select.select([self.master], [], [], 0.2)  # Non-blocking check for readability
-            if can_read:
-                # read data and send it to main
-                data = os.read(self.master, 4096)
+            # Only wait for room in the tty while there is input for it, so the loop does not spin
+            writers = []
+            if self.to_write:
+                writers.append(self.master)
+            if self.payload is not None:
+                writers.append(self.payload_fd)
+            # Non-blocking check for readability
+            can_read, _, _ = select.select([self.master, self.wake_read], writers, [], 0.2)
+            if self.wake_read in can_read:
+                os.read(self.wake_read, 4096)
+            if self.master in can_read:
+                # read data and send it to main, in large chunks so that scripts can keep up with chatty inferiors
+                data = os.read(self.master, 65536)
                 self.update_gui.emit("main", data)
             QCoreApplication.processEvents()  # Process pending write events
-            if self.to_write != b"":
-                os.write(self.master, self.to_write)
-                self.to_write = b""
+            if self.to_write:
+                self.write_some(self.master, self.to_write)
+            if self.payload is not None:
+                self.stream_payload_chunk()
+
+    def write_some(self, fd: int, data: bytearray):
+        """Write as much of the data as the file descriptor takes without blocking and remove it from the data"""
+        try:
+            written = os.write(fd, data)
+        except BlockingIOError:
+            return
+        except OSError as e:
+            logger.warning("Could not write %d bytes of input: %s", len(data), e)
+            written = len(data)
+        del data[:written]
+
+    def stream_payload_chunk(self):
+        """Write the current chunk of the payload and read the next one once it was written completely. The tty only
+        has room for what the inferior read already, so a large payload is never held in memory and never dropped"""
+        try:
+            if not self.payload_chunk:
+                self.payload_chunk += self.payload.read(PwndbgGuiConstants.PAYLOAD_CHUNK_SIZE)
+                if not self.payload_chunk:
+                    self.finish_payload("")
+                    return
+            written = os.write(self.payload_fd, self.payload_chunk)
+        except BlockingIOError:
+            return
+        except OSError as e:
+            self.finish_payload(f"Could not stream payload: {e}")
+            return
+        del self.payload_chunk[:written]
+        self.payload_sent += written
+        now = time.monotonic()
+        if now - self.payload_progress_time > 0.1:
+            self.payload_progress_time = now
+            self.payload_progress.emit(self.payload_sent, self.payload_size)
+
+    def finish_payload(self, error: str):
+        self.payload_progress.emit(self.payload_sent, self.payload_size)
+        self.payload.close()
+        if self.payload_fd != self.master:
+            os.close(self.payload_fd)
+        self.payload = None
+        self.payload_fd = -1
+        self.payload_chunk.clear()
+        logger.debug("Streamed %d bytes of payload", self.payload_sent)
+        self.payload_finished.emit(error)
+
+    @Slot(str, int)
+    def stream_payload(self, path: str, pid: int):
+        """
+        Stream a file of any size to the inferior's input in chunks
+        :param path: The payload file
+        :param pid: The pid of an attached process, whose stdin needs to be a pipe, or 0 to write to our tty
+        """
+        if self.payload is not None:
+            self.payload_finished.emit("Another payload is still being streamed")
+            return
+        try:
+            payload = open(path, "rb")
+        except OSError as e:
+            self.payload_finished.emit(f"Could not open payload: {e}")
+            return
+        payload_fd = self.master
+        if pid != 0:
+            # The inferior was not started with our tty, feed the pipe it reads its input from instead
+            try:
+                payload_fd = os.open(f"/proc/{pid}/fd/0", os.O_WRONLY | os.O_NONBLOCK)
+            except OSError as e:
+                payload.close()
+                self.payload_finished.emit(f"Could not open the stdin of process {pid}: {e}")
+                return
+            if not stat.S_ISFIFO(os.fstat(payload_fd).st_mode):
+                os.close(payload_fd)
+                payload.close()
+                self.payload_finished.emit(f"The stdin of process {pid} is not a pipe, use its terminal instead")
+                return
+        file_stat = os.fstat(payload.fileno())
+        self.payload = payload
+        self.payload_fd = payload_fd
+        self.payload_sent = 0
+        self.payload_size = file_stat.st_size if stat.S_ISREG(file_stat.st_mode) else -1
+        self.payload_progress_time = 0.0
+        logger.debug("Streaming payload %s of %d bytes", path, self.payload_size)
+        self.stream_payload_chunk()
+
+    @Slot()
+    def cancel_payload(self):
+        """Stop streaming the payload, the part that was written already stays in the inferior's input"""
+        if self.payload is not None:
+            self.finish_payload("Cancelled")
 
     @Slot(bytes)
     def inferior_write(self, inferior_input: bytes):
@@ -54,6 +173,16 @@ class InferiorHandler(QObject):
         """
         self.to_write += inferior_input
 
+    @Slot()
+    def wake(self):
+        """Wake up the loop of the inferior thread to write queued input right away. Connected directly, i.e. called
+        in the thread that queued the input"""
+        try:
+            os.write(self.wake_write, b"\0")
+        except BlockingIOError:
+            # The loop wakes up anyway
+            pass
+
     @Slot()
     def set_run(self, state: bool) -> object:
         """Sets whether the thread should keep working"""
@@ -1,4 +1,5 @@
 from enum import Enum
+from typing import Dict, List
 
 
 class InferiorState(Enum):
@@ -10,3 +11,51 @@ class InferiorState(Enum):
     STOPPED = 2
     # Inferior is loaded, but not started
     QUEUED = 3
+
+
+class ThreadStates:
+    """Run state of the inferior's threads, tracked from GDB's running and stopped notifications. In all-stop mode all
+    threads share one state, in non-stop mode every thread runs and stops on its own"""
+    def __init__(self):
+        # States in the form of {thread id: state}
+        self.states: Dict[str, InferiorState] = {}
+        # The thread GDB's commands apply to
+        self.selected: str | None = None
+
+    def set_running(self, thread_id: str):
+        """
+        :param thread_id: The id of the resumed thread or "all"
+        """
+        if thread_id == "all":
+            self.states = dict.fromkeys(self.states, InferiorState.RUNNING)
+        else:
+            self.states[thread_id] = InferiorState.RUNNING
+
+    def set_stopped(self, thread_ids: List[str] | str):
+        """
+        :param thread_ids: The ids of the stopped threads or "all"
+        """
+        if thread_ids == "all":
+            self.states = dict.fromkeys(self.states, InferiorState.STOPPED)
+        else:
+            self.states.update(dict.fromkeys(thread_ids, InferiorState.STOPPED))
+
+    def add(self, thread_id: str):
+        """New threads start out running"""
+        self.states[thread_id] = InferiorState.RUNNING
+
+    def remove(self, thread_id: str):
+        self.states.pop(thread_id, None)
+        if self.selected == thread_id:
+            self.selected = None
+
+    def clear(self):
+        self.states.clear()
+        self.selected = None
+
+    def is_stopped(self, thread_id: str | None) -> bool:
+        return self.states.get(thread_id) == InferiorState.STOPPED
+
+    def selected_stopped(self) -> bool:
+        """Whether the selected thread can be inspected, assumed if the thread is not known yet"""
+        return self.selected not in self.states or self.is_stopped(self.selected)
@@ -0,0 +1,212 @@
+import bisect
+import logging
+import mmap
+import os
+import re
+import shutil
+import tempfile
+import time
+from typing import List, Any, Iterator
+
+from PySide6.QtCore import QObject, Signal, Slot
+
+from gui.gdb_scripts.search_values import INTEGER_WIDTHS, search_pattern
+
+logger = logging.getLogger(__file__)
+
+# Maximum number of hits per emitted record, same as for the streamed GDB search
+BATCH_SIZE = 1000
+
+
+class MemorySnapshot:
+    """Memory-mapped dump of the inferior's mappings as written by the gui-snapshot GDB command. All regions are stored
+    back to back in a single file, so a search is a single pass over one buffer"""
+    def __init__(self, index: dict):
+        """
+        :param index: The snapshot index streamed by gui-snapshot
+        """
+        self.path: str = index["file"]
+        self.scope: str = index["scope"]
+        self.pointer_size: int = index["pointer_size"]
+        self.byte_order: str = index["byte_order"]
+        # Regions in the form of [start, end, permissions, path, file offset]
+        self.regions: List[List[Any]] = index["regions"]
+        self.file_offsets = [region[4] for region in self.regions]
+        self.size = self.regions[-1][4] + self.regions[-1][1] - self.regions[-1][0] if self.regions else 0
+        self.buffer: mmap.mmap | None = None
+        if self.size > 0:
+            with open(self.path, "rb") as snapshot_file:
+                self.buffer = mmap.mmap(snapshot_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def close(self):
+        """Unmap and delete the snapshot file"""
+        if self.buffer is not None:
+            self.buffer.close()
+            self.buffer = None
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+    def region_of(self, file_offset: int) -> int:
+        """The index of the region containing the given offset into the snapshot file"""
+        return bisect.bisect_right(self.file_offsets, file_offset) - 1
+
+    def to_address(self, file_offset: int, region: int) -> int:
+        """Translate an offset into the snapshot file into an address of the inferior"""
+        return self.regions[region][0] + file_offset - self.file_offsets[region]
+
+    def find(self, pattern: bytes, alignment: int = 1) -> Iterator[List[int]]:
+        """
+        Find all occurrences of a byte pattern, matches crossing a region border are dropped
+        :param pattern: The bytes to search for
+        :param alignment: Only report addresses that are a multiple of this (e.g. the width of an integer)
+        :return: Hits in the form of [address, region index]
+        """
+        if self.buffer is None:
+            return
+        offset = self.buffer.find(pattern)
+        while offset != -1:
+            region = self.region_of(offset)
+            address = self.to_address(offset, region)
+            if address % alignment == 0 and address + len(pattern) <= self.regions[region][1]:
+                yield [address, region]
+            # Continue at the next aligned address instead of every single byte in between
+            offset = self.buffer.find(pattern, offset + alignment - address % alignment)
+
+    def find_regex(self, expression: bytes) -> Iterator[List[int]]:
+        """
+        Find all matches of a regular expression over the raw bytes
+        :param expression: A Python regular expression, e.g. rb"\\x48\\x8b.{2}\\xc3"
+        :return: Hits in the form of [address, region index]
+        """
+        if self.buffer is None:
+            return
+        for match in re.finditer(expression, self.buffer, re.DOTALL):
+            region = self.region_of(match.start())
+            if match.end() <= self.file_offsets[region] + self.regions[region][1] - self.regions[region][0]:
+                yield [self.to_address(match.start(), region), region]
+
+
+class SnapshotSearcher(QObject):
+    """Worker that searches a memory-mapped snapshot of the stopped inferior locally instead of letting GDB rescan the
+    process for every search. The snapshot is taken once per stop on the first search and dropped on resume"""
+    # Request a snapshot of the given scope into the given file from GDB
+    request_snapshot = Signal(str, str)
+    # Send the search records in the same format as the streamed GDB search
+    send_record = Signal(dict)
+
+    def __init__(self):
+        super().__init__()
+        # Prefer a memory-backed file system for the snapshot files
+        shm_dir = "/dev/shm" if os.path.isdir("/dev/shm") else None
+        self.snapshot_dir = tempfile.mkdtemp(prefix="pwndbg-gui-", dir=shm_dir)
+        self.snapshot: MemorySnapshot | None = None
+        # Number of snapshots taken, used to give each snapshot file a unique name
+        self.snapshot_count = 0
+        # A search in the form of (value_type, value, scope) that waits for its snapshot
+        self.pending_search: tuple | None = None
+        # Set from the GUI thread while a search is queued or running, hence not a queued slot
+        self.cancelled = False
+
+    @Slot(str, str, str)
+    def search(self, value_type: str, value: str, scope: str):
+        """
+        Search the snapshot of the given scope, taking a new snapshot if there is none for the current stop
+        :param value_type: One of byte, word, dword, qword, pointer, string, bytes, regex
+        :param value: The value as entered by the user
+        :param scope: Either "writable" or "readable" mappings
+        """
+        if self.snapshot is not None and self.snapshot.scope == scope:
+            self.search_snapshot(value_type, value)
+            return
+        self.invalidate()
+        self.pending_search = (value_type, value, scope)
+        self.snapshot_count += 1
+        path = os.path.join(self.snapshot_dir, f"snapshot-{self.snapshot_count}.bin")
+        logger.debug("Requesting %s snapshot into %s", scope, path)
+        self.request_snapshot.emit(scope, path)
+
+    @Slot(dict)
+    def receive_snapshot(self, index: dict):
+        """
+        Callback for the snapshot index streamed by the gui-snapshot command
+        :param index: The regions and architecture information of the snapshot
+        """
+        self.invalidate()
+        try:
+            self.snapshot = MemorySnapshot(index)
+        except (OSError, ValueError) as e:
+            logger.error("Could not map snapshot %s: %s", index.get("file"), e)
+            return
+        logger.debug("Mapped %d bytes of %d regions", self.snapshot.size, len(self.snapshot.regions))
+        if self.pending_search is not None and self.pending_search[2] == self.snapshot.scope:
+            value_type, value, _ = self.pending_search
+            self.pending_search = None
+            self.search_snapshot(value_type, value)
+
+    @Slot(dict)
+    def snapshot_finished(self, payload: dict):
+        """Callback for the result of the gui-snapshot command, only relevant if the snapshot failed"""
+        if "msg" in payload and self.pending_search is not None:
+            self.pending_search = None
+            self.send_record.emit({"done": -1, "cancelled": False, "error": payload["msg"]})
+
+    def search_snapshot(self, value_type: str, value: str):
+        """Search the current snapshot and emit the regions and hits in batches"""
+        start_time = time.perf_counter()
+        try:
+            if value_type == "regex":
+                hits = self.snapshot.find_regex(value.encode())
+            else:
+                pattern = search_pattern(value_type, value, self.snapshot.pointer_size, self.snapshot.byte_order)
+                alignment = len(pattern) if value_type in INTEGER_WIDTHS or value_type == "pointer" else 1
+                hits = self.snapshot.find(pattern, alignment)
+        except (ValueError, re.error) as e:
+            self.send_record.emit({"done": -1, "cancelled": False, "error": str(e)})
+            return
+        self.send_record.emit({"regions": [region[:4] for region in self.snapshot.regions]})
+        count = 0
+        batch = []
+        for hit in hits:
+            if self.cancelled:
+                break
+            batch.append(hit)
+            if len(batch) == BATCH_SIZE:
+                count += len(batch)
+                self.send_record.emit({"hits": batch})
+                batch = []
+        if batch:
+            count += len(batch)
+            self.send_record.emit({"hits": batch})
+        elapsed = (time.perf_counter() - start_time) * 1000
+        logger.debug("Local search for %s %s took %.2fms", value_type, value, elapsed)
+        self.send_record.emit({"done": count, "cancelled": self.cancelled, "elapsed": elapsed})
+
+    def cancel(self):
+        """Stop the running search, called directly from the GUI thread"""
+        self.cancelled = True
+
+    def reset_cancel(self):
+        """Called directly from the GUI thread when a search is queued, so that cancelling it before it runs (e.g. while
+        the snapshot is taken) is not forgotten"""
+        self.cancelled = False
+
+    @Slot(bool)
+    def handle_inferior_state(self, stopped: bool):
+        """Drop the snapshot as soon as the inferior resumes, as its memory is about to change"""
+        if not stopped:
+            self.invalidate()
+
+    @Slot()
+    def invalidate(self):
+        """Unmap and delete the current snapshot"""
+        if self.snapshot is not None:
+            self.snapshot.close()
+            self.snapshot = None
+
+    @Slot()
+    def cleanup(self):
+        """Delete all snapshot files when the GUI is closed"""
+        self.invalidate()
+        shutil.rmtree(self.snapshot_dir, ignore_errors=True)
@@ -1,3 +1,5 @@
+import json
+
 from PySide6.QtCore import Qt
 from PySide6.QtGui import QFont, QColor
 from PySide6.QtWidgets import QTextEdit
@@ -9,6 +11,19 @@ import logging
 logger = logging.getLogger(__file__)
 
 
+def parse_json_report(output: bytes) -> dict:
+    """
+    Parse the JSON report of one of our GDB commands, which pwndbg might precede with warnings (e.g. about missing
+    debug symbols), so the report is the last line that is a JSON object
+    :param output: The output of the command
+    :raise ValueError: If the output contains no JSON object, e.g. if GDB printed an error instead
+    """
+    for line in reversed(output.splitlines()):
+        if line.lstrip().startswith(b"{"):
+            return json.loads(line)
+    raise ValueError("Output contains no JSON report")
+
+
 class ContextParser:
     """Parses raw output from gdb/pwndbg containing ASCII control characters into equivalent HTML code"""
 
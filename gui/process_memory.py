@@ -0,0 +1,187 @@
+import bisect
+import logging
+import os
+from typing import List, Dict, Tuple
+
+from PySide6.QtCore import QObject, Slot
+
+logger = logging.getLogger(__file__)
+
+PAGE_SIZE = 0x1000
+
+
+class Mapping:
+    """A single line of /proc/<pid>/maps"""
+    def __init__(self, start: int, end: int, permissions: str, offset: int, path: str):
+        self.start = start
+        self.end = end
+        self.permissions = permissions
+        self.offset = offset
+        self.path = path
+
+    @property
+    def kind(self) -> str:
+        """Classify the mapping like pwndbg's color legend does"""
+        if self.path == "[stack]":
+            return "stack"
+        elif self.path == "[heap]":
+            return "heap"
+        elif "x" in self.permissions:
+            return "code"
+        elif "w" in self.permissions:
+            return "data"
+        return "rodata"
+
+
+class ProcessMemory(QObject):
+    """Direct access to the memory of the stopped inferior via /proc/<pid>/mem, which saves a round trip through GDB for
+    every read. The mapping index and all read pages are cached until the inferior resumes. Reading requires that we
+    are allowed to ptrace the inferior, which is the case if GDB started it on our behalf"""
+    def __init__(self):
+        super().__init__()
+        self.pid = 0
+        self.mem_fd: int | None = None
+        # Cached mapping index, sorted by start address
+        self.mappings: List[Mapping] | None = None
+        self.starts: List[int] = []
+        # Cached pages in the form of {page address: bytes}, a page that cannot be read is cached as None
+        self.pages: Dict[int, bytes | None] = {}
+        # Pointer size and byte order of the inferior, taken from the ELF header of its executable
+        self.architecture: Tuple[int, str] | None = None
+        # Incremented whenever the cached data is dropped, so that users of this class can invalidate their own caches
+        self.stop = 0
+
+    @Slot(int)
+    def set_pid(self, pid: int):
+        """
+        Switch to a new inferior process
+        :param pid: The pid of the new inferior or 0 if the inferior exited
+        """
+        if pid == self.pid:
+            return
+        self.close()
+        self.pid = pid
+        self.architecture = None
+
+    @Slot(bool)
+    def handle_inferior_state(self, stopped: bool):
+        """Drop all cached data as soon as the inferior resumes, as its memory is about to change"""
+        if not stopped:
+            self.invalidate()
+
+    @Slot()
+    def invalidate(self):
+        """Forget the cached mappings and pages, also after every user command as e.g. "set" writes to memory"""
+        self.mappings = None
+        self.starts = []
+        self.pages.clear()
+        self.stop += 1
+
+    def close(self):
+        """Close the memory file of the current inferior"""
+        self.invalidate()
+        if self.mem_fd is not None:
+            os.close(self.mem_fd)
+            self.mem_fd = None
+
+    def available(self) -> bool:
+        """Whether we can read the memory of the current inferior ourselves"""
+        if self.pid == 0:
+            return False
+        if self.mem_fd is None:
+            try:
+                self.mem_fd = os.open(f"/proc/{self.pid}/mem", os.O_RDONLY)
+            except OSError as e:
+                logger.debug("Cannot open memory of pid %d: %s", self.pid, e)
+                self.pid = 0
+                return False
+        return True
+
+    def get_architecture(self) -> Tuple[int, str]:
+        """
+        Get the pointer size and byte order of the inferior from the ELF identification of its executable
+        :return: The pointer size in bytes and the byte order as accepted by int.from_bytes
+        """
+        if self.architecture is None:
+            with open(f"/proc/{self.pid}/exe", "rb") as executable:
+                ident = executable.read(6)
+            self.architecture = (8 if ident[4] == 2 else 4, "big" if ident[5] == 2 else "little")
+        return self.architecture
+
+    def get_mappings(self) -> List[Mapping]:
+        """Get the mapping index of the inferior, parsed once per stop"""
+        if self.mappings is None:
+            self.mappings = []
+            with open(f"/proc/{self.pid}/maps") as maps:
+                for line in maps:
+                    parts = line.split(maxsplit=5)
+                    start, end = (int(address, 16) for address in parts[0].split("-"))
+                    path = parts[5].strip() if len(parts) > 5 else ""
+                    self.mappings.append(Mapping(start, end, parts[1], int(parts[2], 16), path))
+            self.starts = [mapping.start for mapping in self.mappings]
+        return self.mappings
+
+    def objfile_bases(self) -> Dict[str, int]:
+        """
+        Get the load bases of the objfiles with executable mappings, i.e. the binary and its libraries
+        :return: The bases in the form of {path: address at which offset 0 of the file is mapped}
+        """
+        bases: Dict[str, int] = {}
+        executable = set()
+        for mapping in self.get_mappings():
+            if not mapping.path.startswith("/"):
+                continue
+            bases[mapping.path] = min(bases.get(mapping.path, mapping.start), mapping.start - mapping.offset)
+            if "x" in mapping.permissions:
+                executable.add(mapping.path)
+        return {path: base for path, base in bases.items() if path in executable}
+
+    def executable_regions(self) -> List[Tuple[int, int, str, int]]:
+        """
+        Get the executable mappings of the objfiles
+        :return: The mappings in the form of (start, end, path, load base of the objfile), sorted by start
+        """
+        bases = self.objfile_bases()
+        return [(mapping.start, mapping.end, mapping.path, bases[mapping.path]) for mapping in self.get_mappings()
+                if "x" in mapping.permissions and mapping.path in bases]
+
+    def find_mapping(self, address: int) -> Mapping | None:
+        """Find the mapping containing an address with a binary search over the mapping index"""
+        mappings = self.get_mappings()
+        index = bisect.bisect_right(self.starts, address) - 1
+        if index < 0 or address >= mappings[index].end:
+            return None
+        return mappings[index]
+
+    def read(self, address: int, length: int) -> bytes | None:
+        """
+        Read memory of the inferior. Pages that are not cached yet are read in one bulk read and cached for this stop
+        :return: The bytes or None if any part of the range could not be read
+        """
+        first_page = address & ~(PAGE_SIZE - 1)
+        last_page = (address + length - 1) & ~(PAGE_SIZE - 1)
+        missing = [page for page in range(first_page, last_page + PAGE_SIZE, PAGE_SIZE) if page not in self.pages]
+        if missing:
+            self.read_pages(missing[0], missing[-1] + PAGE_SIZE)
+        data = b"".join(self.pages[page] or b"" for page in range(first_page, last_page + PAGE_SIZE, PAGE_SIZE))
+        if len(data) != last_page + PAGE_SIZE - first_page:
+            return None
+        return data[address - first_page:address - first_page + length]
+
+    def read_pages(self, start: int, end: int):
+        """Read and cache all pages between two page aligned addresses with a single read"""
+        try:
+            data = os.pread(self.mem_fd, end - start, start)
+        except OSError:
+            data = b""
+        if len(data) < end - start:
+            # Partially unmapped, fall back to reading page-wise so that the readable pages are still cached
+            if end - start > PAGE_SIZE:
+                for page in range(start, end, PAGE_SIZE):
+                    if page not in self.pages:
+                        self.read_pages(page, page + PAGE_SIZE)
+            else:
+                self.pages[start] = None
+            return
+        for offset in range(0, end - start, PAGE_SIZE):
+            self.pages[start + offset] = data[offset:offset + PAGE_SIZE]
@@ -7,29 +7,46 @@ from os import path
 import psutil
 
 sys.path.extend([path.join(path.dirname(__file__), path.pardir)])
+from gui.breakpoints import BreakpointTable
 from gui.custom_widgets.backtrace_context_widget import BacktraceContextWidget
+from gui.custom_widgets.breakpoints_widget import BreakpointsWidget
 from gui.custom_widgets.code_context_widget import CodeContextWidget
 from gui.custom_widgets.disasm_context_widget import DisasmContextWidget
+from gui.custom_widgets.gadget_widget import GadgetWidget
 from gui.custom_widgets.info_message_box import InfoMessageBox
+from gui.custom_widgets.logpoint_widget import LogpointWidget
 from gui.custom_widgets.register_context_widget import RegisterContextWidget
+from gui.custom_widgets.script_widget import ScriptWidget
+from gui.custom_widgets.search_results_widget import SearchResultsWidget
 from gui.custom_widgets.stack_context_widget import StackContextWidget
+from gui.custom_widgets.symbol_widget import SymbolWidget
+from gui.custom_widgets.trace_widget import TraceWidget
 
 import PySide6
-from PySide6.QtCore import Slot, Qt, Signal, QThread, QSettings, QByteArray
+from PySide6.QtCore import Slot, Qt, Signal, QThread, QSettings, QByteArray, QObject
 from PySide6.QtGui import QTextOption, QAction, QKeySequence, QFont, QPalette, QColor
 from PySide6.QtWidgets import QApplication, QFileDialog, QMainWindow, QInputDialog, \
-    QLineEdit, QMessageBox, QSpinBox, QSplitter
+    QLineEdit, QMessageBox, QSpinBox, QSplitter, QDockWidget, QWidget, QTabBar, QVBoxLayout
 
 from gui.constants import PwndbgGuiConstants
 from gui.custom_widgets.context_list_widget import ContextListWidget
+from gui.custom_widgets.coverage_widget import CoverageWidget
 from gui.custom_widgets.context_text_edit import ContextTextEdit
 from gui.custom_widgets.main_context_widget import MainContextWidget
-from gui.gdb_handler import GdbHandler
+from gui.custom_widgets.memory_diff_widget import MemoryDiffWidget
+from gui.custom_widgets.profiler_widget import ProfilerWidget
+from gui.custom_widgets.threads_widget import ThreadsWidget
+from gui.coverage import SessionCoverage
+from gui.gadget_index import GadgetIndexer
 from gui.custom_widgets.heap_context_widget import HeapContextWidget
 from gui.custom_widgets.watches_context_widget import HDumpContextWidget
-from gui.gdb_reader import GdbReader
-from gui.inferior_handler import InferiorHandler
+from gui.inferior_state import InferiorState
+from gui.memory_snapshot import SnapshotSearcher
 from gui.parser import ContextParser
+from gui.process_memory import ProcessMemory
+from gui.script_runner import ScriptRunner
+from gui.session import Session
+from gui.symbol_index import SymbolIndexer
 # Important:
 # You need to run the following command to generate the ui_form.py file
 #     pyside6-uic form.ui -o ui_form.py, or
@@ -49,39 +66,86 @@ class PwnDbgGui(QMainWindow):
     set_gdb_pid_target_signal = Signal(list)
     set_gdb_source_dir_signal = Signal(list)
     set_gdb_tty = Signal(str)
+    # Signal to replace the watches of the GdbHandler with the watches shown in the GUI
+    set_gdb_watches = Signal(dict)
     # Signal to request a context update for all contexts from the GdbHandler
     update_contexts = Signal(bool)
+    # Signal to set how many stops per second the GdbReaders of all sessions show at most
+    refresh_rate_changed = Signal(int)
 
     def __init__(self, parent=None):
         super().__init__(parent)
         # An overview of all pwndbg commands
         self.pwndbg_cmds = ""
         self.main_context: MainContextWidget | None = None
-        # Thread that will handle all writing to GDB
-        self.gdb_handler_thread: QThread | None = None
-        # Thread that will continuously read from GDB
-        self.gdb_reader_thread: QThread | None = None
-        # Thread that will continuously read and write to inferior
-        self.inferior_thread: QThread | None = None
-        self.gdb_handler = GdbHandler()
-        self.gdb_reader = GdbReader(self.gdb_handler.controller)
-        self.inferior_handler = InferiorHandler()
+        # The debugging sessions in the order of their tabs, each with its own GDB and worker threads
+        self.sessions: List[Session] = []
+        # The session in front, which is connected to the panes
+        self.session: Session | None = None
+        self.session_tabs: QTabBar | None = None
+        # Number of sessions started so far, used to name new sessions
+        self.session_counter = 0
+        # Thread that will search memory snapshots locally
+        self.snapshot_thread: QThread | None = None
+        # Thread that will index ROP gadgets with a pool of worker processes
+        self.gadget_thread: QThread | None = None
+        # Thread that will parse the symbol tables of the target and its libraries
+        self.symbol_thread: QThread | None = None
+        # Thread that will run the user's exploit scripts
+        self.script_thread: QThread | None = None
+        self.snapshot_searcher = SnapshotSearcher()
+        self.gadget_indexer = GadgetIndexer()
+        self.symbol_indexer = SymbolIndexer()
+        self.script_runner = ScriptRunner()
+        # Direct access to the inferior's memory, shared by the widgets that resolve data locally. Every session has its
+        # own, these are replaced by the ones of the session in front
+        self.process_memory = ProcessMemory()
+        # Hit counts of the executed instructions, shared by the disassembly heatmap and the coverage pane
+        self.coverage = SessionCoverage()
+        # The breakpoints of the session in front, shared by the breakpoints pane and the gutters of disasm and code
+        self.breakpoints = BreakpointTable()
         self.menu_bar = None
+        self.view_menu = None
+        self.non_stop_action: QAction | None = None
+        self.context_output_action: QAction | None = None
+        # Stops per second that are shown at most, 0 shows every stop
+        self.refresh_rate = int(QSettings(PwndbgGuiConstants.SETTINGS_FOLDER, PwndbgGuiConstants.SETTINGS_FILE).value(
+            PwndbgGuiConstants.SETTINGS_REFRESH_RATE, PwndbgGuiConstants.REFRESH_RATE))
         self.ui = Ui_PwnDbgGui()
         self.ui.setupUi(self)
-        # Make all widgets resizable with the window
-        self.setCentralWidget(self.ui.top_splitter)
+        self.setup_session_tabs()
         self.setup_custom_widgets()
-        self.seg_to_widget = dict(stack=self.ui.stack, code=self.ui.code, disasm=self.ui.disasm,
-                                  backtrace=self.ui.backtrace, regs=self.ui.regs,
-                                  main=self.main_context.output_widget)
+        self.seg_to_widget = dict(stack=self.ui.stack, regs=self.ui.regs, main=self.main_context.output_widget)
         self.parser = ContextParser()
-        self.setup_gdb_workers()
+        self.setup_widget_signals()
         self.setup_menu()
-        self.gdb_handler.init()
-        self.setup_inferior()
+        # Docks need to exist before the window state is restored
+        self.setup_tool_docks()
+        self.new_session()
+        self.setup_snapshot_searcher()
+        self.setup_gadget_indexer()
+        self.setup_symbol_indexer()
+        self.setup_script_runner()
         self.load_state()
 
+    def setup_session_tabs(self):
+        """Show a tab per session above the context panes, the tabs are hidden while there is only one session"""
+        self.session_tabs = QTabBar(self)
+        self.session_tabs.setTabsClosable(True)
+        self.session_tabs.setExpanding(False)
+        self.session_tabs.setDocumentMode(True)
+        self.session_tabs.setAutoHide(True)
+        self.session_tabs.currentChanged.connect(self.activate_session)
+        self.session_tabs.tabCloseRequested.connect(self.close_session)
+        central_widget = QWidget(self)
+        layout = QVBoxLayout(central_widget)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.setSpacing(0)
+        layout.addWidget(self.session_tabs)
+        layout.addWidget(self.ui.top_splitter)
+        # Make all widgets resizable with the window
+        self.setCentralWidget(central_widget)
+
     def setup_custom_widgets(self):
         """
         Ugly workaround to allow to use custom widgets. Using custom widgets in Qt Designer seems to only work for C++
@@ -97,6 +161,17 @@ class PwnDbgGui(QMainWindow):
         self.ui.watches = HDumpContextWidget(self)
         self.main_context = MainContextWidget(parent=self)
         self.ui.splitter.replaceWidget(0, self.main_context)
+        self.ui.search_results = SearchResultsWidget(self)
+        self.ui.memory_diff = MemoryDiffWidget(self)
+        self.ui.gadgets = GadgetWidget(self)
+        self.ui.symbols = SymbolWidget(self)
+        self.ui.trace = TraceWidget(self)
+        self.ui.coverage = CoverageWidget(self, self.ui.symbols.symbol_model)
+        self.ui.profiler = ProfilerWidget(self)
+        self.ui.threads = ThreadsWidget(self)
+        self.ui.script = ScriptWidget(self)
+        self.ui.breakpoints = BreakpointsWidget(self, self.breakpoints)
+        self.ui.logpoints = LogpointWidget(self)
 
     def setup_menu(self):
         """Create the menu and toolbar at the top of the window"""
@@ -124,6 +199,38 @@ class PwnDbgGui(QMainWindow):
         debug_menu.addAction(attach_pid_action)
         debug_toolbar.addAction(attach_pid_action)
 
+        debug_menu.addSeparator()
+        self.non_stop_action = QAction("Non-stop Mode", self)
+        self.non_stop_action.setCheckable(True)
+        self.non_stop_action.setToolTip("Stop and resume threads independently, takes effect for the next started or "
+                                        "attached program")
+        self.non_stop_action.toggled.connect(self.set_non_stop)
+        self.non_stop_action.toggled.connect(self.ui.threads.set_non_stop)
+        debug_menu.addAction(self.non_stop_action)
+        self.context_output_action = QAction("Stream Contexts via PTYs", self)
+        self.context_output_action.setCheckable(True)
+        self.context_output_action.setToolTip("Let pwndbg write the registers and stack contexts to ptys of the GUI "
+                                              "instead of sending them through GDB MI, faster for large contexts")
+        self.context_output_action.toggled.connect(self.set_context_output)
+        debug_menu.addAction(self.context_output_action)
+        refresh_rate_action = QAction("Refresh Rate...", self)
+        refresh_rate_action.setToolTip("Limit how many stops per second are shown, e.g. while breakpoint commands keep "
+                                       "continuing. The last stop is always shown")
+        refresh_rate_action.triggered.connect(self.query_refresh_rate)
+        debug_menu.addAction(refresh_rate_action)
+
+        debug_menu.addSeparator()
+        new_session_action = QAction("New Session", self)
+        new_session_action.setToolTip("Start another GDB in a new tab, e.g. to debug a forked child or another binary")
+        new_session_action.setShortcut(QKeySequence.StandardKey.AddTab)
+        new_session_action.triggered.connect(self.new_session)
+        debug_menu.addAction(new_session_action)
+        close_session_action = QAction("Close Session", self)
+        close_session_action.setToolTip("Exit the GDB of the current tab")
+        close_session_action.setShortcut(QKeySequence.StandardKey.Close)
+        close_session_action.triggered.connect(self.close_current_session)
+        debug_menu.addAction(close_session_action)
+
         debug_menu.addSeparator()
         exit_action = QAction("E&xit", self)
         exit_action.setShortcut(QKeySequence.StandardKey.Quit)
@@ -131,6 +238,8 @@ class PwnDbgGui(QMainWindow):
         exit_action.triggered.connect(self.close)
         debug_menu.addAction(exit_action)
 
+        self.view_menu = self.menu_bar.addMenu("&View")
+
         about_menu = self.menu_bar.addMenu("About")
         about_action = QAction("About", self)
         about_action.triggered.connect(self.about)
@@ -142,64 +251,398 @@ class PwnDbgGui(QMainWindow):
         about_qt_action.triggered.connect(QApplication.aboutQt)
         about_menu.addAction(about_qt_action)
 
-    def setup_gdb_workers(self):
-        """Setup our worker threads and connect all required signals with their slots"""
-        self.gdb_handler_thread = QThread()
-        self.gdb_reader_thread = QThread()
-        self.gdb_handler.moveToThread(self.gdb_handler_thread)
-        self.gdb_reader.moveToThread(self.gdb_reader_thread)
-        # Allow widgets to send signals that interact with GDB
-        self.set_gdb_file_target_signal.connect(self.gdb_handler.set_file_target)
-        self.set_gdb_pid_target_signal.connect(self.gdb_handler.set_pid_target)
-        self.set_gdb_source_dir_signal.connect(self.gdb_handler.set_source_dir)
-        self.set_gdb_tty.connect(self.gdb_handler.set_tty)
-        self.update_contexts.connect(self.gdb_handler.update_contexts)
-        self.main_context.gdb_write_input.connect(self.gdb_handler.send_inferior_input)
-        self.main_context.gdb_search.connect(self.gdb_handler.execute_search)
-        self.ui.stack.stack_lines_incrementor.valueChanged.connect(self.gdb_handler.update_stack_lines)
-        self.ui.stack.execute_xinfo.connect(self.gdb_handler.execute_xinfo)
-        self.ui.regs.execute_xinfo.connect(self.gdb_handler.execute_xinfo)
-        # Allow the worker to update contexts in the GUI thread
-        self.gdb_handler.update_gui.connect(self.update_pane)
-        self.gdb_reader.update_gui.connect(self.update_pane)
-        self.gdb_reader.inferior_state_changed.connect(self.main_context.change_input_label)
-        self.gdb_reader.send_pwndbg_about.connect(self.receive_pwndbg_about)
-        self.gdb_reader.send_xinfo.connect(self.display_xinfo_result)
-        # Allow the heap context to receive the results it requests
-        self.gdb_reader.send_heap_try_free_response.connect(self.ui.heap.receive_try_free_result)
-        self.gdb_reader.send_heap_heap_response.connect(self.ui.heap.receive_heap_result)
-        self.gdb_reader.send_heap_bins_response.connect(self.ui.heap.receive_bins_result)
-        # Allow the watches context to receive the hexdump results
-        self.gdb_reader.send_watches_hexdump_response.connect(self.ui.watches.receive_hexdump_result)
-        # Allow the "regs" context to receive information about the fs register
-        self.gdb_reader.send_fs_base_response.connect(self.ui.regs.receive_fs_base)
+    def setup_tool_docks(self):
+        """Create the dockable tool windows, which can be shown via the "View" menu"""
+        self.add_tool_dock(self.ui.search_results, "Search Results")
+        self.add_tool_dock(self.ui.memory_diff, "Memory Diff")
+        self.add_tool_dock(self.ui.gadgets, "Gadgets")
+        self.add_tool_dock(self.ui.symbols, "Symbols")
+        self.add_tool_dock(self.ui.trace, "Trace")
+        self.add_tool_dock(self.ui.coverage, "Coverage")
+        self.add_tool_dock(self.ui.profiler, "Profiler")
+        self.add_tool_dock(self.ui.threads, "Threads")
+        self.add_tool_dock(self.ui.script, "Script")
+        self.add_tool_dock(self.ui.breakpoints, "Breakpoints")
+        self.add_tool_dock(self.ui.logpoints, "Logpoints")
+
+    def add_tool_dock(self, widget: QWidget, title: str) -> QDockWidget:
+        """
+        Add a widget as a dock at the bottom of the window, tabified with the other tool docks
+        :param widget: The widget to show in the dock, needs an object name so that its state can be saved
+        :param title: The title of the dock and its entry in the "View" menu
+        """
+        dock = QDockWidget(title, self)
+        dock.setObjectName(f"{widget.objectName()}_dock")
+        dock.setWidget(widget)
+        existing_docks = [other for other in self.findChildren(QDockWidget) if other is not dock]
+        self.addDockWidget(Qt.DockWidgetArea.BottomDockWidgetArea, dock)
+        if len(existing_docks) > 0:
+            self.tabifyDockWidget(existing_docks[-1], dock)
+        self.view_menu.addAction(dock.toggleViewAction())
+        dock.hide()
+        return dock
+
+    def setup_widget_signals(self):
+        """Connect the signals between widgets, which do not depend on the session in front"""
+        self.main_context.cyclic_pattern_changed.connect(self.ui.regs.set_cyclic_pattern)
+        self.main_context.cyclic_pattern_changed.connect(self.ui.stack.set_cyclic_pattern)
+        self.main_context.gdb_search.connect(self.ui.search_results.start_search)
+        self.main_context.gdb_search.connect(self.show_search_results)
+        self.ui.search_results.open_address.connect(self.ui.watches.add_new_watch)
+        self.ui.trace.show_address.connect(self.ui.disasm.show_address)
+        self.ui.coverage.coverage_changed.connect(self.ui.disasm.update_coverage)
+        self.ui.coverage.show_address.connect(self.ui.disasm.show_address)
+        self.ui.breakpoints.show_address.connect(self.ui.disasm.show_address)
+        self.ui.breakpoints.breakpoints_changed.connect(self.ui.disasm.update_breakpoints)
+        self.ui.breakpoints.breakpoints_changed.connect(self.ui.code.update_breakpoints)
+        # Allow the profiler to take over the continue button
+        self.ui.profiler.continue_command_changed.connect(self.main_context.set_continue_command)
+        self.ui.memory_diff.open_address.connect(self.ui.watches.add_new_watch)
+
+    def connect_session(self, session: Session):
+        """
+        Connect all required signals between the widgets and the workers of a session. The connections are undone when
+        another session is brought to the front
+        :param session: The session that is brought to the front
+        """
+        handler, reader = session.gdb_handler, session.gdb_reader
+        connections = [
+            # Allow widgets to send signals that interact with GDB
+            (self.set_gdb_file_target_signal, handler.set_file_target),
+            (self.set_gdb_pid_target_signal, handler.set_pid_target),
+            (self.set_gdb_source_dir_signal, handler.set_source_dir),
+            (self.set_gdb_tty, handler.set_tty),
+            (self.set_gdb_watches, handler.set_watches),
+            (self.update_contexts, handler.update_contexts),
+            (self.non_stop_action.toggled, handler.set_non_stop),
+            (self.context_output_action.toggled, handler.set_context_output),
+            # Allow the main context to forward commands, input and its own output
+            (self.main_context.gdb_write, handler.send_command),
+            (self.main_context.gdb_write_input, handler.send_inferior_input),
+            (self.main_context.inferior_write, session.inferior_handler.inferior_write),
+            (self.main_context.stream_payload, session.inferior_handler.stream_payload),
+            (self.main_context.cancel_payload, session.inferior_handler.cancel_payload),
+            (session.inferior_handler.payload_progress, self.main_context.receive_payload_progress),
+            (session.inferior_handler.payload_finished, self.main_context.payload_finished),
+            (reader.inferior_pid_changed, self.main_context.set_inferior_pid),
+            (self.main_context.update_gui, session.receive_pane),
+            (self.main_context.gdb_search, handler.execute_search),
+            (self.ui.search_results.cancel_search, handler.interrupt_command),
+            (self.ui.stack.stack_lines_incrementor.valueChanged, handler.update_stack_lines),
+            (self.ui.stack.execute_xinfo, handler.execute_xinfo),
+            (self.ui.stack.request_pwndbg_stack, handler.update_pwndbg_stack),
+            (self.ui.regs.execute_xinfo, handler.execute_xinfo),
+            (reader.inferior_state_changed, self.main_context.change_input_label),
+            (reader.stops_skipped, self.main_context.set_stops_skipped),
+            # Commands can change memory without resuming the inferior, the contexts queried after them must not see
+            # stale pages
+            (self.main_context.gdb_write, session.process_memory.invalidate),
+            (reader.send_frame_pointer, self.ui.stack.receive_frame_pointer),
+            (reader.send_stack_pointer, self.ui.stack.receive_stack_pointer),
+            (reader.send_pwndbg_about, self.receive_pwndbg_about),
+            (reader.send_xinfo, self.display_xinfo_result),
+            # Allow the heap context to request and receive its results
+            (self.ui.heap.get_try_free, handler.execute_try_free),
+            (self.ui.heap.heap_generation, handler.set_heap_generation),
+            (reader.memory_outdated, handler.update_memory_contexts),
+            (reader.send_heap_try_free_response, self.ui.heap.receive_try_free_result),
+            (reader.send_heap_heap_response, self.ui.heap.receive_heap_result),
+            # Allow the "code" context to receive the current source location and to toggle breakpoints
+            (reader.send_source_file, self.ui.code.receive_source_file),
+            (self.ui.code.insert_breakpoint, handler.insert_breakpoint),
+            (self.ui.code.delete_breakpoint, handler.delete_breakpoint),
+            # Allow the "disasm" context to request and receive disassembly and to toggle breakpoints
+            (self.ui.disasm.disassemble_function, handler.disassemble_function),
+            (self.ui.disasm.disassemble_range, handler.disassemble_range),
+            (self.ui.disasm.insert_breakpoint, handler.insert_breakpoint),
+            (self.ui.disasm.delete_breakpoint, handler.delete_breakpoint),
+            (reader.send_frame_info, self.ui.disasm.receive_frame),
+            (reader.send_disassembly, self.ui.disasm.receive_disassembly),
+            # Allow the breakpoints widget to manage the breakpoints and follow GDB's breakpoint notifications
+            (self.ui.breakpoints.insert_breakpoint, handler.insert_breakpoint),
+            (self.ui.breakpoints.delete_breakpoint, handler.delete_breakpoint),
+            (self.ui.breakpoints.enable_breakpoint, handler.enable_breakpoint),
+            (self.ui.breakpoints.set_condition, handler.set_breakpoint_condition),
+            (self.ui.breakpoints.request_breakpoints, handler.list_breakpoints),
+            (reader.send_breakpoint_changed, self.ui.breakpoints.receive_breakpoint),
+            (reader.send_breakpoint_deleted, self.ui.breakpoints.receive_breakpoint_deleted),
+            (reader.send_breakpoint_list, self.ui.breakpoints.receive_breakpoint_list),
+            # Allow the logpoints widget to manage logpoints and receive their streamed hits
+            (self.ui.logpoints.add_logpoint, handler.add_logpoint),
+            (self.ui.logpoints.delete_logpoint, handler.delete_logpoint),
+            (self.ui.logpoints.request_logpoints, handler.list_logpoints),
+            (reader.send_logpoint_record, self.ui.logpoints.receive_record),
+            (reader.send_logpoint_result, self.ui.logpoints.logpoint_finished),
+            # Allow the completer of the main input to index the commands and registers of GDB
+            (self.main_context.completer.request_commands, handler.list_commands),
+            (reader.send_command_record, self.main_context.completer.receive_record),
+            (reader.inferior_pid_changed, self.main_context.completer.handle_inferior_pid),
+            # Allow the "backtrace" context to page through frames and select a frame
+            (self.ui.backtrace.request_frames, handler.list_frames),
+            (self.ui.backtrace.request_arguments, handler.list_frame_arguments),
+            (self.ui.backtrace.select_frame, handler.select_frame),
+            (reader.send_backtrace_depth, self.ui.backtrace.receive_depth),
+            (reader.send_backtrace_frames, self.ui.backtrace.receive_frames),
+            (reader.send_backtrace_args, self.ui.backtrace.receive_arguments),
+            # Allow the search results to receive the streamed hits
+            (reader.send_search_record, self.ui.search_results.receive_record),
+            (reader.send_search_finished, self.ui.search_results.search_finished),
+            # Allow the local snapshot searcher to request snapshots and to drop them once the inferior moved on
+            (self.snapshot_searcher.request_snapshot, handler.take_snapshot),
+            (reader.send_snapshot_index, self.snapshot_searcher.receive_snapshot),
+            (reader.send_snapshot_finished, self.snapshot_searcher.snapshot_finished),
+            (reader.inferior_state_changed, self.snapshot_searcher.handle_inferior_state),
+            # Allow the gadgets and symbols to be rebased on stops and to set breakpoints
+            (reader.inferior_state_changed, self.ui.gadgets.handle_inferior_state),
+            (reader.inferior_state_changed, self.ui.symbols.handle_inferior_state),
+            (self.ui.symbols.insert_breakpoint, handler.insert_breakpoint),
+            # Allow the trace widget to run traces and receive the streamed steps
+            (self.ui.trace.start_trace, handler.execute_trace),
+            (self.ui.trace.cancel_trace, handler.interrupt_command),
+            (reader.send_trace_record, self.ui.trace.receive_record),
+            (reader.send_trace_finished, self.ui.trace.trace_finished),
+            # Allow the coverage to count traced instructions and breakpoint hits
+            (reader.send_trace_record, self.ui.coverage.receive_trace_record),
+            (reader.send_breakpoint_hit, self.ui.coverage.receive_breakpoint_hit),
+            (reader.inferior_pid_changed, self.ui.coverage.set_pid),
+            (reader.inferior_state_changed, self.ui.coverage.handle_inferior_state),
+            # Allow the profiler to receive the streamed samples
+            (reader.send_profile_record, self.ui.profiler.receive_record),
+            # Allow the threads widget to list, select, interrupt and resume threads
+            (self.ui.threads.request_threads, handler.list_threads),
+            (self.ui.threads.select_thread, handler.select_thread),
+            (self.ui.threads.interrupt_thread, handler.interrupt_thread),
+            (self.ui.threads.continue_thread, handler.continue_thread),
+            (self.ui.threads.interrupt_process, handler.interrupt_command),
+            (self.ui.threads.refresh_contexts, handler.update_contexts),
+            (reader.send_thread_info, self.ui.threads.receive_threads),
+            (reader.threads_changed, self.ui.threads.handle_threads_changed),
+            (reader.selected_thread_stopped, self.ui.threads.handle_selected_thread_stopped),
+            (reader.other_thread_stopped, self.ui.threads.handle_other_thread_stopped),
+            # Allow the memory diff to select its regions and receive the changes
+            (self.ui.memory_diff.regions_changed, handler.set_diff_regions),
+            (reader.send_memory_diff, self.ui.memory_diff.receive_diff_result),
+            # Allow the watches context to manage its watches and receive the hexdump results
+            (self.ui.watches.add_watch, handler.add_watch),
+            (self.ui.watches.del_watch, handler.del_watch),
+            (self.ui.watches.change_lines_watch, handler.change_watch_lines),
+            (reader.send_watches_hexdump_response, self.ui.watches.receive_hexdump_result),
+            # Allow the "regs" context to receive information about the fs register
+            (reader.send_fs_base_response, self.ui.regs.receive_fs_base),
+            # Allow scripts to write to the inferior and to execute GDB commands
+            (self.script_runner.inferior_write, session.inferior_handler.inferior_write),
+            (self.script_runner.gdb_write, handler.send_command),
+            (self.script_runner.gdb_write, session.process_memory.invalidate),
+        ]
+        # Called in the thread of the emitter: a script blocks its worker's thread while it waits for output, and the
+        # inferior's thread is woken up right after input was queued for it
+        direct_connections = [
+            (session.inferior_handler.update_gui, self.script_runner.receive_output),
+            (reader.inferior_pid_changed, self.script_runner.set_pid),
+            (self.script_runner.inferior_write, session.inferior_handler.wake),
+            (self.main_context.inferior_write, session.inferior_handler.wake),
+            (self.main_context.stream_payload, session.inferior_handler.wake),
+            (self.main_context.cancel_payload, session.inferior_handler.wake),
+        ]
+        session.connections = [signal.connect(slot) for signal, slot in connections]
+        session.connections += [signal.connect(slot, Qt.ConnectionType.DirectConnection)
+                                for signal, slot in direct_connections]
+        self.main_context.inferior_handler = session.inferior_handler
+
+    def disconnect_session(self, session: Session):
+        """Undo the connections of a session that is sent to the background"""
+        for connection in session.connections:
+            QObject.disconnect(connection)
+        session.connections = []
+
+    @Slot()
+    def new_session(self):
+        """Start a new GDB session in its own tab and bring it to the front"""
+        self.session_counter += 1
+        session = Session(self.session_counter)
+        session.update_gui.connect(self.update_pane)
+        session.changed.connect(self.update_session_tabs)
+        # The reader's thread is not started yet
+        session.gdb_reader.set_refresh_rate(self.refresh_rate)
+        self.refresh_rate_changed.connect(session.gdb_reader.set_refresh_rate)
+        self.sessions.append(session)
+        self.session_tabs.addTab(session.title)
+        self.session_tabs.setCurrentIndex(len(self.sessions) - 1)
+        # Started once the session is connected, so that no response to the initial commands gets lost
+        session.start()
+        logger.info("Started session %d", session.number)
+
+    @Slot(int)
+    def activate_session(self, index: int):
+        """
+        Bring a session to the front, which connects it to the panes and shows its state in them
+        :param index: The index of the session's tab
+        """
+        if index < 0 or self.sessions[index] is self.session:
+            return
+        previous = self.session
+        if previous is not None:
+            self.disconnect_session(previous)
+            previous.set_active(False)
+        session = self.sessions[index]
+        self.session = session
+        self.set_session_memory(session)
+        self.connect_session(session)
+        session.set_active(True)
+        # Sessions may run different GDB versions or architectures
+        self.main_context.completer.request_commands.emit("version")
+        if previous is None:
+            return
+        # A running script talks to the inferior of the previous session, whose payload keeps streaming in the
+        # background
+        self.script_runner.reset()
+        self.main_context.hide_payload_progress()
+        self.main_context.set_stops_skipped(0)
+        # The panes still show the state of the previous session. Show the cached output of this session until its
+        # contexts are refreshed
+        self.main_context.output_widget.clear()
+        self.update_pane("main", bytes(session.main_output))
+        for context in self.seg_to_widget.keys() - {"main"}:
+            self.update_pane(context, session.panes.get(context, b""))
+        if session.target and session.target != previous.target:
+            self.ui.symbols.set_target(session.target)
+        self.non_stop_action.blockSignals(True)
+        self.non_stop_action.setChecked(session.non_stop)
+        self.non_stop_action.blockSignals(False)
+        self.ui.threads.set_non_stop(session.non_stop)
+        self.context_output_action.blockSignals(True)
+        self.context_output_action.setChecked(session.redirect_contexts)
+        self.context_output_action.blockSignals(False)
+        # The heap report, watches and breakpoints of this session's GDB are out of sync with the widgets
+        self.ui.heap.heap_generation.emit(-1)
+        self.ui.breakpoints.request_breakpoints.emit()
+        self.ui.logpoints.reset()
+        self.ui.logpoints.request_logpoints.emit()
+        self.set_gdb_watches.emit(self.ui.watches.watch_parameters())
+        # Let everything else that caches inferior state know that it now belongs to another process
+        session.gdb_reader.inferior_pid_changed.emit(session.pid)
+        session.gdb_reader.inferior_state_changed.emit(False)
+        if session.is_stopped():
+            session.gdb_reader.inferior_state_changed.emit(True)
+            session.gdb_reader.memory_outdated.emit()
+            # Sessions in the background do not refresh, so this is the only refresh for all stops in the background
+            self.update_contexts.emit(False)
+        self.main_context.change_input_label(session.inferior_handler.state != InferiorState.RUNNING)
+
+    def set_session_memory(self, session: Session):
+        """Swap the memory and the coverage of the session brought to the front into the widgets that use them"""
+        self.process_memory = session.process_memory
+        self.coverage = session.coverage
+        self.ui.disasm.set_session(session.process_memory, session.coverage)
+        self.ui.stack.set_memory(session.process_memory)
+        self.ui.symbols.set_memory(session.process_memory)
+        self.ui.gadgets.set_memory(session.process_memory)
+        self.ui.coverage.set_session(session.process_memory, session.coverage)
+
+    @Slot(int)
+    def close_session(self, index: int):
+        """
+        Exit the GDB of a session and close its tab, the last session cannot be closed
+        :param index: The index of the session's tab
+        """
+        if len(self.sessions) == 1:
+            return
+        session = self.sessions.pop(index)
+        # Removing the tab of the session in front brings another session to the front
+        self.session_tabs.removeTab(index)
+        self.disconnect_session(session)
+        session.close()
+        session.deleteLater()
+        logger.info("Closed session %d", session.number)
+
+    @Slot()
+    def close_current_session(self):
+        self.close_session(self.sessions.index(self.session))
+
+    @Slot()
+    def update_session_tabs(self):
+        """Show the target and state of every session in its tab"""
+        for index, session in enumerate(self.sessions):
+            self.session_tabs.setTabText(index, session.title)
+            self.session_tabs.setTabToolTip(index, session.target)
+
+    @Slot(bool)
+    def set_non_stop(self, enabled: bool):
+        self.session.non_stop = enabled
+
+    @Slot(bool)
+    def set_context_output(self, enabled: bool):
+        self.session.redirect_contexts = enabled
+
+    def setup_snapshot_searcher(self):
+        # Thread setup
+        self.snapshot_thread = QThread()
+        self.snapshot_searcher.moveToThread(self.snapshot_thread)
+        # Connect signals for searching and the snapshot life cycle
+        self.main_context.snapshot_search.connect(self.snapshot_searcher.reset_cancel,
+                                                  Qt.ConnectionType.DirectConnection)
+        self.main_context.snapshot_search.connect(self.snapshot_searcher.search)
+        self.main_context.snapshot_search.connect(self.ui.search_results.start_local_search)
+        self.main_context.snapshot_search.connect(self.show_search_results)
+        # The searcher thread is busy while searching, so the cancellation has to bypass its event loop
+        self.ui.search_results.cancel_local_search.connect(self.snapshot_searcher.cancel,
+                                                           Qt.ConnectionType.DirectConnection)
+        self.snapshot_searcher.send_record.connect(self.ui.search_results.receive_record)
         # Thread cleanup
-        self.gdb_handler_thread.finished.connect(self.gdb_handler.deleteLater)
-        self.gdb_reader_thread.finished.connect(self.gdb_reader.deleteLater)
-        self.stop_gdb_threads.connect(lambda: self.gdb_reader.set_run(False))
-        self.stop_gdb_threads.connect(self.gdb_handler_thread.quit)
-        self.stop_gdb_threads.connect(self.gdb_reader_thread.quit)
-        logger.debug("Starting new worker threads")
-        self.gdb_reader_thread.started.connect(self.gdb_reader.read_with_timeout)
-        self.gdb_handler_thread.start()
-        self.gdb_reader_thread.start()
-        logger.info("Started worker threads")
-
-    def setup_inferior(self):
+        self.snapshot_thread.finished.connect(self.snapshot_searcher.cleanup)
+        self.snapshot_thread.finished.connect(self.snapshot_searcher.deleteLater)
+        self.stop_gdb_threads.connect(self.snapshot_thread.quit)
+        # Thread start
+        self.snapshot_thread.start()
+
+    def setup_gadget_indexer(self):
         # Thread setup
-        self.inferior_thread = QThread()
-        self.inferior_handler.moveToThread(self.inferior_thread)
-        # Connect signals from inferior_handler
-        self.inferior_handler.update_gui.connect(self.update_pane)
-        # execute gdb command to redirect inferior to tty
-        self.set_gdb_tty.emit(self.inferior_handler.tty)
+        self.gadget_thread = QThread()
+        self.gadget_indexer.moveToThread(self.gadget_thread)
+        # Connect signals for indexing and rebasing on stops
+        self.ui.gadgets.request_index.connect(self.gadget_indexer.index_file)
+        self.gadget_indexer.send_index.connect(self.ui.gadgets.receive_index)
+        self.gadget_indexer.send_status.connect(self.ui.gadgets.receive_status)
+        # Thread cleanup, a running scan has to be aborted from the GUI thread
+        self.stop_gdb_threads.connect(self.gadget_indexer.cancel, Qt.ConnectionType.DirectConnection)
+        self.gadget_thread.finished.connect(self.gadget_indexer.cleanup)
+        self.gadget_thread.finished.connect(self.gadget_indexer.deleteLater)
+        self.stop_gdb_threads.connect(self.gadget_thread.quit)
+        # Thread start
+        self.gadget_thread.start()
+
+    def setup_symbol_indexer(self):
+        # Thread setup
+        self.symbol_thread = QThread()
+        self.symbol_indexer.moveToThread(self.symbol_thread)
+        # Connect signals for indexing and for acting on a picked symbol
+        self.ui.symbols.request_index.connect(self.symbol_indexer.index_file)
+        self.symbol_indexer.send_index.connect(self.ui.symbols.receive_index)
+        # The symbols of the target are completed in the main input as well
+        self.symbol_indexer.send_index.connect(self.main_context.completer.receive_symbols)
+        self.ui.symbols.target_changed.connect(self.main_context.completer.set_target)
+        self.ui.symbols.show_address.connect(self.ui.disasm.show_address)
+        # Thread cleanup
+        self.symbol_thread.finished.connect(self.symbol_indexer.deleteLater)
+        self.stop_gdb_threads.connect(self.symbol_thread.quit)
+        # Thread start
+        self.symbol_thread.start()
+
+    def setup_script_runner(self):
+        # Thread setup
+        self.script_thread = QThread()
+        self.script_runner.moveToThread(self.script_thread)
+        # Connect signals for running scripts and showing their output
+        self.ui.script.run_script.connect(self.script_runner.run_script)
+        self.ui.script.stop_script.connect(self.script_runner.stop, Qt.ConnectionType.DirectConnection)
+        self.script_runner.send_output.connect(self.ui.script.receive_output)
+        self.script_runner.running_changed.connect(self.ui.script.set_running)
         # Thread cleanup
-        self.inferior_thread.finished.connect(self.inferior_handler.deleteLater())
-        self.stop_gdb_threads.connect(lambda: self.inferior_handler.set_run(False))
-        self.stop_gdb_threads.connect(self.inferior_thread.quit)
+        self.script_thread.finished.connect(self.script_runner.deleteLater)
+        self.stop_gdb_threads.connect(self.script_runner.stop, Qt.ConnectionType.DirectConnection)
+        self.stop_gdb_threads.connect(self.script_thread.quit)
         # Thread start
-        self.inferior_thread.started.connect(self.inferior_handler.inferior_runs)
-        self.inferior_thread.start()
+        self.script_thread.start()
 
     def closeEvent(self, event: PySide6.QtGui.QCloseEvent) -> None:
         """
@@ -209,12 +652,17 @@ class PwnDbgGui(QMainWindow):
         logger.debug("Stopping GDB threads")
         self.stop_gdb_threads.emit()
         self.save_state()
-        logger.debug("Waiting for GDB Handler thread")
-        self.gdb_handler_thread.wait()
-        logger.debug("Waiting for GDB Reader thread")
-        self.gdb_reader_thread.wait()
-        logger.debug("Waiting for Inferior thread")
-        self.inferior_thread.wait()
+        for session in self.sessions:
+            logger.debug("Waiting for the threads of session %d", session.number)
+            session.stop()
+        logger.debug("Waiting for Snapshot thread")
+        self.snapshot_thread.wait()
+        logger.debug("Waiting for Gadget thread")
+        self.gadget_thread.wait()
+        logger.debug("Waiting for Symbol thread")
+        self.symbol_thread.wait()
+        logger.debug("Waiting for Script thread")
+        self.script_thread.wait()
         event.accept()
 
     @Slot()
@@ -225,8 +673,12 @@ class PwnDbgGui(QMainWindow):
         dialog.setViewMode(QFileDialog.ViewMode.Detail)
         if dialog.exec() and len(dialog.selectedFiles()) > 0:
             file_name = dialog.selectedFiles()[0]
+            # Cached disassembly belongs to the previous binary
+            self.ui.disasm.clear_cache()
+            self.ui.symbols.set_target(file_name)
+            self.session.set_target(file_name)
             # Before loading the file we want to set the correct tty for the inferior
-            self.set_gdb_tty.emit(self.inferior_handler.tty)
+            self.set_gdb_tty.emit(self.session.inferior_handler.tty)
             self.set_gdb_file_target_signal.emit([file_name])
             # Reset dir so that GDB doesn't get confused when we load multiple programs with the same name / source
             # file name
@@ -248,10 +700,22 @@ class PwnDbgGui(QMainWindow):
                     pid = process.pid
             if pid is None:
                 logger.error("Could not find PID for process %s", name)
-                self.update_pane("main", f"Could not find PID for process {name}".encode())
+                self.session.receive_pane("main", f"Could not find PID for process {name}".encode())
                 return
             self.attach_to_pid(pid)
 
+    @Slot()
+    def query_refresh_rate(self):
+        """Query the user for the maximum number of stops per second that are shown"""
+        rate, ok = QInputDialog.getInt(self, "Set the refresh rate", "Stops shown per second (0 shows every stop):",
+                                       self.refresh_rate, minValue=0, maxValue=1000)
+        if not ok:
+            return
+        self.refresh_rate = rate
+        QSettings(PwndbgGuiConstants.SETTINGS_FOLDER, PwndbgGuiConstants.SETTINGS_FILE).setValue(
+            PwndbgGuiConstants.SETTINGS_REFRESH_RATE, rate)
+        self.refresh_rate_changed.emit(rate)
+
     @Slot()
     def query_process_pid(self):
         """Query the user for process ID in order to attach to it"""
@@ -277,6 +741,13 @@ class PwnDbgGui(QMainWindow):
         html = self.parser.to_html(content, remove_header)
         widget.add_content(html)
 
+    @Slot()
+    def show_search_results(self):
+        """Bring the search results dock to the front when a search is started"""
+        dock = self.ui.search_results.parentWidget()
+        dock.show()
+        dock.raise_()
+
     @Slot()
     def about(self):
         """Display the About section for our GUI"""
@@ -351,7 +822,11 @@ class PwnDbgGui(QMainWindow):
         # TODO: Allow user to supply dir via GUI, differentiate between user supplied dirs and automatically added by us
         #self.set_gdb_source_dir_signal.emit([""])
         # Add the directory of the executable as a search directory for source files for GDB
-        process_path = Path(psutil.Process(pid).exe()).parent.resolve()
+        executable = psutil.Process(pid).exe()
+        process_path = Path(executable).parent.resolve()
+        self.ui.disasm.clear_cache()
+        self.ui.symbols.set_target(executable)
+        self.session.set_target(executable)
         self.set_gdb_source_dir_signal.emit([str(process_path)])
         # If we attach we don't want gdb to have any weired tty configs that would interfere with the inferior
         self.set_gdb_tty.emit("")
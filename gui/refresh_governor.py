@@ -0,0 +1,61 @@
+class RefreshGovernor:
+    """Caps how often stops of the inferior are shown in the GUI. Breakpoint commands that continue or scripts that
+    stop and continue in a loop produce stops faster than the panes can be refreshed, so a stop that arrives too soon
+    after the last shown one is deferred. A deferred stop that is followed by another stop or by the inferior resuming
+    is skipped, the last stop is always shown once the interval passed"""
+    def __init__(self, rate: int):
+        """
+        :param rate: The maximum number of shown stops per second, 0 shows every stop
+        """
+        self.interval = 0.0
+        self.set_rate(rate)
+        # The time at which the GUI was refreshed last
+        self.last = float("-inf")
+        # Whether a stop is waiting to be shown
+        self.pending = False
+        # Stops that were skipped since a stop was last shown without skipping any, i.e. during the current storm
+        self.skipped = 0
+        # Stops that were skipped since a stop was last shown
+        self.recent = 0
+
+    def set_rate(self, rate: int):
+        self.interval = 1 / rate if rate > 0 else 0.0
+
+    def remaining(self, now: float) -> float:
+        """The seconds until the GUI may be refreshed again"""
+        return max(0.0, self.last + self.interval - now)
+
+    def request(self, now: float) -> bool:
+        """
+        Request to show a stop, a stop that is still pending is skipped
+        :param now: The current time of time.monotonic()
+        :return: True if the stop is shown right away, otherwise it is pending until due() returns True
+        """
+        self.cancel()
+        if self.remaining(now) > 0:
+            self.pending = True
+            return False
+        return True
+
+    def cancel(self):
+        """Skip the pending stop, e.g. because the inferior resumed before it was shown"""
+        if self.pending:
+            self.pending = False
+            self.skipped += 1
+            self.recent += 1
+
+    def due(self, now: float) -> bool:
+        """Whether the pending stop should be shown now"""
+        return self.pending and self.remaining(now) == 0
+
+    def shown(self, now: float):
+        """A stop was shown, which ends the storm if no stop was skipped since the last one"""
+        if self.recent == 0:
+            self.skipped = 0
+        self.recent = 0
+        self.pending = False
+        self.last = now
+
+    def refreshed(self, now: float):
+        """The GUI was refreshed without showing a stop, e.g. with output that was collected during a storm"""
+        self.last = now
@@ -0,0 +1,119 @@
+import functools
+import logging
+import time
+import traceback
+
+from PySide6.QtCore import QObject, Signal, Slot
+
+from gui.constants import PwndbgGuiConstants
+from gui.cyclic import cyclic_pattern
+from gui.tube import Tube, ScriptStopped, Interactive
+
+logger = logging.getLogger(__file__)
+
+
+def pack(value: int, bits: int) -> bytes:
+    """Pack an integer as little endian, negative values are packed in two's complement"""
+    return (value & ((1 << bits) - 1)).to_bytes(bits // 8, "little")
+
+
+def unpack(data: bytes, bits: int) -> int:
+    """Unpack a little endian integer, shorter data (e.g. a leaked pointer without its null bytes) is padded"""
+    return int.from_bytes(data[:bits // 8].ljust(bits // 8, b"\x00"), "little")
+
+
+class ScriptRunner(QObject):
+    """Worker that runs exploit scripts against the inferior of the session in front. A script blocks its own thread
+    while it waits for output, the inferior's output is fed into the tube directly from the inferior's thread.
+
+    Scripts see the tube as "io" and its functions (send, sendline, recvuntil, recvn, interactive, ...) as globals,
+    as well as gdb() to execute a GDB command, the p/u packing helpers and cyclic()"""
+    # Input for the inferior, written via the InferiorHandler's tty
+    inferior_write = Signal(bytes)
+    # Execute a GDB command, e.g. to set a breakpoint or to continue
+    gdb_write = Signal(str)
+    # Output of the script's print() calls and errors
+    send_output = Signal(str)
+    # Emitted with True when a script starts and with False when it finished
+    running_changed = Signal(bool)
+
+    def __init__(self):
+        super().__init__()
+        self.tube = Tube(self.inferior_write.emit)
+        # Read from the inferior's thread, hence not guarded by the event loop
+        self.running = False
+
+    @Slot(str, bytes)
+    def receive_output(self, context: str, data: bytes):
+        """
+        Feed the output of the inferior into the tube. Connected directly, i.e. called in the inferior's thread, since
+        the script blocks the event loop of this worker's thread while it waits for output
+        :param context: The pane the output is meant for, only "main" carries output of the inferior
+        :param data: The output
+        """
+        if context != "main":
+            return
+        self.tube.feed(data)
+        if not self.running:
+            # Keep the latest output, e.g. a prompt printed before the script was started
+            self.tube.trim(PwndbgGuiConstants.SCRIPT_BACKLOG)
+
+    @Slot(int)
+    def set_pid(self, pid: int):
+        """
+        Let a waiting script know that the inferior exited. Connected directly as well
+        :param pid: The pid of a new inferior, or 0 if it exited
+        """
+        if pid == 0:
+            self.tube.close()
+        else:
+            self.tube.open()
+
+    @Slot(str)
+    def run_script(self, source: str):
+        """
+        Run a script until it returns, calls interactive() or is stopped
+        :param source: The Python source of the script
+        """
+        self.tube.start()
+        self.running = True
+        self.running_changed.emit(True)
+        start_time = time.perf_counter()
+        try:
+            exec(compile(source, "<script>", "exec"), self.script_globals())
+            self.send_output.emit(f"Script finished after {time.perf_counter() - start_time:.3f}s\n")
+        except Interactive:
+            self.send_output.emit("Switched to interactive mode, continue in the main input\n")
+        except ScriptStopped:
+            self.send_output.emit("Script stopped\n")
+        except EOFError as e:
+            self.send_output.emit(f"EOF: {e}\n")
+        except Exception:
+            self.send_output.emit(traceback.format_exc())
+        finally:
+            self.running = False
+            self.running_changed.emit(False)
+
+    def stop(self):
+        """Stop a script that waits for output, called from the GUI thread while the script runs"""
+        self.tube.stop()
+
+    def reset(self):
+        """Stop the running script and forget the output of the previous inferior, e.g. when switching sessions"""
+        self.tube.stop()
+        self.tube.reset()
+
+    def script_globals(self) -> dict:
+        tube = self.tube
+        namespace = {"__name__": "__script__", "io": tube, "gdb": self.gdb_write.emit, "print": self.print,
+                     "cyclic": lambda length: cyclic_pattern().generate(length)}
+        for name in ("send", "sendline", "sendafter", "sendlineafter", "recv", "recvn", "recvuntil", "recvline",
+                     "recvall", "clean", "interactive"):
+            namespace[name] = getattr(tube, name)
+        for bits in (8, 16, 32, 64):
+            namespace[f"p{bits}"] = functools.partial(pack, bits=bits)
+            namespace[f"u{bits}"] = functools.partial(unpack, bits=bits)
+        return namespace
+
+    def print(self, *args, sep=" ", end="\n", **kwargs):
+        self.send_output.emit(sep.join(str(arg) for arg in args) + end)
@@ -0,0 +1,176 @@
+import logging
+import os
+from typing import Dict, List
+
+from PySide6.QtCore import Qt, QObject, Signal, Slot, QThread, QMetaObject
+
+from gui.constants import PwndbgGuiConstants
+from gui.context_output import ContextOutputReader
+from gui.coverage import SessionCoverage
+from gui.gdb_handler import GdbHandler
+from gui.gdb_reader import GdbReader
+from gui.inferior_handler import InferiorHandler
+from gui.inferior_state import InferiorState
+from gui.process_memory import ProcessMemory
+
+logger = logging.getLogger(__file__)
+
+
+class Session(QObject):
+    """A single debugging session: its own GDB process with the worker threads that write to and read from it, the pty
+    of its inferior and the state and output of its inferior. Only the session in front is connected to the context
+    panes, the output of sessions in the background is cached until they are brought to the front"""
+    # Update a context pane, only emitted while the session is in front
+    update_gui = Signal(str, bytes)
+    # Emitted when the title or the state shown in the session's tab changed
+    changed = Signal()
+
+    def __init__(self, number: int):
+        super().__init__()
+        self.number = number
+        self.inferior_handler = InferiorHandler()
+        self.gdb_handler = GdbHandler(self.inferior_handler)
+        self.gdb_reader = GdbReader(self.gdb_handler.controller, self.inferior_handler)
+        # Reads the context sections that pwndbg can be told to write to ptys instead of GDB's console
+        self.context_output_reader = ContextOutputReader(["regs", "stack"])
+        self.gdb_handler.context_ttys = dict(self.context_output_reader.ttys)
+        # Thread that will handle all writing to GDB
+        self.gdb_handler_thread = QThread()
+        # Thread that will continuously read from GDB
+        self.gdb_reader_thread = QThread()
+        # Thread that will continuously read and write to the inferior
+        self.inferior_thread = QThread()
+        # Thread that will continuously read the redirected context sections
+        self.context_output_thread = QThread()
+        # Direct access to the memory of this session's inferior, kept up to date while the session is in the background
+        self.process_memory = ProcessMemory()
+        # Hit counts of the instructions executed by this session's inferiors
+        self.coverage = SessionCoverage()
+        # The executable that was started or attached to
+        self.target = ""
+        self.pid = 0
+        self.non_stop = False
+        # Whether the context sections are redirected to the ptys of the context output reader
+        self.redirect_contexts = False
+        # Whether the session is in front and connected to the context panes
+        self.active = False
+        # Whether there is output the user has not seen yet
+        self.unseen_output = False
+        # The latest content of every context pane and the tail of the main output, shown again when the session is
+        # brought to the front
+        self.panes: Dict[str, bytes] = {}
+        self.main_output = bytearray()
+        # Connections between the session's workers and the GUI that only exist while the session is in front
+        self.connections: List[QMetaObject.Connection] = []
+        self.gdb_handler.update_gui.connect(self.receive_pane)
+        self.gdb_reader.update_gui.connect(self.receive_pane)
+        self.inferior_handler.update_gui.connect(self.receive_pane)
+        self.context_output_reader.update_gui.connect(self.receive_pane)
+        self.gdb_reader.context_output_done.connect(self.context_output_reader.flush_section)
+        # The flush is queued to the reader's thread, which waits in select until it is woken up
+        self.gdb_reader.context_output_done.connect(self.context_output_reader.wake, Qt.ConnectionType.DirectConnection)
+        self.gdb_reader.inferior_pid_changed.connect(self.set_pid)
+        self.gdb_reader.inferior_state_changed.connect(self.changed)
+        self.gdb_reader.inferior_pid_changed.connect(self.process_memory.set_pid)
+        self.gdb_reader.inferior_state_changed.connect(self.process_memory.handle_inferior_state)
+
+    @property
+    def title(self) -> str:
+        name = os.path.basename(self.target) if self.target else f"Session {self.number}"
+        if self.inferior_handler.state == InferiorState.RUNNING:
+            name += " (running)"
+        return f"● {name}" if self.unseen_output else name
+
+    def start(self):
+        """Prepare GDB, move the workers to their threads and start the threads"""
+        # Called before the handler lives in its thread, afterwards it may only be invoked via queued signals
+        self.gdb_handler.init()
+        # Route the I/O of inferiors started by GDB via our tty
+        self.gdb_handler.set_tty(self.inferior_handler.tty)
+        self.gdb_handler.moveToThread(self.gdb_handler_thread)
+        self.gdb_reader.moveToThread(self.gdb_reader_thread)
+        self.inferior_handler.moveToThread(self.inferior_thread)
+        self.context_output_reader.moveToThread(self.context_output_thread)
+        # Thread cleanup
+        self.gdb_handler_thread.finished.connect(self.gdb_handler.deleteLater)
+        self.gdb_reader_thread.finished.connect(self.gdb_reader.deleteLater)
+        self.inferior_thread.finished.connect(self.inferior_handler.deleteLater)
+        self.context_output_thread.finished.connect(self.context_output_reader.deleteLater)
+        logger.debug("Starting worker threads of session %d", self.number)
+        self.gdb_reader_thread.started.connect(self.gdb_reader.read_with_timeout)
+        self.inferior_thread.started.connect(self.inferior_handler.inferior_runs)
+        self.context_output_thread.started.connect(self.context_output_reader.read_sections)
+        self.gdb_handler_thread.start()
+        self.gdb_reader_thread.start()
+        self.inferior_thread.start()
+        self.context_output_thread.start()
+
+    def stop(self):
+        """Stop the worker threads and wait for them to finish"""
+        logger.debug("Stopping worker threads of session %d", self.number)
+        self.gdb_reader.set_run(False)
+        self.inferior_handler.set_run(False)
+        self.context_output_reader.set_run(False)
+        self.gdb_handler_thread.quit()
+        self.gdb_reader_thread.quit()
+        self.inferior_thread.quit()
+        self.context_output_thread.quit()
+        self.gdb_handler_thread.wait()
+        self.gdb_reader_thread.wait()
+        self.inferior_thread.wait()
+        self.context_output_thread.wait()
+
+    def close(self):
+        """Stop the worker threads and exit GDB, which kills or detaches from the inferior"""
+        self.stop()
+        self.gdb_handler.controller.exit()
+        self.process_memory.close()
+        self.context_output_reader.close()
+
+    def set_active(self, active: bool):
+        """
+        Bring the session to the front or send it to the background. In the background, the output of the session is
+        only cached, it is neither rendered nor are the contexts refreshed until the session is in front again
+        :param active: True if the session is now in front
+        """
+        self.active = active
+        if active:
+            self.unseen_output = False
+            self.changed.emit()
+
+    def set_target(self, target: str):
+        """
+        :param target: The path of the executable that was started or attached to
+        """
+        self.target = target
+        self.changed.emit()
+
+    @Slot(str, bytes)
+    def receive_pane(self, context: str, content: bytes):
+        """
+        Cache the content of a context pane and forward it while the session is in front
+        :param context: The context to update
+        :param content: The collected output from GDB
+        """
+        if context == "main":
+            self.main_output += content
+            if len(self.main_output) > PwndbgGuiConstants.SESSION_OUTPUT_CACHE:
+                # Only keep whole lines, so that no escape sequence is cut in half
+                cut = len(self.main_output) - PwndbgGuiConstants.SESSION_OUTPUT_CACHE
+                newline = self.main_output.find(b"\n", cut)
+                del self.main_output[:newline + 1 if newline >= 0 else cut]
+        else:
+            self.panes[context] = content
+        if self.active:
+            self.update_gui.emit(context, content)
+        elif context == "main" and content and not self.unseen_output:
+            self.unseen_output = True
+            self.changed.emit()
+
+    @Slot(int)
+    def set_pid(self, pid: int):
+        self.pid = pid
+        self.changed.emit()
+
+    def is_stopped(self) -> bool:
+        return self.inferior_handler.state == InferiorState.STOPPED
@@ -0,0 +1,79 @@
+import re
+from typing import List, Tuple
+
+from PySide6.QtGui import QSyntaxHighlighter, QTextCharFormat, QColor, QFont, QTextDocument
+
+from gui.constants import PwndbgGuiConstants
+
+
+def make_format(color: str, bold=False, italic=False) -> QTextCharFormat:
+    """Create a text format with the given color and font style"""
+    text_format = QTextCharFormat()
+    text_format.setForeground(QColor(color))
+    if bold:
+        text_format.setFontWeight(QFont.Weight.Bold)
+    text_format.setFontItalic(italic)
+    return text_format
+
+
+class SourceHighlighter(QSyntaxHighlighter):
+    """Lightweight syntax highlighter for C-like source files displayed in the "code" context.
+    The highlighting is done once when the document is created and stays cached in the document afterwards"""
+    KEYWORDS = ["auto", "break", "case", "char", "const", "continue", "default", "do", "double", "else", "enum",
+                "extern", "float", "for", "goto", "if", "inline", "int", "long", "register", "restrict", "return",
+                "short", "signed", "sizeof", "static", "struct", "switch", "typedef", "union", "unsigned", "void",
+                "volatile", "while", "bool", "true", "false", "NULL", "nullptr", "class", "namespace", "template",
+                "typename", "public", "private", "protected", "virtual", "new", "delete", "this", "using", "size_t",
+                "uint8_t", "uint16_t", "uint32_t", "uint64_t", "int8_t", "int16_t", "int32_t", "int64_t"]
+    # Block states used to track multi-line comments
+    NO_COMMENT = 0
+    IN_COMMENT = 1
+
+    def __init__(self, document: QTextDocument, line_number_width: int):
+        super().__init__(document)
+        # Every line is prefixed with its line number, which should not be highlighted as source code
+        self.line_number_width = line_number_width
+        self.line_number_format = make_format(PwndbgGuiConstants.LIGHT_GRAY)
+        self.comment_format = make_format("#7F848E", italic=True)
+        self.comment_start = re.compile(r"/\*")
+        self.comment_end = re.compile(r"\*/")
+        self.rules: List[Tuple[re.Pattern, QTextCharFormat]] = [
+            (re.compile(r"\b(" + "|".join(self.KEYWORDS) + r")\b"), make_format(PwndbgGuiConstants.PURPLE, bold=True)),
+            (re.compile(r"\b(0[xX][0-9a-fA-F]+|\d+)[uUlL]*\b"), make_format(PwndbgGuiConstants.YELLOW)),
+            (re.compile(r"\b[A-Za-z_]\w*(?=\s*\()"), make_format(PwndbgGuiConstants.LIGHT_BLUE)),
+            (re.compile(r"^\s*#\s*\w+"), make_format(PwndbgGuiConstants.CYAN)),
+            (re.compile(r"\"(\\.|[^\"\\])*\"|'(\\.|[^'\\])*'"), make_format(PwndbgGuiConstants.GREEN)),
+            (re.compile(r"//.*$"), self.comment_format),
+        ]
+
+    def highlightBlock(self, text: str):
+        """Called by Qt for every line (block) of the document that needs to be highlighted"""
+        self.setFormat(0, min(len(text), self.line_number_width), self.line_number_format)
+        source = text[self.line_number_width:]
+        offset = self.line_number_width
+        for pattern, text_format in self.rules:
+            for match in pattern.finditer(source):
+                self.setFormat(offset + match.start(), match.end() - match.start(), text_format)
+        self.highlight_multiline_comments(source, offset)
+
+    def highlight_multiline_comments(self, source: str, offset: int):
+        """
+        Highlight /* */ comments, which can span over multiple blocks
+        :param source: The source code of the current line without the line number prefix
+        :param offset: The position of the source code in the block
+        """
+        self.setCurrentBlockState(self.NO_COMMENT)
+        start = 0
+        if self.previousBlockState() != self.IN_COMMENT:
+            match = self.comment_start.search(source)
+            start = match.start() if match else -1
+        while start >= 0:
+            end_match = self.comment_end.search(source, start)
+            if end_match is None:
+                self.setCurrentBlockState(self.IN_COMMENT)
+                length = len(source) - start
+            else:
+                length = end_match.end() - start
+            self.setFormat(offset + start, length, self.comment_format)
+            match = self.comment_start.search(source, start + length)
+            start = match.start() if match else -1
@@ -0,0 +1,100 @@
+import bisect
+import logging
+import re
+from typing import List, Any
+
+from PySide6.QtCore import QObject, Signal, Slot
+
+from gui.elf_file import ElfFile, STT_FUNC
+from gui.index_cache import load_index, store_index
+
+logger = logging.getLogger(__file__)
+
+# Version of the on-disk index format, bump it whenever the stored symbol entries change
+INDEX_VERSION = 1
+
+
+class SymbolIndex:
+    """Fuzzy searchable symbol names. All lowercased names are joined into one newline separated string, so that a
+    query is a single regex scan in C instead of a Python loop over (tens of) thousands of names"""
+    def __init__(self):
+        self.names: List[str] = []
+        self.text = ""
+        # The offset of every name in self.text, to map a match back to its name
+        self.line_starts: List[int] = []
+        self.alphabetical: List[int] | None = None
+
+    def add(self, names: List[str]):
+        """Append names to the index, their indices continue the ones of the names added before"""
+        offset = len(self.text) + 1 if self.names else 0
+        for name in names:
+            name = name.lower()
+            self.names.append(name)
+            self.line_starts.append(offset)
+            offset += len(name) + 1
+        self.text = "\n".join(self.names)
+        self.alphabetical = None
+
+    def search(self, query: str) -> List[int]:
+        """
+        Find the names containing the characters of the query in order (e.g. "mlc" finds "malloc")
+        :param query: The query, case is ignored
+        :return: The indices of the matching names, best matches first: exact, prefix, substring, then any other
+        match, each group ordered by name length
+        """
+        query = query.strip().lower()
+        if len(query) == 0:
+            if self.alphabetical is None:
+                self.alphabetical = sorted(range(len(self.names)), key=self.names.__getitem__)
+            return self.alphabetical
+        # Every gap only skips characters that are not the next query character, so the leftmost occurrence of the
+        # subsequence is found without any backtracking
+        pattern = re.compile(re.escape(query[0]) + "".join(f"[^\\n{re.escape(char)}]*{re.escape(char)}"
+                                                           for char in query[1:]))
+        matched = {bisect.bisect_right(self.line_starts, match.start()) - 1 for match in pattern.finditer(self.text)}
+        matches = []
+        for index in matched:
+            name = self.names[index]
+            if name == query:
+                rank = 0
+            elif name.startswith(query):
+                rank = 1
+            elif query in name:
+                rank = 2
+            else:
+                rank = 3
+            matches.append((rank, len(name), index))
+        matches.sort()
+        return [index for _, _, index in matches]
+
+
+class SymbolIndexer(QObject):
+    """Worker that parses the symbol tables of the target and its libraries without involving GDB. The parsed symbols
+    are cached on disk by build-id, so that e.g. libc is only parsed once"""
+    # Send the symbols of a file in the form of {path, link_base, symbols: [[name, offset, size, kind], ...]}
+    send_index = Signal(dict)
+
+    @Slot(str)
+    def index_file(self, path: str):
+        """
+        Get the symbols of a file, from the disk cache or by parsing its symbol tables
+        :param path: The path of an ELF file
+        """
+        try:
+            elf = ElfFile(path)
+        except (OSError, ValueError, IndexError) as e:
+            logger.warning("Cannot index symbols of %s: %s", path, e)
+            return
+        symbols: List[List[Any]] | None = load_index("symbols", elf.build_id, INDEX_VERSION)
+        if symbols is None:
+            try:
+                symbols = [[symbol.name, symbol.value - elf.link_base, symbol.size,
+                            "function" if symbol.kind == STT_FUNC else "object"] for symbol in elf.symbols()]
+            except (ValueError, IndexError) as e:
+                logger.warning("Malformed symbol table in %s: %s", path, e)
+                return
+            try:
+                store_index("symbols", elf.build_id, INDEX_VERSION, path, symbols)
+            except OSError as e:
+                logger.warning("Could not cache symbols of %s: %s", path, e)
+        self.send_index.emit(dict(path=path, link_base=elf.link_base, symbols=symbols))
@@ -0,0 +1,119 @@
+import string
+from typing import List, Dict, Tuple
+
+from gui.process_memory import ProcessMemory
+
+# Maximum number of dereferences per chain, same as pwndbg's default telescope depth
+MAX_DEPTH = 5
+# Number of bytes that are read to check whether a pointer points to a string
+MAX_STRING_LENGTH = 32
+MIN_STRING_LENGTH = 4
+PRINTABLE = set(string.printable.encode()) - set(b"\t\n\r\x0b\x0c")
+
+
+class Link:
+    """A single value of a pointer chain"""
+    def __init__(self, value: int, kind: str | None, label: str = ""):
+        self.value = value
+        # The kind of the mapping the value points into (e.g. "stack", "code") or None if it is not a pointer
+        self.kind = kind
+        # Additional information, e.g. "libc.so.6+0x29d90" for code pointers
+        self.label = label
+
+
+class StackSlot:
+    """A stack slot with the pointer chain starting at its value"""
+    def __init__(self, address: int, links: List[Link], string_value: str | None, cyclic: bool):
+        self.address = address
+        self.links = links
+        # The string the last link of the chain points to, if any
+        self.string_value = string_value
+        # Whether the chain ends because it loops
+        self.cyclic = cyclic
+
+
+class Telescope:
+    """Resolves pointer chains of stack slots locally from a single bulk read of the slots and the cached pages of
+    ProcessMemory. Dereferences are deduplicated, so shared chain suffixes are only resolved once per stop"""
+    def __init__(self, memory: ProcessMemory):
+        self.memory = memory
+        # Dereferenced values of the current stop in the form of {address: value}
+        self.dereferenced: Dict[int, int | None] = {}
+        # The stop of ProcessMemory the dereferenced values belong to
+        self.stop = -1
+
+    def resolve(self, address: int, count: int) -> List[StackSlot]:
+        """
+        Resolve the pointer chains of consecutive slots
+        :param address: The address of the first slot, e.g. the stack pointer
+        :param count: The number of slots
+        """
+        if self.stop != self.memory.stop:
+            # The inferior ran in the meantime
+            self.dereferenced.clear()
+            self.stop = self.memory.stop
+        pointer_size, byte_order = self.memory.get_architecture()
+        data = self.memory.read(address, count * pointer_size)
+        if data is None:
+            return []
+        slots = []
+        for index in range(count):
+            slot_address = address + index * pointer_size
+            value = int.from_bytes(data[index * pointer_size:(index + 1) * pointer_size], byte_order)
+            self.dereferenced[slot_address] = value
+            slots.append(StackSlot(slot_address, *self.chain(value, pointer_size, byte_order)))
+        return slots
+
+    def chain(self, value: int, pointer_size: int, byte_order: str) -> Tuple[List[Link], str | None, bool]:
+        """
+        Follow a value as long as it points into a readable mapping
+        :return: The links of the chain, the string the chain ends in (if any) and whether the chain loops
+        """
+        links = []
+        seen = set()
+        while True:
+            mapping = self.memory.find_mapping(value)
+            links.append(self.classify(value, mapping))
+            if mapping is None or "r" not in mapping.permissions or len(links) > MAX_DEPTH:
+                return links, None, False
+            if value in seen:
+                return links, None, True
+            seen.add(value)
+            # Code pointers point to instructions, following them would only show instruction bytes
+            if mapping.kind == "code":
+                return links, None, False
+            string_value = self.string_at(value, mapping.end)
+            if string_value is not None:
+                return links, string_value, False
+            value = self.dereference(value, pointer_size, byte_order)
+            if value is None:
+                return links, None, False
+
+    def dereference(self, address: int, pointer_size: int, byte_order: str) -> int | None:
+        """Read a pointer from the inferior, every address is only dereferenced once per stop"""
+        if address not in self.dereferenced:
+            data = self.memory.read(address, pointer_size)
+            self.dereferenced[address] = None if data is None else int.from_bytes(data, byte_order)
+        return self.dereferenced[address]
+
+    @staticmethod
+    def classify(value: int, mapping) -> Link:
+        """Classify a value by the mapping it points into"""
+        if mapping is None:
+            return Link(value, None)
+        label = ""
+        if mapping.kind == "code" and mapping.path:
+            label = f"{mapping.path.rsplit('/', 1)[-1]}+{hex(value - mapping.start + mapping.offset)}"
+        return Link(value, mapping.kind, label)
+
+    def string_at(self, address: int, mapping_end: int) -> str | None:
+        """Get the printable, NUL terminated string at an address, if there is one"""
+        data = self.memory.read(address, min(MAX_STRING_LENGTH, mapping_end - address))
+        if data is None:
+            return None
+        length = 0
+        while length < len(data) and data[length] in PRINTABLE:
+            length += 1
+        if length < MIN_STRING_LENGTH or (length < len(data) and data[length] != 0):
+            return None
+        return data[:length].decode() + ("..." if length == len(data) else "")
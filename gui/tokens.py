@@ -10,18 +10,39 @@ class ResponseToken(IntEnum):
     USER_MAIN = 1
     # Command originated by us, add to main output widget
     GUI_MAIN_CONTEXT = 2
-    GUI_DISASM_CONTEXT = 3
-    GUI_CODE_CONTEXT = 4
+    # Frame information containing the current pc for the disassembly view
+    GUI_DISASM_FRAME = 3
+    # Location of the current source file and line, used to move the marker in the cached source view
+    GUI_CODE_SOURCE = 4
     GUI_REGS_CONTEXT = 5
     GUI_STACK_CONTEXT = 6
-    GUI_BACKTRACE_CONTEXT = 7
+    # Capped depth of the stack, used to decide whether the backtrace can load more frames
+    GUI_BACKTRACE_DEPTH = 7
     GUI_HEAP_HEAP = 8
-    GUI_HEAP_BINS = 9
     GUI_HEAP_TRY_MALLOC = 10
     GUI_HEAP_TRY_FREE = 11
     GUI_REGS_FS_BASE = 12
     GUI_PWNDBG_ABOUT = 13
     GUI_XINFO = 14
+    GUI_DISASM_FUNCTION = 15
+    GUI_BREAKPOINT_INSERT = 16
+    GUI_BACKTRACE_FRAMES = 17
+    GUI_BACKTRACE_ARGS = 18
+    GUI_SEARCH = 19
+    GUI_SNAPSHOT = 20
+    GUI_MEMORY_DIFF = 21
+    # Stack and frame pointer, the stack is resolved locally starting at the stack pointer
+    GUI_STACK_POINTER = 22
+    GUI_FRAME_POINTER = 23
+    GUI_TRACE = 24
+    GUI_THREAD_INFO = 25
+    GUI_THREAD_SELECT = 26
+    # pwndbg's context sections that are redirected to a pty of the GUI, their result only marks the end of the output
+    GUI_REGS_CONTEXT_OUTPUT = 27
+    GUI_STACK_CONTEXT_OUTPUT = 28
+    # All breakpoints, only listed to resync the breakpoints pane when another session is brought to the front
+    GUI_BREAKPOINT_LIST = 29
+    GUI_LOGPOINT = 30
     GUI_WATCHES_HEXDUMP = 1000
 
     def __str__(self):
@@ -31,11 +52,45 @@ class ResponseToken(IntEnum):
 Token_to_Context = {
     ResponseToken.USER_MAIN: "main",
     ResponseToken.GUI_MAIN_CONTEXT: "main",
-    ResponseToken.GUI_DISASM_CONTEXT: "disasm",
-    ResponseToken.GUI_CODE_CONTEXT: "code",
     ResponseToken.GUI_REGS_CONTEXT: "regs",
-    ResponseToken.GUI_BACKTRACE_CONTEXT: "backtrace",
     ResponseToken.GUI_STACK_CONTEXT: "stack",
 }
 
 Context_to_Token = dict(map(reversed, Token_to_Context.items()))
+
+Output_Token_to_Context = {
+    ResponseToken.GUI_REGS_CONTEXT_OUTPUT: "regs",
+    ResponseToken.GUI_STACK_CONTEXT_OUTPUT: "stack",
+}
+
+Context_to_Output_Token = dict(map(reversed, Output_Token_to_Context.items()))
+
+# Results whose console output is sent to a widget, in the form of {token: (signal of the reader, whether the output is
+# only sent while the inferior is stopped)}
+Token_to_Console_Signal = {
+    ResponseToken.GUI_HEAP_TRY_FREE: ("send_heap_try_free_response", True),
+    ResponseToken.GUI_HEAP_HEAP: ("send_heap_heap_response", True),
+    ResponseToken.GUI_MEMORY_DIFF: ("send_memory_diff", True),
+    ResponseToken.GUI_REGS_FS_BASE: ("send_fs_base_response", True),
+    ResponseToken.GUI_PWNDBG_ABOUT: ("send_pwndbg_about", False),
+    ResponseToken.GUI_XINFO: ("send_xinfo", True),
+}
+
+# Results whose MI payload is sent to a widget, in the same form
+Token_to_Payload_Signal = {
+    ResponseToken.GUI_STACK_POINTER: ("send_stack_pointer", True),
+    ResponseToken.GUI_FRAME_POINTER: ("send_frame_pointer", True),
+    ResponseToken.GUI_CODE_SOURCE: ("send_source_file", True),
+    ResponseToken.GUI_DISASM_FRAME: ("send_frame_info", True),
+    ResponseToken.GUI_DISASM_FUNCTION: ("send_disassembly", True),
+    ResponseToken.GUI_BREAKPOINT_INSERT: ("send_breakpoint_changed", False),
+    ResponseToken.GUI_LOGPOINT: ("send_logpoint_result", False),
+    ResponseToken.GUI_BREAKPOINT_LIST: ("send_breakpoint_list", False),
+    ResponseToken.GUI_BACKTRACE_DEPTH: ("send_backtrace_depth", True),
+    ResponseToken.GUI_BACKTRACE_FRAMES: ("send_backtrace_frames", True),
+    ResponseToken.GUI_BACKTRACE_ARGS: ("send_backtrace_args", True),
+    ResponseToken.GUI_SEARCH: ("send_search_finished", False),
+    ResponseToken.GUI_SNAPSHOT: ("send_snapshot_finished", False),
+    ResponseToken.GUI_THREAD_INFO: ("send_thread_info", False),
+    ResponseToken.GUI_TRACE: ("send_trace_finished", False),
+}
@@ -0,0 +1,58 @@
+import base64
+import bisect
+from array import array
+from typing import List, Tuple
+
+
+class TraceBuffer:
+    """Array-backed instruction trace as streamed by the gui-trace command. Steps are not stored as Python objects, so
+    a trace of millions of instructions only costs a few bytes per step"""
+    def __init__(self, register_names: List[str] | None = None):
+        self.register_names = register_names or []
+        self.pcs = array("Q")
+        # Register values of all steps, len(register_names) values per step
+        self.register_values = array("Q")
+        # Memory writes as separate columns, sorted by step
+        self.write_steps = array("Q")
+        self.write_addresses = array("Q")
+        self.write_sizes = array("Q")
+        self.write_values = array("Q")
+
+    def __len__(self) -> int:
+        return len(self.pcs)
+
+    def append_chunk(self, record: dict):
+        """
+        Append a chunk streamed by gui-trace
+        :param record: The chunk with the number of steps ("count") and the base64 encoded "pcs", "registers" and
+        "writes" arrays
+        """
+        self.pcs.frombytes(base64.b64decode(record["pcs"]))
+        self.register_values.frombytes(base64.b64decode(record["registers"]))
+        writes = array("Q", base64.b64decode(record["writes"]))
+        # The writes are streamed as flat (step, address, size, value) tuples
+        self.write_steps.extend(writes[0::4])
+        self.write_addresses.extend(writes[1::4])
+        self.write_sizes.extend(writes[2::4])
+        self.write_values.extend(writes[3::4])
+
+    def registers_at(self, step: int) -> List[int]:
+        width = len(self.register_names)
+        return self.register_values[step * width:(step + 1) * width].tolist()
+
+    def writes_at(self, step: int) -> List[Tuple[int, int, int]]:
+        """
+        Get the memory writes of a step
+        :return: The writes in the form of (address, size, value)
+        """
+        first = bisect.bisect_left(self.write_steps, step)
+        last = bisect.bisect_right(self.write_steps, step, first)
+        return [(self.write_addresses[index], self.write_sizes[index], self.write_values[index])
+                for index in range(first, last)]
+
+    def find_pc(self, address: int, start: int = 0) -> int:
+        """The first step at or after start that executed the given address, or -1"""
+        try:
+            return self.pcs.index(address, start)
+        except ValueError:
+            return -1
@@ -0,0 +1,216 @@
+import threading
+import time
+from typing import Callable, Sequence
+
+# Passed to the receive functions to use the tube's default timeout
+DEFAULT_TIMEOUT = object()
+
+
+class ScriptStopped(BaseException):
+    """Raised in a script waiting for output when the user stops it. Not an Exception, so that a bare "except
+    Exception" in the script does not swallow it"""
+
+
+class Interactive(BaseException):
+    """Raised by Tube.interactive() to end the script and hand the inferior back to the main input"""
+
+
+class Tube:
+    """A pwntools-like tube over the output and input of the inferior. Output is fed in by the thread reading the
+    inferior's pty, while a script blocks in its own thread until the output it waits for arrived.
+
+    The received output is kept in a single bytearray that is consumed from the front, so neither receiving nor
+    consuming concatenates bytes objects. Searches for a delimiter continue where the previous search stopped instead
+    of rescanning the whole buffer whenever a new chunk arrives"""
+    def __init__(self, write: Callable[[bytes], None], timeout: float | None = None):
+        """
+        :param write: Writes input to the inferior, must be safe to call from the script's thread
+        :param timeout: The default timeout of the receive functions in seconds, None waits forever
+        """
+        self.write = write
+        self.timeout = timeout
+        self.buffer = bytearray()
+        self.condition = threading.Condition()
+        self.closed = False
+        self.stopped = False
+
+    def feed(self, data: bytes):
+        """
+        Append output of the inferior, called from the thread reading the inferior's pty
+        :param data: The received bytes
+        """
+        with self.condition:
+            self.buffer += data
+            self.condition.notify_all()
+
+    def trim(self, size: int):
+        """Only keep the latest bytes of unconsumed output, used while no script consumes it"""
+        with self.condition:
+            if len(self.buffer) > size:
+                del self.buffer[:len(self.buffer) - size]
+
+    def close(self):
+        """The inferior exited, scripts waiting for more output get an EOFError"""
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+    def stop(self):
+        """Make a waiting script raise ScriptStopped, safe to call from any thread"""
+        with self.condition:
+            self.stopped = True
+            self.condition.notify_all()
+
+    def open(self):
+        """A new inferior was started, its output can be received again"""
+        with self.condition:
+            self.closed = False
+
+    def reset(self):
+        """Drop all buffered output, e.g. of another inferior"""
+        with self.condition:
+            self.buffer.clear()
+            self.closed = False
+
+    def start(self):
+        """Forget that a previous script was stopped before starting the next one"""
+        with self.condition:
+            self.stopped = False
+
+    @staticmethod
+    def to_bytes(data: bytes | bytearray | str | int) -> bytes:
+        if isinstance(data, str):
+            return data.encode()
+        if isinstance(data, int):
+            return str(data).encode()
+        return bytes(data)
+
+    def deadline(self, timeout) -> float | None:
+        timeout = self.timeout if timeout is DEFAULT_TIMEOUT else timeout
+        return None if timeout is None else time.monotonic() + timeout
+
+    def wait(self, deadline: float | None) -> bool:
+        """
+        Wait for more output, the condition needs to be held
+        :return: False if the deadline passed
+        """
+        if self.stopped:
+            raise ScriptStopped()
+        if self.closed:
+            raise EOFError("The inferior closed its output")
+        remaining = None if deadline is None else deadline - time.monotonic()
+        if remaining is not None and remaining <= 0:
+            return False
+        self.condition.wait(remaining)
+        if self.stopped:
+            raise ScriptStopped()
+        return True
+
+    def consume(self, size: int) -> bytes:
+        data = bytes(self.buffer[:size])
+        del self.buffer[:size]
+        return data
+
+    def send(self, data: bytes | str):
+        """
+        Write bytes to the inferior
+        :param data: The bytes, strings are encoded as UTF-8
+        """
+        self.write(self.to_bytes(data))
+
+    def sendline(self, data: bytes | str = b""):
+        self.send(self.to_bytes(data) + b"\n")
+
+    def recv(self, numb: int = 4096, timeout=DEFAULT_TIMEOUT) -> bytes:
+        """
+        Receive up to numb bytes as soon as any output is available
+        :return: The received bytes, or b"" if nothing arrived before the timeout
+        """
+        deadline = self.deadline(timeout)
+        with self.condition:
+            while not self.buffer:
+                if not self.wait(deadline):
+                    return b""
+            return self.consume(numb)
+
+    def recvn(self, numb: int, timeout=DEFAULT_TIMEOUT) -> bytes:
+        """
+        Receive exactly numb bytes
+        :return: The received bytes, or b"" if not enough arrived before the timeout, which consumes nothing
+        """
+        deadline = self.deadline(timeout)
+        with self.condition:
+            while len(self.buffer) < numb:
+                if not self.wait(deadline):
+                    return b""
+            return self.consume(numb)
+
+    def recvuntil(self, delims: bytes | str | Sequence[bytes | str], drop: bool = False,
+                  timeout=DEFAULT_TIMEOUT) -> bytes:
+        """
+        Receive until one of the delimiters appears
+        :param delims: A delimiter or a list of delimiters, the earliest match wins
+        :param drop: Whether to drop the delimiter from the returned bytes
+        :return: The received bytes, or b"" if no delimiter arrived before the timeout, which consumes nothing
+        """
+        if isinstance(delims, (bytes, bytearray, str)):
+            delims = [delims]
+        delims = [self.to_bytes(delim) for delim in delims]
+        longest = max(len(delim) for delim in delims)
+        deadline = self.deadline(timeout)
+        start = 0
+        with self.condition:
+            while True:
+                match = self.find(delims, start)
+                if match is not None:
+                    break
+                # A match can only end in output that has not arrived yet, so the next search starts at the last
+                # position that can still begin a delimiter
+                start = max(0, len(self.buffer) - longest + 1)
+                if not self.wait(deadline):
+                    return b""
+            index, delim = match
+            data = self.consume(index + len(delim))
+            return data[:index] if drop else data
+
+    def find(self, delims: Sequence[bytes], start: int) -> tuple | None:
+        """The earliest (index, delimiter) in the buffer at or after start, the longer delimiter wins a tie"""
+        match = None
+        for delim in delims:
+            index = self.buffer.find(delim, start)
+            if index >= 0 and (match is None or index < match[0] or (index == match[0] and len(delim) > len(match[1]))):
+                match = (index, delim)
+        return match
+
+    def recvline(self, keepends: bool = True, timeout=DEFAULT_TIMEOUT) -> bytes:
+        return self.recvuntil(b"\n", drop=not keepends, timeout=timeout)
+
+    def recvall(self, timeout=DEFAULT_TIMEOUT) -> bytes:
+        """Receive until the inferior closes its output or the timeout passed"""
+        deadline = self.deadline(timeout)
+        with self.condition:
+            try:
+                while self.wait(deadline):
+                    pass
+            except EOFError:
+                pass
+            return self.consume(len(self.buffer))
+
+    def clean(self) -> bytes:
+        """Consume and return all output received so far without waiting"""
+        with self.condition:
+            return self.consume(len(self.buffer))
+
+    def sendafter(self, delims, data: bytes | str, timeout=DEFAULT_TIMEOUT) -> bytes:
+        received = self.recvuntil(delims, timeout=timeout)
+        self.send(data)
+        return received
+
+    def sendlineafter(self, delims, data: bytes | str, timeout=DEFAULT_TIMEOUT) -> bytes:
+        received = self.recvuntil(delims, timeout=timeout)
+        self.sendline(data)
+        return received
+
+    def interactive(self):
+        """End the script and continue in the main input, the output keeps being shown in the main pane"""
+        raise Interactive()